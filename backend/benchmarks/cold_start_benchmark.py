@@ -0,0 +1,103 @@
+"""Import-time (cold start) benchmark for each Lambda handler module.
+
+Usage:
+    python backend/benchmarks/cold_start_benchmark.py [--runs 30] [--with-clients] [handler ...]
+
+Every sample imports one handler in a fresh interpreter, as a Lambda init
+would, and reports p50/p99 in milliseconds. --with-clients also builds the
+module's AWS clients, which is what a first invocation pays for. Runs offline
+with placeholder credentials.
+"""
+
+import argparse
+import glob
+import os
+import statistics
+import subprocess
+import sys
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+HANDLERS_DIR = os.path.join(SRC_DIR, "handlers")
+SHARED_MODULES = {
+    "albums_common",
+    "bulk_common",
+    "derivation_queue",
+    "exif_reader",
+    "object_refs",
+    "photo_fields",
+    "photo_index",
+    "presign",
+    "renditions",
+    "runtime",
+    "thumbnailing",
+    "upload_common",
+    "versions",
+}
+
+BENCH_ENV = {
+    "AWS_ACCESS_KEY_ID": "AKIDBENCHMARK",
+    "AWS_SECRET_ACCESS_KEY": "benchmark-secret",
+    "AWS_DEFAULT_REGION": "us-east-1",
+    "PHOTOS_TABLE": "photos-benchmark",
+    "PHOTO_BUCKET": "photos-benchmark",
+    "ALBUMS_TABLE": "albums-benchmark",
+    "PHOTO_INDEX_TABLE": "photo-index-benchmark",
+    "OBJECT_REFS_TABLE": "object-refs-benchmark",
+    "USERS_TABLE": "users-benchmark",
+}
+
+PROBE = """
+import importlib, sys, time
+sys.path.insert(0, {src!r})
+started = time.perf_counter()
+module = importlib.import_module("handlers." + {name!r})
+if {with_clients!r}:
+    for attribute in ("dynamodb", "s3"):
+        client = getattr(module, attribute, None)
+        if client is not None:
+            client.meta
+print((time.perf_counter() - started) * 1000)
+"""
+
+
+def _handler_names():
+    names = []
+    for path in sorted(glob.glob(os.path.join(HANDLERS_DIR, "*.py"))):
+        name = os.path.splitext(os.path.basename(path))[0]
+        if name != "__init__" and name not in SHARED_MODULES:
+            names.append(name)
+    return names
+
+
+def _sample(name, with_clients):
+    env = {**os.environ, **BENCH_ENV}
+    code = PROBE.format(src=SRC_DIR, name=name, with_clients=with_clients)
+    output = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True)
+    return float(output.stdout.strip().splitlines()[-1])
+
+
+def _percentile(samples, fraction):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("handlers", nargs="*", help="handler module names (default: all)")
+    parser.add_argument("--runs", type=int, default=30)
+    parser.add_argument("--with-clients", action="store_true", help="also construct the module's AWS clients")
+    args = parser.parse_args()
+
+    names = args.handlers or _handler_names()
+    print(f"{'handler':<24}{'p50 ms':>10}{'p99 ms':>10}{'mean ms':>10}")
+    for name in names:
+        samples = [_sample(name, args.with_clients) for _ in range(args.runs)]
+        print(
+            f"{name:<24}{_percentile(samples, 0.5):>10.1f}{_percentile(samples, 0.99):>10.1f}"
+            f"{statistics.mean(samples):>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
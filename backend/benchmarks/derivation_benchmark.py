@@ -0,0 +1,149 @@
+"""Latency and peak memory of photo derivation: separate EXIF and thumbnail passes vs derive_image.
+
+Usage:
+    python backend/benchmarks/derivation_benchmark.py [--megapixels 24] [--rounds 5] [--fetch-mb-per-s 90]
+
+Needs Pillow. Builds a synthetic JPEG with an EXIF capture date, then runs each
+strategy in its own process so peak RSS is not shared between them:
+
+    two-pass     fetch + open for the date label, fetch + open for the thumbnail
+                 (upload-complete before the derive worker)
+    single-pass  one fetch, one open, derive_image()
+
+The S3 GET is simulated by copying the object bytes and sleeping for the time
+the transfer takes at --fetch-mb-per-s. Peak RSS needs the resource module
+(Linux and macOS); it is reported relative to the process after imports and
+after the source object is in memory.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from handlers.renditions import THUMBNAIL_MAX_SIZE  # noqa: E402
+from handlers.upload_common import create_thumbnail_bytes, derive_image, extract_date_label_from_image  # noqa: E402
+
+STRATEGIES = ("two-pass", "single-pass")
+EXIF_DATE_TIME_ORIGINAL = 0x9003
+EXIF_IFD_POINTER = 0x8769
+
+
+def _peak_rss_kb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes on Linux
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def _build_source(path, megapixels):
+    from PIL import Image
+
+    width = int((megapixels * 1_000_000 * 4 / 3) ** 0.5)
+    height = int(width * 3 / 4)
+    # Noise keeps the JPEG close to camera-original size instead of compressing to nothing
+    channels = [Image.effect_noise((width, height), 64) for _ in range(3)]
+    image = Image.merge("RGB", channels)
+    exif = Image.Exif()
+    exif.get_ifd(EXIF_IFD_POINTER)[EXIF_DATE_TIME_ORIGINAL] = "2024:04:12 10:30:00"
+    image.save(path, format="JPEG", quality=92, exif=exif)
+
+
+def _run_child(strategy, source_path, rounds, fetch_mb_per_s):
+    with open(source_path, "rb") as source_file:
+        stored_object = source_file.read()
+    transfer_seconds = len(stored_object) / (fetch_mb_per_s * 1_000_000)
+
+    def fetch():
+        # body.read() hands back a fresh bytes object per GET
+        time.sleep(transfer_seconds)
+        return bytes(bytearray(stored_object))
+
+    def two_pass():
+        date_label = extract_date_label_from_image(fetch())
+        thumbnail_bytes = create_thumbnail_bytes(fetch())
+        return date_label, thumbnail_bytes
+
+    def single_pass():
+        date_label, renditions = derive_image(fetch())
+        return date_label, renditions.get(THUMBNAIL_MAX_SIZE)
+
+    run = two_pass if strategy == "two-pass" else single_pass
+    baseline_kb = _peak_rss_kb()
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        date_label, thumbnail_bytes = run()
+        timings.append(time.perf_counter() - started)
+    peak_kb = _peak_rss_kb()
+
+    print(json.dumps({
+        "dateLabel": date_label,
+        "thumbnailBytes": len(thumbnail_bytes or b""),
+        "medianMs": statistics.median(timings) * 1000,
+        "peakDeltaMb": None if peak_kb is None else (peak_kb - baseline_kb) / 1024,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--megapixels", type=float, default=24)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--fetch-mb-per-s", type=float, default=90)
+    parser.add_argument("--child", choices=STRATEGIES, help=argparse.SUPPRESS)
+    parser.add_argument("--source", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _run_child(args.child, args.source, args.rounds, args.fetch_mb_per_s)
+        return
+
+    try:
+        import PIL  # noqa: F401
+    except ImportError:
+        sys.exit("derivation_benchmark needs Pillow: pip install Pillow")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source_path = os.path.join(temp_dir, "source.jpg")
+        _build_source(source_path, args.megapixels)
+        source_mb = os.path.getsize(source_path) / 1_000_000
+        print(
+            f"source={source_mb:.1f} MB ({args.megapixels:g} MP JPEG) rounds={args.rounds} "
+            f"fetch={args.fetch_mb_per_s:g} MB/s"
+        )
+
+        results = {}
+        for strategy in STRATEGIES:
+            completed = subprocess.run(
+                [
+                    sys.executable, __file__,
+                    "--child", strategy,
+                    "--source", source_path,
+                    "--rounds", str(args.rounds),
+                    "--fetch-mb-per-s", str(args.fetch_mb_per_s),
+                ],
+                capture_output=True, text=True, check=True,
+            )
+            results[strategy] = json.loads(completed.stdout.strip().splitlines()[-1])
+
+    baseline = results["two-pass"]
+    for strategy in STRATEGIES:
+        result = results[strategy]
+        peak = "n/a" if result["peakDeltaMb"] is None else f"{result['peakDeltaMb']:7.1f} MB"
+        print(
+            f"{strategy:<12} {result['medianMs']:8.1f} ms median  ({baseline['medianMs'] / result['medianMs']:.2f}x)  "
+            f"peak +{peak}  label={result['dateLabel']} thumbnail={result['thumbnailBytes']} B"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Per-URL cost of presigning thumbnail GET URLs: botocore per call vs the batch presigner.
+
+Usage:
+    python backend/benchmarks/presign_benchmark.py [--batch-size 100] [--rounds 50] [--region us-east-1]
+
+Runs offline with placeholder credentials; no request is sent to S3.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "AKIDBENCHMARK")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "benchmark-secret")
+os.environ.setdefault("AWS_SESSION_TOKEN", "benchmark-token")
+
+import boto3  # noqa: E402
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from handlers.presign import presign_get_urls  # noqa: E402
+
+BUCKET = "millerpic-photos-benchmark"
+
+
+def _time_per_url(fn, keys, rounds):
+    fn(keys)  # warm up: endpoint resolution, credential loading, model caches
+    started = time.perf_counter()
+    for _ in range(rounds):
+        fn(keys)
+    elapsed = time.perf_counter() - started
+    return elapsed / (rounds * len(keys)) * 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--region", default="us-east-1")
+    args = parser.parse_args()
+
+    s3 = boto3.client("s3", region_name=args.region)
+    keys = [f"thumbnails/user-benchmark/photo-{i:04d}.webp" for i in range(args.batch_size)]
+
+    def botocore_loop(batch):
+        for key in batch:
+            s3.generate_presigned_url("get_object", Params={"Bucket": BUCKET, "Key": key}, ExpiresIn=3600)
+
+    def batch_presigner(batch):
+        presign_get_urls(s3, BUCKET, batch, expires_in=3600)
+
+    baseline = _time_per_url(botocore_loop, keys, args.rounds)
+    batched = _time_per_url(batch_presigner, keys, args.rounds)
+
+    print(f"region={args.region} batch_size={args.batch_size} rounds={args.rounds}")
+    print(f"botocore generate_presigned_url: {baseline:8.1f} us/url")
+    print(f"presign_get_urls:                {batched:8.1f} us/url  ({baseline / batched:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
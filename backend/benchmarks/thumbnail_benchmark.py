@@ -0,0 +1,175 @@
+"""Latency and peak memory of thumbnailing: convert-then-thumbnail vs thumbnailing.downscale().
+
+Usage:
+    python backend/benchmarks/thumbnail_benchmark.py CORPUS_DIR [--size 320] [--rounds 3]
+    python backend/benchmarks/thumbnail_benchmark.py --synthetic [--megapixels 24]
+
+Needs Pillow. CORPUS_DIR is a folder of real camera files (JPEG, PNG, WebP,
+TIFF and anything else Pillow opens); --synthetic builds one noise-filled
+JPEG instead, which is only good for a smoke run. Every file and strategy runs
+in its own process so peak RSS is not shared between them:
+
+    convert-first  image.convert("RGB") then thumbnail() (the old routine)
+    downscale      draft()/reduce() first, convert the small result
+
+Peak RSS needs the resource module (Linux and macOS); it is reported relative
+to the process after imports and after the file bytes are in memory.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from io import BytesIO
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from handlers.thumbnailing import downscale  # noqa: E402
+
+STRATEGIES = ("convert-first", "downscale")
+
+
+def _peak_rss_kb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes on Linux
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def _build_synthetic(path, megapixels):
+    from PIL import Image
+
+    width = int((megapixels * 1_000_000 * 4 / 3) ** 0.5)
+    height = int(width * 3 / 4)
+    # Noise keeps the JPEG close to camera-original size instead of compressing to nothing
+    channels = [Image.effect_noise((width, height), 64) for _ in range(3)]
+    Image.merge("RGB", channels).save(path, format="JPEG", quality=92)
+
+
+def _run_child(strategy, source_path, size, rounds):
+    from PIL import Image
+
+    with open(source_path, "rb") as source_file:
+        source_bytes = source_file.read()
+
+    def convert_first(image):
+        prepared = image.convert("RGB")
+        prepared.thumbnail((size, size))
+        return prepared
+
+    shrink = convert_first if strategy == "convert-first" else lambda image: downscale(image, size)
+    baseline_kb = _peak_rss_kb()
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        with Image.open(BytesIO(source_bytes)) as image:
+            source_format = image.format
+            source_size = image.size
+            output = BytesIO()
+            shrink(image).save(output, format="WEBP", quality=80)
+        timings.append(time.perf_counter() - started)
+    peak_kb = _peak_rss_kb()
+
+    print(json.dumps({
+        "format": source_format,
+        "megapixels": source_size[0] * source_size[1] / 1_000_000,
+        "thumbnailBytes": len(output.getvalue()),
+        "medianMs": statistics.median(timings) * 1000,
+        "peakDeltaMb": None if peak_kb is None else (peak_kb - baseline_kb) / 1024,
+    }))
+
+
+def _measure(strategy, source_path, size, rounds):
+    completed = subprocess.run(
+        [
+            sys.executable, __file__,
+            "--child", strategy,
+            "--source", source_path,
+            "--size", str(size),
+            "--rounds", str(rounds),
+        ],
+        capture_output=True, text=True,
+    )
+    if completed.returncode != 0:
+        return None
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def _corpus_files(corpus_dir):
+    return sorted(
+        os.path.join(root, name)
+        for root, _, names in os.walk(corpus_dir)
+        for name in names
+        if not name.startswith(".")
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("corpus", nargs="?", help="folder of camera files")
+    parser.add_argument("--synthetic", action="store_true", help="benchmark one generated JPEG instead of a corpus")
+    parser.add_argument("--megapixels", type=float, default=24)
+    parser.add_argument("--size", type=int, default=320)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--child", choices=STRATEGIES, help=argparse.SUPPRESS)
+    parser.add_argument("--source", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _run_child(args.child, args.source, args.size, args.rounds)
+        return
+    if not args.corpus and not args.synthetic:
+        parser.error("pass CORPUS_DIR or --synthetic")
+
+    try:
+        import PIL  # noqa: F401
+    except ImportError:
+        sys.exit("thumbnail_benchmark needs Pillow: pip install Pillow")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        if args.synthetic:
+            source_path = os.path.join(temp_dir, "synthetic.jpg")
+            _build_synthetic(source_path, args.megapixels)
+            files = [source_path]
+        else:
+            files = _corpus_files(args.corpus)
+
+        totals = {strategy: {"ms": [], "peak": []} for strategy in STRATEGIES}
+        for path in files:
+            results = {strategy: _measure(strategy, path, args.size, args.rounds) for strategy in STRATEGIES}
+            if any(result is None for result in results.values()):
+                print(f"{os.path.basename(path):<32} skipped (Pillow cannot open it)")
+                continue
+            first = results[STRATEGIES[0]]
+            row = f"{os.path.basename(path):<32} {first['format'] or '?':<5} {first['megapixels']:5.1f} MP"
+            for strategy in STRATEGIES:
+                result = results[strategy]
+                totals[strategy]["ms"].append(result["medianMs"])
+                if result["peakDeltaMb"] is not None:
+                    totals[strategy]["peak"].append(result["peakDeltaMb"])
+                row += f"  {strategy} {result['medianMs']:7.1f} ms +{result['peakDeltaMb'] or 0:6.1f} MB"
+            print(row)
+
+    if not totals[STRATEGIES[0]]["ms"]:
+        sys.exit("no files could be benchmarked")
+    baseline_ms = sum(totals["convert-first"]["ms"])
+    print(f"files={len(totals['convert-first']['ms'])} size={args.size} rounds={args.rounds}")
+    for strategy in STRATEGIES:
+        timings = totals[strategy]["ms"]
+        peaks = totals[strategy]["peak"]
+        peak = f"median peak +{statistics.median(peaks):.1f} MB, max +{max(peaks):.1f} MB" if peaks else "peak n/a"
+        print(
+            f"{strategy:<14} total {sum(timings):9.1f} ms ({baseline_ms / sum(timings):.2f}x)  "
+            f"median {statistics.median(timings):7.1f} ms/file  {peak}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""Backfill records derived from photo rows written before the derived tables existed.
+
+Usage:
+    python backend/scripts/backfill_derived_records.py --photos-table millerpic-photos-dev \
+        --index-table millerpic-photo-index-dev --object-refs-table millerpic-object-refs-dev --active-index
+
+Search and label postings, object references and ActiveIndex membership are all keyed per photo,
+so re-running is safe.
+Run the object reference backfill before deploying reference-counted hard delete: an
+object without a reference record is treated as unreferenced.
+Run the ActiveIndex backfill before deploying the list/search/album handlers that read it:
+legacy rows without ActiveUserId are invisible to them. It also stamps a CreatedAt on rows
+missing one so they land on ActiveCreatedAtIndex (at the end of the newest-first list).
+Re-run the --index-table backfill once to add the label postings album listing reads.
+Pass --drop-term-prefix t: once to remove postings left over from the retired token index.
+Run the --updated-at backfill once GET /photos/changes is deployed: rows written before
+writes stamped UpdatedAt are not on UpdatedAtIndex, so the change feed never reports them.
+They are stamped with the current time, so clients already holding a cursor pick them up too.
+"""
+
+import argparse
+import os
+import sys
+
+import boto3
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from handlers.object_refs import ref_member  # noqa: E402
+from handlers.photo_index import sync_photo_postings  # noqa: E402
+from handlers.versions import updated_at_now  # noqa: E402
+
+
+LEGACY_CREATED_AT = "1970-01-01T00:00:00+00:00"
+
+
+def _scan_all(table, **scan_args):
+    while True:
+        result = table.scan(**scan_args)
+        for item in result.get("Items") or []:
+            yield item
+        last_key = result.get("LastEvaluatedKey")
+        if not last_key:
+            return
+        scan_args["ExclusiveStartKey"] = last_key
+
+
+def backfill_postings(photos_table, index_table):
+    scanned = 0
+    for item in _scan_all(photos_table):
+        sync_photo_postings(index_table, item["UserId"], item["PhotoId"], None, item)
+        scanned += 1
+    return scanned
+
+
+def backfill_object_refs(photos_table, refs_table):
+    referenced = 0
+    for item in _scan_all(photos_table, ProjectionExpression="UserId, PhotoId, ObjectKey"):
+        object_key = item.get("ObjectKey")
+        if not object_key:
+            continue
+        refs_table.update_item(
+            Key={"ObjectKey": object_key},
+            UpdateExpression="ADD #refs :ref",
+            ExpressionAttributeNames={"#refs": "Refs"},
+            ExpressionAttributeValues={":ref": {ref_member(item["UserId"], item["PhotoId"])}},
+        )
+        referenced += 1
+    return referenced
+
+
+def backfill_active_index(photos_table):
+    """Give completed, non-deleted rows the sparse ActiveUserId attribute (and a CreatedAt)."""
+    activated = 0
+    for item in _scan_all(
+        photos_table,
+        ProjectionExpression="UserId, PhotoId, #status, DeletedAt, ActiveUserId, CreatedAt",
+        ExpressionAttributeNames={"#status": "Status"},
+    ):
+        status = item.get("Status")
+        if item.get("DeletedAt") or (status and status != "ACTIVE"):
+            continue
+        if item.get("ActiveUserId") and item.get("CreatedAt"):
+            continue
+        photos_table.update_item(
+            Key={"UserId": item["UserId"], "PhotoId": item["PhotoId"]},
+            UpdateExpression="SET ActiveUserId = :userId, CreatedAt = if_not_exists(CreatedAt, :epoch)",
+            ExpressionAttributeValues={":userId": item["UserId"], ":epoch": LEGACY_CREATED_AT},
+        )
+        activated += 1
+    return activated
+
+
+def backfill_updated_at(photos_table):
+    """Stamp UpdatedAt on rows that predate it so they join UpdatedAtIndex."""
+    stamped = 0
+    for item in _scan_all(photos_table, ProjectionExpression="UserId, PhotoId, UpdatedAt"):
+        if item.get("UpdatedAt"):
+            continue
+        photos_table.update_item(
+            Key={"UserId": item["UserId"], "PhotoId": item["PhotoId"]},
+            UpdateExpression="SET UpdatedAt = if_not_exists(UpdatedAt, :now)",
+            ExpressionAttributeValues={":now": updated_at_now()},
+        )
+        stamped += 1
+    return stamped
+
+
+def drop_terms(index_table, term_prefix):
+    dropped = 0
+    with index_table.batch_writer() as batch:
+        for entry in _scan_all(index_table, ProjectionExpression="IndexKey, SortKey"):
+            term = entry["IndexKey"].split("#", 1)[-1]
+            if term.startswith(term_prefix):
+                batch.delete_item(Key={"IndexKey": entry["IndexKey"], "SortKey": entry["SortKey"]})
+                dropped += 1
+    return dropped
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--photos-table", required=True)
+    parser.add_argument("--index-table")
+    parser.add_argument("--object-refs-table")
+    parser.add_argument("--active-index", action="store_true", help="set ActiveUserId on active rows")
+    parser.add_argument("--updated-at", action="store_true", help="stamp UpdatedAt on rows missing it")
+    parser.add_argument("--drop-term-prefix", help="delete postings whose term starts with this prefix")
+    parser.add_argument("--region", default=os.environ.get("AWS_REGION", "us-east-1"))
+    args = parser.parse_args()
+
+    dynamodb = boto3.resource("dynamodb", region_name=args.region)
+    photos_table = dynamodb.Table(args.photos_table)
+
+    if args.index_table:
+        index_table = dynamodb.Table(args.index_table)
+        if args.drop_term_prefix:
+            dropped = drop_terms(index_table, args.drop_term_prefix)
+            print(f"dropped {dropped} postings with prefix {args.drop_term_prefix!r}")
+        print(f"indexed {backfill_postings(photos_table, index_table)} photo records")
+
+    if args.object_refs_table:
+        referenced = backfill_object_refs(photos_table, dynamodb.Table(args.object_refs_table))
+        print(f"recorded {referenced} object references")
+
+    if args.active_index:
+        print(f"added {backfill_active_index(photos_table)} photo records to ActiveIndex")
+
+    if args.updated_at:
+        print(f"stamped UpdatedAt on {backfill_updated_at(photos_table)} photo records")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,25 @@
-import json
 import os
 
-import boto3
-
 try:
-    from handlers.albums_common import extract_user_id, normalize_photo_subjects, utc_now_iso
+    from handlers.albums_common import PhotoChangedError, add_album_labels, extract_user_id, save_photo_labels
+    from handlers.runtime import aws_resource, error_response, json_response
+    from handlers.versions import bump_collection_version
 except ImportError:
-    from albums_common import extract_user_id, normalize_photo_subjects, utc_now_iso  # type: ignore
+    from albums_common import PhotoChangedError, add_album_labels, extract_user_id, save_photo_labels  # type: ignore
+    from runtime import aws_resource, error_response, json_response  # type: ignore
+    from versions import bump_collection_version  # type: ignore
+
 
+try:
+    from handlers.photo_index import sync_photo_postings
+except ImportError:
+    from photo_index import sync_photo_postings  # type: ignore
 
-dynamodb = boto3.resource("dynamodb")
+dynamodb = aws_resource("dynamodb")
 ALBUMS_TABLE = os.environ["ALBUMS_TABLE"]
 PHOTOS_TABLE = os.environ["PHOTOS_TABLE"]
+PHOTO_INDEX_TABLE = os.environ["PHOTO_INDEX_TABLE"]
+USERS_TABLE = os.environ["USERS_TABLE"]
 
 
 def handler(event, context):
@@ -24,50 +32,47 @@ def handler(event, context):
         album_id = (path.get("albumId") or "").strip()
         photo_id = (path.get("photoId") or "").strip()
         if not album_id or not photo_id:
-            return {"statusCode": 400, "body": json.dumps({"error": "albumId and photoId are required"})}
+            return error_response(400, "albumId and photoId are required")
 
         albums_table = dynamodb.Table(ALBUMS_TABLE)
         album = albums_table.get_item(Key={"UserId": user_id, "AlbumId": album_id}).get("Item")
         if not album:
-            return {"statusCode": 404, "body": json.dumps({"error": "album not found"})}
-
-        required_labels = [label for label in (album.get("RequiredLabels") or []) if isinstance(label, str)]
+            return error_response(404, "album not found")
 
         photos_table = dynamodb.Table(PHOTOS_TABLE)
         photo = photos_table.get_item(Key={"UserId": user_id, "PhotoId": photo_id}).get("Item")
         if not photo:
-            return {"statusCode": 404, "body": json.dumps({"error": "photo not found"})}
-
-        subjects = normalize_photo_subjects(photo.get("Subjects"))
-        subjects_lower = {item.lower() for item in subjects}
+            return error_response(404, "photo not found")
 
-        added_labels = []
-        for label in required_labels:
-            lowered = label.lower().strip()
-            if not lowered or lowered in subjects_lower:
-                continue
-            subjects.append(label)
-            subjects_lower.add(lowered)
-            added_labels.append(label)
+        try:
+            saved = save_photo_labels(
+                photos_table,
+                user_id,
+                photo,
+                lambda subjects: add_album_labels(subjects, album.get("RequiredLabels")),
+            )
+        except PhotoChangedError:
+            return error_response(409, "photo changed during update; retry")
+        if not saved:
+            return error_response(404, "photo not found")
+        photo, subjects, added_labels = saved
 
-        photos_table.update_item(
-            Key={"UserId": user_id, "PhotoId": photo_id},
-            UpdateExpression="SET #subjects = :subjects, #updatedAt = :updatedAt",
-            ExpressionAttributeNames={"#subjects": "Subjects", "#updatedAt": "UpdatedAt"},
-            ExpressionAttributeValues={":subjects": subjects, ":updatedAt": utc_now_iso()},
-        )
+        if added_labels:
+            sync_photo_postings(
+                dynamodb.Table(PHOTO_INDEX_TABLE),
+                user_id,
+                photo_id,
+                photo,
+                {**photo, "Subjects": subjects},
+            )
+            bump_collection_version(dynamodb.Table(USERS_TABLE), user_id)
 
-        return {
-            "statusCode": 200,
-            "body": json.dumps(
-                {
-                    "albumId": album_id,
-                    "photoId": photo_id,
-                    "addedLabels": added_labels,
-                    "subjects": subjects,
-                }
-            ),
-        }
+        return json_response(200, {
+            "albumId": album_id,
+            "photoId": photo_id,
+            "addedLabels": added_labels,
+            "subjects": subjects,
+        })
     except Exception as error:
         print(f"albums_apply_labels handler error: {error}")
-        return {"statusCode": 500, "body": json.dumps({"error": "internal server error"})}
+        return error_response(500, "internal server error")
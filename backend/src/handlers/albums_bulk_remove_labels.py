@@ -0,0 +1,108 @@
+import json
+import os
+
+try:
+    from handlers.albums_common import (
+        PhotoChangedError,
+        album_label_set,
+        extract_user_id,
+        parse_requested_labels,
+        remove_album_labels,
+        save_photo_labels,
+    )
+    from handlers.bulk_common import BULK_WORKERS, bulk_response, load_selection, parse_selection
+    from handlers.photo_index import sync_many_photo_postings
+    from handlers.runtime import aws_resource, error_response, run_parallel
+    from handlers.versions import bump_collection_version
+except ImportError:
+    from albums_common import (  # type: ignore
+        PhotoChangedError,
+        album_label_set,
+        extract_user_id,
+        parse_requested_labels,
+        remove_album_labels,
+        save_photo_labels,
+    )
+    from bulk_common import BULK_WORKERS, bulk_response, load_selection, parse_selection  # type: ignore
+    from photo_index import sync_many_photo_postings  # type: ignore
+    from runtime import aws_resource, error_response, run_parallel  # type: ignore
+    from versions import bump_collection_version  # type: ignore
+
+dynamodb = aws_resource("dynamodb")
+ALBUMS_TABLE = os.environ["ALBUMS_TABLE"]
+PHOTOS_TABLE = os.environ["PHOTOS_TABLE"]
+PHOTO_INDEX_TABLE = os.environ["PHOTO_INDEX_TABLE"]
+USERS_TABLE = os.environ["USERS_TABLE"]
+
+
+def handler(event, context):
+    try:
+        user_id, auth_error = extract_user_id(event)
+        if auth_error:
+            return auth_error
+
+        album_id = ((event.get("pathParameters") or {}).get("albumId") or "").strip()
+        if not album_id:
+            return error_response(400, "albumId is required")
+
+        body = json.loads(event.get("body") or "{}")
+        photo_ids, _, selection_error = parse_selection(body, allow_deleted_before=False)
+        if selection_error:
+            return error_response(400, selection_error)
+
+        normalized_request, labels_error = parse_requested_labels(body.get("labels"))
+        if labels_error:
+            return error_response(400, labels_error)
+
+        # The album is read once for the whole batch
+        album = dynamodb.Table(ALBUMS_TABLE).get_item(Key={"UserId": user_id, "AlbumId": album_id}).get("Item")
+        if not album:
+            return error_response(404, "album not found")
+
+        if not set(normalized_request).issubset(album_label_set(album)):
+            return error_response(400, "all requested labels must belong to album requiredLabels")
+
+        selection, _ = load_selection(dynamodb, PHOTOS_TABLE, user_id, photo_ids, None)
+        photos_table = dynamodb.Table(PHOTOS_TABLE)
+
+        def change(subjects):
+            return remove_album_labels(subjects, normalized_request)
+
+        def save(photo):
+            try:
+                saved = save_photo_labels(photos_table, user_id, photo, change)
+                return (saved, None) if saved else (None, "photo not found")
+            except PhotoChangedError:
+                return None, "photo changed during update"
+            except Exception as update_error:
+                print(f"albums_bulk_remove_labels error for {photo['PhotoId']}: {update_error}")
+                return None, "internal server error"
+
+        # Photos that already have the change are left untouched; a photo that changed
+        # since the selection read is re-read, so labels written in between are kept
+        found = [photo for _, photo in selection if photo]
+        outcomes = dict(zip([photo["PhotoId"] for photo in found], run_parallel(save, found, BULK_WORKERS)))
+
+        results = []
+        for photo_id, _ in selection:
+            saved, update_error = outcomes.get(photo_id) or (None, "photo not found")
+            if update_error:
+                results.append({"photoId": photo_id, "error": update_error})
+            else:
+                results.append({"photoId": photo_id, "removedLabels": saved[2]})
+
+        changed = [saved for saved, _ in outcomes.values() if saved and saved[2]]
+        if changed:
+            sync_many_photo_postings(
+                dynamodb.Table(PHOTO_INDEX_TABLE),
+                user_id,
+                [(photo["PhotoId"], photo, {**photo, "Subjects": subjects}) for photo, subjects, _ in changed],
+            )
+            bump_collection_version(dynamodb.Table(USERS_TABLE), user_id)
+
+        return bulk_response(results, event)
+    except json.JSONDecodeError:
+        return error_response(400, "invalid JSON in request body")
+    except Exception as error:
+        print(f"albums_bulk_remove_labels handler error: {error}")
+        return error_response(500, "internal server error")
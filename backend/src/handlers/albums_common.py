@@ -1,42 +1,25 @@
-import json
 from datetime import datetime, timezone
 
+try:
+    from handlers.runtime import extract_user_id, forbidden_response, unauthorized_response  # noqa: F401
+    from handlers.versions import updated_at_now
+except ImportError:
+    from runtime import extract_user_id, forbidden_response, unauthorized_response  # type: ignore # noqa: F401
+    from versions import updated_at_now  # type: ignore
+
 MAX_ALBUM_NAME_LENGTH = 120
 MAX_REQUIRED_LABELS = 20
 MAX_LABEL_LENGTH = 64
+# Label writes that keep losing to concurrent writers are reported as a conflict after this many tries
+SUBJECTS_WRITE_ATTEMPTS = 3
 
 
-def utc_now_iso():
-    return datetime.now(timezone.utc).isoformat()
-
-
-def unauthorized_response():
-    return {
-        "statusCode": 401,
-        "body": json.dumps({"error": "missing or invalid JWT subject claim"}),
-    }
-
-
-def forbidden_response():
-    return {
-        "statusCode": 403,
-        "body": json.dumps({"error": "email is not verified"}),
-    }
-
-
-def extract_user_id(event):
-    claims = (((event.get("requestContext") or {}).get("authorizer") or {}).get("jwt") or {}).get("claims") or {}
-    user_id = claims.get("sub")
-    if not user_id:
-        return None, unauthorized_response()
+class PhotoChangedError(Exception):
+    """The photo changed under every attempt at a label write."""
 
-    email_verified = claims.get("email_verified")
-    if isinstance(email_verified, str):
-        email_verified = email_verified.lower() == "true"
-    if email_verified is False:
-        return None, forbidden_response()
 
-    return user_id, None
+def utc_now_iso():
+    return datetime.now(timezone.utc).isoformat()
 
 
 def normalize_label(value):
@@ -94,6 +77,103 @@ def normalize_photo_subjects(subjects):
     return result
 
 
+def album_label_set(album):
+    return {label for label in (normalize_label(value) for value in (album.get("RequiredLabels") or [])) if label}
+
+
+def parse_requested_labels(labels_input):
+    """Normalized, deduped labels from a remove-labels body; returns (labels, None) or (None, error message)."""
+    if not isinstance(labels_input, list) or not labels_input:
+        return None, "labels must be a non-empty array"
+
+    normalized_request = []
+    for value in labels_input:
+        normalized = normalize_label(value)
+        if not normalized:
+            return None, "labels must be non-empty strings"
+        if normalized not in normalized_request:
+            normalized_request.append(normalized)
+    return normalized_request, None
+
+
+def add_album_labels(subjects, required_labels):
+    """Photo subjects with the album's required labels appended; returns (subjects, added_labels)."""
+    subjects = normalize_photo_subjects(subjects)
+    subjects_lower = {item.lower() for item in subjects}
+
+    added_labels = []
+    for label in required_labels or []:
+        if not isinstance(label, str):
+            continue
+        lowered = label.lower().strip()
+        if not lowered or lowered in subjects_lower:
+            continue
+        subjects.append(label)
+        subjects_lower.add(lowered)
+        added_labels.append(label)
+    return subjects, added_labels
+
+
+def remove_album_labels(subjects, labels):
+    """Photo subjects without the given normalized labels; returns (subjects, removed_labels)."""
+    to_remove = set(labels)
+
+    next_subjects = []
+    removed_labels = []
+    for subject in normalize_photo_subjects(subjects):
+        lowered = subject.lower()
+        if lowered in to_remove:
+            removed_labels.append(lowered)
+            continue
+        next_subjects.append(subject)
+    return next_subjects, sorted(set(removed_labels))
+
+
+def update_photo_subjects(photos_table, user_id, photo, subjects):
+    """Write subjects onto the row photo was read from, conditioned on the Version it was read at.
+
+    Raises ConditionalCheckFailedException when the row changed in between,
+    for example when the derivation worker added its date label.
+    """
+    expression_attribute_values = {":subjects": subjects, ":updatedAt": updated_at_now(), ":one": 1}
+    if "Version" in photo:
+        condition_expression = "#version = :readVersion"
+        expression_attribute_values[":readVersion"] = photo["Version"]
+    else:
+        condition_expression = "attribute_exists(PhotoId) AND attribute_not_exists(#version)"
+    photos_table.update_item(
+        Key={"UserId": user_id, "PhotoId": photo["PhotoId"]},
+        UpdateExpression="SET #subjects = :subjects, #updatedAt = :updatedAt ADD #version :one",
+        ConditionExpression=condition_expression,
+        ExpressionAttributeNames={"#subjects": "Subjects", "#updatedAt": "UpdatedAt", "#version": "Version"},
+        ExpressionAttributeValues=expression_attribute_values,
+    )
+
+
+def save_photo_labels(photos_table, user_id, photo, change):
+    """Apply change(subjects) -> (subjects, labels) to photo and write it when labels is non-empty.
+
+    A write that loses a race re-reads the row and recomputes the change, so
+    subjects another writer added in between are kept. Returns (photo,
+    subjects, labels) for the row the write was based on, or None once the
+    photo is gone; raises PhotoChangedError if it never stops changing.
+    """
+    for _ in range(SUBJECTS_WRITE_ATTEMPTS):
+        subjects, labels = change(photo.get("Subjects"))
+        if not labels:
+            return photo, subjects, labels
+        try:
+            update_photo_subjects(photos_table, user_id, photo, subjects)
+            return photo, subjects, labels
+        except photos_table.meta.client.exceptions.ConditionalCheckFailedException:
+            photo = photos_table.get_item(
+                Key={"UserId": user_id, "PhotoId": photo["PhotoId"]}, ConsistentRead=True
+            ).get("Item")
+            if not photo:
+                return None
+    raise PhotoChangedError(f"photo {photo['PhotoId']} kept changing during a label write")
+
+
 def album_response(item):
     return {
         "albumId": item.get("AlbumId"),
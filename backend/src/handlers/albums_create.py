@@ -2,8 +2,6 @@ import json
 import os
 import uuid
 
-import boto3
-
 try:
     from handlers.albums_common import (
         MAX_ALBUM_NAME_LENGTH,
@@ -12,6 +10,7 @@ try:
         normalize_required_labels,
         utc_now_iso,
     )
+    from handlers.runtime import aws_resource, error_response, json_response
 except ImportError:
     from albums_common import (  # type: ignore
         MAX_ALBUM_NAME_LENGTH,
@@ -20,9 +19,10 @@ except ImportError:
         normalize_required_labels,
         utc_now_iso,
     )
+    from runtime import aws_resource, error_response, json_response  # type: ignore
 
 
-dynamodb = boto3.resource("dynamodb")
+dynamodb = aws_resource("dynamodb")
 ALBUMS_TABLE = os.environ["ALBUMS_TABLE"]
 
 
@@ -37,22 +37,16 @@ def handler(event, context):
         required_labels = normalize_required_labels(body.get("requiredLabels"))
 
         if not isinstance(name_raw, str):
-            return {"statusCode": 400, "body": json.dumps({"error": "name must be a string"})}
+            return error_response(400, "name must be a string")
 
         name = name_raw.strip()
         if not name:
-            return {"statusCode": 400, "body": json.dumps({"error": "name cannot be empty"})}
+            return error_response(400, "name cannot be empty")
         if len(name) > MAX_ALBUM_NAME_LENGTH:
-            return {
-                "statusCode": 400,
-                "body": json.dumps({"error": f"name exceeds maximum length of {MAX_ALBUM_NAME_LENGTH}"}),
-            }
+            return error_response(400, f"name exceeds maximum length of {MAX_ALBUM_NAME_LENGTH}")
 
         if required_labels is None:
-            return {
-                "statusCode": 400,
-                "body": json.dumps({"error": "requiredLabels must be a non-empty array of strings"}),
-            }
+            return error_response(400, "requiredLabels must be a non-empty array of strings")
 
         table = dynamodb.Table(ALBUMS_TABLE)
         now = utc_now_iso()
@@ -66,9 +60,9 @@ def handler(event, context):
         }
         table.put_item(Item=item)
 
-        return {"statusCode": 200, "body": json.dumps(album_response(item))}
+        return json_response(200, album_response(item))
     except json.JSONDecodeError:
-        return {"statusCode": 400, "body": json.dumps({"error": "invalid JSON in request body"})}
+        return error_response(400, "invalid JSON in request body")
     except Exception as error:
         print(f"albums_create handler error: {error}")
-        return {"statusCode": 500, "body": json.dumps({"error": "internal server error"})}
+        return error_response(500, "internal server error")
@@ -1,16 +1,16 @@
-import json
 import os
 
-import boto3
 from boto3.dynamodb.conditions import Key
 
 try:
     from handlers.albums_common import album_response, extract_user_id
+    from handlers.runtime import aws_resource, error_response, json_response
 except ImportError:
     from albums_common import album_response, extract_user_id  # type: ignore
+    from runtime import aws_resource, error_response, json_response  # type: ignore
 
 
-dynamodb = boto3.resource("dynamodb")
+dynamodb = aws_resource("dynamodb")
 ALBUMS_TABLE = os.environ["ALBUMS_TABLE"]
 
 
@@ -30,15 +30,10 @@ def handler(event, context):
         items = response.get("Items") or []
         albums = [album_response(item) for item in items]
 
-        return {
-            "statusCode": 200,
-            "body": json.dumps(
-                {
-                    "albums": albums,
-                    "count": len(albums),
-                }
-            ),
-        }
+        return json_response(200, {
+            "albums": albums,
+            "count": len(albums),
+        }, event)
     except Exception as error:
         print(f"albums_list handler error: {error}")
-        return {"statusCode": 500, "body": json.dumps({"error": "internal server error"})}
+        return error_response(500, "internal server error")
@@ -1,22 +1,64 @@
+import base64
 import json
 import os
 from datetime import datetime
 
-import boto3
-from boto3.dynamodb.conditions import Attr, Key
+from boto3.dynamodb.conditions import Key
 
 try:
     from handlers.albums_common import extract_user_id
+    from handlers.photo_index import batch_get_photos, intersect_postings, label_term
+    from handlers.presign import attach_thumbnail_urls, thumbnail_source_key
+    from handlers.runtime import aws_client, aws_resource, error_response, json_response
 except ImportError:
     from albums_common import extract_user_id  # type: ignore
+    from photo_index import batch_get_photos, intersect_postings, label_term  # type: ignore
+    from presign import attach_thumbnail_urls, thumbnail_source_key  # type: ignore
+    from runtime import aws_client, aws_resource, error_response, json_response  # type: ignore
 
 
-dynamodb = boto3.resource("dynamodb")
-s3 = boto3.client("s3")
+dynamodb = aws_resource("dynamodb")
+s3 = aws_client("s3")
 
 ALBUMS_TABLE = os.environ["ALBUMS_TABLE"]
 PHOTOS_TABLE = os.environ["PHOTOS_TABLE"]
 PHOTO_BUCKET = os.environ["PHOTO_BUCKET"]
+PHOTO_INDEX_TABLE = os.environ["PHOTO_INDEX_TABLE"]
+ACTIVE_INDEX = "ActiveIndex"
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+
+def _parse_limit(raw_limit):
+    if raw_limit is None:
+        return DEFAULT_LIMIT
+    try:
+        value = int(raw_limit)
+    except (TypeError, ValueError):
+        return None
+    if value < 1:
+        return None
+    return min(value, MAX_LIMIT)
+
+
+def _decode_next_token(token):
+    if not token:
+        return None
+    try:
+        decoded = base64.urlsafe_b64decode(token.encode("utf-8")).decode("utf-8")
+        payload = json.loads(decoded)
+        if "ActiveUserId" not in payload or "UserId" not in payload or "PhotoId" not in payload:
+            return None
+        return payload
+    except Exception:
+        return None
+
+
+def _encode_next_token(last_key):
+    if not last_key:
+        return None
+    encoded = base64.urlsafe_b64encode(json.dumps(last_key).encode("utf-8")).decode("utf-8")
+    return encoded
 
 
 def _normalize_subject_set(subjects):
@@ -31,6 +73,58 @@ def _normalize_subject_set(subjects):
     return result
 
 
+def _is_album_member(item, required_labels):
+    if item.get("DeletedAt"):
+        return False
+    status = item.get("Status")
+    if status and status != "ACTIVE":
+        return False
+    return required_labels.issubset(_normalize_subject_set(item.get("Subjects")))
+
+
+def _members_from_postings(user_id, required_labels, limit, exclusive_start_key):
+    """Intersect the album's label posting lists, then fetch and verify one page of members."""
+    terms = [label_term(label) for label in required_labels]
+    candidates = intersect_postings(dynamodb.Table(PHOTO_INDEX_TABLE), user_id, terms)
+    ordered = sorted(candidates, reverse=True)
+    if exclusive_start_key:
+        ordered = [photo_id for photo_id in ordered if photo_id < exclusive_start_key["PhotoId"]]
+
+    members = []
+    # Postings are kept in step with Subjects, so nearly every candidate is a member;
+    # fetching a page-sized chunk at a time keeps reads close to what is returned.
+    for start in range(0, len(ordered), limit):
+        chunk = ordered[start:start + limit]
+        found = batch_get_photos(dynamodb, PHOTOS_TABLE, user_id, chunk)
+        for offset, photo_id in enumerate(chunk):
+            item = found.get(photo_id)
+            if not item or not _is_album_member(item, required_labels):
+                continue
+
+            members.append(item)
+            if len(members) >= limit:
+                has_more = start + offset + 1 < len(ordered)
+                cursor = {"ActiveUserId": user_id, "UserId": user_id, "PhotoId": photo_id}
+                return members, (cursor if has_more else None)
+
+    return members, None
+
+
+def _members_from_active_index(user_id, limit, exclusive_start_key):
+    """An album without required labels holds every active photo."""
+    query_args = {
+        "IndexName": ACTIVE_INDEX,
+        "KeyConditionExpression": Key("ActiveUserId").eq(user_id),
+        "ScanIndexForward": False,
+        "Limit": limit,
+    }
+    if exclusive_start_key:
+        query_args["ExclusiveStartKey"] = exclusive_start_key
+
+    result = dynamodb.Table(PHOTOS_TABLE).query(**query_args)
+    return result.get("Items") or [], result.get("LastEvaluatedKey")
+
+
 def _build_photo_response(item):
     created_at = item.get("CreatedAt")
     if isinstance(created_at, datetime):
@@ -47,24 +141,9 @@ def _build_photo_response(item):
     }
 
     thumbnail_key = item.get("ThumbnailKey")
-    thumbnail_source_key = thumbnail_key
-    content_type = str(item.get("ContentType") or "").lower()
-    if not thumbnail_source_key and content_type.startswith("image/"):
-        thumbnail_source_key = item.get("ObjectKey")
-
     if thumbnail_key:
         photo["thumbnailKey"] = thumbnail_key
 
-    if thumbnail_source_key:
-        try:
-            photo["thumbnailUrl"] = s3.generate_presigned_url(
-                "get_object",
-                Params={"Bucket": PHOTO_BUCKET, "Key": thumbnail_source_key},
-                ExpiresIn=3600,
-            )
-        except Exception as thumbnail_error:
-            print(f"albums_photos thumbnail URL generation error: {thumbnail_error}")
-
     return photo
 
 
@@ -76,47 +155,53 @@ def handler(event, context):
 
         album_id = ((event.get("pathParameters") or {}).get("albumId") or "").strip()
         if not album_id:
-            return {"statusCode": 400, "body": json.dumps({"error": "albumId is required"})}
+            return error_response(400, "albumId is required")
 
         albums_table = dynamodb.Table(ALBUMS_TABLE)
         album_result = albums_table.get_item(Key={"UserId": user_id, "AlbumId": album_id})
         album = album_result.get("Item")
         if not album:
-            return {"statusCode": 404, "body": json.dumps({"error": "album not found"})}
+            return error_response(404, "album not found")
+
+        query_params = event.get("queryStringParameters") or {}
+        limit = _parse_limit(query_params.get("limit"))
+        if limit is None:
+            return error_response(400, "limit must be an integer between 1 and 100")
+
+        next_token = query_params.get("nextToken")
+        exclusive_start_key = _decode_next_token(next_token)
+        if next_token and not exclusive_start_key:
+            return error_response(400, "nextToken is invalid")
+        if exclusive_start_key and (
+            exclusive_start_key.get("ActiveUserId") != user_id or exclusive_start_key.get("UserId") != user_id
+        ):
+            return error_response(400, "nextToken does not belong to current user")
 
         required_labels = _normalize_subject_set(album.get("RequiredLabels"))
-
-        photos_table = dynamodb.Table(PHOTOS_TABLE)
-        query_result = photos_table.query(
-            KeyConditionExpression=Key("UserId").eq(user_id),
-            FilterExpression=Attr("DeletedAt").not_exists(),
-            ScanIndexForward=False,
-            Limit=300,
-        )
+        if required_labels:
+            members, last_key = _members_from_postings(user_id, required_labels, limit, exclusive_start_key)
+        else:
+            members, last_key = _members_from_active_index(user_id, limit, exclusive_start_key)
 
         photos = []
-        for item in query_result.get("Items") or []:
-            status = item.get("Status")
-            if status and status != "ACTIVE":
-                continue
+        thumbnail_entries = []
+        for item in members:
+            photo = _build_photo_response(item)
+            photos.append(photo)
+            thumbnail_entries.append((photo, thumbnail_source_key(item)))
 
-            subject_set = _normalize_subject_set(item.get("Subjects"))
-            if not required_labels.issubset(subject_set):
-                continue
+        try:
+            attach_thumbnail_urls(s3, PHOTO_BUCKET, thumbnail_entries)
+        except Exception as thumbnail_error:
+            print(f"albums_photos thumbnail URL generation error: {thumbnail_error}")
 
-            photos.append(_build_photo_response(item))
-
-        return {
-            "statusCode": 200,
-            "body": json.dumps(
-                {
-                    "albumId": album_id,
-                    "requiredLabels": sorted(required_labels),
-                    "photos": photos,
-                    "count": len(photos),
-                }
-            ),
-        }
+        return json_response(200, {
+            "albumId": album_id,
+            "requiredLabels": sorted(required_labels),
+            "photos": photos,
+            "count": len(photos),
+            "nextToken": _encode_next_token(last_key),
+        }, event)
     except Exception as error:
         print(f"albums_photos handler error: {error}")
-        return {"statusCode": 500, "body": json.dumps({"error": "internal server error"})}
+        return error_response(500, "internal server error")
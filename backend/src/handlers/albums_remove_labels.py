@@ -1,17 +1,40 @@
 import json
 import os
 
-import boto3
-
 try:
-    from handlers.albums_common import extract_user_id, normalize_label, normalize_photo_subjects, utc_now_iso
+    from handlers.albums_common import (
+        PhotoChangedError,
+        album_label_set,
+        extract_user_id,
+        parse_requested_labels,
+        remove_album_labels,
+        save_photo_labels,
+    )
+    from handlers.runtime import aws_resource, error_response, json_response
+    from handlers.versions import bump_collection_version
 except ImportError:
-    from albums_common import extract_user_id, normalize_label, normalize_photo_subjects, utc_now_iso  # type: ignore
+    from albums_common import (  # type: ignore
+        PhotoChangedError,
+        album_label_set,
+        extract_user_id,
+        parse_requested_labels,
+        remove_album_labels,
+        save_photo_labels,
+    )
+    from runtime import aws_resource, error_response, json_response  # type: ignore
+    from versions import bump_collection_version  # type: ignore
 
 
-dynamodb = boto3.resource("dynamodb")
+try:
+    from handlers.photo_index import sync_photo_postings
+except ImportError:
+    from photo_index import sync_photo_postings  # type: ignore
+
+dynamodb = aws_resource("dynamodb")
 ALBUMS_TABLE = os.environ["ALBUMS_TABLE"]
 PHOTOS_TABLE = os.environ["PHOTOS_TABLE"]
+PHOTO_INDEX_TABLE = os.environ["PHOTO_INDEX_TABLE"]
+USERS_TABLE = os.environ["USERS_TABLE"]
 
 
 def handler(event, context):
@@ -24,75 +47,57 @@ def handler(event, context):
         album_id = (path.get("albumId") or "").strip()
         photo_id = (path.get("photoId") or "").strip()
         if not album_id or not photo_id:
-            return {"statusCode": 400, "body": json.dumps({"error": "albumId and photoId are required"})}
+            return error_response(400, "albumId and photoId are required")
 
         body = json.loads(event.get("body") or "{}")
-        labels_input = body.get("labels")
-        if not isinstance(labels_input, list) or not labels_input:
-            return {"statusCode": 400, "body": json.dumps({"error": "labels must be a non-empty array"})}
-
-        normalized_request = []
-        for value in labels_input:
-            normalized = normalize_label(value)
-            if not normalized:
-                return {"statusCode": 400, "body": json.dumps({"error": "labels must be non-empty strings"})}
-            if normalized not in normalized_request:
-                normalized_request.append(normalized)
+        normalized_request, labels_error = parse_requested_labels(body.get("labels"))
+        if labels_error:
+            return error_response(400, labels_error)
 
         albums_table = dynamodb.Table(ALBUMS_TABLE)
         album = albums_table.get_item(Key={"UserId": user_id, "AlbumId": album_id}).get("Item")
         if not album:
-            return {"statusCode": 404, "body": json.dumps({"error": "album not found"})}
+            return error_response(404, "album not found")
 
-        album_labels = {
-            normalize_label(value)
-            for value in (album.get("RequiredLabels") or [])
-            if normalize_label(value)
-        }
-
-        if not set(normalized_request).issubset(album_labels):
-            return {
-                "statusCode": 400,
-                "body": json.dumps({"error": "all requested labels must belong to album requiredLabels"}),
-            }
+        if not set(normalized_request).issubset(album_label_set(album)):
+            return error_response(400, "all requested labels must belong to album requiredLabels")
 
         photos_table = dynamodb.Table(PHOTOS_TABLE)
         photo = photos_table.get_item(Key={"UserId": user_id, "PhotoId": photo_id}).get("Item")
         if not photo:
-            return {"statusCode": 404, "body": json.dumps({"error": "photo not found"})}
-
-        subjects = normalize_photo_subjects(photo.get("Subjects"))
-        to_remove = set(normalized_request)
-
-        next_subjects = []
-        removed_labels = []
-        for subject in subjects:
-            lowered = subject.lower()
-            if lowered in to_remove:
-                removed_labels.append(lowered)
-                continue
-            next_subjects.append(subject)
-
-        photos_table.update_item(
-            Key={"UserId": user_id, "PhotoId": photo_id},
-            UpdateExpression="SET #subjects = :subjects, #updatedAt = :updatedAt",
-            ExpressionAttributeNames={"#subjects": "Subjects", "#updatedAt": "UpdatedAt"},
-            ExpressionAttributeValues={":subjects": next_subjects, ":updatedAt": utc_now_iso()},
-        )
-
-        return {
-            "statusCode": 200,
-            "body": json.dumps(
-                {
-                    "albumId": album_id,
-                    "photoId": photo_id,
-                    "removedLabels": sorted(set(removed_labels)),
-                    "subjects": next_subjects,
-                }
-            ),
-        }
+            return error_response(404, "photo not found")
+
+        try:
+            saved = save_photo_labels(
+                photos_table,
+                user_id,
+                photo,
+                lambda subjects: remove_album_labels(subjects, normalized_request),
+            )
+        except PhotoChangedError:
+            return error_response(409, "photo changed during update; retry")
+        if not saved:
+            return error_response(404, "photo not found")
+        photo, next_subjects, removed_labels = saved
+
+        if removed_labels:
+            sync_photo_postings(
+                dynamodb.Table(PHOTO_INDEX_TABLE),
+                user_id,
+                photo_id,
+                photo,
+                {**photo, "Subjects": next_subjects},
+            )
+            bump_collection_version(dynamodb.Table(USERS_TABLE), user_id)
+
+        return json_response(200, {
+            "albumId": album_id,
+            "photoId": photo_id,
+            "removedLabels": removed_labels,
+            "subjects": next_subjects,
+        })
     except json.JSONDecodeError:
-        return {"statusCode": 400, "body": json.dumps({"error": "invalid JSON in request body"})}
+        return error_response(400, "invalid JSON in request body")
     except Exception as error:
         print(f"albums_remove_labels handler error: {error}")
-        return {"statusCode": 500, "body": json.dumps({"error": "internal server error"})}
+        return error_response(500, "internal server error")
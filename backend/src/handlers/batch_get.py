@@ -0,0 +1,76 @@
+import json
+import os
+
+try:
+    from handlers.photo_fields import photo_summary
+    from handlers.photo_index import batch_get_photos
+    from handlers.presign import attach_thumbnail_urls, thumbnail_source_key
+    from handlers.runtime import aws_client, aws_resource, error_response, extract_user_id, json_response
+except ImportError:
+    from photo_fields import photo_summary  # type: ignore
+    from photo_index import batch_get_photos  # type: ignore
+    from presign import attach_thumbnail_urls, thumbnail_source_key  # type: ignore
+    from runtime import aws_client, aws_resource, error_response, extract_user_id, json_response  # type: ignore
+
+dynamodb = aws_resource("dynamodb")
+s3 = aws_client("s3")
+
+PHOTOS_TABLE = os.environ["PHOTOS_TABLE"]
+PHOTO_BUCKET = os.environ["PHOTO_BUCKET"]
+MAX_PHOTO_IDS = 100
+
+
+def _parse_photo_ids(body):
+    """Requested IDs in order with duplicates dropped (BatchGetItem rejects repeated keys), or None."""
+    photo_ids = body.get("photoIds") if isinstance(body, dict) else None
+    if not isinstance(photo_ids, list) or not photo_ids:
+        return None
+    if not all(isinstance(photo_id, str) and photo_id for photo_id in photo_ids):
+        return None
+    return list(dict.fromkeys(photo_ids))
+
+
+def handler(event, context):
+    try:
+        user_id, auth_error = extract_user_id(event, require_verified_email=True)
+        if auth_error:
+            return auth_error
+
+        body = json.loads(event.get("body") or "{}")
+        photo_ids = _parse_photo_ids(body)
+        if photo_ids is None:
+            return error_response(400, "photoIds must be a non-empty array of strings")
+        if len(photo_ids) > MAX_PHOTO_IDS:
+            return error_response(400, f"photoIds accepts at most {MAX_PHOTO_IDS} IDs")
+
+        items = batch_get_photos(dynamodb, PHOTOS_TABLE, user_id, photo_ids)
+
+        # Same photo objects as GET /photos/{photoId}, in request order; the rest are reported missing
+        photos = []
+        missing = []
+        thumbnail_entries = []
+        for photo_id in photo_ids:
+            item = items.get(photo_id)
+            if not item or item.get("Status") not in (None, "ACTIVE"):
+                missing.append(photo_id)
+                continue
+            photo = photo_summary(item)
+            photos.append(photo)
+            thumbnail_entries.append((photo, thumbnail_source_key(item)))
+
+        # One signing pass for the whole batch
+        try:
+            attach_thumbnail_urls(s3, PHOTO_BUCKET, thumbnail_entries)
+        except Exception as thumbnail_error:
+            print(f"batch_get thumbnail URL generation error: {thumbnail_error}")
+
+        return json_response(200, {
+            "photos": photos,
+            "count": len(photos),
+            "missing": missing,
+        }, event)
+    except json.JSONDecodeError:
+        return error_response(400, "invalid JSON in request body")
+    except Exception as error:
+        print(f"batch_get handler error: {error}")
+        return error_response(500, "internal server error")
@@ -0,0 +1,92 @@
+"""Photo selection and per-photo results shared by the bulk delete, restore and hard-delete endpoints."""
+
+from datetime import datetime, timezone
+
+from boto3.dynamodb.conditions import Key
+
+try:
+    from handlers.photo_index import batch_get_photos
+    from handlers.runtime import json_response
+except ImportError:
+    from photo_index import batch_get_photos  # type: ignore
+    from runtime import json_response  # type: ignore
+
+MAX_BULK_PHOTOS = 1000
+# Per-photo updates and reference changes are single-item calls; run this many at once
+BULK_WORKERS = 16
+DELETED_AT_INDEX = "DeletedAtIndex"
+
+
+def _parse_deleted_before(raw_value):
+    if not isinstance(raw_value, str) or not raw_value.strip():
+        return None
+    try:
+        parsed = datetime.fromisoformat(raw_value.strip())
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    # DeletedAt is stored as a UTC isoformat() string, so the cutoff compares as text
+    return parsed.astimezone(timezone.utc).isoformat()
+
+
+def parse_selection(body, allow_deleted_before):
+    """Returns (photo_ids, deleted_before, error); a request names either photoIds or deletedBefore."""
+    if not isinstance(body, dict):
+        return None, None, "request body must be a JSON object"
+
+    photo_ids = body.get("photoIds")
+    raw_deleted_before = body.get("deletedBefore")
+    if allow_deleted_before and photo_ids is None and raw_deleted_before is not None:
+        deleted_before = _parse_deleted_before(raw_deleted_before)
+        if deleted_before is None:
+            return None, None, "deletedBefore must be an ISO-8601 timestamp"
+        return None, deleted_before, None
+
+    if not isinstance(photo_ids, list) or not photo_ids:
+        if allow_deleted_before:
+            return None, None, "provide photoIds or deletedBefore"
+        return None, None, "photoIds must be a non-empty array of strings"
+    if not all(isinstance(photo_id, str) and photo_id for photo_id in photo_ids):
+        return None, None, "photoIds must be a non-empty array of strings"
+
+    # BatchGetItem rejects repeated keys
+    photo_ids = list(dict.fromkeys(photo_ids))
+    if len(photo_ids) > MAX_BULK_PHOTOS:
+        return None, None, f"photoIds accepts at most {MAX_BULK_PHOTOS} IDs"
+    return photo_ids, None, None
+
+
+def load_selection(dynamodb, table_name, user_id, photo_ids, deleted_before):
+    """Rows to act on as ordered (photo_id, item or None) pairs, plus whether more trash matches.
+
+    A deletedBefore selection reads at most MAX_BULK_PHOTOS trashed rows, oldest
+    deletion first, from the sparse DeletedAt index; callers repeat the request
+    while hasMore is true.
+    """
+    if photo_ids is not None:
+        items = batch_get_photos(dynamodb, table_name, user_id, photo_ids)
+        return [(photo_id, items.get(photo_id)) for photo_id in photo_ids], False
+
+    table = dynamodb.Table(table_name)
+    query_args = {
+        "IndexName": DELETED_AT_INDEX,
+        "KeyConditionExpression": Key("UserId").eq(user_id) & Key("DeletedAt").lt(deleted_before),
+    }
+    selected = []
+    while True:
+        result = table.query(Limit=MAX_BULK_PHOTOS - len(selected), **query_args)
+        selected.extend((item["PhotoId"], item) for item in result.get("Items") or [])
+        last_key = result.get("LastEvaluatedKey")
+        if not last_key or len(selected) >= MAX_BULK_PHOTOS:
+            return selected, bool(last_key)
+        query_args["ExclusiveStartKey"] = last_key
+
+
+def bulk_response(results, event, has_more=False):
+    return json_response(200, {
+        "results": results,
+        "count": len(results),
+        "failedCount": sum(1 for result in results if "error" in result),
+        "hasMore": has_more,
+    }, event)
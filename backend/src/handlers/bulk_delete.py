@@ -0,0 +1,88 @@
+import json
+import os
+from datetime import datetime, timedelta, timezone
+
+try:
+    from handlers.bulk_common import BULK_WORKERS, bulk_response, load_selection, parse_selection
+    from handlers.runtime import aws_resource, error_response, extract_user_id, run_parallel
+    from handlers.versions import bump_collection_version, updated_at_now
+except ImportError:
+    from bulk_common import BULK_WORKERS, bulk_response, load_selection, parse_selection  # type: ignore
+    from runtime import aws_resource, error_response, extract_user_id, run_parallel  # type: ignore
+    from versions import bump_collection_version, updated_at_now  # type: ignore
+
+dynamodb = aws_resource("dynamodb")
+
+PHOTOS_TABLE = os.environ["PHOTOS_TABLE"]
+USERS_TABLE = os.environ["USERS_TABLE"]
+DEFAULT_RETENTION_DAYS = 60
+
+
+def handler(event, context):
+    try:
+        user_id, auth_error = extract_user_id(event)
+        if auth_error:
+            return auth_error
+
+        body = json.loads(event.get("body") or "{}")
+        photo_ids, _, selection_error = parse_selection(body, allow_deleted_before=False)
+        if selection_error:
+            return error_response(400, selection_error)
+
+        table = dynamodb.Table(PHOTOS_TABLE)
+        selection, _ = load_selection(dynamodb, PHOTOS_TABLE, user_id, photo_ids, None)
+
+        now = datetime.now(timezone.utc)
+        deleted_at = now.isoformat()
+        retention_until = (now + timedelta(days=DEFAULT_RETENTION_DAYS)).isoformat()
+
+        def soft_delete(photo_id):
+            # Same update as DELETE /photos/{photoId}; the condition catches a delete that raced this one
+            try:
+                table.update_item(
+                    Key={"UserId": user_id, "PhotoId": photo_id},
+                    UpdateExpression=(
+                        "SET DeletedAt = :deleted_at, DeletedBy = :deleted_by, RetentionUntil = :retention_until, "
+                        "UpdatedAt = :updated_at REMOVE ActiveUserId ADD #version :one"
+                    ),
+                    ConditionExpression="attribute_exists(PhotoId) AND attribute_not_exists(DeletedAt)",
+                    ExpressionAttributeNames={"#version": "Version"},
+                    ExpressionAttributeValues={
+                        ":deleted_at": deleted_at,
+                        ":deleted_by": user_id,
+                        ":retention_until": retention_until,
+                        # Stamped per row: the change feed assumes UpdatedAt is taken just before the write
+                        ":updated_at": updated_at_now(),
+                        ":one": 1,
+                    },
+                )
+                return None
+            except table.meta.client.exceptions.ConditionalCheckFailedException:
+                return "photo already deleted"
+            except Exception as update_error:
+                print(f"bulk delete error for {photo_id}: {update_error}")
+                return "internal server error"
+
+        eligible = [photo_id for photo_id, item in selection if item and not item.get("DeletedAt")]
+        update_errors = dict(zip(eligible, run_parallel(soft_delete, eligible, BULK_WORKERS)))
+
+        results = []
+        for photo_id, item in selection:
+            if not item:
+                results.append({"photoId": photo_id, "error": "photo not found"})
+            elif photo_id not in update_errors:
+                results.append({"photoId": photo_id, "error": "photo already deleted"})
+            elif update_errors[photo_id]:
+                results.append({"photoId": photo_id, "error": update_errors[photo_id]})
+            else:
+                results.append({"photoId": photo_id, "deletedAt": deleted_at, "retentionUntil": retention_until})
+
+        if any(error is None for error in update_errors.values()):
+            bump_collection_version(dynamodb.Table(USERS_TABLE), user_id)
+
+        return bulk_response(results, event)
+    except json.JSONDecodeError:
+        return error_response(400, "invalid JSON in request body")
+    except Exception as error:
+        print(f"bulk delete handler error: {error}")
+        return error_response(500, "internal server error")
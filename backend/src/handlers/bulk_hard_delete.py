@@ -0,0 +1,122 @@
+import json
+import os
+
+try:
+    from handlers.bulk_common import BULK_WORKERS, bulk_response, load_selection, parse_selection
+    from handlers.object_refs import apply_ref_action, claim_unreferenced, remove_ref_action
+    from handlers.photo_index import sync_many_photo_postings, tombstone_item
+    from handlers.runtime import aws_client, aws_resource, error_response, extract_user_id, run_parallel
+    from handlers.versions import bump_collection_version, updated_at_now
+except ImportError:
+    from bulk_common import BULK_WORKERS, bulk_response, load_selection, parse_selection  # type: ignore
+    from object_refs import apply_ref_action, claim_unreferenced, remove_ref_action  # type: ignore
+    from photo_index import sync_many_photo_postings, tombstone_item  # type: ignore
+    from runtime import aws_client, aws_resource, error_response, extract_user_id, run_parallel  # type: ignore
+    from versions import bump_collection_version, updated_at_now  # type: ignore
+
+s3 = aws_client("s3")
+dynamodb = aws_resource("dynamodb")
+
+PHOTO_BUCKET = os.environ["PHOTO_BUCKET"]
+PHOTOS_TABLE = os.environ["PHOTOS_TABLE"]
+PHOTO_INDEX_TABLE = os.environ["PHOTO_INDEX_TABLE"]
+OBJECT_REFS_TABLE = os.environ["OBJECT_REFS_TABLE"]
+USERS_TABLE = os.environ["USERS_TABLE"]
+# S3 DeleteObjects limit
+DELETE_OBJECTS_MAX_KEYS = 1000
+
+
+def _delete_objects(object_keys):
+    for start in range(0, len(object_keys), DELETE_OBJECTS_MAX_KEYS):
+        chunk = object_keys[start:start + DELETE_OBJECTS_MAX_KEYS]
+        result = s3.delete_objects(
+            Bucket=PHOTO_BUCKET,
+            Delete={"Objects": [{"Key": object_key} for object_key in chunk], "Quiet": True},
+        )
+        # Metadata is already gone; a failed object delete only leaves an orphan behind
+        for failure in result.get("Errors") or []:
+            print(f"bulk hard delete object delete failed: {failure.get('Key')} {failure.get('Code')}")
+
+
+def handler(event, context):
+    try:
+        user_id, auth_error = extract_user_id(event)
+        if auth_error:
+            return auth_error
+
+        body = json.loads(event.get("body") or "{}")
+        photo_ids, deleted_before, selection_error = parse_selection(body, allow_deleted_before=True)
+        if selection_error:
+            return error_response(400, selection_error)
+
+        selection, has_more = load_selection(dynamodb, PHOTOS_TABLE, user_id, photo_ids, deleted_before)
+        table = dynamodb.Table(PHOTOS_TABLE)
+
+        def delete_row(item):
+            # Selection reads are eventually consistent: a photo restored moments ago can
+            # still look trashed there, so the row only goes if it is still trashed now
+            try:
+                deleted = table.delete_item(
+                    Key={"UserId": user_id, "PhotoId": item["PhotoId"]},
+                    ConditionExpression="attribute_exists(DeletedAt)",
+                    ReturnValues="ALL_OLD",
+                )
+                return deleted.get("Attributes") or item, None
+            except table.meta.client.exceptions.ConditionalCheckFailedException:
+                return None, "photo is not deleted"
+            except Exception as delete_error:
+                print(f"bulk hard delete error for {item['PhotoId']}: {delete_error}")
+                return None, "internal server error"
+
+        eligible = [item for _, item in selection if item and item.get("DeletedAt")]
+        delete_results = dict(zip(
+            [item["PhotoId"] for item in eligible],
+            run_parallel(delete_row, eligible, BULK_WORKERS),
+        ))
+        doomed = [deleted for deleted, _ in delete_results.values() if deleted]
+
+        if doomed:
+            updated_at = updated_at_now()
+            refs_table = dynamodb.Table(OBJECT_REFS_TABLE)
+            index_table = dynamodb.Table(PHOTO_INDEX_TABLE)
+
+            # Without a transaction per photo, the row goes before its object reference:
+            # a failure in between leaves an extra reference (the object is kept), never
+            # a reference-free object that a surviving row still points at.
+            with index_table.batch_writer() as batch:
+                for item in doomed:
+                    batch.put_item(Item=tombstone_item(user_id, item["PhotoId"], updated_at))
+            sync_many_photo_postings(index_table, user_id, [(item["PhotoId"], item, None) for item in doomed])
+            bump_collection_version(dynamodb.Table(USERS_TABLE), user_id)
+
+            referenced = [item for item in doomed if item.get("ObjectKey")]
+            run_parallel(
+                lambda item: apply_ref_action(
+                    refs_table, remove_ref_action(OBJECT_REFS_TABLE, item["ObjectKey"], user_id, item["PhotoId"])
+                ),
+                referenced,
+                BULK_WORKERS,
+            )
+
+            # Delete from S3 only the objects no other photo references any more
+            object_keys = list(dict.fromkeys(item["ObjectKey"] for item in referenced))
+            claimed = run_parallel(lambda object_key: claim_unreferenced(refs_table, object_key), object_keys, BULK_WORKERS)
+            _delete_objects([object_key for object_key, unreferenced in zip(object_keys, claimed) if unreferenced])
+
+        results = []
+        for photo_id, item in selection:
+            if not item:
+                results.append({"photoId": photo_id, "error": "photo not found"})
+            elif photo_id not in delete_results:
+                results.append({"photoId": photo_id, "error": "photo must be soft deleted before hard delete"})
+            elif delete_results[photo_id][1]:
+                results.append({"photoId": photo_id, "error": delete_results[photo_id][1]})
+            else:
+                results.append({"photoId": photo_id, "message": "photo permanently deleted"})
+
+        return bulk_response(results, event, has_more)
+    except json.JSONDecodeError:
+        return error_response(400, "invalid JSON in request body")
+    except Exception as error:
+        print(f"bulk hard delete handler error: {error}")
+        return error_response(500, "internal server error")
@@ -0,0 +1,82 @@
+import json
+import os
+
+try:
+    from handlers.bulk_common import BULK_WORKERS, bulk_response, load_selection, parse_selection
+    from handlers.runtime import aws_resource, error_response, extract_user_id, run_parallel
+    from handlers.versions import bump_collection_version, updated_at_now
+except ImportError:
+    from bulk_common import BULK_WORKERS, bulk_response, load_selection, parse_selection  # type: ignore
+    from runtime import aws_resource, error_response, extract_user_id, run_parallel  # type: ignore
+    from versions import bump_collection_version, updated_at_now  # type: ignore
+
+dynamodb = aws_resource("dynamodb")
+
+PHOTOS_TABLE = os.environ["PHOTOS_TABLE"]
+USERS_TABLE = os.environ["USERS_TABLE"]
+
+
+def handler(event, context):
+    try:
+        user_id, auth_error = extract_user_id(event)
+        if auth_error:
+            return auth_error
+
+        body = json.loads(event.get("body") or "{}")
+        photo_ids, deleted_before, selection_error = parse_selection(body, allow_deleted_before=True)
+        if selection_error:
+            return error_response(400, selection_error)
+
+        table = dynamodb.Table(PHOTOS_TABLE)
+        selection, has_more = load_selection(dynamodb, PHOTOS_TABLE, user_id, photo_ids, deleted_before)
+
+        def restore(item):
+            update_expression = "SET UpdatedAt = :updated_at"
+            # Stamped per row: the change feed assumes UpdatedAt is taken just before the write
+            expression_attribute_values = {":updated_at": updated_at_now(), ":one": 1}
+            # Only finished uploads belong in ActiveIndex; a trashed PENDING row stays out of it
+            if item.get("Status") == "ACTIVE":
+                update_expression += ", ActiveUserId = :user_id"
+                expression_attribute_values[":user_id"] = user_id
+            update_expression += " REMOVE DeletedAt, DeletedBy, RetentionUntil ADD #version :one"
+            try:
+                table.update_item(
+                    Key={"UserId": user_id, "PhotoId": item["PhotoId"]},
+                    UpdateExpression=update_expression,
+                    ConditionExpression="attribute_exists(DeletedAt)",
+                    ExpressionAttributeNames={"#version": "Version"},
+                    ExpressionAttributeValues=expression_attribute_values,
+                )
+                return None
+            except table.meta.client.exceptions.ConditionalCheckFailedException:
+                return "photo is not deleted"
+            except Exception as update_error:
+                print(f"bulk restore error for {item['PhotoId']}: {update_error}")
+                return "internal server error"
+
+        eligible = [item for _, item in selection if item and item.get("DeletedAt")]
+        update_errors = dict(zip(
+            [item["PhotoId"] for item in eligible],
+            run_parallel(restore, eligible, BULK_WORKERS),
+        ))
+
+        results = []
+        for photo_id, item in selection:
+            if not item:
+                results.append({"photoId": photo_id, "error": "photo not found"})
+            elif photo_id not in update_errors:
+                results.append({"photoId": photo_id, "error": "photo is not deleted"})
+            elif update_errors[photo_id]:
+                results.append({"photoId": photo_id, "error": update_errors[photo_id]})
+            else:
+                results.append({"photoId": photo_id, "message": "photo restored"})
+
+        if any(error is None for error in update_errors.values()):
+            bump_collection_version(dynamodb.Table(USERS_TABLE), user_id)
+
+        return bulk_response(results, event, has_more)
+    except json.JSONDecodeError:
+        return error_response(400, "invalid JSON in request body")
+    except Exception as error:
+        print(f"bulk restore handler error: {error}")
+        return error_response(500, "internal server error")
@@ -0,0 +1,230 @@
+import base64
+import heapq
+import json
+import os
+from datetime import datetime, timedelta, timezone
+
+from boto3.dynamodb.conditions import Key
+
+try:
+    from handlers.photo_fields import photo_summary
+    from handlers.photo_index import TOMBSTONE_RETENTION_DAYS, TOMBSTONE_TERM, index_key
+    from handlers.presign import attach_thumbnail_urls, thumbnail_source_key
+    from handlers.runtime import aws_client, aws_resource, error_response, extract_user_id, json_response
+except ImportError:
+    from photo_fields import photo_summary  # type: ignore
+    from photo_index import TOMBSTONE_RETENTION_DAYS, TOMBSTONE_TERM, index_key  # type: ignore
+    from presign import attach_thumbnail_urls, thumbnail_source_key  # type: ignore
+    from runtime import aws_client, aws_resource, error_response, extract_user_id, json_response  # type: ignore
+
+dynamodb = aws_resource("dynamodb")
+s3 = aws_client("s3")
+
+PHOTOS_TABLE = os.environ["PHOTOS_TABLE"]
+PHOTO_BUCKET = os.environ["PHOTO_BUCKET"]
+PHOTO_INDEX_TABLE = os.environ["PHOTO_INDEX_TABLE"]
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 100
+UPDATED_AT_INDEX = "UpdatedAtIndex"
+# Writes stamp UpdatedAt just before they commit and the index is eventually
+# consistent, so the feed stops this far behind the clock; a write can then no
+# longer land behind a cursor the client already holds.
+SETTLE_SECONDS = 2
+# Sorts after "<UpdatedAt>#<PhotoId>" for every photo changed at that instant
+AFTER_INSTANT = "~"
+
+
+def _parse_limit(raw_limit):
+    if raw_limit is None:
+        return DEFAULT_LIMIT
+    try:
+        value = int(raw_limit)
+    except (TypeError, ValueError):
+        return None
+    if value < 1:
+        return None
+    return min(value, MAX_LIMIT)
+
+
+def _decode_cursor(cursor):
+    """Cursor payload: {"photos": [UpdatedAt, PhotoId], "tombstones": SortKey}; "" means from the start."""
+    if not cursor:
+        return None
+    try:
+        decoded = base64.urlsafe_b64decode(cursor.encode("utf-8")).decode("utf-8")
+        payload = json.loads(decoded)
+        updated_at, photo_id = payload["photos"]
+        tombstones = payload["tombstones"]
+        if not all(isinstance(value, str) for value in (updated_at, photo_id, tombstones)):
+            return None
+        return {"photos": (updated_at, photo_id), "tombstones": tombstones}
+    except Exception:
+        return None
+
+
+def _encode_cursor(position):
+    payload = {"photos": list(position["photos"]), "tombstones": position["tombstones"]}
+    return base64.urlsafe_b64encode(json.dumps(payload).encode("utf-8")).decode("utf-8")
+
+
+def _query_photo_changes(table, user_id, after, horizon, limit):
+    """Photo rows changed after `after` (UpdatedAt, PhotoId) up to the horizon, in UpdatedAt order.
+
+    Returns (entries, last_key) where entries are (UpdatedAt, position, item)
+    and last_key is where the index read stopped (None once it is exhausted).
+    """
+    updated_at, photo_id = after
+    if updated_at > horizon:
+        return [], None
+
+    key_condition = Key("UserId").eq(user_id)
+    if updated_at:
+        key_condition &= Key("UpdatedAt").between(updated_at, horizon)
+    else:
+        key_condition &= Key("UpdatedAt").lte(horizon)
+    query_args = {"IndexName": UPDATED_AT_INDEX, "KeyConditionExpression": key_condition, "Limit": limit}
+    if photo_id:
+        query_args["ExclusiveStartKey"] = {"UserId": user_id, "PhotoId": photo_id, "UpdatedAt": updated_at}
+
+    result = table.query(**query_args)
+    entries = []
+    for item in result.get("Items") or []:
+        # A cursor without a PhotoId has already delivered everything at its instant
+        if not photo_id and item["UpdatedAt"] == updated_at:
+            continue
+        entries.append((item["UpdatedAt"], (item["UpdatedAt"], item["PhotoId"]), item))
+
+    last_key = result.get("LastEvaluatedKey")
+    return entries, (last_key["UpdatedAt"], last_key["PhotoId"]) if last_key else None
+
+
+def _query_tombstones(index_table, user_id, after, horizon, limit):
+    """Hard-delete tombstones after the `after` sort key up to the horizon; same shape as above."""
+    upper = f"{horizon}{AFTER_INSTANT}"
+    if after > upper:
+        return [], None
+
+    key_condition = Key("IndexKey").eq(index_key(user_id, TOMBSTONE_TERM))
+    if after:
+        key_condition &= Key("SortKey").between(after, upper)
+    else:
+        key_condition &= Key("SortKey").lte(upper)
+
+    result = index_table.query(KeyConditionExpression=key_condition, Limit=limit)
+    entries = [
+        (item["UpdatedAt"], item["SortKey"], item)
+        for item in result.get("Items") or []
+        if item["SortKey"] != after
+    ]
+    last_key = result.get("LastEvaluatedKey")
+    return entries, last_key["SortKey"] if last_key else None
+
+
+def _advance(position, entries, consumed, last_key, exhausted_position):
+    """Where a stream's next read starts once `consumed` of its entries have been returned."""
+    if consumed < len(entries):
+        return entries[consumed - 1][1] if consumed else position
+    if last_key:
+        return last_key
+    return exhausted_position
+
+
+def _photo_change(item, thumbnail_entries):
+    change = {"photoId": item["PhotoId"], "updatedAt": item["UpdatedAt"]}
+    if item.get("DeletedAt"):
+        change["change"] = "trashed"
+        change["deletedAt"] = item.get("DeletedAt")
+        change["retentionUntil"] = item.get("RetentionUntil")
+    elif item.get("Status") in (None, "ACTIVE"):
+        change["change"] = "upsert"
+        change["photo"] = photo_summary(item)
+        thumbnail_entries.append((change["photo"], thumbnail_source_key(item)))
+    else:
+        # Re-initialized uploads leave the list until they complete again
+        change["change"] = "removed"
+    return change
+
+
+def handler(event, context):
+    try:
+        user_id, auth_error = extract_user_id(event)
+        if auth_error:
+            return auth_error
+
+        query_params = event.get("queryStringParameters") or {}
+        limit = _parse_limit(query_params.get("limit"))
+        if limit is None:
+            return error_response(400, "limit must be an integer between 1 and 100")
+
+        since = query_params.get("since")
+        position = _decode_cursor(since)
+        if since and not position:
+            return error_response(400, "since is not a valid cursor")
+
+        now = datetime.now(timezone.utc)
+        if position:
+            # Tombstones expire after the retention window; an older cursor could miss deletions
+            expired_before = (now - timedelta(days=TOMBSTONE_RETENTION_DAYS)).isoformat(timespec="microseconds")
+            started = [value for value in (position["photos"][0], position["tombstones"]) if value]
+            if started and min(started) < expired_before:
+                return error_response(410, "since cursor has expired; resync from GET /photos/changes without since")
+        else:
+            position = {"photos": ("", ""), "tombstones": ""}
+
+        horizon = (now - timedelta(seconds=SETTLE_SECONDS)).isoformat(timespec="microseconds")
+        photo_entries, photos_last_key = _query_photo_changes(
+            dynamodb.Table(PHOTOS_TABLE), user_id, position["photos"], horizon, limit
+        )
+        tombstone_entries, tombstones_last_key = _query_tombstones(
+            dynamodb.Table(PHOTO_INDEX_TABLE), user_id, position["tombstones"], horizon, limit
+        )
+
+        # Both streams are already in UpdatedAt order; take the oldest `limit` changes across them
+        merged = heapq.merge(
+            (("photo", entry) for entry in photo_entries),
+            (("tombstone", entry) for entry in tombstone_entries),
+            key=lambda tagged: tagged[1][0],
+        )
+        changes = []
+        thumbnail_entries = []
+        consumed = {"photo": 0, "tombstone": 0}
+        for stream, (_, _, item) in merged:
+            if len(changes) >= limit:
+                break
+            consumed[stream] += 1
+            if stream == "photo":
+                changes.append(_photo_change(item, thumbnail_entries))
+            else:
+                changes.append({"photoId": item["PhotoId"], "updatedAt": item["UpdatedAt"], "change": "removed"})
+
+        next_position = {
+            "photos": _advance(
+                position["photos"], photo_entries, consumed["photo"], photos_last_key, (horizon, "")
+            ),
+            "tombstones": _advance(
+                position["tombstones"], tombstone_entries, consumed["tombstone"], tombstones_last_key,
+                f"{horizon}{AFTER_INSTANT}",
+            ),
+        }
+        has_more = (
+            consumed["photo"] < len(photo_entries)
+            or consumed["tombstone"] < len(tombstone_entries)
+            or bool(photos_last_key)
+            or bool(tombstones_last_key)
+        )
+
+        if thumbnail_entries:
+            try:
+                attach_thumbnail_urls(s3, PHOTO_BUCKET, thumbnail_entries)
+            except Exception as thumbnail_error:
+                print(f"changes thumbnail URL generation error: {thumbnail_error}")
+
+        return json_response(200, {
+            "changes": changes,
+            "count": len(changes),
+            "cursor": _encode_cursor(next_position),
+            "hasMore": has_more,
+        }, event)
+    except Exception as error:
+        print(f"changes handler error: {error}")
+        return error_response(500, "internal server error")
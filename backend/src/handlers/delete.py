@@ -1,40 +1,28 @@
-import json
 import os
 from datetime import datetime, timezone, timedelta
 
-import boto3
+try:
+    from handlers.runtime import aws_resource, error_response, extract_user_id, json_response
+    from handlers.versions import bump_collection_version, updated_at_now
+except ImportError:
+    from runtime import aws_resource, error_response, extract_user_id, json_response  # type: ignore
+    from versions import bump_collection_version, updated_at_now  # type: ignore
 
-dynamodb = boto3.resource("dynamodb")
+dynamodb = aws_resource("dynamodb")
 
 PHOTOS_TABLE = os.environ["PHOTOS_TABLE"]
+USERS_TABLE = os.environ["USERS_TABLE"]
 DEFAULT_RETENTION_DAYS = 60
 
 def handler(event, context):
     try:
-        claims = (((event.get("requestContext") or {}).get("authorizer") or {}).get("jwt") or {}).get("claims") or {}
-        user_id = claims.get("sub")
-
-        if not user_id:
-            return {
-                "statusCode": 401,
-                "body": json.dumps({"error": "missing or invalid JWT subject claim"})
-            }
-
-        email_verified = claims.get("email_verified")
-        if isinstance(email_verified, str):
-            email_verified = email_verified.lower() == "true"
-        if email_verified is False:
-            return {
-                "statusCode": 403,
-                "body": json.dumps({"error": "email is not verified"})
-            }
+        user_id, auth_error = extract_user_id(event)
+        if auth_error:
+            return auth_error
 
         photo_id = event.get("pathParameters", {}).get("photoId")
         if not photo_id:
-            return {
-                "statusCode": 400,
-                "body": json.dumps({"error": "photoId is required"})
-            }
+            return error_response(400, "photoId is required")
 
         table = dynamodb.Table(PHOTOS_TABLE)
         
@@ -48,19 +36,13 @@ def handler(event, context):
         
         item = response.get("Item")
         if not item:
-            return {
-                "statusCode": 404,
-                "body": json.dumps({"error": "photo not found"})
-            }
+            return error_response(404, "photo not found")
         
         # Check if already deleted
         if item.get("DeletedAt"):
-            return {
-                "statusCode": 409,
-                "body": json.dumps({"error": "photo already deleted"})
-            }
+            return error_response(409, "photo already deleted")
         
-        # Soft delete: set DeletedAt, DeletedBy, and RetentionUntil
+        # Soft delete: set DeletedAt, DeletedBy, and RetentionUntil, and drop the row from ActiveIndex
         now = datetime.now(timezone.utc)
         retention_until = now + timedelta(days=DEFAULT_RETENTION_DAYS)
         
@@ -69,25 +51,26 @@ def handler(event, context):
                 "UserId": user_id,
                 "PhotoId": photo_id
             },
-            UpdateExpression="SET DeletedAt = :deleted_at, DeletedBy = :deleted_by, RetentionUntil = :retention_until",
+            UpdateExpression=(
+                "SET DeletedAt = :deleted_at, DeletedBy = :deleted_by, RetentionUntil = :retention_until, UpdatedAt = :updated_at "
+                "REMOVE ActiveUserId ADD #version :one"
+            ),
+            ExpressionAttributeNames={"#version": "Version"},
             ExpressionAttributeValues={
                 ":deleted_at": now.isoformat(),
                 ":deleted_by": user_id,
-                ":retention_until": retention_until.isoformat()
+                ":retention_until": retention_until.isoformat(),
+                ":updated_at": updated_at_now(),
+                ":one": 1,
             }
         )
+        bump_collection_version(dynamodb.Table(USERS_TABLE), user_id)
 
-        return {
-            "statusCode": 200,
-            "body": json.dumps({
-                "photoId": photo_id,
-                "deletedAt": now.isoformat(),
-                "retentionUntil": retention_until.isoformat()
-            })
-        }
+        return json_response(200, {
+            "photoId": photo_id,
+            "deletedAt": now.isoformat(),
+            "retentionUntil": retention_until.isoformat()
+        })
     except Exception as error:
         print(f"delete handler error: {error}")
-        return {
-            "statusCode": 500,
-            "body": json.dumps({"error": "internal server error"})
-        }
+        return error_response(500, "internal server error")
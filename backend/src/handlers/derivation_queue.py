@@ -0,0 +1,58 @@
+"""Queue that hands derivative work (thumbnail, EXIF date label) from upload-complete to the derive worker.
+
+Functions that enqueue send to the SQS queue named by DERIVATION_QUEUE_URL,
+which triggers derive_photo.handler with retries and a dead-letter queue. The
+variable is required there: without a queue, photos would stay PENDING forever.
+"""
+
+import json
+import os
+
+try:
+    from handlers.runtime import aws_client
+except ImportError:
+    from runtime import aws_client  # type: ignore
+
+DERIVATION_QUEUE_URL = os.environ.get("DERIVATION_QUEUE_URL", "")
+# SendMessageBatch limit
+SEND_BATCH_MAX = 10
+# Matches the queue's redrive maxReceiveCount; the worker marks a photo FAILED on the last attempt
+MAX_RECEIVE_COUNT = 5
+
+
+def derivation_message(user_id, photo_id):
+    return json.dumps({"userId": user_id, "photoId": photo_id}, sort_keys=True)
+
+
+class SqsDerivationQueue:
+    def __init__(self, queue_url):
+        self.queue_url = queue_url
+        self._sqs = aws_client("sqs")
+
+    def send(self, bodies):
+        for start in range(0, len(bodies), SEND_BATCH_MAX):
+            chunk = bodies[start:start + SEND_BATCH_MAX]
+            result = self._sqs.send_message_batch(
+                QueueUrl=self.queue_url,
+                Entries=[{"Id": str(position), "MessageBody": body} for position, body in enumerate(chunk)],
+            )
+            if result.get("Failed"):
+                raise RuntimeError(f"derivation enqueue failed: {result['Failed']}")
+
+
+_queue = None
+
+
+def derivation_queue():
+    global _queue
+    if _queue is None:
+        if not DERIVATION_QUEUE_URL:
+            raise RuntimeError("DERIVATION_QUEUE_URL is not set; derivations cannot be enqueued")
+        _queue = SqsDerivationQueue(DERIVATION_QUEUE_URL)
+    return _queue
+
+
+def enqueue_derivations(user_id, photo_ids):
+    photo_ids = list(photo_ids)
+    if photo_ids:
+        derivation_queue().send([derivation_message(user_id, photo_id) for photo_id in photo_ids])
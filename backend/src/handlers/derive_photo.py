@@ -0,0 +1,219 @@
+"""Derive worker: adds the rendition ladder and EXIF date label to photos that upload-complete marked ACTIVE.
+
+Triggered by the derivations SQS queue with partial batch responses, so one
+bad photo only retries itself. Messages are idempotent: a photo whose
+DerivationStatus is no longer PENDING is skipped.
+"""
+
+import json
+import os
+
+try:
+    from handlers.derivation_queue import MAX_RECEIVE_COUNT
+    from handlers.exif_reader import read_exif_block
+    from handlers.photo_index import sync_photo_postings
+    from handlers.renditions import PREVIEW_MAX_SIZE, RENDITION_SIZES, THUMBNAIL_MAX_SIZE, build_rendition_key
+    from handlers.runtime import aws_client, aws_resource
+    from handlers.upload_common import (
+        DERIVATION_FAILED,
+        DERIVATION_PENDING,
+        apply_derivatives,
+        derive_image,
+        extract_date_label_from_exif,
+        object_exists,
+        put_rendition,
+    )
+    from handlers.versions import bump_collection_version, updated_at_now
+except ImportError:
+    from derivation_queue import MAX_RECEIVE_COUNT  # type: ignore
+    from exif_reader import read_exif_block  # type: ignore
+    from photo_index import sync_photo_postings  # type: ignore
+    from renditions import PREVIEW_MAX_SIZE, RENDITION_SIZES, THUMBNAIL_MAX_SIZE, build_rendition_key  # type: ignore
+    from runtime import aws_client, aws_resource  # type: ignore
+    from upload_common import (  # type: ignore
+        DERIVATION_FAILED,
+        DERIVATION_PENDING,
+        apply_derivatives,
+        derive_image,
+        extract_date_label_from_exif,
+        object_exists,
+        put_rendition,
+    )
+    from versions import bump_collection_version, updated_at_now  # type: ignore
+
+s3 = aws_client("s3")
+dynamodb = aws_resource("dynamodb")
+
+PHOTO_BUCKET = os.environ["PHOTO_BUCKET"]
+PHOTOS_TABLE = os.environ["PHOTOS_TABLE"]
+PHOTO_INDEX_TABLE = os.environ["PHOTO_INDEX_TABLE"]
+USERS_TABLE = os.environ["USERS_TABLE"]
+# A concurrent edit moves the Version between our read and write; re-read this many times
+APPLY_ATTEMPTS = 3
+# Larger originals (multipart uploads allow very large panoramas) are not buffered and decoded:
+# a worker killed for memory or time never reports the failure, so the row would stay PENDING
+MAX_SOURCE_BYTES = 64 * 1024 * 1024
+
+
+def _load_source_bytes(object_key):
+    """The object's bytes, or None when it is over MAX_SOURCE_BYTES (the body is not read)."""
+    source_object = s3.get_object(Bucket=PHOTO_BUCKET, Key=object_key)
+    if source_object.get("ContentLength", 0) > MAX_SOURCE_BYTES:
+        source_object["Body"].close()
+        return None
+    return source_object.get("Body").read()
+
+
+def _client_thumbnail_key(item):
+    """ThumbnailKey when the uploader already put a thumbnail there (the desktop client does)."""
+    thumbnail_key = item.get("ThumbnailKey")
+    if thumbnail_key and object_exists(s3, PHOTO_BUCKET, thumbnail_key):
+        return thumbnail_key
+    return None
+
+
+def _put_renditions(user_id, photo_id, rendition_bytes):
+    """Store each rendition under its deterministic key; returns {long edge: key} for the ones written."""
+    renditions = {}
+    for size, data in sorted(rendition_bytes.items()):
+        key = build_rendition_key(user_id, photo_id, size)
+        try:
+            renditions[str(size)] = put_rendition(s3, PHOTO_BUCKET, key, data)
+        except Exception as upload_error:
+            print(f"derive {size}px rendition upload skipped for {photo_id}: {upload_error}")
+    return renditions
+
+
+def _derive_from_client_thumbnail(user_id, item, thumbnail_key):
+    """Date label and renditions without downloading the original, or None when a full read is needed."""
+    # The capture date sits in the original's first few KB
+    exif_bytes = read_exif_block(s3, PHOTO_BUCKET, item["ObjectKey"])
+    if exif_bytes is None:
+        return None
+    date_label = None
+    try:
+        date_label = extract_date_label_from_exif(exif_bytes)
+    except Exception as metadata_error:
+        print(f"derive metadata extraction skipped for {item['PhotoId']}: {metadata_error}")
+
+    # Ladder steps below the thumbnail are downscaled from the client's thumbnail
+    renditions = {str(THUMBNAIL_MAX_SIZE): thumbnail_key}
+    smaller_sizes = [size for size in RENDITION_SIZES if size < THUMBNAIL_MAX_SIZE]
+    if smaller_sizes:
+        try:
+            thumbnail_bytes = _load_source_bytes(thumbnail_key)
+            if thumbnail_bytes is None:
+                raise ValueError("client thumbnail is over the source size cap")
+            _, rendition_bytes = derive_image(thumbnail_bytes, smaller_sizes)
+            renditions.update(_put_renditions(user_id, item["PhotoId"], rendition_bytes))
+        except Exception as image_error:
+            print(f"derive small renditions skipped for {item['PhotoId']}: {image_error}")
+    return date_label, renditions
+
+
+def _date_label_from_header(item):
+    """Date label from a ranged read of the original's metadata, without downloading the rest."""
+    exif_bytes = read_exif_block(s3, PHOTO_BUCKET, item["ObjectKey"])
+    if exif_bytes is None:
+        return None
+    try:
+        return extract_date_label_from_exif(exif_bytes)
+    except Exception as metadata_error:
+        print(f"derive metadata extraction skipped for {item['PhotoId']}: {metadata_error}")
+        return None
+
+
+def _derive(user_id, item):
+    """Date label, thumbnail key and renditions for one photo; a missing source raises so the message retries."""
+    # Only a preview needs the original's pixels; without one, a client-uploaded thumbnail is enough
+    thumbnail_key = _client_thumbnail_key(item) if not PREVIEW_MAX_SIZE else None
+    if thumbnail_key:
+        derived = _derive_from_client_thumbnail(user_id, item, thumbnail_key)
+        if derived is not None:
+            date_label, renditions = derived
+            return date_label, thumbnail_key, renditions
+
+    # One GET and one decode serve the EXIF read and every rendition
+    source_bytes = _load_source_bytes(item["ObjectKey"])
+    if source_bytes is None:
+        print(f"derive renditions skipped for {item['PhotoId']}: original is over {MAX_SOURCE_BYTES} bytes")
+        return _date_label_from_header(item), None, {}
+    try:
+        date_label, rendition_bytes = derive_image(source_bytes, RENDITION_SIZES)
+    except Exception as image_error:
+        print(f"derive image processing skipped for {item['PhotoId']}: {image_error}")
+        return None, None, {}
+
+    renditions = _put_renditions(user_id, item["PhotoId"], rendition_bytes)
+    return date_label, renditions.get(str(THUMBNAIL_MAX_SIZE)), renditions
+
+
+def _read_pending(table, user_id, photo_id):
+    item = table.get_item(Key={"UserId": user_id, "PhotoId": photo_id}).get("Item")
+    # Deleted rows, rows not yet finalized and already-derived rows need no work
+    if not item or item.get("Status") != "ACTIVE" or item.get("DerivationStatus") != DERIVATION_PENDING:
+        return None
+    return item
+
+
+def _mark_failed(table, user_id, photo_id):
+    try:
+        table.update_item(
+            Key={"UserId": user_id, "PhotoId": photo_id},
+            UpdateExpression="SET DerivationStatus = :failed, UpdatedAt = :updated_at ADD #version :one",
+            ConditionExpression="DerivationStatus = :pending",
+            ExpressionAttributeNames={"#version": "Version"},
+            ExpressionAttributeValues={
+                ":failed": DERIVATION_FAILED,
+                ":pending": DERIVATION_PENDING,
+                ":updated_at": updated_at_now(),
+                ":one": 1,
+            },
+        )
+        bump_collection_version(dynamodb.Table(USERS_TABLE), user_id)
+    except table.meta.client.exceptions.ConditionalCheckFailedException:
+        pass
+
+
+def derive(user_id, photo_id):
+    """Derive one photo; returns True when the row changed."""
+    table = dynamodb.Table(PHOTOS_TABLE)
+    item = _read_pending(table, user_id, photo_id)
+    if not item:
+        return False
+
+    date_label, thumbnail_key, renditions = _derive(user_id, item)
+    for _ in range(APPLY_ATTEMPTS):
+        try:
+            updated = apply_derivatives(table, user_id, item, date_label, thumbnail_key, renditions)
+            break
+        except table.meta.client.exceptions.ConditionalCheckFailedException:
+            item = _read_pending(table, user_id, photo_id)
+            if not item:
+                return False
+    else:
+        raise RuntimeError(f"photo {photo_id} kept changing during derivation")
+
+    sync_photo_postings(dynamodb.Table(PHOTO_INDEX_TABLE), user_id, photo_id, item, updated)
+    bump_collection_version(dynamodb.Table(USERS_TABLE), user_id)
+    return True
+
+
+def handler(event, context):
+    failures = []
+    for record in event.get("Records") or []:
+        try:
+            message = json.loads(record["body"])
+            derive(message["userId"], message["photoId"])
+        except Exception as error:
+            print(f"derive error for message {record.get('messageId')}: {error}")
+            receive_count = int((record.get("attributes") or {}).get("ApproximateReceiveCount") or 1)
+            if receive_count >= MAX_RECEIVE_COUNT:
+                # Last delivery before the dead-letter queue: stop clients waiting on PENDING
+                try:
+                    message = json.loads(record["body"])
+                    _mark_failed(dynamodb.Table(PHOTOS_TABLE), message["userId"], message["photoId"])
+                except Exception as mark_error:
+                    print(f"derive failed-status update error: {mark_error}")
+            failures.append({"itemIdentifier": record["messageId"]})
+    return {"batchItemFailures": failures}
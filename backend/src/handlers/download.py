@@ -1,79 +1,64 @@
-import json
 import os
 
-import boto3
+try:
+    from handlers.renditions import parse_size_hint, rendition_for_size
+    from handlers.runtime import aws_client, aws_resource, error_response, extract_user_id, json_response
+except ImportError:
+    from renditions import parse_size_hint, rendition_for_size  # type: ignore
+    from runtime import aws_client, aws_resource, error_response, extract_user_id, json_response  # type: ignore
 
-s3 = boto3.client("s3")
-dynamodb = boto3.resource("dynamodb")
+s3 = aws_client("s3")
+dynamodb = aws_resource("dynamodb")
 
 PHOTO_BUCKET = os.environ["PHOTO_BUCKET"]
 PHOTOS_TABLE = os.environ["PHOTOS_TABLE"]
 
 def handler(event, context):
     try:
-        claims = (((event.get("requestContext") or {}).get("authorizer") or {}).get("jwt") or {}).get("claims") or {}
-        user_id = claims.get("sub")
-
-        if not user_id:
-            return {
-                "statusCode": 401,
-                "body": json.dumps({"error": "missing or invalid JWT subject claim"})
-            }
-
-        email_verified = claims.get("email_verified")
-        if isinstance(email_verified, str):
-            email_verified = email_verified.lower() == "true"
-        if email_verified is False:
-            return {
-                "statusCode": 403,
-                "body": json.dumps({"error": "email is not verified"})
-            }
+        user_id, auth_error = extract_user_id(event)
+        if auth_error:
+            return auth_error
 
         path_parameters = event.get("pathParameters") or {}
         photo_id = path_parameters.get("photoId")
 
         if not photo_id:
-            return {
-                "statusCode": 400,
-                "body": json.dumps({"error": "photoId path param is required"})
-            }
+            return error_response(400, "photoId path param is required")
+
+        size, size_error = parse_size_hint((event.get("queryStringParameters") or {}).get("size"))
+        if size_error:
+            return error_response(400, size_error)
 
         table = dynamodb.Table(PHOTOS_TABLE)
         result = table.get_item(Key={"UserId": user_id, "PhotoId": photo_id})
         item = result.get("Item")
 
         if not item:
-            return {
-                "statusCode": 404,
-                "body": json.dumps({"error": "photo not found"})
-            }
+            return error_response(404, "photo not found")
         
         # Check if photo is soft deleted
         if item.get("DeletedAt"):
-            return {
-                "statusCode": 404,
-                "body": json.dumps({"error": "photo not found"})
-            }
+            return error_response(404, "photo not found")
+
+        # Without a size hint, or when no rendition is big enough, the original is served
+        object_key, rendition_size = rendition_for_size(item, size) if size else (None, None)
+        if not object_key:
+            object_key = item["ObjectKey"]
 
         download_url = s3.generate_presigned_url(
             "get_object",
             Params={
                 "Bucket": PHOTO_BUCKET,
-                "Key": item["ObjectKey"]
+                "Key": object_key
             },
             ExpiresIn=3600
         )
 
-        return {
-            "statusCode": 200,
-            "body": json.dumps({
-                "downloadUrl": download_url,
-                "expiresInSeconds": 3600
-            })
-        }
+        return json_response(200, {
+            "downloadUrl": download_url,
+            "expiresInSeconds": 3600,
+            "renditionSize": rendition_size,
+        })
     except Exception as error:
         print(f"download handler error: {error}")
-        return {
-            "statusCode": 500,
-            "body": json.dumps({"error": "internal server error"})
-        }
+        return error_response(500, "internal server error")
@@ -0,0 +1,156 @@
+"""Read the EXIF block of an original with S3 ranged GETs instead of downloading the whole object.
+
+The first request asks for the leading 64 KB, which holds the metadata of
+almost every JPEG, PNG and TIFF. A longer APP1 segment, or a WebP whose EXIF
+chunk follows the image data, costs one more ranged GET for exactly the bytes
+still needed. read_exif_block() returns the raw EXIF (TIFF-structured) bytes,
+b"" when the file has no EXIF, or None when the format is not one it can walk
+or the metadata sits too deep; callers then fall back to a full read.
+"""
+
+from botocore.exceptions import ClientError
+
+INITIAL_RANGE_BYTES = 64 * 1024
+# Past this many bytes or requests, a full GET is the better deal
+MAX_METADATA_BYTES = 1024 * 1024
+MAX_RANGE_REQUESTS = 8
+EXIF_HEADER = b"Exif\x00\x00"
+
+JPEG_SOI = b"\xff\xd8"
+JPEG_APP1 = 0xE1
+# Start of scan and end of image: no metadata segments follow either
+JPEG_SOS = 0xDA
+JPEG_EOI = 0xD9
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+TIFF_HEADERS = (b"II*\x00", b"MM\x00*")
+WEBP_VP8X_EXIF_FLAG = 0x08
+
+
+class _MetadataTooDeep(Exception):
+    pass
+
+
+class _RangedObject:
+    """Byte access to an S3 object that fetches only the ranges asked for."""
+
+    def __init__(self, s3_client, bucket, object_key):
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.object_key = object_key
+        self.prefix = b""
+        self.size = None
+        self.requests = 0
+        self.bytes_read = 0
+
+    def _get(self, start, end):
+        if self.requests >= MAX_RANGE_REQUESTS or self.bytes_read + (end - start) > MAX_METADATA_BYTES:
+            raise _MetadataTooDeep()
+        self.requests += 1
+        try:
+            response = self.s3_client.get_object(Bucket=self.bucket, Key=self.object_key, Range=f"bytes={start}-{end - 1}")
+        except ClientError as error:
+            # Asking for bytes past the end of a small object
+            if error.response.get("Error", {}).get("Code") == "InvalidRange":
+                self.size = start
+                return b""
+            raise
+        content_range = response.get("ContentRange") or ""
+        if "/" in content_range and content_range.rsplit("/", 1)[1].isdigit():
+            self.size = int(content_range.rsplit("/", 1)[1])
+        data = response["Body"].read()
+        self.bytes_read += len(data)
+        return data
+
+    def read(self, start, end):
+        """Bytes [start, end), shorter only at the end of the object."""
+        if self.size is not None:
+            end = min(end, self.size)
+        if end <= len(self.prefix):
+            return self.prefix[start:end]
+        if start <= len(self.prefix):
+            # Extend the cached prefix; the first request always covers the leading 64 KB
+            fetch_end = max(end, INITIAL_RANGE_BYTES) if not self.prefix else end
+            self.prefix += self._get(len(self.prefix), fetch_end)
+            return self.prefix[start:end]
+        return self._get(start, end)
+
+
+def _strip_exif_header(block):
+    return block[len(EXIF_HEADER):] if block.startswith(EXIF_HEADER) else block
+
+
+def _jpeg_exif(source):
+    position = len(JPEG_SOI)
+    while True:
+        header = source.read(position, position + 4)
+        if len(header) < 2 or header[0] != 0xFF:
+            return b""
+        marker = header[1]
+        if marker == 0xFF:
+            # Fill byte before a marker
+            position += 1
+            continue
+        if marker in (JPEG_SOS, JPEG_EOI) or len(header) < 4:
+            return b""
+        segment_end = position + 2 + int.from_bytes(header[2:4], "big")
+        if marker == JPEG_APP1:
+            payload = source.read(position + 4, segment_end)
+            if payload.startswith(EXIF_HEADER):
+                return payload[len(EXIF_HEADER):]
+        position = segment_end
+
+
+def _png_exif(source):
+    position = len(PNG_SIGNATURE)
+    while True:
+        header = source.read(position, position + 8)
+        if len(header) < 8:
+            return b""
+        length = int.from_bytes(header[:4], "big")
+        chunk_type = header[4:8]
+        if chunk_type == b"eXIf":
+            return _strip_exif_header(source.read(position + 8, position + 8 + length))
+        if chunk_type in (b"IDAT", b"IEND"):
+            return b""
+        # Length, type, data and CRC
+        position += 12 + length
+
+
+def _webp_exif(source):
+    first_chunk = source.read(12, 30)
+    # Simple (VP8/VP8L) files carry no metadata; extended files flag EXIF in the VP8X header
+    if first_chunk[:4] != b"VP8X" or len(first_chunk) < 9 or not first_chunk[8] & WEBP_VP8X_EXIF_FLAG:
+        return b""
+    position = 12
+    while True:
+        header = source.read(position, position + 8)
+        if len(header) < 8:
+            return b""
+        length = int.from_bytes(header[4:8], "little")
+        if header[:4] == b"EXIF":
+            return _strip_exif_header(source.read(position + 8, position + 8 + length))
+        # Chunks are padded to an even length; the image data is skipped without being read
+        position += 8 + length + (length & 1)
+
+
+def read_exif_block(s3_client, bucket, object_key):
+    """Raw EXIF bytes of an S3 object, b"" if it has none, or None when a full read is needed.
+
+    S3 errors other than an out-of-range request are raised to the caller.
+    """
+    source = _RangedObject(s3_client, bucket, object_key)
+    try:
+        signature = source.read(0, len(PNG_SIGNATURE))
+        if signature.startswith(JPEG_SOI):
+            return _jpeg_exif(source)
+        if signature == PNG_SIGNATURE:
+            return _png_exif(source)
+        if signature[:4] == b"RIFF" and source.read(8, 12) == b"WEBP":
+            return _webp_exif(source)
+        if signature[:4] in TIFF_HEADERS:
+            # TIFF-based files (and most RAW formats) are EXIF structures themselves, with IFD0
+            # and the Exif IFD near the start; tags pointing past the prefix are skipped
+            return source.prefix
+    except _MetadataTooDeep:
+        return None
+    return None
@@ -1,47 +1,58 @@
-import json
 import os
-from datetime import datetime
 
-import boto3
+try:
+    from handlers.photo_fields import photo_summary
+    from handlers.presign import attach_thumbnail_urls, thumbnail_source_key
+    from handlers.renditions import display_source_key, parse_size_hint
+    from handlers.runtime import aws_client, aws_resource, error_response, extract_user_id, json_response
+    from handlers.versions import etag_headers, etag_matches, if_none_match, make_etag, not_modified_response, photo_version
+except ImportError:
+    from photo_fields import photo_summary  # type: ignore
+    from presign import attach_thumbnail_urls, thumbnail_source_key  # type: ignore
+    from renditions import display_source_key, parse_size_hint  # type: ignore
+    from runtime import aws_client, aws_resource, error_response, extract_user_id, json_response  # type: ignore
+    from versions import etag_headers, etag_matches, if_none_match, make_etag, not_modified_response, photo_version  # type: ignore
 
-dynamodb = boto3.resource("dynamodb")
-s3 = boto3.client("s3")
+dynamodb = aws_resource("dynamodb")
+s3 = aws_client("s3")
 
 PHOTOS_TABLE = os.environ["PHOTOS_TABLE"]
 PHOTO_BUCKET = os.environ["PHOTO_BUCKET"]
 
 
-def handler(event, context):
-    try:
-        # Extract JWT claims for authorization
-        claims = (((event.get("requestContext") or {}).get("authorizer") or {}).get("jwt") or {}).get("claims") or {}
-        user_id = claims.get("sub")
+def _photo_etag(user_id, photo_id, item, size):
+    return make_etag("photo", user_id, photo_id, photo_version(item), size or "", signed_urls=True)
 
-        if not user_id:
-            return {
-                "statusCode": 401,
-                "body": json.dumps({"error": "missing or invalid JWT subject claim"})
-            }
 
-        email_verified = claims.get("email_verified")
-        if isinstance(email_verified, str):
-            email_verified = email_verified.lower() == "true"
-        if email_verified is not True:
-            return {
-                "statusCode": 403,
-                "body": json.dumps({"error": "email is not verified"})
-            }
+def handler(event, context):
+    try:
+        user_id, auth_error = extract_user_id(event, require_verified_email=True)
+        if auth_error:
+            return auth_error
 
         # Get photoId from path parameters
         photo_id = event.get("pathParameters", {}).get("photoId")
         if not photo_id:
-            return {
-                "statusCode": 400,
-                "body": json.dumps({"error": "photoId is required"})
-            }
+            return error_response(400, "photoId is required")
+
+        size, size_error = parse_size_hint((event.get("queryStringParameters") or {}).get("size"))
+        if size_error:
+            return error_response(400, size_error)
 
         table = dynamodb.Table(PHOTOS_TABLE)
-        
+
+        # A conditional request reads only the status and version before deciding to send the photo
+        if if_none_match(event):
+            head = table.get_item(
+                Key={"UserId": user_id, "PhotoId": photo_id},
+                ProjectionExpression="PhotoId, #status, #version",
+                ExpressionAttributeNames={"#status": "Status", "#version": "Version"},
+            ).get("Item")
+            if head and head.get("Status") in (None, "ACTIVE"):
+                etag = _photo_etag(user_id, photo_id, head, size)
+                if etag_matches(event, etag):
+                    return not_modified_response(etag)
+
         # Get the photo record to verify ownership
         response = table.get_item(
             Key={
@@ -52,82 +63,23 @@ def handler(event, context):
         
         item = response.get("Item")
         if not item:
-            return {
-                "statusCode": 404,
-                "body": json.dumps({"error": "photo not found"})
-            }
+            return error_response(404, "photo not found")
         
         # Only return ACTIVE photos (filter out PENDING and DELETED)
         status = item.get("Status")
         if status and status != "ACTIVE":
-            return {
-                "statusCode": 404,
-                "body": json.dumps({"error": "photo not found"})
-            }
+            return error_response(404, "photo not found")
         
-        # Build response with full metadata (same format as list.py)
-        created_at = item.get("CreatedAt")
-        if isinstance(created_at, datetime):
-            created_at = created_at.isoformat()
-
-        file_name = item.get("OriginalFileName")
-        if not file_name:
-            object_key = item.get("ObjectKey") or ""
-            if object_key:
-                file_name = object_key.rsplit("/", 1)[-1]
-            else:
-                file_name = item.get("PhotoId")
-
-        photo = {
-            "photoId": item.get("PhotoId"),
-            "fileName": file_name,
-            "objectKey": item.get("ObjectKey"),
-            "contentType": item.get("ContentType"),
-            "createdAt": created_at,
-            "status": status or "ACTIVE",
-        }
-        
-        # Only include optional metadata fields if they have values
-        description = item.get("Description")
-        subjects = item.get("Subjects")
-        taken_at = item.get("TakenAt")
-        
-        if description:
-            photo["description"] = description
-        if subjects is not None:  # Include empty arrays
-            photo["subjects"] = subjects
-        if taken_at:
-            photo["takenAt"] = taken_at
-
-        thumbnail_key = item.get("ThumbnailKey")
-        thumbnail_source_key = thumbnail_key
-        content_type = str(item.get("ContentType") or "").lower()
-        if not thumbnail_source_key and content_type.startswith("image/"):
-            thumbnail_source_key = item.get("ObjectKey")
-
-        if thumbnail_key:
-            photo["thumbnailKey"] = thumbnail_key
+        # Same photo object as GET /photos
+        photo = photo_summary(item)
 
-        if thumbnail_source_key:
-            try:
-                photo["thumbnailUrl"] = s3.generate_presigned_url(
-                    "get_object",
-                    Params={
-                        "Bucket": PHOTO_BUCKET,
-                        "Key": thumbnail_source_key,
-                    },
-                    ExpiresIn=3600,
-                )
-            except Exception as thumbnail_error:
-                print(f"get_photo thumbnail URL generation error: {thumbnail_error}")
+        try:
+            source_key = thumbnail_source_key(item) if size is None else display_source_key(item, size)
+            attach_thumbnail_urls(s3, PHOTO_BUCKET, [(photo, source_key)])
+        except Exception as thumbnail_error:
+            print(f"get_photo thumbnail URL generation error: {thumbnail_error}")
 
-        return {
-            "statusCode": 200,
-            "body": json.dumps(photo)
-        }
+        return json_response(200, photo, headers=etag_headers(_photo_etag(user_id, photo_id, item, size)))
     except Exception as error:
         print(f"get_photo handler error: {error}")
-        return {
-            "statusCode": 500,
-            "body": json.dumps({"error": "internal server error"})
-        }
+        return error_response(500, "internal server error")
@@ -1,42 +1,36 @@
-import json
 import os
 
-import boto3
-from boto3.dynamodb.conditions import Attr
 from botocore.exceptions import ClientError
 
-s3 = boto3.client("s3")
-dynamodb = boto3.resource("dynamodb")
+try:
+    from handlers.object_refs import claim_unreferenced, remove_ref_action
+    from handlers.photo_index import sync_photo_postings, tombstone_action
+    from handlers.runtime import aws_client, aws_resource, error_response, extract_user_id, json_response
+    from handlers.versions import bump_collection_action, updated_at_now
+except ImportError:
+    from object_refs import claim_unreferenced, remove_ref_action  # type: ignore
+    from photo_index import sync_photo_postings, tombstone_action  # type: ignore
+    from runtime import aws_client, aws_resource, error_response, extract_user_id, json_response  # type: ignore
+    from versions import bump_collection_action, updated_at_now  # type: ignore
+
+s3 = aws_client("s3")
+dynamodb = aws_resource("dynamodb")
 
 PHOTO_BUCKET = os.environ["PHOTO_BUCKET"]
 PHOTOS_TABLE = os.environ["PHOTOS_TABLE"]
+PHOTO_INDEX_TABLE = os.environ["PHOTO_INDEX_TABLE"]
+OBJECT_REFS_TABLE = os.environ["OBJECT_REFS_TABLE"]
+USERS_TABLE = os.environ["USERS_TABLE"]
 
 def handler(event, context):
     try:
-        claims = (((event.get("requestContext") or {}).get("authorizer") or {}).get("jwt") or {}).get("claims") or {}
-        user_id = claims.get("sub")
-
-        if not user_id:
-            return {
-                "statusCode": 401,
-                "body": json.dumps({"error": "missing or invalid JWT subject claim"})
-            }
-
-        email_verified = claims.get("email_verified")
-        if isinstance(email_verified, str):
-            email_verified = email_verified.lower() == "true"
-        if email_verified is False:
-            return {
-                "statusCode": 403,
-                "body": json.dumps({"error": "email is not verified"})
-            }
+        user_id, auth_error = extract_user_id(event)
+        if auth_error:
+            return auth_error
 
         photo_id = event.get("pathParameters", {}).get("photoId")
         if not photo_id:
-            return {
-                "statusCode": 400,
-                "body": json.dumps({"error": "photoId is required"})
-            }
+            return error_response(400, "photoId is required")
 
         table = dynamodb.Table(PHOTOS_TABLE)
         
@@ -50,57 +44,52 @@ def handler(event, context):
         
         item = response.get("Item")
         if not item:
-            return {
-                "statusCode": 404,
-                "body": json.dumps({"error": "photo not found"})
-            }
+            return error_response(404, "photo not found")
         
         # Check if the photo is in deleted state
         if not item.get("DeletedAt"):
-            return {
-                "statusCode": 400,
-                "body": json.dumps({"error": "photo must be soft deleted before hard delete"})
-            }
+            return error_response(400, "photo must be soft deleted before hard delete")
         
         object_key = item.get("ObjectKey")
-        
-        # Delete from S3 if object key exists
+
+        # Delete the row, leave a tombstone for the change feed, bump the collection
+        # version and drop the object reference in one transaction
+        transact_items = [
+            {
+                "Delete": {
+                    "TableName": PHOTOS_TABLE,
+                    "Key": {"UserId": user_id, "PhotoId": photo_id},
+                    # A restore that lands after the read above cancels the transaction
+                    "ConditionExpression": "attribute_exists(DeletedAt)",
+                }
+            },
+            tombstone_action(PHOTO_INDEX_TABLE, user_id, photo_id, updated_at_now()),
+            bump_collection_action(USERS_TABLE, user_id),
+        ]
         if object_key:
-            shared_refs = table.scan(
-                FilterExpression=Attr("ObjectKey").eq(object_key) & ~(
-                    Attr("UserId").eq(user_id) & Attr("PhotoId").eq(photo_id)
-                ),
-                ProjectionExpression="UserId, PhotoId",
-            )
-            has_other_references = bool(shared_refs.get("Items"))
+            transact_items.append(remove_ref_action(OBJECT_REFS_TABLE, object_key, user_id, photo_id))
+        try:
+            dynamodb.meta.client.transact_write_items(TransactItems=transact_items)
+        except dynamodb.meta.client.exceptions.TransactionCanceledException:
+            if not table.get_item(Key={"UserId": user_id, "PhotoId": photo_id}, ConsistentRead=True).get("Item"):
+                return error_response(404, "photo not found")
+            return error_response(409, "photo is not deleted")
+        sync_photo_postings(dynamodb.Table(PHOTO_INDEX_TABLE), user_id, photo_id, item, None)
 
-            if not has_other_references:
-                try:
-                    s3.delete_object(Bucket=PHOTO_BUCKET, Key=object_key)
-                except ClientError as e:
-                    error_code = e.response.get("Error", {}).get("Code")
-                    # Continue even if object not found in S3 - cleanup metadata
-                    if error_code != "404" and error_code != "NoSuchKey":
-                        raise
-        
-        # Delete from DynamoDB
-        table.delete_item(
-            Key={
-                "UserId": user_id,
-                "PhotoId": photo_id
-            }
-        )
+        # Delete from S3 only once no other photo references the object
+        if object_key and claim_unreferenced(dynamodb.Table(OBJECT_REFS_TABLE), object_key):
+            try:
+                s3.delete_object(Bucket=PHOTO_BUCKET, Key=object_key)
+            except ClientError as e:
+                error_code = e.response.get("Error", {}).get("Code")
+                # Metadata is already gone; a missing object is fine
+                if error_code != "404" and error_code != "NoSuchKey":
+                    raise
 
-        return {
-            "statusCode": 200,
-            "body": json.dumps({
-                "photoId": photo_id,
-                "message": "photo permanently deleted"
-            })
-        }
+        return json_response(200, {
+            "photoId": photo_id,
+            "message": "photo permanently deleted"
+        })
     except Exception as error:
         print(f"hard delete handler error: {error}")
-        return {
-            "statusCode": 500,
-            "body": json.dumps({"error": "internal server error"})
-        }
+        return error_response(500, "internal server error")
@@ -1,18 +1,32 @@
 import base64
 import json
 import os
-from datetime import datetime
 
-import boto3
-from boto3.dynamodb.conditions import Key, Attr
+from boto3.dynamodb.conditions import Key
 
-dynamodb = boto3.resource("dynamodb")
-s3 = boto3.client("s3")
+try:
+    from handlers.photo_fields import PHOTO_FIELD_ATTRIBUTES, parse_fields, photo_summary, projection_args, select_fields
+    from handlers.presign import attach_thumbnail_urls, thumbnail_source_key
+    from handlers.renditions import display_source_key, parse_size_hint
+    from handlers.runtime import aws_client, aws_resource, error_response, extract_user_id, json_response
+    from handlers.versions import etag_headers, etag_matches, make_etag, not_modified_response, read_collection_version
+except ImportError:
+    from photo_fields import PHOTO_FIELD_ATTRIBUTES, parse_fields, photo_summary, projection_args, select_fields  # type: ignore
+    from presign import attach_thumbnail_urls, thumbnail_source_key  # type: ignore
+    from renditions import display_source_key, parse_size_hint  # type: ignore
+    from runtime import aws_client, aws_resource, error_response, extract_user_id, json_response  # type: ignore
+    from versions import etag_headers, etag_matches, make_etag, not_modified_response, read_collection_version  # type: ignore
+
+dynamodb = aws_resource("dynamodb")
+s3 = aws_client("s3")
 
 PHOTOS_TABLE = os.environ["PHOTOS_TABLE"]
 PHOTO_BUCKET = os.environ["PHOTO_BUCKET"]
+USERS_TABLE = os.environ["USERS_TABLE"]
 DEFAULT_LIMIT = 20
 MAX_LIMIT = 100
+ACTIVE_CREATED_AT_INDEX = "ActiveCreatedAtIndex"
+NEXT_TOKEN_KEYS = ("ActiveUserId", "CreatedAt", "UserId", "PhotoId")
 
 
 def _parse_limit(raw_limit):
@@ -33,7 +47,7 @@ def _decode_next_token(token):
     try:
         decoded = base64.urlsafe_b64decode(token.encode("utf-8")).decode("utf-8")
         payload = json.loads(decoded)
-        if "UserId" not in payload or "PhotoId" not in payload:
+        if any(key not in payload for key in NEXT_TOKEN_KEYS):
             return None
         return payload
     except Exception:
@@ -49,136 +63,85 @@ def _encode_next_token(last_key):
 
 def handler(event, context):
     try:
-        claims = (((event.get("requestContext") or {}).get("authorizer") or {}).get("jwt") or {}).get("claims") or {}
-        user_id = claims.get("sub")
-
-        if not user_id:
-            return {
-                "statusCode": 401,
-                "body": json.dumps({"error": "missing or invalid JWT subject claim"})
-            }
-
-        email_verified = claims.get("email_verified")
-        if isinstance(email_verified, str):
-            email_verified = email_verified.lower() == "true"
-        if email_verified is False:
-            return {
-                "statusCode": 403,
-                "body": json.dumps({"error": "email is not verified"})
-            }
+        user_id, auth_error = extract_user_id(event)
+        if auth_error:
+            return auth_error
 
         query_params = event.get("queryStringParameters") or {}
         limit = _parse_limit(query_params.get("limit"))
         if limit is None:
-            return {
-                "statusCode": 400,
-                "body": json.dumps({"error": "limit must be an integer between 1 and 100"})
-            }
+            return error_response(400, "limit must be an integer between 1 and 100")
 
         next_token = query_params.get("nextToken")
         exclusive_start_key = _decode_next_token(next_token)
         if next_token and not exclusive_start_key:
-            return {
-                "statusCode": 400,
-                "body": json.dumps({"error": "nextToken is invalid"})
-            }
+            return error_response(400, "nextToken is invalid")
+
+        try:
+            fields = parse_fields(query_params.get("fields"), PHOTO_FIELD_ATTRIBUTES)
+        except ValueError as fields_error:
+            return error_response(400, str(fields_error))
+        wants_thumbnail_urls = fields is None or "thumbnailUrl" in fields
+
+        # size=N asks for thumbnailUrl to point at the smallest rendition at least N pixels on its long edge
+        size, size_error = parse_size_hint(query_params.get("size"))
+        if size_error:
+            return error_response(400, size_error)
+
+        # Only the user's version item is read before deciding whether anything changed
+        etag = make_etag(
+            "list",
+            user_id,
+            read_collection_version(dynamodb.Table(USERS_TABLE), user_id),
+            limit,
+            next_token or "",
+            ",".join(sorted(fields)) if fields else "*",
+            size or "",
+            signed_urls=wants_thumbnail_urls,
+        )
+        if etag_matches(event, etag):
+            return not_modified_response(etag)
 
         table = dynamodb.Table(PHOTOS_TABLE)
 
+        # ActiveCreatedAtIndex only holds rows that carry ActiveUserId (completed, not
+        # deleted), so every item read here is returned, newest upload first.
         query_args = {
-            "KeyConditionExpression": Key("UserId").eq(user_id),
-            "FilterExpression": Attr("DeletedAt").not_exists(),
+            "IndexName": ACTIVE_CREATED_AT_INDEX,
+            "KeyConditionExpression": Key("ActiveUserId").eq(user_id),
             "Limit": limit,
             "ScanIndexForward": False,
+            **projection_args(fields, PHOTO_FIELD_ATTRIBUTES),
         }
         if exclusive_start_key:
-            if exclusive_start_key.get("UserId") != user_id:
-                return {
-                    "statusCode": 400,
-                    "body": json.dumps({"error": "nextToken does not belong to current user"})
-                }
+            if exclusive_start_key.get("ActiveUserId") != user_id or exclusive_start_key.get("UserId") != user_id:
+                return error_response(400, "nextToken does not belong to current user")
             query_args["ExclusiveStartKey"] = exclusive_start_key
 
         result = table.query(**query_args)
 
         items = result.get("Items") or []
         photos = []
+        thumbnail_entries = []
         for item in items:
-            # Filter out pending photos, but include items without Status for backward compatibility
-            status = item.get("Status")
-            if status and status != "ACTIVE":
-                continue
-            
-            created_at = item.get("CreatedAt")
-            if isinstance(created_at, datetime):
-                created_at = created_at.isoformat()
-
-            file_name = item.get("OriginalFileName")
-            if not file_name:
-                object_key = item.get("ObjectKey") or ""
-                if object_key:
-                    file_name = object_key.rsplit("/", 1)[-1]
-                else:
-                    file_name = item.get("PhotoId")
-
-            photo = {
-                "photoId": item.get("PhotoId"),
-                "fileName": file_name,
-                "objectKey": item.get("ObjectKey"),
-                "contentType": item.get("ContentType"),
-                "createdAt": created_at,
-                "status": status or "ACTIVE",
-            }
-            
-            # Only include optional metadata fields if they have values
-            description = item.get("Description")
-            subjects = item.get("Subjects")
-            taken_at = item.get("TakenAt")
-            
-            if description:
-                photo["description"] = description
-            if subjects is not None:  # Include empty arrays
-                photo["subjects"] = subjects
-            if taken_at:
-                photo["takenAt"] = taken_at
-
-            thumbnail_key = item.get("ThumbnailKey")
-            thumbnail_source_key = thumbnail_key
-            content_type = str(item.get("ContentType") or "").lower()
-            if not thumbnail_source_key and content_type.startswith("image/"):
-                thumbnail_source_key = item.get("ObjectKey")
-
-            if thumbnail_key:
-                photo["thumbnailKey"] = thumbnail_key
-
-            if thumbnail_source_key:
-                try:
-                    photo["thumbnailUrl"] = s3.generate_presigned_url(
-                        "get_object",
-                        Params={
-                            "Bucket": PHOTO_BUCKET,
-                            "Key": thumbnail_source_key,
-                        },
-                        ExpiresIn=3600,
-                    )
-                except Exception as thumbnail_error:
-                    print(f"list thumbnail URL generation error: {thumbnail_error}")
-            
+            photo = select_fields(photo_summary(item), fields)
             photos.append(photo)
+            thumbnail_entries.append((photo, thumbnail_source_key(item) if size is None else display_source_key(item, size)))
+
+        # One signing pass for the whole page rather than one botocore call per photo
+        if wants_thumbnail_urls:
+            try:
+                attach_thumbnail_urls(s3, PHOTO_BUCKET, thumbnail_entries)
+            except Exception as thumbnail_error:
+                print(f"list thumbnail URL generation error: {thumbnail_error}")
 
         new_next_token = _encode_next_token(result.get("LastEvaluatedKey"))
 
-        return {
-            "statusCode": 200,
-            "body": json.dumps({
-                "photos": photos,
-                "count": len(photos),
-                "nextToken": new_next_token,
-            })
-        }
+        return json_response(200, {
+            "photos": photos,
+            "count": len(photos),
+            "nextToken": new_next_token,
+        }, event, etag_headers(etag))
     except Exception as error:
         print(f"list handler error: {error}")
-        return {
-            "statusCode": 500,
-            "body": json.dumps({"error": "internal server error"})
-        }
+        return error_response(500, "internal server error")
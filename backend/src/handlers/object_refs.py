@@ -0,0 +1,53 @@
+def ref_member(user_id, photo_id):
+    return f"{user_id}#{photo_id}"
+
+
+def add_ref_action(table_name, object_key, user_id, photo_id):
+    """TransactWriteItems entry (for the resource client) recording (user, photo) as a referrer.
+
+    Referrers are kept as a string set rather than a bare counter so retried or
+    repeated upload-init calls for the same photo cannot inflate the count.
+    """
+    return {
+        "Update": {
+            "TableName": table_name,
+            "Key": {"ObjectKey": object_key},
+            "UpdateExpression": "ADD #refs :ref",
+            "ExpressionAttributeNames": {"#refs": "Refs"},
+            "ExpressionAttributeValues": {":ref": {ref_member(user_id, photo_id)}},
+        }
+    }
+
+
+def remove_ref_action(table_name, object_key, user_id, photo_id):
+    return {
+        "Update": {
+            "TableName": table_name,
+            "Key": {"ObjectKey": object_key},
+            "UpdateExpression": "DELETE #refs :ref",
+            "ExpressionAttributeNames": {"#refs": "Refs"},
+            "ExpressionAttributeValues": {":ref": {ref_member(user_id, photo_id)}},
+        }
+    }
+
+
+def claim_unreferenced(refs_table, object_key):
+    """Drop the ref record if no referrers remain; True means the caller may delete the object.
+
+    DynamoDB removes an empty set attribute, so a record without Refs has a count of zero.
+    """
+    try:
+        refs_table.delete_item(
+            Key={"ObjectKey": object_key},
+            ConditionExpression="attribute_not_exists(#refs)",
+            ExpressionAttributeNames={"#refs": "Refs"},
+        )
+        return True
+    except refs_table.meta.client.exceptions.ConditionalCheckFailedException:
+        return False
+
+
+def apply_ref_action(refs_table, action):
+    """Run an add/remove_ref_action entry as a standalone update_item (outside a transaction)."""
+    update = {name: value for name, value in action["Update"].items() if name != "TableName"}
+    refs_table.update_item(**update)
@@ -2,11 +2,20 @@ import json
 import os
 from datetime import datetime
 
-import boto3
+try:
+    from handlers.photo_index import sync_photo_postings
+    from handlers.runtime import aws_resource, error_response, extract_user_id, json_response
+    from handlers.versions import bump_collection_version, updated_at_now
+except ImportError:
+    from photo_index import sync_photo_postings  # type: ignore
+    from runtime import aws_resource, error_response, extract_user_id, json_response  # type: ignore
+    from versions import bump_collection_version, updated_at_now  # type: ignore
 
-dynamodb = boto3.resource("dynamodb")
+dynamodb = aws_resource("dynamodb")
 
 PHOTOS_TABLE = os.environ["PHOTOS_TABLE"]
+PHOTO_INDEX_TABLE = os.environ["PHOTO_INDEX_TABLE"]
+USERS_TABLE = os.environ["USERS_TABLE"]
 MAX_SUBJECTS = 50
 MAX_DESCRIPTION_LENGTH = 1000
 MAX_FILENAME_LENGTH = 255
@@ -54,37 +63,16 @@ def _validate_iso_date(date_str):
 
 def handler(event, context):
     try:
-        # Extract JWT claims for authorization
-        request_context = event.get("requestContext") or {}
-        authorizer = request_context.get("authorizer") or {}
-        jwt_data = authorizer.get("jwt") or {}
-        claims = jwt_data.get("claims") or {}
-        user_id = claims.get("sub")
-
-        if not user_id:
-            return {
-                "statusCode": 401,
-                "body": json.dumps({"error": "missing or invalid JWT subject claim"})
-            }
-
-        email_verified = claims.get("email_verified")
-        if isinstance(email_verified, str):
-            email_verified = email_verified.lower() == "true"
-        if email_verified is not True:
-            return {
-                "statusCode": 403,
-                "body": json.dumps({"error": "email is not verified"})
-            }
+        user_id, auth_error = extract_user_id(event, require_verified_email=True)
+        if auth_error:
+            return auth_error
 
         # Get photoId from path parameters
         path_params = event.get("pathParameters") or {}
         photo_id = path_params.get("photoId")
 
         if not photo_id:
-            return {
-                "statusCode": 400,
-                "body": json.dumps({"error": "photoId is required"})
-            }
+            return error_response(400, "photoId is required")
 
         # Parse request body
         body = json.loads(event.get("body") or "{}")
@@ -97,10 +85,7 @@ def handler(event, context):
 
         # Validate at least one field is provided
         if file_name is None and description is None and subjects is None and taken_at is None:
-            return {
-                "statusCode": 400,
-                "body": json.dumps({"error": "at least one field must be provided"})
-            }
+            return error_response(400, "at least one field must be provided")
 
         # Build update expression
         update_parts = []
@@ -110,21 +95,12 @@ def handler(event, context):
         # Validate and add fileName
         if file_name is not None:
             if not isinstance(file_name, str):
-                return {
-                    "statusCode": 400,
-                    "body": json.dumps({"error": "fileName must be a string"})
-                }
+                return error_response(400, "fileName must be a string")
             file_name = file_name.strip()
             if not file_name:
-                return {
-                    "statusCode": 400,
-                    "body": json.dumps({"error": "fileName cannot be empty"})
-                }
+                return error_response(400, "fileName cannot be empty")
             if len(file_name) > MAX_FILENAME_LENGTH:
-                return {
-                    "statusCode": 400,
-                    "body": json.dumps({"error": f"fileName exceeds maximum length of {MAX_FILENAME_LENGTH}"})
-                }
+                return error_response(400, f"fileName exceeds maximum length of {MAX_FILENAME_LENGTH}")
             update_parts.append("#fileName = :fileName")
             expr_names["#fileName"] = "OriginalFileName"
             expr_values[":fileName"] = file_name
@@ -132,21 +108,12 @@ def handler(event, context):
         # Validate and add description
         if description is not None:
             if not isinstance(description, str):
-                return {
-                    "statusCode": 400,
-                    "body": json.dumps({"error": "description must be a string"})
-                }
+                return error_response(400, "description must be a string")
             description = description.strip()
             if not description:
-                return {
-                    "statusCode": 400,
-                    "body": json.dumps({"error": "description cannot be empty"})
-                }
+                return error_response(400, "description cannot be empty")
             if len(description) > MAX_DESCRIPTION_LENGTH:
-                return {
-                    "statusCode": 400,
-                    "body": json.dumps({"error": f"description exceeds maximum length of {MAX_DESCRIPTION_LENGTH}"})
-                }
+                return error_response(400, f"description exceeds maximum length of {MAX_DESCRIPTION_LENGTH}")
             update_parts.append("#description = :description")
             expr_names["#description"] = "Description"
             expr_values[":description"] = description
@@ -155,10 +122,7 @@ def handler(event, context):
         if subjects is not None:
             sanitized_subjects = _sanitize_subjects(subjects)
             if sanitized_subjects is None:
-                return {
-                    "statusCode": 400,
-                    "body": json.dumps({"error": "subjects must be an array of strings"})
-                }
+                return error_response(400, "subjects must be an array of strings")
             # Allow empty list to clear subjects
             update_parts.append("#subjects = :subjects")
             expr_names["#subjects"] = "Subjects"
@@ -167,20 +131,18 @@ def handler(event, context):
         # Validate and add takenAt
         if taken_at is not None:
             if not _validate_iso_date(taken_at):
-                return {
-                    "statusCode": 400,
-                    "body": json.dumps({"error": "takenAt must be a valid ISO 8601 datetime string"})
-                }
+                return error_response(400, "takenAt must be a valid ISO 8601 datetime string")
             update_parts.append("#takenAt = :takenAt")
             expr_names["#takenAt"] = "TakenAt"
             expr_values[":takenAt"] = taken_at
 
         # Check if any updates to perform
         if not update_parts:
-            return {
-                "statusCode": 400,
-                "body": json.dumps({"error": "no valid fields to update"})
-            }
+            return error_response(400, "no valid fields to update")
+
+        update_parts.append("#updatedAt = :updatedAt")
+        expr_names["#updatedAt"] = "UpdatedAt"
+        expr_values[":updatedAt"] = updated_at_now()
 
         # Update the photo metadata with ownership check
         table = dynamodb.Table(PHOTOS_TABLE)
@@ -192,14 +154,27 @@ def handler(event, context):
                     "UserId": user_id,
                     "PhotoId": photo_id
                 },
-                UpdateExpression="SET " + ", ".join(update_parts),
-                ExpressionAttributeNames=expr_names,
-                ExpressionAttributeValues=expr_values,
+                UpdateExpression="SET " + ", ".join(update_parts) + " ADD #version :one",
+                ExpressionAttributeNames={**expr_names, "#version": "Version"},
+                ExpressionAttributeValues={**expr_values, ":one": 1},
                 ConditionExpression="attribute_exists(UserId)",
-                ReturnValues="ALL_NEW"
+                ReturnValues="ALL_OLD"
             )
-            
-            updated_item = response.get("Attributes", {})
+
+            # ALL_OLD lets the search index drop stale terms; the new image is rebuilt locally
+            previous_item = response.get("Attributes", {})
+            updated_item = dict(previous_item)
+            for placeholder, attribute_name in expr_names.items():
+                updated_item[attribute_name] = expr_values[":" + placeholder[1:]]
+
+            sync_photo_postings(
+                dynamodb.Table(PHOTO_INDEX_TABLE),
+                user_id,
+                photo_id,
+                previous_item,
+                updated_item,
+            )
+            bump_collection_version(dynamodb.Table(USERS_TABLE), user_id)
             
             # Build response with only non-null fields for consistency with list endpoint
             result = {"photoId": photo_id}
@@ -213,24 +188,12 @@ def handler(event, context):
             if updated_item.get("TakenAt"):
                 result["takenAt"] = updated_item.get("TakenAt")
             
-            return {
-                "statusCode": 200,
-                "body": json.dumps(result)
-            }
+            return json_response(200, result)
         except dynamodb.meta.client.exceptions.ConditionalCheckFailedException:
-            return {
-                "statusCode": 404,
-                "body": json.dumps({"error": "photo not found"})
-            }
+            return error_response(404, "photo not found")
 
     except json.JSONDecodeError:
-        return {
-            "statusCode": 400,
-            "body": json.dumps({"error": "invalid JSON in request body"})
-        }
+        return error_response(400, "invalid JSON in request body")
     except Exception as error:
         print(f"patch_photo handler error: {error}")
-        return {
-            "statusCode": 500,
-            "body": json.dumps({"error": "internal server error"})
-        }
+        return error_response(500, "internal server error")
@@ -0,0 +1,115 @@
+"""Sparse fieldsets for the photo listing endpoints (`fields=photoId,contentHash`).
+
+Each response field maps to the item attributes it is built from, so a
+request for a subset of fields reads only those attributes and the handler
+can skip work (such as presigning thumbnails) for fields nobody asked for.
+"""
+
+from datetime import datetime
+
+PHOTO_FIELD_ATTRIBUTES = {
+    "photoId": ("PhotoId",),
+    "fileName": ("OriginalFileName", "ObjectKey", "PhotoId"),
+    "objectKey": ("ObjectKey",),
+    "contentType": ("ContentType",),
+    "contentHash": ("ContentHash",),
+    "createdAt": ("CreatedAt",),
+    "status": ("Status",),
+    "description": ("Description",),
+    "subjects": ("Subjects",),
+    "takenAt": ("TakenAt",),
+    "thumbnailKey": ("ThumbnailKey",),
+    "thumbnailUrl": ("ThumbnailKey", "Renditions", "ObjectKey", "ContentType"),
+    "derivationStatus": ("DerivationStatus",),
+}
+
+TRASH_FIELD_ATTRIBUTES = {
+    "photoId": ("PhotoId",),
+    "fileName": ("OriginalFileName", "ObjectKey", "PhotoId"),
+    "objectKey": ("ObjectKey",),
+    "contentType": ("ContentType",),
+    "contentHash": ("ContentHash",),
+    "createdAt": ("CreatedAt",),
+    "deletedAt": ("DeletedAt",),
+    "deletedBy": ("DeletedBy",),
+    "retentionUntil": ("RetentionUntil",),
+}
+
+
+def parse_fields(raw_fields, field_attributes):
+    """Parse a comma-separated fields value into a set; None means every field.
+
+    Raises ValueError with a client-facing message for empty or unknown fields.
+    """
+    if raw_fields is None:
+        return None
+
+    fields = {name.strip() for name in str(raw_fields).split(",") if name.strip()}
+    if not fields:
+        raise ValueError("fields must name at least one field")
+
+    unknown = sorted(fields - set(field_attributes))
+    if unknown:
+        raise ValueError(f"fields contains unknown field '{unknown[0]}'")
+    return fields
+
+
+def projection_args(fields, field_attributes, extra_attributes=()):
+    """Query/GetItem kwargs that read only the attributes `fields` needs; {} when every field is wanted."""
+    if fields is None:
+        return {}
+
+    attributes = set(extra_attributes)
+    for field in fields:
+        attributes.update(field_attributes[field])
+
+    names = {f"#f{position}": attribute for position, attribute in enumerate(sorted(attributes))}
+    return {
+        "ProjectionExpression": ", ".join(names),
+        "ExpressionAttributeNames": names,
+    }
+
+
+def photo_summary(item):
+    """The photo object GET /photos returns for an item (thumbnailUrl is attached separately)."""
+    created_at = item.get("CreatedAt")
+    if isinstance(created_at, datetime):
+        created_at = created_at.isoformat()
+
+    file_name = item.get("OriginalFileName")
+    if not file_name:
+        object_key = item.get("ObjectKey") or ""
+        if object_key:
+            file_name = object_key.rsplit("/", 1)[-1]
+        else:
+            file_name = item.get("PhotoId")
+
+    photo = {
+        "photoId": item.get("PhotoId"),
+        "fileName": file_name,
+        "objectKey": item.get("ObjectKey"),
+        "contentType": item.get("ContentType"),
+        "createdAt": created_at,
+        "status": item.get("Status") or "ACTIVE",
+    }
+
+    # Only include optional metadata fields if they have values
+    if item.get("Description"):
+        photo["description"] = item["Description"]
+    if item.get("Subjects") is not None:  # Include empty arrays
+        photo["subjects"] = item["Subjects"]
+    if item.get("TakenAt"):
+        photo["takenAt"] = item["TakenAt"]
+    if item.get("ThumbnailKey"):
+        photo["thumbnailKey"] = item["ThumbnailKey"]
+    if item.get("ContentHash"):
+        photo["contentHash"] = item["ContentHash"]
+    if item.get("DerivationStatus"):
+        photo["derivationStatus"] = item["DerivationStatus"]
+    return photo
+
+
+def select_fields(photo, fields):
+    if fields is None:
+        return photo
+    return {name: value for name, value in photo.items() if name in fields}
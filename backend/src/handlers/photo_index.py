@@ -0,0 +1,207 @@
+import time
+
+NGRAM_SIZE = 3
+NGRAM_TERM_PREFIX = "g:"
+LABEL_TERM_PREFIX = "l:"
+# Hard-deleted photos leave a tombstone in this partition, sorted "<UpdatedAt>#<PhotoId>",
+# so GET /photos/changes can report the deletion; the table's TTL drops it later.
+TOMBSTONE_TERM = "d:"
+TOMBSTONE_RETENTION_DAYS = 30
+MAX_QUERY_NGRAMS = 8
+BATCH_GET_MAX_KEYS = 100
+BATCH_GET_MAX_ATTEMPTS = 5
+
+
+def index_key(user_id, term):
+    return f"{user_id}#{term}"
+
+
+def display_file_name(item):
+    file_name = item.get("OriginalFileName")
+    if file_name:
+        return file_name
+
+    object_key = item.get("ObjectKey") or ""
+    if object_key:
+        return object_key.rsplit("/", 1)[-1]
+    return item.get("PhotoId")
+
+
+def normalize_text(value):
+    if not isinstance(value, str):
+        return ""
+    return value.lower()
+
+
+def ngrams(text):
+    if len(text) < NGRAM_SIZE:
+        return set()
+    return {text[i:i + NGRAM_SIZE] for i in range(len(text) - NGRAM_SIZE + 1)}
+
+
+def normalize_label(value):
+    if not isinstance(value, str):
+        return None
+    cleaned = value.strip().lower()
+    return cleaned or None
+
+
+def label_term(label):
+    return f"{LABEL_TERM_PREFIX}{label}"
+
+
+def _searchable_values(item):
+    values = [display_file_name(item), item.get("PhotoId")]
+    for subject in item.get("Subjects") or []:
+        if isinstance(subject, str):
+            values.append(subject)
+    return values
+
+
+def index_terms_for_photo(item):
+    if not item:
+        return set()
+
+    terms = set()
+    for value in _searchable_values(item):
+        for gram in ngrams(normalize_text(value)):
+            terms.add(f"{NGRAM_TERM_PREFIX}{gram}")
+
+    # Whole-label postings back album membership (label -> PhotoId)
+    for subject in item.get("Subjects") or []:
+        label = normalize_label(subject)
+        if label:
+            terms.add(label_term(label))
+    return terms
+
+
+def query_terms(search_lower):
+    """Pick a covering set of query trigrams; candidates are verified, so a subset is enough.
+
+    Every substring match contains all of the query's trigrams, so the posting
+    intersection never drops a real hit. Non-overlapping grams (plus the tail gram)
+    keep long queries from loading one posting list per character.
+    """
+    text = normalize_text(search_lower)
+    if len(text) < NGRAM_SIZE:
+        return set()
+
+    positions = list(range(0, len(text) - NGRAM_SIZE + 1, NGRAM_SIZE))
+    tail = len(text) - NGRAM_SIZE
+    if positions[-1] != tail:
+        positions.append(tail)
+    if len(positions) > MAX_QUERY_NGRAMS:
+        step = len(positions) / MAX_QUERY_NGRAMS
+        positions = [positions[int(i * step)] for i in range(MAX_QUERY_NGRAMS)]
+
+    return {f"{NGRAM_TERM_PREFIX}{text[i:i + NGRAM_SIZE]}" for i in positions}
+
+
+def matches_search(item, search_lower):
+    for value in _searchable_values(item):
+        if value and search_lower in value.lower():
+            return True
+    return False
+
+
+def sync_photo_postings(index_table, user_id, photo_id, previous_item, current_item):
+    """Bring the photo's posting entries in line with its current searchable fields."""
+    sync_many_photo_postings(index_table, user_id, [(photo_id, previous_item, current_item)])
+
+
+def sync_many_photo_postings(index_table, user_id, changes):
+    """sync_photo_postings for many (photo_id, previous_item, current_item) changes through one batch writer."""
+    puts = []
+    deletes = []
+    for photo_id, previous_item, current_item in changes:
+        previous_terms = index_terms_for_photo(previous_item)
+        current_terms = index_terms_for_photo(current_item)
+        puts.extend((index_key(user_id, term), photo_id) for term in sorted(current_terms - previous_terms))
+        deletes.extend((index_key(user_id, term), photo_id) for term in sorted(previous_terms - current_terms))
+    if not puts and not deletes:
+        return
+
+    with index_table.batch_writer() as batch:
+        for posting_key, photo_id in puts:
+            batch.put_item(Item={"IndexKey": posting_key, "SortKey": photo_id})
+        for posting_key, photo_id in deletes:
+            batch.delete_item(Key={"IndexKey": posting_key, "SortKey": photo_id})
+
+
+def tombstone_sort_key(updated_at, photo_id):
+    return f"{updated_at}#{photo_id}"
+
+
+def tombstone_item(user_id, photo_id, updated_at):
+    """Change-feed record of a hard delete; expires with the tombstone retention window."""
+    return {
+        "IndexKey": index_key(user_id, TOMBSTONE_TERM),
+        "SortKey": tombstone_sort_key(updated_at, photo_id),
+        "PhotoId": photo_id,
+        "UpdatedAt": updated_at,
+        "ExpiresAt": int(time.time()) + TOMBSTONE_RETENTION_DAYS * 86400,
+    }
+
+
+def tombstone_action(table_name, user_id, photo_id, updated_at):
+    """TransactWriteItems Put (for the resource client) recording a hard delete for the change feed."""
+    return {"Put": {"TableName": table_name, "Item": tombstone_item(user_id, photo_id, updated_at)}}
+
+
+def load_posting_list(index_table, user_id, term):
+    photo_ids = set()
+    query_args = {
+        "KeyConditionExpression": "IndexKey = :indexKey",
+        "ExpressionAttributeValues": {":indexKey": index_key(user_id, term)},
+        "ProjectionExpression": "SortKey",
+    }
+    while True:
+        result = index_table.query(**query_args)
+        for entry in result.get("Items") or []:
+            photo_ids.add(entry["SortKey"])
+        last_key = result.get("LastEvaluatedKey")
+        if not last_key:
+            return photo_ids
+        query_args["ExclusiveStartKey"] = last_key
+
+
+def intersect_postings(index_table, user_id, terms):
+    """Intersect posting lists, smallest first, so the candidate set only shrinks."""
+    postings = [load_posting_list(index_table, user_id, term) for term in terms]
+    if not postings:
+        return set()
+
+    postings.sort(key=len)
+    candidates = set(postings[0])
+    for photo_ids in postings[1:]:
+        if not candidates:
+            break
+        candidates &= photo_ids
+    return candidates
+
+
+def batch_get_photos(dynamodb, table_name, user_id, photo_ids, projection=None):
+    """BatchGetItem the given photos, retrying unprocessed keys; returns {PhotoId: item}.
+
+    projection takes ProjectionExpression/ExpressionAttributeNames kwargs and
+    must read PhotoId.
+    """
+    found = {}
+    photo_ids = list(photo_ids)
+    for start in range(0, len(photo_ids), BATCH_GET_MAX_KEYS):
+        chunk = photo_ids[start:start + BATCH_GET_MAX_KEYS]
+        request_items = {
+            table_name: {"Keys": [{"UserId": user_id, "PhotoId": photo_id} for photo_id in chunk], **(projection or {})}
+        }
+        attempts = 0
+        while request_items and attempts < BATCH_GET_MAX_ATTEMPTS:
+            if attempts:
+                time.sleep(0.05 * (2 ** attempts))
+            attempts += 1
+            result = dynamodb.batch_get_item(RequestItems=request_items)
+            for item in (result.get("Responses") or {}).get(table_name) or []:
+                found[item["PhotoId"]] = item
+            request_items = result.get("UnprocessedKeys") or {}
+        if request_items:
+            raise RuntimeError("batch_get_item left unprocessed keys after retries")
+    return found
@@ -0,0 +1,213 @@
+import base64
+import hashlib
+import hmac
+from urllib.parse import parse_qsl, quote, urlsplit
+
+SIGV4_ALGORITHM = "AWS4-HMAC-SHA256"
+SIGV4_SIGNATURE_PARAM = "X-Amz-Signature"
+SIGV2_SIGNATURE_PARAM = "Signature"
+
+
+def _botocore_presign(s3_client, bucket, key, expires_in, content_type=None):
+    """GET URL by default; a content_type makes it a PUT URL for uploading that type."""
+    if content_type is None:
+        return s3_client.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": bucket, "Key": key},
+            ExpiresIn=expires_in,
+        )
+    return s3_client.generate_presigned_url(
+        "put_object",
+        Params={"Bucket": bucket, "Key": key, "ContentType": content_type},
+        ExpiresIn=expires_in,
+    )
+
+
+def _frozen_credentials(s3_client):
+    credentials = s3_client._get_credentials()
+    if credentials is None:
+        return None
+    return credentials.get_frozen_credentials()
+
+
+def _hmac_sha256(key, message):
+    return hmac.new(key, message.encode("utf-8"), hashlib.sha256).digest()
+
+
+class _BatchSigner:
+    """Re-signs a botocore-generated template URL for other keys in the same bucket.
+
+    botocore signs one URL per batch, which fixes the host, addressing style,
+    signature version, timestamp and credentials. Every other URL in the batch
+    differs from it only in the object path and the signature, so the signing
+    key (SigV4) or HMAC state (SigV2) is derived once and reused per key.
+    """
+
+    def __init__(self, template_url, bucket, key, credentials, content_type=None):
+        parts = urlsplit(template_url)
+        # PUT URLs are signed for one Content-Type, which the uploader must send
+        self._method = "GET" if content_type is None else "PUT"
+        self._content_type = content_type or ""
+        quoted_key = quote(key, safe="/~")
+        if not parts.path.endswith("/" + quoted_key):
+            raise ValueError("template path does not end with the object key")
+
+        self._base = f"{parts.scheme}://{parts.netloc}{parts.path[:-len(quoted_key)]}"
+        self._path_prefix = parts.path[:-len(quoted_key)]
+        self._host = parts.netloc
+        self._bucket = bucket
+        self._raw_params = parts.query.split("&")
+        params = parse_qsl(parts.query, keep_blank_values=True)
+        param_map = dict(params)
+
+        if param_map.get("X-Amz-Algorithm") == SIGV4_ALGORITHM:
+            self._init_sigv4(param_map, credentials)
+        elif SIGV2_SIGNATURE_PARAM in param_map and "AWSAccessKeyId" in param_map:
+            self._init_sigv2(param_map, credentials)
+        else:
+            raise ValueError("unsupported presigned URL format")
+
+        self._signature_index = next(
+            index for index, raw in enumerate(self._raw_params) if raw.startswith(f"{self._signature_param}=")
+        )
+
+    def _init_sigv4(self, param_map, credentials):
+        access_key, date, region, service, _ = param_map["X-Amz-Credential"].split("/")
+        if access_key != credentials.access_key:
+            raise ValueError("template was not signed with the current credentials")
+        signed_headers = param_map.get("X-Amz-SignedHeaders")
+        if signed_headers == "host":
+            canonical_headers = f"host:{self._host}\n"
+        elif signed_headers == "content-type;host" and self._content_type:
+            canonical_headers = f"content-type:{self._content_type}\nhost:{self._host}\n"
+        else:
+            raise ValueError("template signs headers the batch signer does not reproduce")
+
+        self._signature_param = SIGV4_SIGNATURE_PARAM
+        scope = f"{date}/{region}/{service}/aws4_request"
+        canonical_query = "&".join(
+            f"{quote(name, safe='-_.~')}={quote(value, safe='-_.~')}"
+            for name, value in sorted(param_map.items())
+            if name != SIGV4_SIGNATURE_PARAM
+        )
+        self._canonical_suffix = f"\n{canonical_query}\n{canonical_headers}\n{signed_headers}\nUNSIGNED-PAYLOAD"
+        self._string_to_sign_prefix = f"{SIGV4_ALGORITHM}\n{param_map['X-Amz-Date']}\n{scope}\n"
+
+        signing_key = _hmac_sha256(f"AWS4{credentials.secret_key}".encode("utf-8"), date)
+        signing_key = _hmac_sha256(signing_key, region)
+        signing_key = _hmac_sha256(signing_key, service)
+        self._signing_key = _hmac_sha256(signing_key, "aws4_request")
+
+    def _init_sigv2(self, param_map, credentials):
+        if param_map["AWSAccessKeyId"] != credentials.access_key:
+            raise ValueError("template was not signed with the current credentials")
+
+        self._signature_param = SIGV2_SIGNATURE_PARAM
+        amz_headers = "".join(
+            f"{name}:{value}\n" for name, value in sorted(param_map.items()) if name.startswith("x-amz-")
+        )
+        # SigV2 signs "/bucket/key"; virtual-hosted URLs leave the bucket out of the path
+        resource_prefix = "" if self._path_prefix.startswith(f"/{self._bucket}/") else f"/{self._bucket}"
+        self._string_to_sign_prefix = (
+            f"{self._method}\n\n{self._content_type}\n{param_map['Expires']}\n{amz_headers}{resource_prefix}"
+        )
+        self._hmac_sha1 = hmac.new(credentials.secret_key.encode("utf-8"), digestmod=hashlib.sha1)
+
+    def _signature(self, path):
+        if self._signature_param == SIGV4_SIGNATURE_PARAM:
+            canonical_request = f"{self._method}\n{path}{self._canonical_suffix}"
+            string_to_sign = self._string_to_sign_prefix + hashlib.sha256(canonical_request.encode("utf-8")).hexdigest()
+            return hmac.new(self._signing_key, string_to_sign.encode("utf-8"), hashlib.sha256).hexdigest()
+
+        digest = self._hmac_sha1.copy()
+        digest.update(f"{self._string_to_sign_prefix}{path}".encode("utf-8"))
+        return quote(base64.b64encode(digest.digest()).decode("utf-8"), safe="")
+
+    def sign(self, key):
+        quoted_key = quote(key, safe="/~")
+        raw_params = list(self._raw_params)
+        raw_params[self._signature_index] = f"{self._signature_param}={self._signature(self._path_prefix + quoted_key)}"
+        return f"{self._base}{quoted_key}?{'&'.join(raw_params)}"
+
+
+def thumbnail_source_key(item):
+    """Key to serve as a photo's thumbnail: the generated thumbnail, else the original image."""
+    thumbnail_key = item.get("ThumbnailKey")
+    if thumbnail_key:
+        return thumbnail_key
+    content_type = str(item.get("ContentType") or "").lower()
+    if content_type.startswith("image/"):
+        return item.get("ObjectKey")
+    return None
+
+
+def attach_thumbnail_urls(s3_client, bucket, entries, expires_in=3600):
+    """Set photo["thumbnailUrl"] for each (photo, source_key) entry, signing the whole batch at once."""
+    urls = presign_get_urls(s3_client, bucket, [source_key for _, source_key in entries], expires_in)
+    for photo, source_key in entries:
+        if source_key in urls:
+            photo["thumbnailUrl"] = urls[source_key]
+
+
+def presign_get_urls(s3_client, bucket, keys, expires_in=3600):
+    """Presign GET URLs for many keys in one bucket; returns {key: url}.
+
+    The URLs match what s3_client.generate_presigned_url would return at the
+    same instant. If the client's URL shape is not one this module can re-sign
+    (custom signer, unexpected query layout, credentials refreshed mid-call),
+    every key falls back to botocore.
+    """
+    unique_keys = list(dict.fromkeys(key for key in keys if key))
+    if not unique_keys:
+        return {}
+
+    first_key = unique_keys[0]
+    template_url = _botocore_presign(s3_client, bucket, first_key, expires_in)
+    urls = {first_key: template_url}
+    if len(unique_keys) == 1:
+        return urls
+
+    try:
+        signer = _BatchSigner(template_url, bucket, first_key, _frozen_credentials(s3_client))
+    except Exception as signer_error:
+        print(f"presign batch signer unavailable, using botocore: {signer_error}")
+        signer = None
+
+    for key in unique_keys[1:]:
+        urls[key] = signer.sign(key) if signer else _botocore_presign(s3_client, bucket, key, expires_in)
+    return urls
+
+
+def presign_put_urls(s3_client, bucket, uploads, expires_in=900):
+    """Presign PUT URLs for many (key, content_type) uploads in one bucket; returns {key: url}.
+
+    One botocore template is signed per content type and re-signed per key,
+    with the same botocore fallback as presign_get_urls.
+    """
+    keys_by_type = {}
+    for key, content_type in uploads:
+        if key:
+            keys_by_type.setdefault(content_type or "", []).append(key)
+
+    urls = {}
+    for content_type, keys in keys_by_type.items():
+        unique_keys = list(dict.fromkeys(keys))
+        first_key = unique_keys[0]
+        template_url = _botocore_presign(s3_client, bucket, first_key, expires_in, content_type=content_type)
+        urls[first_key] = template_url
+
+        signer = None
+        if len(unique_keys) > 1:
+            try:
+                signer = _BatchSigner(
+                    template_url, bucket, first_key, _frozen_credentials(s3_client), content_type=content_type
+                )
+            except Exception as signer_error:
+                print(f"presign batch signer unavailable, using botocore: {signer_error}")
+
+        for key in unique_keys[1:]:
+            if signer:
+                urls[key] = signer.sign(key)
+            else:
+                urls[key] = _botocore_presign(s3_client, bucket, key, expires_in, content_type=content_type)
+    return urls
@@ -0,0 +1,70 @@
+"""The derivative ladder: which downscaled WebP renditions exist, where they live, and which one to serve.
+
+The derive worker writes one WebP per ladder step and records them on the
+photo row as Renditions, a map of long edge in pixels (as a string) to
+object key. List, get and download take a size hint and serve the smallest
+rendition whose long edge covers it, falling back to the original.
+"""
+
+import os
+
+GRID_MAX_SIZE = int(os.environ.get("GRID_MAX_SIZE", "64"))
+THUMBNAIL_MAX_SIZE = int(os.environ.get("THUMBNAIL_MAX_SIZE", "320"))
+# Long edge comfortable on a 4K display without original-level fidelity; 0 turns previews off
+PREVIEW_MAX_SIZE = int(os.environ.get("PREVIEW_MAX_SIZE", "2048"))
+RENDITION_SIZES = tuple(sorted({size for size in (GRID_MAX_SIZE, THUMBNAIL_MAX_SIZE, PREVIEW_MAX_SIZE) if size > 0}))
+MAX_SIZE_HINT = 16384
+
+
+def build_thumbnail_key(user_id, photo_id):
+    return f"thumbnails/{user_id}/{photo_id}.webp"
+
+
+def build_rendition_key(user_id, photo_id, size):
+    # The list thumbnail keeps the key upload-init hands to clients for their own thumbnail upload
+    if size == THUMBNAIL_MAX_SIZE:
+        return build_thumbnail_key(user_id, photo_id)
+    return f"previews/{user_id}/{photo_id}/{size}.webp"
+
+
+def parse_size_hint(raw_size):
+    """Returns (size, error); size is None when no hint was given."""
+    if raw_size is None or raw_size == "":
+        return None, None
+    try:
+        size = int(raw_size)
+    except (TypeError, ValueError):
+        return None, f"size must be an integer between 1 and {MAX_SIZE_HINT}"
+    if size < 1 or size > MAX_SIZE_HINT:
+        return None, f"size must be an integer between 1 and {MAX_SIZE_HINT}"
+    return size, None
+
+
+def stored_renditions(item):
+    """(long edge, key) pairs for a photo row, smallest first.
+
+    Rows derived before the ladder only carry ThumbnailKey, which counts as
+    the THUMBNAIL_MAX_SIZE step.
+    """
+    renditions = {int(size): key for size, key in (item.get("Renditions") or {}).items() if key}
+    if item.get("ThumbnailKey") and not renditions:
+        renditions[THUMBNAIL_MAX_SIZE] = item["ThumbnailKey"]
+    return sorted(renditions.items())
+
+
+def rendition_for_size(item, size):
+    """(key, long edge) of the smallest stored rendition covering size, or (None, None)."""
+    for edge, key in stored_renditions(item):
+        if edge >= size:
+            return key, edge
+    return None, None
+
+
+def display_source_key(item, size):
+    """Key to show a photo at size pixels: the covering rendition, else the original image."""
+    key, _ = rendition_for_size(item, size)
+    if key:
+        return key
+    if str(item.get("ContentType") or "").lower().startswith("image/"):
+        return item.get("ObjectKey")
+    return None
@@ -0,0 +1,166 @@
+import base64
+import gzip
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+from botocore.config import Config
+
+# One config for every client: a pool sized for the thread fan-out some
+# handlers use, TCP keep-alive so warm invocations reuse connections, and
+# adaptive retries so throttling backs off instead of failing the request.
+AWS_CLIENT_CONFIG = Config(
+    max_pool_connections=int(os.environ.get("AWS_MAX_POOL_CONNECTIONS", "32")),
+    tcp_keepalive=True,
+    connect_timeout=2,
+    read_timeout=10,
+    retries={"mode": "adaptive", "max_attempts": 5},
+)
+
+# Below this a compressed body saves too little to be worth the CPU or the base64 overhead
+GZIP_MIN_BYTES = 1024
+GZIP_LEVEL = 6
+
+_clients = {}
+_pillow = None
+
+
+class _LazyAWS:
+    """Stands in for a boto3 client/resource and builds it on first use.
+
+    Handlers keep their module-level `dynamodb` / `s3` names, but importing a
+    handler no longer pays for endpoint and service-model loading, and a
+    request rejected before touching AWS never builds a client at all.
+    """
+
+    def __init__(self, kind, service_name):
+        self._kind = kind
+        self._service_name = service_name
+
+    def _target(self):
+        key = (self._kind, self._service_name)
+        target = _clients.get(key)
+        if target is None:
+            factory = boto3.resource if self._kind == "resource" else boto3.client
+            target = factory(self._service_name, config=AWS_CLIENT_CONFIG)
+            _clients[key] = target
+        return target
+
+    def __getattr__(self, name):
+        return getattr(self._target(), name)
+
+
+def aws_client(service_name):
+    return _LazyAWS("client", service_name)
+
+
+def aws_resource(service_name):
+    return _LazyAWS("resource", service_name)
+
+
+def load_pillow():
+    """Import Pillow on first use; returns (Image, ExifTags), or (None, None) when unavailable."""
+    global _pillow
+    if _pillow is None:
+        try:
+            from PIL import ExifTags, Image
+            _pillow = (Image, ExifTags)
+        except Exception:
+            _pillow = (None, None)
+    return _pillow
+
+
+def run_parallel(fn, values, max_workers):
+    """Apply fn to every value on up to max_workers threads; results in input order."""
+    values = list(values)
+    if not values:
+        return []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(values))) as executor:
+        return list(executor.map(fn, values))
+
+
+def accepts_gzip(event):
+    """True when the request's Accept-Encoding allows gzip (HTTP API lower-cases header names)."""
+    headers = (event or {}).get("headers") or {}
+    accept_encoding = headers.get("accept-encoding") or headers.get("Accept-Encoding") or ""
+    for coding in accept_encoding.split(","):
+        name, _, params = coding.strip().partition(";")
+        if name.strip().lower() not in ("gzip", "*"):
+            continue
+        quality = params.strip().lower()
+        if quality.startswith("q="):
+            try:
+                return float(quality[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
+
+
+def json_response(status_code, body, event=None, headers=None):
+    """API Gateway response with a JSON body.
+
+    Pass the request event to gzip the body when the client accepts it and
+    the payload is large enough to benefit; the compressed bytes go back
+    base64-encoded, which API Gateway decodes before sending. Any response
+    given an event carries Vary: Accept-Encoding, so a cache never hands the
+    plain body to a gzip client or the reverse.
+    """
+    payload = json.dumps(body)
+    if event is None:
+        response = {"statusCode": status_code, "body": payload}
+        if headers:
+            response["headers"] = dict(headers)
+        return response
+    if len(payload) < GZIP_MIN_BYTES or not accepts_gzip(event):
+        return {
+            "statusCode": status_code,
+            "headers": {**(headers or {}), "Vary": "Accept-Encoding"},
+            "body": payload,
+        }
+
+    compressed = gzip.compress(payload.encode("utf-8"), compresslevel=GZIP_LEVEL, mtime=0)
+    return {
+        "statusCode": status_code,
+        "headers": {
+            **(headers or {}),
+            "Content-Type": "application/json",
+            "Content-Encoding": "gzip",
+            "Vary": "Accept-Encoding",
+        },
+        "isBase64Encoded": True,
+        "body": base64.b64encode(compressed).decode("ascii"),
+    }
+
+
+def error_response(status_code, message):
+    return json_response(status_code, {"error": message})
+
+
+def unauthorized_response():
+    return error_response(401, "missing or invalid JWT subject claim")
+
+
+def forbidden_response():
+    return error_response(403, "email is not verified")
+
+
+def extract_user_id(event, require_verified_email=False):
+    """Return (user_id, None) for an authorized request, or (None, error_response).
+
+    By default only an explicit email_verified=false is rejected; pass
+    require_verified_email=True where the claim must be present and true.
+    """
+    claims = (((event.get("requestContext") or {}).get("authorizer") or {}).get("jwt") or {}).get("claims") or {}
+    user_id = claims.get("sub")
+    if not user_id:
+        return None, unauthorized_response()
+
+    email_verified = claims.get("email_verified")
+    if isinstance(email_verified, str):
+        email_verified = email_verified.lower() == "true"
+    if email_verified is False or (require_verified_email and email_verified is not True):
+        return None, forbidden_response()
+
+    return user_id, None
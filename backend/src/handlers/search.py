@@ -3,17 +3,43 @@ import json
 import os
 from datetime import datetime
 
-import boto3
-from boto3.dynamodb.conditions import Key, Attr
-
-dynamodb = boto3.resource("dynamodb")
-s3 = boto3.client("s3")
+from boto3.dynamodb.conditions import Key
+
+try:
+    from handlers.photo_fields import PHOTO_FIELD_ATTRIBUTES, parse_fields, projection_args, select_fields
+    from handlers.photo_index import (
+        batch_get_photos,
+        display_file_name,
+        intersect_postings,
+        matches_search,
+        query_terms,
+    )
+    from handlers.presign import attach_thumbnail_urls, thumbnail_source_key
+    from handlers.runtime import aws_client, aws_resource, error_response, extract_user_id, json_response
+except ImportError:
+    from photo_fields import PHOTO_FIELD_ATTRIBUTES, parse_fields, projection_args, select_fields  # type: ignore
+    from photo_index import (  # type: ignore
+        batch_get_photos,
+        display_file_name,
+        intersect_postings,
+        matches_search,
+        query_terms,
+    )
+    from presign import attach_thumbnail_urls, thumbnail_source_key  # type: ignore
+    from runtime import aws_client, aws_resource, error_response, extract_user_id, json_response  # type: ignore
+
+dynamodb = aws_resource("dynamodb")
+s3 = aws_client("s3")
 
 PHOTOS_TABLE = os.environ["PHOTOS_TABLE"]
 PHOTO_BUCKET = os.environ["PHOTO_BUCKET"]
+PHOTO_INDEX_TABLE = os.environ["PHOTO_INDEX_TABLE"]
 DEFAULT_LIMIT = 20
 MAX_LIMIT = 100
 QUERY_BATCH_SIZE = 100
+ACTIVE_INDEX = "ActiveIndex"
+# Read on every search, whatever `fields` asks for, so matches can be verified
+SEARCH_FILTER_ATTRIBUTES = ("PhotoId", "OriginalFileName", "ObjectKey", "Subjects", "DeletedAt", "Status")
 
 
 def _parse_limit(raw_limit):
@@ -34,7 +60,7 @@ def _decode_next_token(token):
     try:
         decoded = base64.urlsafe_b64decode(token.encode("utf-8")).decode("utf-8")
         payload = json.loads(decoded)
-        if "UserId" not in payload or "PhotoId" not in payload:
+        if "ActiveUserId" not in payload or "UserId" not in payload or "PhotoId" not in payload:
             return None
         return payload
     except Exception:
@@ -48,190 +74,182 @@ def _encode_next_token(last_key):
     return encoded
 
 
+def _build_photo(item):
+    created_at = item.get("CreatedAt")
+    if isinstance(created_at, datetime):
+        created_at = created_at.isoformat()
+
+    photo = {
+        "photoId": item.get("PhotoId"),
+        "fileName": display_file_name(item),
+        "objectKey": item.get("ObjectKey"),
+        "contentType": item.get("ContentType"),
+        "createdAt": created_at,
+        "status": item.get("Status") or "ACTIVE",
+    }
+
+    # Only include optional metadata fields if they have values
+    description = item.get("Description")
+    subjects = item.get("Subjects", [])
+    taken_at = item.get("TakenAt")
+
+    if description:
+        photo["description"] = description
+    if subjects is not None:  # Include empty arrays
+        photo["subjects"] = subjects
+    if taken_at:
+        photo["takenAt"] = taken_at
+
+    thumbnail_key = item.get("ThumbnailKey")
+    if thumbnail_key:
+        photo["thumbnailKey"] = thumbnail_key
+
+    content_hash = item.get("ContentHash")
+    if content_hash:
+        photo["contentHash"] = content_hash
+
+    return photo
+
+
+def _is_searchable(item):
+    if item.get("DeletedAt"):
+        return False
+    # Filter out pending photos, but include items without Status for backward compatibility
+    status = item.get("Status")
+    return not status or status == "ACTIVE"
+
+
+def _search_postings(user_id, search_lower, terms, limit, exclusive_start_key, projection):
+    """Resolve candidates from the trigram index, then fetch and verify only those photos."""
+    candidates = intersect_postings(dynamodb.Table(PHOTO_INDEX_TABLE), user_id, terms)
+    ordered = sorted(candidates, reverse=True)
+    if exclusive_start_key:
+        ordered = [photo_id for photo_id in ordered if photo_id < exclusive_start_key["PhotoId"]]
+
+    matches = []
+    for start in range(0, len(ordered), QUERY_BATCH_SIZE):
+        chunk = ordered[start:start + QUERY_BATCH_SIZE]
+        found = batch_get_photos(dynamodb, PHOTOS_TABLE, user_id, chunk, projection)
+        for offset, photo_id in enumerate(chunk):
+            item = found.get(photo_id)
+            if not item or not _is_searchable(item) or not matches_search(item, search_lower):
+                continue
+
+            matches.append(item)
+            if len(matches) >= limit:
+                has_more = start + offset + 1 < len(ordered)
+                # Same shape as an ActiveIndex key so either search path can resume from it
+                cursor = {"ActiveUserId": user_id, "UserId": user_id, "PhotoId": photo_id}
+                return matches, (cursor if has_more else None)
+
+    return matches, None
+
+
+def _search_partition(user_id, search_lower, limit, exclusive_start_key, projection):
+    """Fallback for queries shorter than one trigram: walk the user's active photos."""
+    table = dynamodb.Table(PHOTOS_TABLE)
+    matches = []
+    last_evaluated_key = exclusive_start_key
+
+    # Continue querying until we have enough matching results or run out of items
+    while len(matches) < limit:
+        query_args = {
+            "IndexName": ACTIVE_INDEX,
+            "KeyConditionExpression": Key("ActiveUserId").eq(user_id),
+            "Limit": QUERY_BATCH_SIZE,
+            "ScanIndexForward": False,
+            **projection,
+        }
+        if last_evaluated_key:
+            query_args["ExclusiveStartKey"] = last_evaluated_key
+
+        result = table.query(**query_args)
+
+        for item in result.get("Items") or []:
+            if not _is_searchable(item) or not matches_search(item, search_lower):
+                continue
+
+            matches.append(item)
+
+            # Stop if we have enough results
+            if len(matches) >= limit:
+                break
+
+        # Update last evaluated key for next iteration
+        last_evaluated_key = result.get("LastEvaluatedKey")
+
+        # Break if no more items to query
+        if not last_evaluated_key:
+            break
+
+    return matches, last_evaluated_key
+
+
 def handler(event, context):
     try:
-        claims = (((event.get("requestContext") or {}).get("authorizer") or {}).get("jwt") or {}).get("claims") or {}
-        user_id = claims.get("sub")
-
-        if not user_id:
-            return {
-                "statusCode": 401,
-                "body": json.dumps({"error": "missing or invalid JWT subject claim"})
-            }
-
-        email_verified = claims.get("email_verified")
-        if isinstance(email_verified, str):
-            email_verified = email_verified.lower() == "true"
-        if email_verified is False:
-            return {
-                "statusCode": 403,
-                "body": json.dumps({"error": "email is not verified"})
-            }
+        user_id, auth_error = extract_user_id(event)
+        if auth_error:
+            return auth_error
 
         query_params = event.get("queryStringParameters") or {}
         
         # Validate query parameter
         search_query = query_params.get("q")
         if not search_query or not search_query.strip():
-            return {
-                "statusCode": 400,
-                "body": json.dumps({"error": "query parameter 'q' is required and cannot be empty"})
-            }
+            return error_response(400, "query parameter 'q' is required and cannot be empty")
         
         # Parse and validate limit
         limit = _parse_limit(query_params.get("limit"))
         if limit is None:
-            return {
-                "statusCode": 400,
-                "body": json.dumps({"error": "limit must be an integer between 1 and 100"})
-            }
+            return error_response(400, "limit must be an integer between 1 and 100")
 
         # Parse and validate nextToken
         next_token = query_params.get("nextToken")
         exclusive_start_key = _decode_next_token(next_token)
         if next_token and not exclusive_start_key:
-            return {
-                "statusCode": 400,
-                "body": json.dumps({"error": "nextToken is invalid"})
-            }
+            return error_response(400, "nextToken is invalid")
 
-        table = dynamodb.Table(PHOTOS_TABLE)
+        if exclusive_start_key and (
+            exclusive_start_key.get("ActiveUserId") != user_id or exclusive_start_key.get("UserId") != user_id
+        ):
+            return error_response(400, "nextToken is invalid")
+
+        try:
+            fields = parse_fields(query_params.get("fields"), PHOTO_FIELD_ATTRIBUTES)
+        except ValueError as fields_error:
+            return error_response(400, str(fields_error))
+        projection = projection_args(fields, PHOTO_FIELD_ATTRIBUTES, SEARCH_FILTER_ATTRIBUTES)
 
-        # Build filter expression for case-insensitive search on OriginalFileName and Subjects
-        # Note: DynamoDB doesn't support case-insensitive search natively, so we query by UserId
-        # and filter in the application layer. For better performance, consider using a search
-        # service like OpenSearch for production use.
         search_lower = search_query.lower()
-        
-        photos = []
-        last_evaluated_key = exclusive_start_key
-        
-        # Continue querying until we have enough matching results or run out of items
-        while len(photos) < limit:
-            query_args = {
-                "KeyConditionExpression": Key("UserId").eq(user_id),
-                "FilterExpression": Attr("DeletedAt").not_exists(),
-                "Limit": QUERY_BATCH_SIZE,
-                "ScanIndexForward": False,
-            }
-            if last_evaluated_key:
-                if last_evaluated_key.get("UserId") != user_id:
-                    return {
-                        "statusCode": 400,
-                        "body": json.dumps({"error": "nextToken is invalid"})
-                    }
-                query_args["ExclusiveStartKey"] = last_evaluated_key
-
-            result = table.query(**query_args)
-
-            items = result.get("Items") or []
-            
-            for item in items:
-                # Filter out pending photos, but include items without Status for backward compatibility
-                status = item.get("Status")
-                if status and status != "ACTIVE":
-                    continue
-                
-                file_name = item.get("OriginalFileName")
-                if not file_name:
-                    object_key = item.get("ObjectKey") or ""
-                    if object_key:
-                        file_name = object_key.rsplit("/", 1)[-1]
-                    else:
-                        file_name = item.get("PhotoId")
-
-                file_name_match = search_lower in file_name.lower() if file_name else False
-                photo_id = item.get("PhotoId") or ""
-                photo_id_match = search_lower in photo_id.lower()
-                
-                # Case-insensitive search in Subjects (list of strings)
-                subjects = item.get("Subjects", [])
-                subjects_match = False
-                if subjects:
-                    for subject in subjects:
-                        if search_lower in subject.lower():
-                            subjects_match = True
-                            break
-                
-                # Skip if no match
-                if not file_name_match and not subjects_match and not photo_id_match:
-                    continue
-                
-                created_at = item.get("CreatedAt")
-                if isinstance(created_at, datetime):
-                    created_at = created_at.isoformat()
-
-                photo = {
-                    "photoId": item.get("PhotoId"),
-                    "fileName": file_name,
-                    "objectKey": item.get("ObjectKey"),
-                    "contentType": item.get("ContentType"),
-                    "createdAt": created_at,
-                    "status": status or "ACTIVE",
-                }
-                
-                # Only include optional metadata fields if they have values
-                description = item.get("Description")
-                taken_at = item.get("TakenAt")
-                
-                if description:
-                    photo["description"] = description
-                if subjects is not None:  # Include empty arrays
-                    photo["subjects"] = subjects
-                if taken_at:
-                    photo["takenAt"] = taken_at
-
-                thumbnail_key = item.get("ThumbnailKey")
-                thumbnail_source_key = thumbnail_key
-                content_type = str(item.get("ContentType") or "").lower()
-                if not thumbnail_source_key and content_type.startswith("image/"):
-                    thumbnail_source_key = item.get("ObjectKey")
-
-                if thumbnail_key:
-                    photo["thumbnailKey"] = thumbnail_key
-
-                if thumbnail_source_key:
-                    try:
-                        photo["thumbnailUrl"] = s3.generate_presigned_url(
-                            "get_object",
-                            Params={
-                                "Bucket": PHOTO_BUCKET,
-                                "Key": thumbnail_source_key,
-                            },
-                            ExpiresIn=3600,
-                        )
-                    except Exception as thumbnail_error:
-                        print(f"search thumbnail URL generation error: {thumbnail_error}")
-                
-                photos.append(photo)
-                
-                # Stop if we have enough results
-                if len(photos) >= limit:
-                    break
-            
-            # Update last evaluated key for next iteration
-            last_evaluated_key = result.get("LastEvaluatedKey")
-            
-            # Break if no more items to query
-            if not last_evaluated_key:
-                break
+        terms = query_terms(search_lower)
+        if terms:
+            matches, last_evaluated_key = _search_postings(
+                user_id, search_lower, terms, limit, exclusive_start_key, projection
+            )
+        else:
+            matches, last_evaluated_key = _search_partition(user_id, search_lower, limit, exclusive_start_key, projection)
+
+        photos = [select_fields(_build_photo(item), fields) for item in matches]
+        if fields is None or "thumbnailUrl" in fields:
+            try:
+                attach_thumbnail_urls(
+                    s3,
+                    PHOTO_BUCKET,
+                    [(photo, thumbnail_source_key(item)) for photo, item in zip(photos, matches)],
+                )
+            except Exception as thumbnail_error:
+                print(f"search thumbnail URL generation error: {thumbnail_error}")
 
         # Handle pagination: only set nextToken if we have more items to query
         new_next_token = None
         if last_evaluated_key and len(photos) >= limit:
             new_next_token = _encode_next_token(last_evaluated_key)
 
-        return {
-            "statusCode": 200,
-            "body": json.dumps({
-                "photos": photos,
-                "count": len(photos),
-                "nextToken": new_next_token,
-            })
-        }
+        return json_response(200, {
+            "photos": photos,
+            "count": len(photos),
+            "nextToken": new_next_token,
+        }, event)
     except Exception as error:
         print(f"search handler error: {error}")
-        return {
-            "statusCode": 500,
-            "body": json.dumps({"error": "internal server error"})
-        }
+        return error_response(500, "internal server error")
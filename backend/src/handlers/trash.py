@@ -3,14 +3,21 @@ import json
 import os
 from datetime import datetime
 
-import boto3
-from boto3.dynamodb.conditions import Key, Attr
+from boto3.dynamodb.conditions import Key
 
-dynamodb = boto3.resource("dynamodb")
+try:
+    from handlers.photo_fields import TRASH_FIELD_ATTRIBUTES, parse_fields, projection_args, select_fields
+    from handlers.runtime import aws_resource, error_response, extract_user_id, json_response
+except ImportError:
+    from photo_fields import TRASH_FIELD_ATTRIBUTES, parse_fields, projection_args, select_fields  # type: ignore
+    from runtime import aws_resource, error_response, extract_user_id, json_response  # type: ignore
+
+dynamodb = aws_resource("dynamodb")
 
 PHOTOS_TABLE = os.environ["PHOTOS_TABLE"]
 DEFAULT_LIMIT = 20
 MAX_LIMIT = 100
+DELETED_AT_INDEX = "DeletedAtIndex"
 
 
 def _parse_limit(raw_limit):
@@ -31,7 +38,7 @@ def _decode_next_token(token):
     try:
         decoded = base64.urlsafe_b64decode(token.encode("utf-8")).decode("utf-8")
         payload = json.loads(decoded)
-        if "UserId" not in payload or "PhotoId" not in payload:
+        if "UserId" not in payload or "PhotoId" not in payload or "DeletedAt" not in payload:
             return None
         return payload
     except Exception:
@@ -47,54 +54,38 @@ def _encode_next_token(last_key):
 
 def handler(event, context):
     try:
-        claims = (((event.get("requestContext") or {}).get("authorizer") or {}).get("jwt") or {}).get("claims") or {}
-        user_id = claims.get("sub")
-
-        if not user_id:
-            return {
-                "statusCode": 401,
-                "body": json.dumps({"error": "missing or invalid JWT subject claim"})
-            }
-
-        email_verified = claims.get("email_verified")
-        if isinstance(email_verified, str):
-            email_verified = email_verified.lower() == "true"
-        if email_verified is False:
-            return {
-                "statusCode": 403,
-                "body": json.dumps({"error": "email is not verified"})
-            }
+        user_id, auth_error = extract_user_id(event)
+        if auth_error:
+            return auth_error
 
         query_params = event.get("queryStringParameters") or {}
         limit = _parse_limit(query_params.get("limit"))
         if limit is None:
-            return {
-                "statusCode": 400,
-                "body": json.dumps({"error": "limit must be an integer between 1 and 100"})
-            }
+            return error_response(400, "limit must be an integer between 1 and 100")
 
         next_token = query_params.get("nextToken")
         exclusive_start_key = _decode_next_token(next_token)
         if next_token and not exclusive_start_key:
-            return {
-                "statusCode": 400,
-                "body": json.dumps({"error": "nextToken is invalid"})
-            }
+            return error_response(400, "nextToken is invalid")
+
+        try:
+            fields = parse_fields(query_params.get("fields"), TRASH_FIELD_ATTRIBUTES)
+        except ValueError as fields_error:
+            return error_response(400, str(fields_error))
 
         table = dynamodb.Table(PHOTOS_TABLE)
 
+        # The sparse DeletedAt index holds only trashed rows, newest deletion first
         query_args = {
+            "IndexName": DELETED_AT_INDEX,
             "KeyConditionExpression": Key("UserId").eq(user_id),
-            "FilterExpression": Attr("DeletedAt").exists(),
             "Limit": limit,
             "ScanIndexForward": False,
+            **projection_args(fields, TRASH_FIELD_ATTRIBUTES),
         }
         if exclusive_start_key:
             if exclusive_start_key.get("UserId") != user_id:
-                return {
-                    "statusCode": 400,
-                    "body": json.dumps({"error": "nextToken does not belong to current user"})
-                }
+                return error_response(400, "nextToken does not belong to current user")
             query_args["ExclusiveStartKey"] = exclusive_start_key
 
         result = table.query(**query_args)
@@ -122,7 +113,7 @@ def handler(event, context):
                 else:
                     file_name = item.get("PhotoId")
 
-            photos.append({
+            photo = {
                 "photoId": item.get("PhotoId"),
                 "fileName": file_name,
                 "objectKey": item.get("ObjectKey"),
@@ -131,21 +122,20 @@ def handler(event, context):
                 "deletedAt": deleted_at,
                 "deletedBy": item.get("DeletedBy"),
                 "retentionUntil": retention_until,
-            })
+            }
+            content_hash = item.get("ContentHash")
+            if content_hash:
+                photo["contentHash"] = content_hash
+
+            photos.append(select_fields(photo, fields))
 
         new_next_token = _encode_next_token(result.get("LastEvaluatedKey"))
 
-        return {
-            "statusCode": 200,
-            "body": json.dumps({
-                "photos": photos,
-                "count": len(photos),
-                "nextToken": new_next_token,
-            })
-        }
+        return json_response(200, {
+            "photos": photos,
+            "count": len(photos),
+            "nextToken": new_next_token,
+        }, event)
     except Exception as error:
         print(f"trash handler error: {error}")
-        return {
-            "statusCode": 500,
-            "body": json.dumps({"error": "internal server error"})
-        }
+        return error_response(500, "internal server error")
@@ -1,174 +1,140 @@
 import json
 import os
-import re
-from datetime import datetime, timezone
 
-import boto3
-from boto3.dynamodb.conditions import Attr
-
-s3 = boto3.client("s3")
-dynamodb = boto3.resource("dynamodb")
+from botocore.exceptions import ClientError
+
+try:
+    from handlers.object_refs import add_ref_action, claim_unreferenced, remove_ref_action
+    from handlers.photo_index import sync_photo_postings
+    from handlers.runtime import aws_client, aws_resource, error_response, extract_user_id, json_response
+    from handlers.upload_common import (
+        UPLOAD_URL_EXPIRES_SECONDS,
+        abort_multipart_upload,
+        build_photo_item,
+        dedupe_result,
+        dedupe_source_check_action,
+        find_dedupe_source,
+        parse_multipart_request,
+        parse_upload_descriptor,
+        start_multipart_upload,
+        upload_result,
+    )
+    from handlers.versions import bump_collection_action
+except ImportError:
+    from object_refs import add_ref_action, claim_unreferenced, remove_ref_action  # type: ignore
+    from photo_index import sync_photo_postings  # type: ignore
+    from runtime import aws_client, aws_resource, error_response, extract_user_id, json_response  # type: ignore
+    from upload_common import (  # type: ignore
+        UPLOAD_URL_EXPIRES_SECONDS,
+        abort_multipart_upload,
+        build_photo_item,
+        dedupe_result,
+        dedupe_source_check_action,
+        find_dedupe_source,
+        parse_multipart_request,
+        parse_upload_descriptor,
+        start_multipart_upload,
+        upload_result,
+    )
+    from versions import bump_collection_action  # type: ignore
+
+s3 = aws_client("s3")
+dynamodb = aws_resource("dynamodb")
 
 PHOTO_BUCKET = os.environ["PHOTO_BUCKET"]
 PHOTOS_TABLE = os.environ["PHOTOS_TABLE"]
-MAX_SUBJECTS = 50
-CONTENT_HASH_PATTERN = re.compile(r"^[a-fA-F0-9]{64}$")
-
-
-def _sanitize_subjects(subjects):
-    if subjects is None:
-        return None
-    if not isinstance(subjects, list):
-        return None
-
-    trimmed = []
-    for value in subjects:
-        if not isinstance(value, str):
-            return None
-        cleaned = value.strip()
-        if cleaned:
-            trimmed.append(cleaned)
-
-    seen = set()
-    deduped = []
-    for item in trimmed:
-        lowered = item.lower()
-        if lowered in seen:
-            continue
-        seen.add(lowered)
-        deduped.append(item)
-
-    if len(deduped) > MAX_SUBJECTS:
-        deduped = deduped[:MAX_SUBJECTS]
-
-    return deduped
-
-
-def _sanitize_content_hash(content_hash):
-    if content_hash is None:
-        return None
-    if not isinstance(content_hash, str):
-        return None
-
-    normalized = content_hash.strip().lower()
-    if not CONTENT_HASH_PATTERN.match(normalized):
-        return None
-    return normalized
+PHOTO_INDEX_TABLE = os.environ["PHOTO_INDEX_TABLE"]
+OBJECT_REFS_TABLE = os.environ["OBJECT_REFS_TABLE"]
+USERS_TABLE = os.environ["USERS_TABLE"]
+
+
+def _write_photo(user_id, item, previous_item, dedupe_source):
+    """Write the photo row and its object reference in one transaction.
+
+    A shared object can then never be referenced by a row the ref record does
+    not know about; a deduplicated row is cancelled if its source has gone.
+    """
+    photo_id = item["PhotoId"]
+    object_key = item["ObjectKey"]
+    previous_object_key = (previous_item or {}).get("ObjectKey")
+    transact_items = [
+        {"Put": {"TableName": PHOTOS_TABLE, "Item": item}},
+        add_ref_action(OBJECT_REFS_TABLE, object_key, user_id, photo_id),
+    ]
+    if dedupe_source:
+        transact_items.append(dedupe_source_check_action(PHOTOS_TABLE, dedupe_source))
+    if previous_object_key and previous_object_key != object_key:
+        transact_items.append(remove_ref_action(OBJECT_REFS_TABLE, previous_object_key, user_id, photo_id))
+    # The listed collection changes when a row enters (dedupe) or leaves (re-init) ActiveIndex
+    if dedupe_source or (previous_item or {}).get("ActiveUserId"):
+        transact_items.append(bump_collection_action(USERS_TABLE, user_id))
+    dynamodb.meta.client.transact_write_items(TransactItems=transact_items)
+
 
 def handler(event, context):
     try:
-        claims = (((event.get("requestContext") or {}).get("authorizer") or {}).get("jwt") or {}).get("claims") or {}
-        user_id = claims.get("sub")
-
-        if not user_id:
-            return {
-                "statusCode": 401,
-                "body": json.dumps({"error": "missing or invalid JWT subject claim"})
-            }
-
-        email_verified = claims.get("email_verified")
-        if isinstance(email_verified, str):
-            email_verified = email_verified.lower() == "true"
-        if email_verified is False:
-            return {
-                "statusCode": 403,
-                "body": json.dumps({"error": "email is not verified"})
-            }
+        user_id, auth_error = extract_user_id(event)
+        if auth_error:
+            return auth_error
 
         body = json.loads(event.get("body") or "{}")
-        photo_id = body.get("photoId")
-        content_type = body.get("contentType", "image/webp")
-        original_file_name = body.get("originalFileName")
-        subjects = _sanitize_subjects(body.get("subjects"))
-        content_hash = _sanitize_content_hash(body.get("contentHash"))
-
-        if body.get("subjects") is not None and subjects is None:
-            return {
-                "statusCode": 400,
-                "body": json.dumps({"error": "subjects must be an array of strings"})
-            }
-
-        if body.get("contentHash") is not None and content_hash is None:
-            return {
-                "statusCode": 400,
-                "body": json.dumps({"error": "contentHash must be a 64-character hex SHA-256 string"})
-            }
-
-        if original_file_name:
-            original_file_name = os.path.basename(str(original_file_name))[:255]
-
-        if not photo_id:
-            return {
-                "statusCode": 400,
-                "body": json.dumps({"error": "photoId is required"})
-            }
+        descriptor, validation_error = parse_upload_descriptor(body)
+        if validation_error:
+            return error_response(400, validation_error)
+        # multipart=true with fileSize opens an S3 multipart upload instead of signing one PUT
+        multipart_file_size, multipart_error = parse_multipart_request(body)
+        if multipart_error:
+            return error_response(400, multipart_error)
+        photo_id = descriptor["photoId"]
 
         table = dynamodb.Table(PHOTOS_TABLE)
         dedupe_source = None
-        if content_hash:
-            dedupe_result = table.scan(
-                FilterExpression=Attr("ContentHash").eq(content_hash) & Attr("Status").eq("ACTIVE"),
-                ProjectionExpression="UserId, PhotoId, ObjectKey, ThumbnailKey",
-                Limit=1,
-            )
-            dedupe_items = dedupe_result.get("Items") or []
-            if dedupe_items:
-                dedupe_source = dedupe_items[0]
-
-        object_key = dedupe_source.get("ObjectKey") if dedupe_source else f"originals/{user_id}/{photo_id}.webp"
-        is_image_upload = str(content_type or "").lower().startswith("image/")
-        thumbnail_key = None
-        if dedupe_source and dedupe_source.get("ThumbnailKey"):
-            thumbnail_key = dedupe_source.get("ThumbnailKey")
-        elif is_image_upload:
-            thumbnail_key = f"thumbnails/{user_id}/{photo_id}.webp"
-
-        status = "ACTIVE" if dedupe_source else "PENDING"
-        item = {
-            "UserId": user_id,
-            "PhotoId": photo_id,
-            "ObjectKey": object_key,
-            "ContentType": content_type,
-            "OriginalFileName": original_file_name,
-            "CreatedAt": datetime.now(timezone.utc).isoformat(),
-            "Status": status
-        }
-        if subjects is not None:
-            item["Subjects"] = subjects
-        if content_hash is not None:
-            item["ContentHash"] = content_hash
-        if thumbnail_key:
-            item["ThumbnailKey"] = thumbnail_key
-        if dedupe_source:
-            item["DeduplicatedFromPhotoId"] = dedupe_source.get("PhotoId")
-            item["DeduplicatedFromUserId"] = dedupe_source.get("UserId")
-            if dedupe_source.get("ThumbnailKey"):
-                item["ThumbnailKey"] = dedupe_source.get("ThumbnailKey")
+        if descriptor["contentHash"]:
+            dedupe_source = find_dedupe_source(table, descriptor["contentHash"], user_id, photo_id)
+
+        previous_item = table.get_item(Key={"UserId": user_id, "PhotoId": photo_id}).get("Item")
+        previous_object_key = (previous_item or {}).get("ObjectKey")
 
-        table.put_item(Item=item)
+        if dedupe_source:
+            item = build_photo_item(user_id, descriptor, previous_item, dedupe_source)
+            try:
+                _write_photo(user_id, item, previous_item, dedupe_source)
+            except ClientError as link_error:
+                # The source was trashed or removed after the ContentHashIndex read (or the link
+                # could not be written at all); upload the bytes instead
+                print(f"upload dedupe link skipped for {photo_id}: {link_error}")
+                dedupe_source = None
+        if not dedupe_source:
+            item = build_photo_item(user_id, descriptor, previous_item, None)
+            if multipart_file_size:
+                start_multipart_upload(s3, PHOTO_BUCKET, item, multipart_file_size)
+            _write_photo(user_id, item, previous_item, None)
+        object_key = item["ObjectKey"]
+        thumbnail_key = item.get("ThumbnailKey")
+
+        if previous_object_key and previous_object_key != object_key:
+            if claim_unreferenced(dynamodb.Table(OBJECT_REFS_TABLE), previous_object_key):
+                s3.delete_object(Bucket=PHOTO_BUCKET, Key=previous_object_key)
+        # A re-init replaces any multipart upload the previous attempt left open
+        abort_multipart_upload(s3, PHOTO_BUCKET, previous_item)
+
+        sync_photo_postings(dynamodb.Table(PHOTO_INDEX_TABLE), user_id, photo_id, previous_item, item)
 
         if dedupe_source:
-            return {
-                "statusCode": 200,
-                "body": json.dumps({
-                    "uploadRequired": False,
-                    "deduplicated": True,
-                    "objectKey": object_key,
-                    "thumbnailKey": dedupe_source.get("ThumbnailKey"),
-                    "linkedToPhotoId": dedupe_source.get("PhotoId"),
-                    "linkedToUserId": dedupe_source.get("UserId"),
-                })
-            }
-
-        upload_url = s3.generate_presigned_url(
-            "put_object",
-            Params={
-                "Bucket": PHOTO_BUCKET,
-                "Key": object_key,
-                "ContentType": content_type
-            },
-            ExpiresIn=900
-        )
+            return json_response(200, dedupe_result(item, dedupe_source))
+
+        # Multipart uploads sign their parts through POST /photos/{photoId}/upload-parts
+        upload_url = None
+        if not item.get("MultipartUploadId"):
+            upload_url = s3.generate_presigned_url(
+                "put_object",
+                Params={
+                    "Bucket": PHOTO_BUCKET,
+                    "Key": object_key,
+                    "ContentType": descriptor["contentType"]
+                },
+                ExpiresIn=UPLOAD_URL_EXPIRES_SECONDS
+            )
 
         thumbnail_upload_url = None
         if thumbnail_key:
@@ -179,24 +145,10 @@ def handler(event, context):
                     "Key": thumbnail_key,
                     "ContentType": "image/webp",
                 },
-                ExpiresIn=900,
+                ExpiresIn=UPLOAD_URL_EXPIRES_SECONDS,
             )
 
-        return {
-            "statusCode": 200,
-            "body": json.dumps({
-                "uploadRequired": True,
-                "deduplicated": False,
-                "uploadUrl": upload_url,
-                "objectKey": object_key,
-                "thumbnailKey": thumbnail_key,
-                "thumbnailUploadUrl": thumbnail_upload_url,
-                "expiresInSeconds": 900
-            })
-        }
+        return json_response(200, upload_result(item, upload_url, thumbnail_upload_url))
     except Exception as error:
         print(f"upload handler error: {error}")
-        return {
-            "statusCode": 500,
-            "body": json.dumps({"error": "internal server error"})
-        }
+        return error_response(500, "internal server error")
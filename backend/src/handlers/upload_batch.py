@@ -0,0 +1,207 @@
+import json
+import os
+
+from botocore.exceptions import ClientError
+
+try:
+    from handlers.object_refs import add_ref_action, apply_ref_action, claim_unreferenced, remove_ref_action
+    from handlers.photo_index import batch_get_photos, sync_many_photo_postings
+    from handlers.presign import presign_put_urls
+    from handlers.runtime import aws_client, aws_resource, error_response, extract_user_id, json_response, run_parallel
+    from handlers.upload_common import (
+        UPLOAD_URL_EXPIRES_SECONDS,
+        abort_multipart_upload,
+        build_photo_item,
+        dedupe_result,
+        dedupe_source_check_action,
+        find_dedupe_source,
+        parse_upload_descriptor,
+        upload_result,
+    )
+    from handlers.versions import bump_collection_version
+except ImportError:
+    from object_refs import add_ref_action, apply_ref_action, claim_unreferenced, remove_ref_action  # type: ignore
+    from photo_index import batch_get_photos, sync_many_photo_postings  # type: ignore
+    from presign import presign_put_urls  # type: ignore
+    from runtime import aws_client, aws_resource, error_response, extract_user_id, json_response, run_parallel  # type: ignore
+    from upload_common import (  # type: ignore
+        UPLOAD_URL_EXPIRES_SECONDS,
+        abort_multipart_upload,
+        build_photo_item,
+        dedupe_result,
+        dedupe_source_check_action,
+        find_dedupe_source,
+        parse_upload_descriptor,
+        upload_result,
+    )
+    from versions import bump_collection_version  # type: ignore
+
+s3 = aws_client("s3")
+dynamodb = aws_resource("dynamodb")
+
+PHOTO_BUCKET = os.environ["PHOTO_BUCKET"]
+PHOTOS_TABLE = os.environ["PHOTOS_TABLE"]
+PHOTO_INDEX_TABLE = os.environ["PHOTO_INDEX_TABLE"]
+OBJECT_REFS_TABLE = os.environ["OBJECT_REFS_TABLE"]
+USERS_TABLE = os.environ["USERS_TABLE"]
+MAX_BATCH_FILES = 100
+# Dedupe lookups and ref updates are single-item calls; run this many at once
+BATCH_WORKERS = 16
+
+
+def _parse_files(body):
+    """Per-file (descriptor, error) pairs in request order, or None when `files` is not a usable list."""
+    files = body.get("files") if isinstance(body, dict) else None
+    if not isinstance(files, list) or not files or len(files) > MAX_BATCH_FILES:
+        return None
+
+    parsed = []
+    seen = set()
+    for file_body in files:
+        descriptor, validation_error = parse_upload_descriptor(file_body)
+        if descriptor and descriptor["photoId"] in seen:
+            descriptor, validation_error = None, "photoId appears more than once in the batch"
+        if descriptor:
+            seen.add(descriptor["photoId"])
+        parsed.append((descriptor, validation_error, file_body))
+    return parsed
+
+
+def handler(event, context):
+    try:
+        user_id, auth_error = extract_user_id(event)
+        if auth_error:
+            return auth_error
+
+        body = json.loads(event.get("body") or "{}")
+        parsed = _parse_files(body)
+        if parsed is None:
+            return error_response(400, f"files must be an array of 1-{MAX_BATCH_FILES} upload requests")
+
+        descriptors = [descriptor for descriptor, _, _ in parsed if descriptor]
+        photo_ids = [descriptor["photoId"] for descriptor in descriptors]
+        table = dynamodb.Table(PHOTOS_TABLE)
+        refs_table = dynamodb.Table(OBJECT_REFS_TABLE)
+
+        # Existing rows in one BatchGetItem, content-hash lookups side by side
+        previous_items = batch_get_photos(dynamodb, PHOTOS_TABLE, user_id, photo_ids) if photo_ids else {}
+        hashed = [descriptor for descriptor in descriptors if descriptor["contentHash"]]
+        dedupe_sources = dict(zip(
+            [descriptor["photoId"] for descriptor in hashed],
+            run_parallel(
+                lambda descriptor: find_dedupe_source(table, descriptor["contentHash"], user_id, descriptor["photoId"]),
+                hashed,
+                BATCH_WORKERS,
+            ),
+        ))
+
+        def record_ref(descriptor):
+            """Record the file's object reference first; returns (item, dedupe_source) as written."""
+            photo_id = descriptor["photoId"]
+            previous_item = previous_items.get(photo_id)
+            dedupe_source = dedupe_sources.get(photo_id)
+            if dedupe_source:
+                item = build_photo_item(user_id, descriptor, previous_item, dedupe_source)
+                try:
+                    dynamodb.meta.client.transact_write_items(TransactItems=[
+                        add_ref_action(OBJECT_REFS_TABLE, item["ObjectKey"], user_id, photo_id),
+                        dedupe_source_check_action(PHOTOS_TABLE, dedupe_source),
+                    ])
+                    return item, dedupe_source
+                except ClientError as link_error:
+                    # The source was trashed or removed after the ContentHashIndex read (or the link
+                    # could not be written at all); upload the bytes instead
+                    print(f"upload batch dedupe link skipped for {photo_id}: {link_error}")
+            item = build_photo_item(user_id, descriptor, previous_item, None)
+            apply_ref_action(refs_table, add_ref_action(OBJECT_REFS_TABLE, item["ObjectKey"], user_id, photo_id))
+            return item, None
+
+        # Without a transaction per file, record every new referrer before any row
+        # points at its object: a failure in between leaves an extra reference
+        # (the object is kept), never a row whose object could be deleted.
+        recorded = run_parallel(record_ref, descriptors, BATCH_WORKERS)
+        items = {item["PhotoId"]: item for item, _ in recorded}
+        dedupe_sources = {item["PhotoId"]: dedupe_source for item, dedupe_source in recorded}
+
+        # A re-init replaces any multipart upload the previous attempt left open
+        run_parallel(
+            lambda previous_item: abort_multipart_upload(s3, PHOTO_BUCKET, previous_item),
+            [previous_items[photo_id] for photo_id in items if (previous_items.get(photo_id) or {}).get("MultipartUploadId")],
+            BATCH_WORKERS,
+        )
+        with table.batch_writer() as batch:
+            for item in items.values():
+                batch.put_item(Item=item)
+
+        replaced = [
+            (photo_id, previous_items[photo_id]["ObjectKey"])
+            for photo_id, item in items.items()
+            if (previous_items.get(photo_id) or {}).get("ObjectKey") not in (None, item["ObjectKey"])
+        ]
+
+        def release_replaced(entry):
+            photo_id, previous_object_key = entry
+            apply_ref_action(refs_table, remove_ref_action(OBJECT_REFS_TABLE, previous_object_key, user_id, photo_id))
+            if claim_unreferenced(refs_table, previous_object_key):
+                s3.delete_object(Bucket=PHOTO_BUCKET, Key=previous_object_key)
+
+        run_parallel(release_replaced, replaced, BATCH_WORKERS)
+
+        sync_many_photo_postings(
+            dynamodb.Table(PHOTO_INDEX_TABLE),
+            user_id,
+            [(photo_id, previous_items.get(photo_id), item) for photo_id, item in items.items()],
+        )
+
+        # The listed collection changes when a row enters (dedupe) or leaves (re-init) ActiveIndex
+        if any(dedupe_sources.values()) or any(
+            (previous_items.get(photo_id) or {}).get("ActiveUserId") for photo_id in items
+        ):
+            bump_collection_version(dynamodb.Table(USERS_TABLE), user_id)
+
+        uploads = [
+            (items[descriptor["photoId"]], descriptor)
+            for descriptor in descriptors
+            if not dedupe_sources.get(descriptor["photoId"])
+        ]
+        upload_urls = presign_put_urls(
+            s3,
+            PHOTO_BUCKET,
+            [(item["ObjectKey"], descriptor["contentType"]) for item, descriptor in uploads],
+            expires_in=UPLOAD_URL_EXPIRES_SECONDS,
+        )
+        thumbnail_upload_urls = presign_put_urls(
+            s3,
+            PHOTO_BUCKET,
+            [(item.get("ThumbnailKey"), "image/webp") for item, _ in uploads],
+            expires_in=UPLOAD_URL_EXPIRES_SECONDS,
+        )
+
+        results = []
+        for descriptor, validation_error, file_body in parsed:
+            if not descriptor:
+                photo_id = file_body.get("photoId") if isinstance(file_body, dict) else None
+                results.append({"photoId": photo_id, "error": validation_error})
+                continue
+
+            photo_id = descriptor["photoId"]
+            item = items[photo_id]
+            dedupe_source = dedupe_sources.get(photo_id)
+            if dedupe_source:
+                result = dedupe_result(item, dedupe_source)
+            else:
+                result = upload_result(
+                    item, upload_urls.get(item["ObjectKey"]), thumbnail_upload_urls.get(item.get("ThumbnailKey"))
+                )
+            results.append({"photoId": photo_id, **result})
+
+        return json_response(200, {
+            "results": results,
+            "count": len(results),
+            "failedCount": sum(1 for result in results if "error" in result),
+        }, event)
+    except json.JSONDecodeError:
+        return error_response(400, "invalid JSON in request body")
+    except Exception as error:
+        print(f"upload batch handler error: {error}")
+        return error_response(500, "internal server error")
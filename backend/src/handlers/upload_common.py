@@ -0,0 +1,601 @@
+"""Upload-init row construction, upload-complete activation and photo derivatives, shared by the upload handlers."""
+
+import math
+import os
+import re
+from datetime import datetime, timezone
+from io import BytesIO
+
+from boto3.dynamodb.conditions import Attr, Key
+from botocore.exceptions import ClientError
+
+try:
+    from handlers.renditions import THUMBNAIL_MAX_SIZE, build_thumbnail_key
+    from handlers.runtime import load_pillow
+    from handlers.thumbnailing import downscale
+    from handlers.versions import photo_version, updated_at_now
+except ImportError:
+    from renditions import THUMBNAIL_MAX_SIZE, build_thumbnail_key  # type: ignore
+    from runtime import load_pillow  # type: ignore
+    from thumbnailing import downscale  # type: ignore
+    from versions import photo_version, updated_at_now  # type: ignore
+
+MAX_SUBJECTS = 50
+CONTENT_HASH_PATTERN = re.compile(r"^[a-fA-F0-9]{64}$")
+CONTENT_HASH_INDEX = "ContentHashIndex"
+# Legacy uuid4 hex IDs and 26-character ULID-style (time-ordered) IDs both fit
+PHOTO_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,128}$")
+UPLOAD_URL_EXPIRES_SECONDS = 900
+# S3 multipart limits: every part but the last is at least 5 MiB, and an upload has at most 10,000 parts
+MULTIPART_PART_SIZE = 8 * 1024 * 1024
+MULTIPART_MAX_PARTS = 10000
+MULTIPART_MAX_FILE_SIZE = 5 * 1024 ** 4
+MAX_PART_URLS_PER_REQUEST = 100
+# Photo.DerivationStatus: upload-complete sets PENDING (images) or SKIPPED; the derive worker
+# moves PENDING to COMPLETE, or to FAILED once its retries are used up
+DERIVATION_PENDING = "PENDING"
+DERIVATION_COMPLETE = "COMPLETE"
+DERIVATION_SKIPPED = "SKIPPED"
+DERIVATION_FAILED = "FAILED"
+# Renditions are skipped above this many pixels: decoding more does not fit the worker's memory
+MAX_DERIVE_PIXELS = 100_000_000
+# Tag in the base IFD that points at the Exif sub-IFD
+EXIF_IFD_POINTER = 0x8769
+
+
+def sanitize_subjects(subjects):
+    if subjects is None:
+        return None
+    if not isinstance(subjects, list):
+        return None
+
+    trimmed = []
+    for value in subjects:
+        if not isinstance(value, str):
+            return None
+        cleaned = value.strip()
+        if cleaned:
+            trimmed.append(cleaned)
+
+    seen = set()
+    deduped = []
+    for item in trimmed:
+        lowered = item.lower()
+        if lowered in seen:
+            continue
+        seen.add(lowered)
+        deduped.append(item)
+
+    if len(deduped) > MAX_SUBJECTS:
+        deduped = deduped[:MAX_SUBJECTS]
+
+    return deduped
+
+
+def sanitize_content_hash(content_hash):
+    if content_hash is None:
+        return None
+    if not isinstance(content_hash, str):
+        return None
+
+    normalized = content_hash.strip().lower()
+    if not CONTENT_HASH_PATTERN.match(normalized):
+        return None
+    return normalized
+
+
+def parse_upload_descriptor(body):
+    """Validate one upload-init request body; returns (descriptor, None) or (None, error message)."""
+    if not isinstance(body, dict):
+        return None, "upload request must be a JSON object"
+
+    photo_id = body.get("photoId")
+    content_type = body.get("contentType", "image/webp")
+    original_file_name = body.get("originalFileName")
+    subjects = sanitize_subjects(body.get("subjects"))
+    content_hash = sanitize_content_hash(body.get("contentHash"))
+
+    if body.get("subjects") is not None and subjects is None:
+        return None, "subjects must be an array of strings"
+
+    if body.get("contentHash") is not None and content_hash is None:
+        return None, "contentHash must be a 64-character hex SHA-256 string"
+
+    if original_file_name:
+        original_file_name = os.path.basename(str(original_file_name))[:255]
+
+    if not photo_id:
+        return None, "photoId is required"
+
+    if not isinstance(photo_id, str) or not PHOTO_ID_PATTERN.match(photo_id):
+        return None, "photoId must be 1-128 letters, digits, '-' or '_'"
+
+    return {
+        "photoId": photo_id,
+        "contentType": content_type,
+        "originalFileName": original_file_name,
+        "subjects": subjects,
+        "contentHash": content_hash,
+    }, None
+
+
+def parse_multipart_request(body):
+    """(fileSize, None) for a multipart upload-init, (None, None) for a single PUT, or (None, error message)."""
+    if not body.get("multipart"):
+        return None, None
+    file_size = body.get("fileSize")
+    if isinstance(file_size, bool) or not isinstance(file_size, int) or not 0 < file_size <= MULTIPART_MAX_FILE_SIZE:
+        return None, "fileSize must be a positive integer of at most 5 TiB for multipart uploads"
+    return file_size, None
+
+
+def multipart_part_size(file_size):
+    """8 MiB parts, grown in whole MiB steps when 10,000 of them would not cover the file."""
+    mebibyte = 1024 * 1024
+    smallest_fitting = math.ceil(file_size / MULTIPART_MAX_PARTS / mebibyte) * mebibyte
+    return max(MULTIPART_PART_SIZE, smallest_fitting)
+
+
+def multipart_part_count(item):
+    return max(1, math.ceil(int(item["FileSize"]) / int(item["MultipartPartSize"])))
+
+
+def parse_part_numbers(value, part_count):
+    """Validate a list of part numbers to sign; returns (sorted unique numbers, None) or (None, error message).
+
+    An empty list is allowed: a resuming client with every part uploaded still needs a thumbnail URL.
+    """
+    if not isinstance(value, list) or len(value) > MAX_PART_URLS_PER_REQUEST:
+        return None, f"partNumbers must be an array of 0-{MAX_PART_URLS_PER_REQUEST} part numbers"
+    for number in value:
+        if isinstance(number, bool) or not isinstance(number, int) or not 1 <= number <= part_count:
+            return None, f"partNumbers must be integers between 1 and {part_count}"
+    return sorted(set(value)), None
+
+
+def parse_completed_parts(value, part_count):
+    """Validate upload-complete's parts list; returns (S3 Parts list, None) or (None, error message)."""
+    if not isinstance(value, list) or len(value) != part_count:
+        return None, f"parts must list all {part_count} uploaded parts"
+    parts = {}
+    for part in value:
+        part_number = part.get("partNumber") if isinstance(part, dict) else None
+        etag = part.get("etag") if isinstance(part, dict) else None
+        if isinstance(part_number, bool) or not isinstance(part_number, int) or not 1 <= part_number <= part_count:
+            return None, f"parts[].partNumber must be an integer between 1 and {part_count}"
+        if not isinstance(etag, str) or not etag:
+            return None, "parts[].etag must be the ETag S3 returned for that part"
+        parts[part_number] = etag
+    if len(parts) != part_count:
+        return None, f"parts must list all {part_count} uploaded parts"
+    return [{"PartNumber": number, "ETag": parts[number]} for number in sorted(parts)], None
+
+
+def find_dedupe_source(table, content_hash, user_id, photo_id):
+    # Query the ContentHash GSI; a filtered scan with Limit=1 stops after one evaluated row.
+    query_args = {
+        "IndexName": CONTENT_HASH_INDEX,
+        "KeyConditionExpression": Key("ContentHash").eq(content_hash),
+        # Trashed rows stay ACTIVE; linking to one would be cancelled by the source check anyway
+        "FilterExpression": Attr("Status").eq("ACTIVE") & Attr("DeletedAt").not_exists(),
+        "ProjectionExpression": "UserId, PhotoId, ObjectKey, ThumbnailKey, Renditions",
+    }
+    while True:
+        result = table.query(**query_args)
+        for candidate in result.get("Items") or []:
+            # A re-upload of the same photo must not link to itself
+            if candidate.get("UserId") == user_id and candidate.get("PhotoId") == photo_id:
+                continue
+            return candidate
+        last_key = result.get("LastEvaluatedKey")
+        if not last_key:
+            return None
+        query_args["ExclusiveStartKey"] = last_key
+
+
+def dedupe_source_check_action(table_name, dedupe_source):
+    """TransactWriteItems entry that holds only while the dedupe source row is live (not trashed).
+
+    ContentHashIndex is eventually consistent and trashed rows stay ACTIVE, so a
+    source read there may be on its way out through hard delete. Checking it in
+    the same transaction as the new object reference keeps that reference from
+    landing on an object the hard delete has already claimed.
+    """
+    return {
+        "ConditionCheck": {
+            "TableName": table_name,
+            "Key": {"UserId": dedupe_source["UserId"], "PhotoId": dedupe_source["PhotoId"]},
+            "ConditionExpression": "attribute_exists(PhotoId) AND attribute_not_exists(DeletedAt)",
+        }
+    }
+
+
+def build_photo_item(user_id, descriptor, previous_item, dedupe_source):
+    """The photo row upload-init writes: PENDING until upload-complete, or ACTIVE when deduplicated."""
+    photo_id = descriptor["photoId"]
+    content_type = descriptor["contentType"]
+
+    object_key = dedupe_source.get("ObjectKey") if dedupe_source else f"originals/{user_id}/{photo_id}.webp"
+    is_image_upload = is_image_content_type(content_type)
+    thumbnail_key = None
+    if dedupe_source and dedupe_source.get("ThumbnailKey"):
+        thumbnail_key = dedupe_source.get("ThumbnailKey")
+    elif is_image_upload:
+        thumbnail_key = build_thumbnail_key(user_id, photo_id)
+
+    # A retried upload-init keeps its original CreatedAt, and with it its place in the chronological list
+    created_at = (previous_item or {}).get("CreatedAt") or datetime.now(timezone.utc).isoformat()
+
+    item = {
+        "UserId": user_id,
+        "PhotoId": photo_id,
+        "ObjectKey": object_key,
+        "ContentType": content_type,
+        "OriginalFileName": descriptor["originalFileName"],
+        "CreatedAt": created_at,
+        "Status": "ACTIVE" if dedupe_source else "PENDING",
+        "Version": photo_version(previous_item) + 1,
+        "UpdatedAt": updated_at_now(),
+    }
+    if descriptor["subjects"] is not None:
+        item["Subjects"] = descriptor["subjects"]
+    if descriptor["contentHash"] is not None:
+        item["ContentHash"] = descriptor["contentHash"]
+    if thumbnail_key:
+        item["ThumbnailKey"] = thumbnail_key
+    if dedupe_source and dedupe_source.get("Renditions"):
+        # The source's rendition ladder serves size hints; deduplicated rows are never derived
+        item["Renditions"] = dedupe_source["Renditions"]
+    if dedupe_source:
+        # Deduplicated uploads are complete on arrival, so they join ActiveIndex right away
+        item["ActiveUserId"] = user_id
+        item["DeduplicatedFromPhotoId"] = dedupe_source.get("PhotoId")
+        item["DeduplicatedFromUserId"] = dedupe_source.get("UserId")
+    return item
+
+
+def dedupe_result(item, dedupe_source):
+    return {
+        "uploadRequired": False,
+        "deduplicated": True,
+        "objectKey": item["ObjectKey"],
+        "thumbnailKey": dedupe_source.get("ThumbnailKey"),
+        "linkedToPhotoId": dedupe_source.get("PhotoId"),
+        "linkedToUserId": dedupe_source.get("UserId"),
+    }
+
+
+def upload_result(item, upload_url, thumbnail_upload_url):
+    result = {
+        "uploadRequired": True,
+        "deduplicated": False,
+        "uploadUrl": upload_url,
+        "objectKey": item["ObjectKey"],
+        "thumbnailKey": item.get("ThumbnailKey"),
+        "thumbnailUploadUrl": thumbnail_upload_url,
+        "expiresInSeconds": UPLOAD_URL_EXPIRES_SECONDS,
+    }
+    if item.get("MultipartUploadId"):
+        result["multipartUploadId"] = item["MultipartUploadId"]
+        result["partSize"] = int(item["MultipartPartSize"])
+        result["partCount"] = multipart_part_count(item)
+    return result
+
+
+def start_multipart_upload(s3_client, bucket, item, file_size):
+    """Open an S3 multipart upload for the row's object and record it on the (not yet written) row."""
+    response = s3_client.create_multipart_upload(Bucket=bucket, Key=item["ObjectKey"], ContentType=item["ContentType"])
+    item["MultipartUploadId"] = response["UploadId"]
+    item["MultipartPartSize"] = multipart_part_size(file_size)
+    item["FileSize"] = file_size
+    return item
+
+
+def complete_multipart_upload(s3_client, bucket, item, parts):
+    """Assemble the uploaded parts into the object; returns an error message when S3 rejects the parts."""
+    try:
+        s3_client.complete_multipart_upload(
+            Bucket=bucket,
+            Key=item["ObjectKey"],
+            UploadId=item["MultipartUploadId"],
+            MultipartUpload={"Parts": parts},
+        )
+    except ClientError as error:
+        code = error.response.get("Error", {}).get("Code")
+        if code == "NoSuchUpload":
+            # An earlier attempt completed it but its response was lost; the storage check decides
+            return None
+        if code in ("InvalidPart", "InvalidPartOrder", "EntityTooSmall"):
+            return f"multipart upload could not be completed: {code}"
+        raise
+    return None
+
+
+def abort_multipart_upload(s3_client, bucket, item):
+    """Best-effort abort of a row's open multipart upload; the bucket's lifecycle rule catches any miss."""
+    upload_id = (item or {}).get("MultipartUploadId")
+    if not upload_id:
+        return
+    try:
+        s3_client.abort_multipart_upload(Bucket=bucket, Key=item["ObjectKey"], UploadId=upload_id)
+    except ClientError as error:
+        print(f"multipart abort skipped for {item.get('PhotoId')}: {error}")
+
+
+def is_image_content_type(content_type):
+    return str(content_type or "").lower().startswith("image/")
+
+
+def _renditions_from_image(image, sizes):
+    """WebP bytes per long edge in sizes, each step downscaled from the larger one before it."""
+    renditions = {}
+    for size in sorted(sizes, reverse=True):
+        image = downscale(image, size)
+        output = BytesIO()
+        image.save(output, format="WEBP", quality=80)
+        renditions[size] = output.getvalue()
+    return renditions
+
+
+def _thumbnail_from_image(image):
+    return _renditions_from_image(image, (THUMBNAIL_MAX_SIZE,))[THUMBNAIL_MAX_SIZE]
+
+
+def create_thumbnail_bytes(source_bytes):
+    Image, _ = load_pillow()
+    if Image is None:
+        return None
+
+    with Image.open(BytesIO(source_bytes)) as image:
+        return _thumbnail_from_image(image)
+
+
+def put_rendition(s3_client, bucket, key, rendition_bytes):
+    s3_client.put_object(
+        Bucket=bucket,
+        Key=key,
+        Body=rendition_bytes,
+        ContentType="image/webp",
+        CacheControl="public, max-age=31536000",
+    )
+    return key
+
+
+def _build_exif_tag_map(exif_data):
+    _, ExifTags = load_pillow()
+    if ExifTags is None:
+        return {}
+
+    if not exif_data:
+        return {}
+
+    tags = dict(exif_data.items())
+    # Cameras record DateTimeOriginal in the Exif sub-IFD; the base IFD only has DateTime
+    tags.update(exif_data.get_ifd(EXIF_IFD_POINTER))
+    return {
+        ExifTags.TAGS.get(tag_id, tag_id): value
+        for tag_id, value in tags.items()
+    }
+
+
+def normalize_date_label(raw_value):
+    if not raw_value:
+        return None
+
+    if isinstance(raw_value, bytes):
+        raw_value = raw_value.decode("utf-8", errors="ignore")
+
+    value = str(raw_value).strip()
+    if not value:
+        return None
+
+    candidates = [
+        "%Y:%m:%d %H:%M:%S",
+        "%Y-%m-%d %H:%M:%S",
+        "%Y:%m:%d",
+        "%Y-%m-%d",
+    ]
+    for date_format in candidates:
+        try:
+            parsed = datetime.strptime(value, date_format)
+            return f"date:{parsed.date().isoformat()}"
+        except ValueError:
+            continue
+
+    return None
+
+
+def _date_label_from_exif(exif_data):
+    tag_map = _build_exif_tag_map(exif_data)
+    return normalize_date_label(tag_map.get("DateTimeOriginal") or tag_map.get("DateTime"))
+
+
+def extract_date_label_from_image(source_bytes):
+    Image, _ = load_pillow()
+    if Image is None:
+        return None
+
+    with Image.open(BytesIO(source_bytes)) as image:
+        return _date_label_from_exif(image.getexif())
+
+
+def extract_date_label_from_exif(exif_bytes):
+    """Date label from a raw EXIF block, as returned by exif_reader.read_exif_block."""
+    Image, _ = load_pillow()
+    if Image is None or not exif_bytes:
+        return None
+
+    exif_data = Image.Exif()
+    exif_data.load(exif_bytes)
+    return _date_label_from_exif(exif_data)
+
+
+def derive_image(source_bytes, sizes=(THUMBNAIL_MAX_SIZE,)):
+    """Date label and {long edge: WebP bytes} from a single open of the original; (None, {}) without Pillow."""
+    Image, _ = load_pillow()
+    if Image is None:
+        return None, {}
+
+    with Image.open(BytesIO(source_bytes)) as image:
+        # EXIF sits in the file header, so it is read before the pixels are decoded for the renditions
+        date_label = None
+        try:
+            date_label = _date_label_from_exif(image.getexif())
+        except Exception as metadata_error:
+            print(f"date label extraction skipped: {metadata_error}")
+        if image.width * image.height > MAX_DERIVE_PIXELS:
+            print(f"renditions skipped: {image.width}x{image.height} is over {MAX_DERIVE_PIXELS} pixels")
+            return date_label, {}
+        return date_label, _renditions_from_image(image, sizes)
+
+
+def merge_subjects_with_date_label(subjects, date_label):
+    cleaned = []
+    seen = set()
+
+    for value in subjects or []:
+        if not isinstance(value, str):
+            continue
+        item = value.strip()
+        if not item:
+            continue
+        lowered = item.lower()
+        if lowered in seen:
+            continue
+        seen.add(lowered)
+        cleaned.append(item)
+
+    if date_label:
+        lowered = date_label.lower()
+        if lowered not in seen:
+            cleaned.append(date_label)
+
+    if len(cleaned) > MAX_SUBJECTS:
+        cleaned = cleaned[:MAX_SUBJECTS]
+
+    return cleaned
+
+
+def object_exists(s3_client, bucket, object_key):
+    try:
+        s3_client.head_object(Bucket=bucket, Key=object_key)
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") == "404":
+            return False
+        raise
+    return True
+
+
+def completed_result(item):
+    return {
+        "photoId": item["PhotoId"],
+        "status": item.get("Status"),
+        "thumbnailKey": item.get("ThumbnailKey"),
+        "derivationStatus": item.get("DerivationStatus"),
+    }
+
+
+def activate_photo(table, user_id, item, derivation_status):
+    """Flip an uploaded photo to ACTIVE, leaving thumbnail and date label to the derive worker.
+
+    Returns the updated row, or None when the photo is no longer PENDING: a
+    repeated upload-complete must not reset DerivationStatus and queue the work again.
+    """
+    update_expression = "SET #status = :active, #derivationStatus = :derivationStatus, #updatedAt = :updatedAt"
+    expression_attribute_names = {
+        "#status": "Status",
+        "#derivationStatus": "DerivationStatus",
+        "#updatedAt": "UpdatedAt",
+    }
+    expression_attribute_values = {
+        ":active": "ACTIVE",
+        ":pending": "PENDING",
+        ":derivationStatus": derivation_status,
+        ":updatedAt": updated_at_now(),
+    }
+
+    # ActiveUserId is the sparse ActiveIndex partition key; delete removes it again
+    if not item.get("DeletedAt"):
+        update_expression += ", #activeUserId = :userId"
+        expression_attribute_names["#activeUserId"] = "ActiveUserId"
+        expression_attribute_values[":userId"] = user_id
+
+    # The object is assembled; the upload ID is spent
+    if item.get("MultipartUploadId"):
+        update_expression += " REMOVE #multipartUploadId, #multipartPartSize"
+        expression_attribute_names["#multipartUploadId"] = "MultipartUploadId"
+        expression_attribute_names["#multipartPartSize"] = "MultipartPartSize"
+
+    update_expression += " ADD #version :one"
+    expression_attribute_names["#version"] = "Version"
+    expression_attribute_values[":one"] = 1
+
+    try:
+        updated = table.update_item(
+            Key={
+                "UserId": user_id,
+                "PhotoId": item["PhotoId"]
+            },
+            UpdateExpression=update_expression,
+            ConditionExpression="#status = :pending",
+            ExpressionAttributeNames=expression_attribute_names,
+            ExpressionAttributeValues=expression_attribute_values,
+            ReturnValues="ALL_NEW",
+        )
+    except table.meta.client.exceptions.ConditionalCheckFailedException:
+        return None
+    return updated.get("Attributes")
+
+
+def initial_derivation_status(item):
+    # Only images get a thumbnail and an EXIF date label
+    return DERIVATION_PENDING if is_image_content_type(item.get("ContentType")) else DERIVATION_SKIPPED
+
+
+def apply_derivatives(table, user_id, item, date_label, thumbnail_key, renditions=None):
+    """Record the worker's date label, thumbnail and renditions on the row it read; returns the updated row.
+
+    The write is conditioned on the Version the worker read, and album label
+    writes are conditioned the same way, so neither drops the other's
+    subjects: whichever loses the race re-reads and retries.
+    """
+    merged_subjects = merge_subjects_with_date_label(item.get("Subjects") or [], date_label)
+
+    update_expression = "SET #subjects = :subjects, #derivationStatus = :complete, #updatedAt = :updatedAt"
+    expression_attribute_names = {
+        "#subjects": "Subjects",
+        "#derivationStatus": "DerivationStatus",
+        "#updatedAt": "UpdatedAt",
+        "#version": "Version",
+    }
+    expression_attribute_values = {
+        ":subjects": merged_subjects,
+        ":complete": DERIVATION_COMPLETE,
+        ":updatedAt": updated_at_now(),
+        ":one": 1,
+    }
+    if thumbnail_key:
+        update_expression += ", #thumbnailKey = :thumbnailKey"
+        expression_attribute_names["#thumbnailKey"] = "ThumbnailKey"
+        expression_attribute_values[":thumbnailKey"] = thumbnail_key
+    if renditions:
+        update_expression += ", #renditions = :renditions"
+        expression_attribute_names["#renditions"] = "Renditions"
+        expression_attribute_values[":renditions"] = renditions
+    update_expression += " ADD #version :one"
+
+    if "Version" in item:
+        condition_expression = "#version = :readVersion"
+        expression_attribute_values[":readVersion"] = item["Version"]
+    else:
+        condition_expression = "attribute_exists(PhotoId) AND attribute_not_exists(#version)"
+
+    updated = table.update_item(
+        Key={"UserId": user_id, "PhotoId": item["PhotoId"]},
+        UpdateExpression=update_expression,
+        ConditionExpression=condition_expression,
+        ExpressionAttributeNames=expression_attribute_names,
+        ExpressionAttributeValues=expression_attribute_values,
+        ReturnValues="ALL_NEW",
+    )
+    return updated.get("Attributes")
@@ -1,173 +1,57 @@
 import json
 import os
-from io import BytesIO
-from datetime import datetime
-
-import boto3
-from botocore.exceptions import ClientError
 
 try:
-    from PIL import ExifTags, Image
-except Exception:
-    ExifTags = None
-    Image = None
+    from handlers.derivation_queue import enqueue_derivations
+    from handlers.photo_index import sync_photo_postings
+    from handlers.runtime import aws_client, aws_resource, error_response, extract_user_id, json_response
+    from handlers.upload_common import (
+        DERIVATION_PENDING,
+        activate_photo,
+        complete_multipart_upload,
+        completed_result,
+        initial_derivation_status,
+        multipart_part_count,
+        object_exists,
+        parse_completed_parts,
+    )
+    from handlers.versions import bump_collection_version
+except ImportError:
+    from derivation_queue import enqueue_derivations  # type: ignore
+    from photo_index import sync_photo_postings  # type: ignore
+    from runtime import aws_client, aws_resource, error_response, extract_user_id, json_response  # type: ignore
+    from upload_common import (  # type: ignore
+        DERIVATION_PENDING,
+        activate_photo,
+        complete_multipart_upload,
+        completed_result,
+        initial_derivation_status,
+        multipart_part_count,
+        object_exists,
+        parse_completed_parts,
+    )
+    from versions import bump_collection_version  # type: ignore
 
-s3 = boto3.client("s3")
-dynamodb = boto3.resource("dynamodb")
+s3 = aws_client("s3")
+dynamodb = aws_resource("dynamodb")
 
 PHOTO_BUCKET = os.environ["PHOTO_BUCKET"]
 PHOTOS_TABLE = os.environ["PHOTOS_TABLE"]
-THUMBNAIL_MAX_SIZE = int(os.environ.get("THUMBNAIL_MAX_SIZE", "320"))
-MAX_SUBJECTS = 50
-
-
-def _build_thumbnail_key(user_id, photo_id):
-    return f"thumbnails/{user_id}/{photo_id}.webp"
-
-
-def _create_thumbnail_bytes(source_bytes):
-    if Image is None:
-        return None
-
-    with Image.open(BytesIO(source_bytes)) as image:
-        normalized = image.convert("RGB")
-        normalized.thumbnail((THUMBNAIL_MAX_SIZE, THUMBNAIL_MAX_SIZE))
-        output = BytesIO()
-        normalized.save(output, format="WEBP", quality=80)
-        return output.getvalue()
-
-
-def _build_exif_tag_map(image):
-    if ExifTags is None:
-        return {}
-
-    exif_data = image.getexif()
-    if not exif_data:
-        return {}
-
-    return {
-        ExifTags.TAGS.get(tag_id, tag_id): value
-        for tag_id, value in exif_data.items()
-    }
-
-
-def _normalize_date_label(raw_value):
-    if not raw_value:
-        return None
-
-    if isinstance(raw_value, bytes):
-        raw_value = raw_value.decode("utf-8", errors="ignore")
-
-    value = str(raw_value).strip()
-    if not value:
-        return None
-
-    candidates = [
-        "%Y:%m:%d %H:%M:%S",
-        "%Y-%m-%d %H:%M:%S",
-        "%Y:%m:%d",
-        "%Y-%m-%d",
-    ]
-    for date_format in candidates:
-        try:
-            parsed = datetime.strptime(value, date_format)
-            return f"date:{parsed.date().isoformat()}"
-        except ValueError:
-            continue
-
-    return None
-
-
-def _extract_date_label_from_image(source_bytes):
-    if Image is None:
-        return None
-
-    with Image.open(BytesIO(source_bytes)) as image:
-        tag_map = _build_exif_tag_map(image)
-        return _normalize_date_label(tag_map.get("DateTimeOriginal") or tag_map.get("DateTime"))
-
-
-def _merge_subjects_with_date_label(subjects, date_label):
-    cleaned = []
-    seen = set()
-
-    for value in subjects or []:
-        if not isinstance(value, str):
-            continue
-        item = value.strip()
-        if not item:
-            continue
-        lowered = item.lower()
-        if lowered in seen:
-            continue
-        seen.add(lowered)
-        cleaned.append(item)
+PHOTO_INDEX_TABLE = os.environ["PHOTO_INDEX_TABLE"]
+USERS_TABLE = os.environ["USERS_TABLE"]
 
-    if date_label:
-        lowered = date_label.lower()
-        if lowered not in seen:
-            cleaned.append(date_label)
-
-    if len(cleaned) > MAX_SUBJECTS:
-        cleaned = cleaned[:MAX_SUBJECTS]
-
-    return cleaned
-
-
-def _try_generate_thumbnail(user_id, photo_id, object_key, content_type):
-    content_type_normalized = (content_type or "").lower()
-    if not content_type_normalized.startswith("image/"):
-        return None
-
-    source_object = s3.get_object(Bucket=PHOTO_BUCKET, Key=object_key)
-    source_bytes = source_object.get("Body").read()
-    thumbnail_bytes = _create_thumbnail_bytes(source_bytes)
-    if not thumbnail_bytes:
-        return None
-
-    thumbnail_key = _build_thumbnail_key(user_id, photo_id)
-    s3.put_object(
-        Bucket=PHOTO_BUCKET,
-        Key=thumbnail_key,
-        Body=thumbnail_bytes,
-        ContentType="image/webp",
-        CacheControl="public, max-age=31536000",
-    )
-    return thumbnail_key
-
-
-def _load_source_bytes(object_key):
-    source_object = s3.get_object(Bucket=PHOTO_BUCKET, Key=object_key)
-    return source_object.get("Body").read()
 
 def handler(event, context):
     try:
-        claims = (((event.get("requestContext") or {}).get("authorizer") or {}).get("jwt") or {}).get("claims") or {}
-        user_id = claims.get("sub")
-
-        if not user_id:
-            return {
-                "statusCode": 401,
-                "body": json.dumps({"error": "missing or invalid JWT subject claim"})
-            }
-
-        email_verified = claims.get("email_verified")
-        if isinstance(email_verified, str):
-            email_verified = email_verified.lower() == "true"
-        if email_verified is False:
-            return {
-                "statusCode": 403,
-                "body": json.dumps({"error": "email is not verified"})
-            }
+        user_id, auth_error = extract_user_id(event)
+        if auth_error:
+            return auth_error
 
         body = json.loads(event.get("body") or "{}")
         photo_id = body.get("photoId")
 
         if not photo_id:
-            return {
-                "statusCode": 400,
-                "body": json.dumps({"error": "photoId is required"})
-            }
+            return error_response(400, "photoId is required")
 
         table = dynamodb.Table(PHOTOS_TABLE)
         
@@ -181,90 +65,53 @@ def handler(event, context):
         
         item = response.get("Item")
         if not item:
-            return {
-                "statusCode": 404,
-                "body": json.dumps({"error": "photo not found"})
-            }
+            return error_response(404, "photo not found")
         
+        # A repeated complete is a no-op; re-activating would reset derivation and queue it again
+        if item.get("Status") == "ACTIVE":
+            return json_response(200, completed_result(item))
+
         object_key = item.get("ObjectKey")
         if not object_key:
-            return {
-                "statusCode": 500,
-                "body": json.dumps({"error": "photo record missing object key"})
-            }
+            return error_response(500, "photo record missing object key")
+
+        # Multipart uploads are assembled from the part ETags the client collected
+        if item.get("MultipartUploadId"):
+            parts, parts_error = parse_completed_parts(body.get("parts"), multipart_part_count(item))
+            if parts_error:
+                return error_response(400, parts_error)
+            completion_error = complete_multipart_upload(s3, PHOTO_BUCKET, item, parts)
+            if completion_error:
+                return error_response(400, completion_error)
         
         # Verify the object exists in S3
-        try:
-            s3.head_object(Bucket=PHOTO_BUCKET, Key=object_key)
-        except ClientError as e:
-            error_code = e.response.get("Error", {}).get("Code")
-            if error_code == "404":
-                return {
-                    "statusCode": 404,
-                    "body": json.dumps({"error": "photo not found in storage"})
-                }
-            raise
+        if not object_exists(s3, PHOTO_BUCKET, object_key):
+            return error_response(404, "photo not found in storage")
         
-        source_bytes = None
-        date_label = None
-        content_type = item.get("ContentType")
-        content_type_normalized = (content_type or "").lower()
-        if content_type_normalized.startswith("image/"):
-            try:
-                source_bytes = _load_source_bytes(object_key)
-                date_label = _extract_date_label_from_image(source_bytes)
-            except Exception as metadata_error:
-                print(f"upload-complete metadata extraction skipped: {metadata_error}")
-
-        thumbnail_key = None
-        try:
-            thumbnail_key = _try_generate_thumbnail(
-                user_id=user_id,
-                photo_id=photo_id,
-                object_key=object_key,
-                content_type=content_type,
-            )
-        except Exception as thumbnail_error:
-            print(f"upload-complete thumbnail generation skipped: {thumbnail_error}")
-
-        merged_subjects = _merge_subjects_with_date_label(item.get("Subjects") or [], date_label)
-
-        update_expression = "SET #status = :active, #subjects = :subjects"
-        expression_attribute_names = {
-            "#status": "Status",
-            "#subjects": "Subjects",
-        }
-        expression_attribute_values = {
-            ":active": "ACTIVE",
-            ":subjects": merged_subjects,
-        }
-
-        if thumbnail_key:
-            update_expression += ", #thumbnailKey = :thumbnailKey"
-            expression_attribute_names["#thumbnailKey"] = "ThumbnailKey"
-            expression_attribute_values[":thumbnailKey"] = thumbnail_key
-
-        table.update_item(
-            Key={
-                "UserId": user_id,
-                "PhotoId": photo_id
-            },
-            UpdateExpression=update_expression,
-            ExpressionAttributeNames=expression_attribute_names,
-            ExpressionAttributeValues=expression_attribute_values,
+        # Thumbnail and date label come later from the derive worker; the photo is usable now
+        derivation_status = initial_derivation_status(item)
+        updated = activate_photo(table, user_id, item, derivation_status)
+        if not updated:
+            # A concurrent complete activated the photo first
+            current = table.get_item(
+                Key={"UserId": user_id, "PhotoId": photo_id},
+                ConsistentRead=True,
+            ).get("Item")
+            if not current:
+                return error_response(404, "photo not found")
+            return json_response(200, completed_result(current))
+        sync_photo_postings(
+            dynamodb.Table(PHOTO_INDEX_TABLE),
+            user_id,
+            photo_id,
+            item,
+            updated,
         )
+        bump_collection_version(dynamodb.Table(USERS_TABLE), user_id)
+        if derivation_status == DERIVATION_PENDING:
+            enqueue_derivations(user_id, [photo_id])
 
-        return {
-            "statusCode": 200,
-            "body": json.dumps({
-                "photoId": photo_id,
-                "status": "ACTIVE",
-                "thumbnailKey": thumbnail_key,
-            })
-        }
+        return json_response(200, completed_result(updated))
     except Exception as error:
         print(f"upload-complete handler error: {error}")
-        return {
-            "statusCode": 500,
-            "body": json.dumps({"error": "internal server error"})
-        }
+        return error_response(500, "internal server error")
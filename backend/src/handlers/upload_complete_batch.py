@@ -0,0 +1,123 @@
+import json
+import os
+
+try:
+    from handlers.derivation_queue import enqueue_derivations
+    from handlers.photo_index import batch_get_photos, sync_many_photo_postings
+    from handlers.runtime import aws_client, aws_resource, error_response, extract_user_id, json_response, run_parallel
+    from handlers.upload_common import DERIVATION_PENDING, activate_photo, completed_result, initial_derivation_status, object_exists
+    from handlers.versions import bump_collection_version
+except ImportError:
+    from derivation_queue import enqueue_derivations  # type: ignore
+    from photo_index import batch_get_photos, sync_many_photo_postings  # type: ignore
+    from runtime import aws_client, aws_resource, error_response, extract_user_id, json_response, run_parallel  # type: ignore
+    from upload_common import DERIVATION_PENDING, activate_photo, completed_result, initial_derivation_status, object_exists  # type: ignore
+    from versions import bump_collection_version  # type: ignore
+
+s3 = aws_client("s3")
+dynamodb = aws_resource("dynamodb")
+
+PHOTO_BUCKET = os.environ["PHOTO_BUCKET"]
+PHOTOS_TABLE = os.environ["PHOTOS_TABLE"]
+PHOTO_INDEX_TABLE = os.environ["PHOTO_INDEX_TABLE"]
+USERS_TABLE = os.environ["USERS_TABLE"]
+MAX_PHOTO_IDS = 100
+# HeadObject checks and row updates are single calls with no image work; run this many at once
+FINALIZE_WORKERS = 16
+
+
+def _parse_photo_ids(body):
+    """Requested IDs in order with duplicates dropped (BatchGetItem rejects repeated keys), or None."""
+    photo_ids = body.get("photoIds") if isinstance(body, dict) else None
+    if not isinstance(photo_ids, list) or not photo_ids:
+        return None
+    if not all(isinstance(photo_id, str) and photo_id for photo_id in photo_ids):
+        return None
+    return list(dict.fromkeys(photo_ids))
+
+
+def _finalize(user_id, table, item):
+    """Run one photo through upload-complete; returns (current row, whether this call activated it, error message)."""
+    try:
+        # A repeated complete is a no-op; re-activating would reset derivation and queue it again
+        if item.get("Status") == "ACTIVE":
+            return item, False, None
+        object_key = item.get("ObjectKey")
+        if not object_key:
+            return None, None, "photo record missing object key"
+        if item.get("MultipartUploadId"):
+            return None, None, "multipart uploads are completed with POST /photos/upload-complete and their parts"
+        if not object_exists(s3, PHOTO_BUCKET, object_key):
+            return None, None, "photo not found in storage"
+
+        updated = activate_photo(table, user_id, item, initial_derivation_status(item))
+        if updated:
+            return updated, True, None
+        # A concurrent complete activated the photo first
+        current = table.get_item(
+            Key={"UserId": user_id, "PhotoId": item["PhotoId"]},
+            ConsistentRead=True,
+        ).get("Item")
+        if not current:
+            return None, False, "photo not found"
+        return current, False, None
+    except Exception as error:
+        print(f"upload-complete batch error for {item.get('PhotoId')}: {error}")
+        return None, None, "internal server error"
+
+
+def handler(event, context):
+    try:
+        user_id, auth_error = extract_user_id(event)
+        if auth_error:
+            return auth_error
+
+        body = json.loads(event.get("body") or "{}")
+        photo_ids = _parse_photo_ids(body)
+        if photo_ids is None:
+            return error_response(400, "photoIds must be a non-empty array of strings")
+        if len(photo_ids) > MAX_PHOTO_IDS:
+            return error_response(400, f"photoIds accepts at most {MAX_PHOTO_IDS} IDs")
+
+        table = dynamodb.Table(PHOTOS_TABLE)
+        items = batch_get_photos(dynamodb, PHOTOS_TABLE, user_id, photo_ids)
+
+        # S3 checks and row updates run side by side; thumbnails and date labels are left to the derive worker
+        found = [items[photo_id] for photo_id in photo_ids if photo_id in items]
+        outcomes = dict(zip(
+            [item["PhotoId"] for item in found],
+            run_parallel(lambda item: _finalize(user_id, table, item), found, FINALIZE_WORKERS),
+        ))
+
+        results = []
+        posting_changes = []
+        pending = []
+        for photo_id in photo_ids:
+            if photo_id not in outcomes:
+                results.append({"photoId": photo_id, "error": "photo not found"})
+                continue
+            updated, activated, finalize_error = outcomes[photo_id]
+            if finalize_error:
+                results.append({"photoId": photo_id, "error": finalize_error})
+                continue
+            if activated:
+                posting_changes.append((photo_id, items[photo_id], updated))
+                if updated.get("DerivationStatus") == DERIVATION_PENDING:
+                    pending.append(photo_id)
+            results.append(completed_result(updated))
+
+        if posting_changes:
+            sync_many_photo_postings(dynamodb.Table(PHOTO_INDEX_TABLE), user_id, posting_changes)
+            bump_collection_version(dynamodb.Table(USERS_TABLE), user_id)
+        enqueue_derivations(user_id, pending)
+
+        return json_response(200, {
+            "results": results,
+            "count": len(results),
+            "failedCount": sum(1 for result in results if "error" in result),
+        }, event)
+    except json.JSONDecodeError:
+        return error_response(400, "invalid JSON in request body")
+    except Exception as error:
+        print(f"upload-complete batch handler error: {error}")
+        return error_response(500, "internal server error")
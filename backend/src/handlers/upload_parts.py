@@ -0,0 +1,86 @@
+import json
+import os
+
+try:
+    from handlers.runtime import aws_client, aws_resource, error_response, extract_user_id, json_response
+    from handlers.upload_common import UPLOAD_URL_EXPIRES_SECONDS, multipart_part_count, parse_part_numbers
+except ImportError:
+    from runtime import aws_client, aws_resource, error_response, extract_user_id, json_response  # type: ignore
+    from upload_common import UPLOAD_URL_EXPIRES_SECONDS, multipart_part_count, parse_part_numbers  # type: ignore
+
+s3 = aws_client("s3")
+dynamodb = aws_resource("dynamodb")
+
+PHOTO_BUCKET = os.environ["PHOTO_BUCKET"]
+PHOTOS_TABLE = os.environ["PHOTOS_TABLE"]
+
+
+def handler(event, context):
+    try:
+        user_id, auth_error = extract_user_id(event)
+        if auth_error:
+            return auth_error
+
+        photo_id = (event.get("pathParameters") or {}).get("photoId")
+        if not photo_id:
+            return error_response(400, "photoId path param is required")
+
+        body = json.loads(event.get("body") or "{}")
+        if not isinstance(body, dict):
+            return error_response(400, "request body must be a JSON object")
+
+        item = dynamodb.Table(PHOTOS_TABLE).get_item(
+            Key={"UserId": user_id, "PhotoId": photo_id},
+            ProjectionExpression="ObjectKey, ThumbnailKey, #status, MultipartUploadId, MultipartPartSize, FileSize",
+            ExpressionAttributeNames={"#status": "Status"},
+        ).get("Item")
+        if not item:
+            return error_response(404, "photo not found")
+        if item.get("Status") != "PENDING" or not item.get("MultipartUploadId"):
+            return error_response(409, "photo has no multipart upload in progress")
+
+        part_count = multipart_part_count(item)
+        part_numbers, validation_error = parse_part_numbers(body.get("partNumbers"), part_count)
+        if validation_error:
+            return error_response(400, validation_error)
+
+        parts = [
+            {
+                "partNumber": part_number,
+                "uploadUrl": s3.generate_presigned_url(
+                    "upload_part",
+                    Params={
+                        "Bucket": PHOTO_BUCKET,
+                        "Key": item["ObjectKey"],
+                        "UploadId": item["MultipartUploadId"],
+                        "PartNumber": part_number,
+                    },
+                    ExpiresIn=UPLOAD_URL_EXPIRES_SECONDS,
+                ),
+            }
+            for part_number in part_numbers
+        ]
+
+        # A resuming client no longer holds upload-init's thumbnail URL, so every call signs a fresh one
+        thumbnail_upload_url = None
+        if item.get("ThumbnailKey"):
+            thumbnail_upload_url = s3.generate_presigned_url(
+                "put_object",
+                Params={"Bucket": PHOTO_BUCKET, "Key": item["ThumbnailKey"], "ContentType": "image/webp"},
+                ExpiresIn=UPLOAD_URL_EXPIRES_SECONDS,
+            )
+
+        # multipartUploadId lets a resuming client check that its saved part ETags belong to this upload
+        return json_response(200, {
+            "photoId": photo_id,
+            "multipartUploadId": item["MultipartUploadId"],
+            "partSize": int(item["MultipartPartSize"]),
+            "partCount": part_count,
+            "parts": parts,
+            "thumbnailKey": item.get("ThumbnailKey"),
+            "thumbnailUploadUrl": thumbnail_upload_url,
+            "expiresInSeconds": UPLOAD_URL_EXPIRES_SECONDS,
+        })
+    except Exception as error:
+        print(f"upload-parts handler error: {error}")
+        return error_response(500, "internal server error")
@@ -0,0 +1,101 @@
+"""Collection and photo versions behind the ETags on GET /photos and GET /photos/{photoId}.
+
+Every write that can change what a user's photo list returns bumps
+CollectionVersion on the user's row in the users table, and every write to a
+photo row bumps its Version attribute. A conditional GET then only has to
+read the version to answer 304.
+
+Every write to a photo row also stamps UpdatedAt, which orders the row on
+UpdatedAtIndex for the GET /photos/changes feed.
+"""
+
+import hashlib
+import time
+from datetime import datetime, timezone
+
+COLLECTION_VERSION_ATTRIBUTE = "CollectionVersion"
+PHOTO_VERSION_ATTRIBUTE = "Version"
+UPDATED_AT_ATTRIBUTE = "UpdatedAt"
+# Responses carry presigned URLs valid for an hour. Rotating the ETag every half
+# hour means a 304 never tells a client to keep URLs with under 30 minutes left.
+SIGNED_URL_ETAG_WINDOW_SECONDS = 1800
+
+
+def bump_collection_action(table_name, user_id):
+    """TransactWriteItems entry (for the resource client) bumping the user's collection version."""
+    return {
+        "Update": {
+            "TableName": table_name,
+            "Key": {"UserId": user_id},
+            "UpdateExpression": "ADD #collectionVersion :one",
+            "ExpressionAttributeNames": {"#collectionVersion": COLLECTION_VERSION_ATTRIBUTE},
+            "ExpressionAttributeValues": {":one": 1},
+        }
+    }
+
+
+def bump_collection_version(users_table, user_id):
+    users_table.update_item(
+        Key={"UserId": user_id},
+        UpdateExpression="ADD #collectionVersion :one",
+        ExpressionAttributeNames={"#collectionVersion": COLLECTION_VERSION_ATTRIBUTE},
+        ExpressionAttributeValues={":one": 1},
+    )
+
+
+def read_collection_version(users_table, user_id):
+    item = users_table.get_item(
+        Key={"UserId": user_id},
+        ProjectionExpression="#collectionVersion",
+        ExpressionAttributeNames={"#collectionVersion": COLLECTION_VERSION_ATTRIBUTE},
+    ).get("Item") or {}
+    return int(item.get(COLLECTION_VERSION_ATTRIBUTE) or 0)
+
+
+def updated_at_now():
+    """UpdatedAt value for a photo write; fixed-width so values sort in time order as strings."""
+    return datetime.now(timezone.utc).isoformat(timespec="microseconds")
+
+
+def photo_version(item):
+    return int((item or {}).get(PHOTO_VERSION_ATTRIBUTE) or 0)
+
+
+def make_etag(*parts, signed_urls=False):
+    """Weak ETag over the given parts; signed_urls also ties it to the current URL window."""
+    if signed_urls:
+        parts += (int(time.time() // SIGNED_URL_ETAG_WINDOW_SECONDS),)
+    digest = hashlib.sha256("\x1f".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+    return f'W/"{digest[:32]}"'
+
+
+def if_none_match(event):
+    headers = (event or {}).get("headers") or {}
+    return headers.get("if-none-match") or headers.get("If-None-Match")
+
+
+def etag_matches(event, etag):
+    """True when the request's If-None-Match names this ETag (weak comparison) or is '*'."""
+    candidates = if_none_match(event)
+    if not candidates:
+        return False
+
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in candidates.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def etag_headers(etag):
+    # no-cache: clients may store the body but must revalidate it before reuse
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+
+def not_modified_response(etag):
+    return {"statusCode": 304, "headers": etag_headers(etag), "body": ""}
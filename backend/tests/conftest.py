@@ -1,4 +1,6 @@
 import os
+import uuid
+
 import pytest
 
 # Set AWS credentials and region before any boto3 imports happen
@@ -12,3 +14,58 @@ os.environ.setdefault("AWS_SESSION_TOKEN", "testing")
 os.environ.setdefault("PHOTOS_TABLE", "photos-test")
 os.environ.setdefault("PHOTO_BUCKET", "photos-test-bucket")
 os.environ.setdefault("ALBUMS_TABLE", "albums-test")
+os.environ.setdefault("PHOTO_INDEX_TABLE", "photo-index-test")
+os.environ.setdefault("OBJECT_REFS_TABLE", "object-refs-test")
+os.environ.setdefault("USERS_TABLE", "users-test")
+
+
+class InProcessDerivationQueue:
+    """Stand-in for the SQS derivation queue: holds messages until drain() hands them to the worker."""
+
+    def __init__(self):
+        self.messages = []
+
+    def send(self, bodies):
+        self.messages.extend({"body": body, "receiveCount": 0} for body in bodies)
+
+    def drain(self, handler):
+        """Deliver messages to handler until none remain, redelivering reported failures like SQS would.
+
+        Returns the bodies that ran out of receives (what SQS would move to the dead-letter queue).
+        """
+        from handlers.derivation_queue import MAX_RECEIVE_COUNT, SEND_BATCH_MAX
+
+        dead_letters = []
+        while self.messages:
+            batch, self.messages = self.messages[:SEND_BATCH_MAX], self.messages[SEND_BATCH_MAX:]
+            records = {}
+            for message in batch:
+                message["receiveCount"] += 1
+                records[str(uuid.uuid4())] = message
+            response = handler({
+                "Records": [
+                    {
+                        "messageId": message_id,
+                        "body": message["body"],
+                        "attributes": {"ApproximateReceiveCount": str(message["receiveCount"])},
+                    }
+                    for message_id, message in records.items()
+                ]
+            }, None) or {}
+            for failure in response.get("batchItemFailures") or []:
+                message = records[failure["itemIdentifier"]]
+                if message["receiveCount"] >= MAX_RECEIVE_COUNT:
+                    dead_letters.append(message["body"])
+                else:
+                    self.messages.append(message)
+        return dead_letters
+
+
+@pytest.fixture
+def derivation_queue(monkeypatch):
+    """Fresh in-process derivation queue; drain() runs queued messages through the derive worker."""
+    from handlers import derivation_queue as queue_module
+
+    queue = InProcessDerivationQueue()
+    monkeypatch.setattr(queue_module, "derivation_queue", lambda: queue)
+    return queue
@@ -9,7 +9,16 @@ from moto import mock_aws
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
 
-from handlers import albums_apply_labels, albums_create, albums_list, albums_photos, albums_remove_labels
+from handlers import (
+    albums_apply_labels,
+    albums_bulk_apply_labels,
+    albums_bulk_remove_labels,
+    albums_create,
+    albums_list,
+    albums_photos,
+    albums_remove_labels,
+    photo_index,
+)
 
 
 @pytest.fixture
@@ -39,7 +48,38 @@ def aws_resources():
             AttributeDefinitions=[
                 {"AttributeName": "UserId", "AttributeType": "S"},
                 {"AttributeName": "PhotoId", "AttributeType": "S"},
+                {"AttributeName": "ActiveUserId", "AttributeType": "S"},
             ],
+            GlobalSecondaryIndexes=[
+                {
+                    "IndexName": "ActiveIndex",
+                    "KeySchema": [
+                        {"AttributeName": "ActiveUserId", "KeyType": "HASH"},
+                        {"AttributeName": "PhotoId", "KeyType": "RANGE"},
+                    ],
+                    "Projection": {"ProjectionType": "ALL"},
+                }
+            ],
+            BillingMode="PAY_PER_REQUEST",
+        )
+
+        index_table = dynamodb.create_table(
+            TableName="photo-index-test",
+            KeySchema=[
+                {"AttributeName": "IndexKey", "KeyType": "HASH"},
+                {"AttributeName": "SortKey", "KeyType": "RANGE"},
+            ],
+            AttributeDefinitions=[
+                {"AttributeName": "IndexKey", "AttributeType": "S"},
+                {"AttributeName": "SortKey", "AttributeType": "S"},
+            ],
+            BillingMode="PAY_PER_REQUEST",
+        )
+
+        users_table = dynamodb.create_table(
+            TableName="users-test",
+            KeySchema=[{"AttributeName": "UserId", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "UserId", "AttributeType": "S"}],
             BillingMode="PAY_PER_REQUEST",
         )
 
@@ -49,9 +89,16 @@ def aws_resources():
         yield {
             "albums": albums_table,
             "photos": photos_table,
+            "index": index_table,
+            "users": users_table,
         }
 
 
+def _put_indexed_photo(aws_resources, item):
+    aws_resources["photos"].put_item(Item=item)
+    photo_index.sync_photo_postings(aws_resources["index"], item["UserId"], item["PhotoId"], None, item)
+
+
 @pytest.fixture
 def mock_env(monkeypatch):
     monkeypatch.setenv("ALBUMS_TABLE", "albums-test")
@@ -110,8 +157,9 @@ class TestAlbums:
                 "UpdatedAt": now,
             }
         )
-        aws_resources["photos"].put_item(
-            Item={
+        _put_indexed_photo(
+            aws_resources,
+            {
                 "UserId": "user-123",
                 "PhotoId": "photo-match",
                 "OriginalFileName": "match.jpg",
@@ -119,11 +167,13 @@ class TestAlbums:
                 "ContentType": "image/jpeg",
                 "Subjects": ["bob", "2026", "vacation"],
                 "Status": "ACTIVE",
+                "ActiveUserId": "user-123",
                 "CreatedAt": now,
             }
         )
-        aws_resources["photos"].put_item(
-            Item={
+        _put_indexed_photo(
+            aws_resources,
+            {
                 "UserId": "user-123",
                 "PhotoId": "photo-miss",
                 "OriginalFileName": "miss.jpg",
@@ -131,6 +181,7 @@ class TestAlbums:
                 "ContentType": "image/jpeg",
                 "Subjects": ["bob"],
                 "Status": "ACTIVE",
+                "ActiveUserId": "user-123",
                 "CreatedAt": now,
             }
         )
@@ -163,6 +214,7 @@ class TestAlbums:
                 "PhotoId": "photo-1",
                 "Subjects": ["bob"],
                 "Status": "ACTIVE",
+                "ActiveUserId": "user-123",
                 "CreatedAt": now,
             }
         )
@@ -175,6 +227,7 @@ class TestAlbums:
         body = json.loads(response["body"])
         assert body["addedLabels"] == ["2026"]
         assert "2026" in [label.lower() for label in body["subjects"]]
+        assert aws_resources["users"].get_item(Key={"UserId": "user-123"})["Item"]["CollectionVersion"] == 1
 
     def test_remove_labels_removes_selected_album_labels(self, aws_resources, mock_env, auth_event_base):
         now = datetime.now(timezone.utc).isoformat()
@@ -194,6 +247,7 @@ class TestAlbums:
                 "PhotoId": "photo-1",
                 "Subjects": ["bob", "2026", "vacation"],
                 "Status": "ACTIVE",
+                "ActiveUserId": "user-123",
                 "CreatedAt": now,
             }
         )
@@ -208,3 +262,194 @@ class TestAlbums:
         assert body["removedLabels"] == ["2026"]
         assert "2026" not in [label.lower() for label in body["subjects"]]
         assert "vacation" in [label.lower() for label in body["subjects"]]
+
+    def test_list_album_photos_paginates_past_large_libraries(self, aws_resources, mock_env, auth_event_base):
+        aws_resources["albums"].put_item(
+            Item={"UserId": "user-123", "AlbumId": "album-1", "Name": "Beach", "RequiredLabels": ["beach"]}
+        )
+        with aws_resources["photos"].batch_writer() as batch:
+            for i in range(350):
+                batch.put_item(
+                    Item={"UserId": "user-123", "PhotoId": f"photo-{i:03d}", "Subjects": ["city"], "Status": "ACTIVE"}
+                )
+        for photo_id in ["photo-000", "photo-001", "photo-002"]:
+            _put_indexed_photo(
+                aws_resources,
+                {
+                    "UserId": "user-123",
+                    "PhotoId": photo_id,
+                    "Subjects": ["Beach"],
+                    "Status": "ACTIVE",
+                    "ActiveUserId": "user-123",
+                },
+            )
+        _put_indexed_photo(
+            aws_resources,
+            {"UserId": "user-123", "PhotoId": "photo-003", "Subjects": ["beach"], "Status": "PENDING"},
+        )
+
+        event = dict(auth_event_base)
+        event["pathParameters"] = {"albumId": "album-1"}
+        event["queryStringParameters"] = {"limit": "2"}
+        first = json.loads(albums_photos.handler(event, None)["body"])
+        assert [photo["photoId"] for photo in first["photos"]] == ["photo-002", "photo-001"]
+        assert first["nextToken"]
+
+        event["queryStringParameters"] = {"limit": "2", "nextToken": first["nextToken"]}
+        second = json.loads(albums_photos.handler(event, None)["body"])
+        assert [photo["photoId"] for photo in second["photos"]] == ["photo-000"]
+        assert second["nextToken"] is None
+
+    def test_apply_labels_updates_label_postings(self, aws_resources, mock_env, auth_event_base):
+        aws_resources["albums"].put_item(
+            Item={"UserId": "user-123", "AlbumId": "album-1", "Name": "Bob", "RequiredLabels": ["bob"]}
+        )
+        _put_indexed_photo(
+            aws_resources,
+            {"UserId": "user-123", "PhotoId": "photo-1", "Subjects": [], "Status": "ACTIVE", "ActiveUserId": "user-123"},
+        )
+
+        event = dict(auth_event_base)
+        event["pathParameters"] = {"albumId": "album-1", "photoId": "photo-1"}
+        assert albums_apply_labels.handler(event, None)["statusCode"] == 200
+
+        event = dict(auth_event_base)
+        event["pathParameters"] = {"albumId": "album-1"}
+        body = json.loads(albums_photos.handler(event, None)["body"])
+        assert [photo["photoId"] for photo in body["photos"]] == ["photo-1"]
+
+    def test_bulk_apply_labels_updates_many_photos(self, aws_resources, mock_env, auth_event_base):
+        aws_resources["albums"].put_item(
+            Item={"UserId": "user-123", "AlbumId": "album-1", "Name": "Bob 2026", "RequiredLabels": ["bob", "2026"]}
+        )
+        for photo_id, subjects in [("photo-1", []), ("photo-2", ["Bob"]), ("photo-3", ["bob", "2026"])]:
+            _put_indexed_photo(
+                aws_resources,
+                {"UserId": "user-123", "PhotoId": photo_id, "Subjects": subjects, "Status": "ACTIVE", "ActiveUserId": "user-123"},
+            )
+
+        event = dict(auth_event_base)
+        event["pathParameters"] = {"albumId": "album-1"}
+        event["body"] = json.dumps({"photoIds": ["photo-1", "photo-2", "photo-3", "missing"]})
+        response = albums_bulk_apply_labels.handler(event, None)
+
+        assert response["statusCode"] == 200
+        body = json.loads(response["body"])
+        assert body["results"] == [
+            {"photoId": "photo-1", "addedLabels": ["bob", "2026"]},
+            {"photoId": "photo-2", "addedLabels": ["2026"]},
+            {"photoId": "photo-3", "addedLabels": []},
+            {"photoId": "missing", "error": "photo not found"},
+        ]
+        assert body["failedCount"] == 1
+        photo_2 = aws_resources["photos"].get_item(Key={"UserId": "user-123", "PhotoId": "photo-2"})["Item"]
+        assert photo_2["Subjects"] == ["Bob", "2026"]
+        assert photo_2["Version"] == 1
+        # Already-labelled photos are not rewritten
+        photo_3 = aws_resources["photos"].get_item(Key={"UserId": "user-123", "PhotoId": "photo-3"})["Item"]
+        assert "Version" not in photo_3
+        assert aws_resources["users"].get_item(Key={"UserId": "user-123"})["Item"]["CollectionVersion"] == 1
+
+        photos_event = dict(auth_event_base)
+        photos_event["pathParameters"] = {"albumId": "album-1"}
+        album_body = json.loads(albums_photos.handler(photos_event, None)["body"])
+        assert sorted(photo["photoId"] for photo in album_body["photos"]) == ["photo-1", "photo-2", "photo-3"]
+
+    def test_bulk_apply_labels_keeps_labels_written_after_the_selection_read(
+        self, aws_resources, mock_env, auth_event_base, monkeypatch
+    ):
+        aws_resources["albums"].put_item(
+            Item={"UserId": "user-123", "AlbumId": "album-1", "Name": "Bob", "RequiredLabels": ["bob"]}
+        )
+        stale = {"UserId": "user-123", "PhotoId": "photo-1", "Subjects": [], "Status": "ACTIVE", "Version": 1}
+        # The derivation worker added its date label after the selection was read
+        _put_indexed_photo(aws_resources, {**stale, "Subjects": ["2026"], "Version": 2})
+        monkeypatch.setattr(
+            albums_bulk_apply_labels, "load_selection", lambda *args: ([("photo-1", stale)], False)
+        )
+
+        event = dict(auth_event_base)
+        event["pathParameters"] = {"albumId": "album-1"}
+        event["body"] = json.dumps({"photoIds": ["photo-1"]})
+        body = json.loads(albums_bulk_apply_labels.handler(event, None)["body"])
+
+        assert body["results"] == [{"photoId": "photo-1", "addedLabels": ["bob"]}]
+        photo = aws_resources["photos"].get_item(Key={"UserId": "user-123", "PhotoId": "photo-1"})["Item"]
+        assert photo["Subjects"] == ["2026", "bob"]
+        assert photo["Version"] == 3
+        for label in ("2026", "bob"):
+            posting = aws_resources["index"].get_item(Key={"IndexKey": f"user-123#l:{label}", "SortKey": "photo-1"})
+            assert "Item" in posting
+
+    def test_apply_labels_reports_a_photo_that_keeps_changing(self, aws_resources, mock_env, auth_event_base, monkeypatch):
+        aws_resources["albums"].put_item(
+            Item={"UserId": "user-123", "AlbumId": "album-1", "Name": "Bob", "RequiredLabels": ["bob"]}
+        )
+        aws_resources["photos"].put_item(
+            Item={"UserId": "user-123", "PhotoId": "photo-1", "Subjects": [], "Status": "ACTIVE", "Version": 1}
+        )
+        photos_table = aws_resources["photos"]
+        real_get_item = photos_table.meta.client.get_item
+
+        def get_item_then_edit(**kwargs):
+            # Another writer bumps the row between every read and write
+            response = real_get_item(**kwargs)
+            if kwargs.get("TableName") == "photos-test":
+                photos_table.update_item(
+                    Key={"UserId": "user-123", "PhotoId": "photo-1"},
+                    UpdateExpression="ADD #version :one",
+                    ExpressionAttributeNames={"#version": "Version"},
+                    ExpressionAttributeValues={":one": 1},
+                )
+            return response
+
+        monkeypatch.setattr(albums_apply_labels.dynamodb.meta.client, "get_item", get_item_then_edit)
+
+        event = dict(auth_event_base)
+        event["pathParameters"] = {"albumId": "album-1", "photoId": "photo-1"}
+        response = albums_apply_labels.handler(event, None)
+
+        assert response["statusCode"] == 409
+        photo = aws_resources["photos"].get_item(Key={"UserId": "user-123", "PhotoId": "photo-1"})["Item"]
+        assert photo["Subjects"] == []
+
+    def test_bulk_remove_labels_updates_many_photos(self, aws_resources, mock_env, auth_event_base):
+        aws_resources["albums"].put_item(
+            Item={"UserId": "user-123", "AlbumId": "album-1", "Name": "Bob 2026", "RequiredLabels": ["bob", "2026"]}
+        )
+        for photo_id, subjects in [("photo-1", ["bob", "2026", "vacation"]), ("photo-2", ["vacation"])]:
+            _put_indexed_photo(
+                aws_resources,
+                {"UserId": "user-123", "PhotoId": photo_id, "Subjects": subjects, "Status": "ACTIVE", "ActiveUserId": "user-123"},
+            )
+
+        event = dict(auth_event_base)
+        event["pathParameters"] = {"albumId": "album-1"}
+        event["body"] = json.dumps({"photoIds": ["photo-1", "photo-2"], "labels": ["2026", "BOB"]})
+        response = albums_bulk_remove_labels.handler(event, None)
+
+        assert response["statusCode"] == 200
+        assert json.loads(response["body"])["results"] == [
+            {"photoId": "photo-1", "removedLabels": ["2026", "bob"]},
+            {"photoId": "photo-2", "removedLabels": []},
+        ]
+        photo_1 = aws_resources["photos"].get_item(Key={"UserId": "user-123", "PhotoId": "photo-1"})["Item"]
+        assert photo_1["Subjects"] == ["vacation"]
+        posting = aws_resources["index"].get_item(Key={"IndexKey": "user-123#l:bob", "SortKey": "photo-1"})
+        assert "Item" not in posting
+
+    def test_bulk_label_requests_are_validated(self, aws_resources, mock_env, auth_event_base):
+        aws_resources["albums"].put_item(
+            Item={"UserId": "user-123", "AlbumId": "album-1", "Name": "Bob", "RequiredLabels": ["bob"]}
+        )
+        cases = [
+            (albums_bulk_apply_labels, "album-1", {"photoIds": []}, 400),
+            (albums_bulk_apply_labels, "album-missing", {"photoIds": ["photo-1"]}, 404),
+            (albums_bulk_remove_labels, "album-1", {"photoIds": ["photo-1"]}, 400),
+            (albums_bulk_remove_labels, "album-1", {"photoIds": ["photo-1"], "labels": ["beach"]}, 400),
+        ]
+        for module, album_id, body, status_code in cases:
+            event = dict(auth_event_base)
+            event["pathParameters"] = {"albumId": album_id}
+            event["body"] = json.dumps(body)
+            assert module.handler(event, None)["statusCode"] == status_code
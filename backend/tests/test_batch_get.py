@@ -0,0 +1,112 @@
+import json
+import os
+import sys
+
+import boto3
+import pytest
+from moto import mock_aws
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from handlers import batch_get, get_photo
+
+
+@pytest.fixture
+def dynamodb_table():
+    with mock_aws():
+        dynamodb = boto3.resource("dynamodb", region_name="us-east-1")
+        table = dynamodb.create_table(
+            TableName="photos-test",
+            KeySchema=[
+                {"AttributeName": "UserId", "KeyType": "HASH"},
+                {"AttributeName": "PhotoId", "KeyType": "RANGE"},
+            ],
+            AttributeDefinitions=[
+                {"AttributeName": "UserId", "AttributeType": "S"},
+                {"AttributeName": "PhotoId", "AttributeType": "S"},
+            ],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        for position in range(3):
+            table.put_item(
+                Item={
+                    "UserId": "user-123",
+                    "PhotoId": f"photo-{position}",
+                    "OriginalFileName": f"beach-{position}.jpg",
+                    "ObjectKey": f"originals/user-123/photo-{position}.jpg",
+                    "ContentType": "image/jpeg",
+                    "Subjects": ["beach"],
+                    "Status": "ACTIVE",
+                }
+            )
+        table.put_item(Item={"UserId": "user-123", "PhotoId": "photo-pending", "Status": "PENDING"})
+        table.put_item(Item={"UserId": "other-user", "PhotoId": "photo-foreign", "Status": "ACTIVE"})
+        yield table
+
+
+def _event(body):
+    return {
+        "requestContext": {"authorizer": {"jwt": {"claims": {"sub": "user-123", "email_verified": "true"}}}},
+        "body": body if isinstance(body, str) else json.dumps(body),
+    }
+
+
+class TestBatchGet:
+    def test_returns_photos_in_request_order_and_reports_missing(self, dynamodb_table):
+        response = batch_get.handler(
+            _event({"photoIds": ["photo-2", "photo-pending", "photo-0", "photo-foreign", "photo-2", "nope"]}),
+            None,
+        )
+
+        assert response["statusCode"] == 200
+        body = json.loads(response["body"])
+        assert [photo["photoId"] for photo in body["photos"]] == ["photo-2", "photo-0"]
+        assert body["count"] == 2
+        assert body["missing"] == ["photo-pending", "photo-foreign", "nope"]
+        assert all(photo["thumbnailUrl"] for photo in body["photos"])
+
+    def test_photo_matches_get_photo_shape(self, dynamodb_table):
+        single = json.loads(get_photo.handler({**_event({}), "pathParameters": {"photoId": "photo-1"}}, None)["body"])
+        batched = json.loads(batch_get.handler(_event({"photoIds": ["photo-1"]}), None)["body"])["photos"][0]
+
+        single.pop("thumbnailUrl")
+        batched.pop("thumbnailUrl")
+        assert batched == single
+
+    def test_retries_unprocessed_keys(self, dynamodb_table, monkeypatch):
+        real_batch_get_item = batch_get.dynamodb.batch_get_item
+        calls = []
+
+        def flaky_batch_get_item(RequestItems):
+            calls.append(RequestItems)
+            if len(calls) == 1:
+                # First round: serve one key, leave the rest unprocessed
+                keys = RequestItems["photos-test"]["Keys"]
+                served = real_batch_get_item(RequestItems={"photos-test": {"Keys": keys[:1]}})
+                return {**served, "UnprocessedKeys": {"photos-test": {"Keys": keys[1:]}}}
+            return real_batch_get_item(RequestItems=RequestItems)
+
+        monkeypatch.setattr(batch_get.dynamodb, "batch_get_item", flaky_batch_get_item, raising=False)
+        monkeypatch.setattr("handlers.photo_index.time.sleep", lambda seconds: None)
+
+        response = batch_get.handler(_event({"photoIds": ["photo-0", "photo-1", "photo-2"]}), None)
+
+        body = json.loads(response["body"])
+        assert [photo["photoId"] for photo in body["photos"]] == ["photo-0", "photo-1", "photo-2"]
+        assert len(calls) == 2
+
+    @pytest.mark.parametrize("body", [{}, {"photoIds": []}, {"photoIds": "photo-1"}, {"photoIds": [1]}])
+    def test_rejects_invalid_photo_ids(self, dynamodb_table, body):
+        assert batch_get.handler(_event(body), None)["statusCode"] == 400
+
+    def test_rejects_more_than_100_ids(self, dynamodb_table):
+        response = batch_get.handler(_event({"photoIds": [f"photo-{i}" for i in range(101)]}), None)
+        assert response["statusCode"] == 400
+
+    def test_rejects_invalid_json(self, dynamodb_table):
+        assert batch_get.handler(_event("{not json"), None)["statusCode"] == 400
+
+    def test_requires_verified_email(self, dynamodb_table):
+        event = _event({"photoIds": ["photo-1"]})
+        event["requestContext"]["authorizer"]["jwt"]["claims"]["email_verified"] = "false"
+        assert batch_get.handler(event, None)["statusCode"] == 403
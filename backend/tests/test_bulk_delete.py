@@ -0,0 +1,312 @@
+import json
+import os
+import sys
+
+import boto3
+import pytest
+from moto import mock_aws
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from handlers import bulk_common, bulk_delete, bulk_hard_delete, bulk_restore
+from handlers.object_refs import ref_member
+
+
+@pytest.fixture
+def aws_resources():
+    with mock_aws():
+        dynamodb = boto3.resource("dynamodb", region_name="us-east-1")
+        table = dynamodb.create_table(
+            TableName="photos-test",
+            KeySchema=[
+                {"AttributeName": "UserId", "KeyType": "HASH"},
+                {"AttributeName": "PhotoId", "KeyType": "RANGE"},
+            ],
+            AttributeDefinitions=[
+                {"AttributeName": "UserId", "AttributeType": "S"},
+                {"AttributeName": "PhotoId", "AttributeType": "S"},
+                {"AttributeName": "DeletedAt", "AttributeType": "S"},
+            ],
+            GlobalSecondaryIndexes=[
+                {
+                    "IndexName": "DeletedAtIndex",
+                    "KeySchema": [
+                        {"AttributeName": "UserId", "KeyType": "HASH"},
+                        {"AttributeName": "DeletedAt", "KeyType": "RANGE"},
+                    ],
+                    "Projection": {"ProjectionType": "ALL"},
+                }
+            ],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        index_table = dynamodb.create_table(
+            TableName="photo-index-test",
+            KeySchema=[
+                {"AttributeName": "IndexKey", "KeyType": "HASH"},
+                {"AttributeName": "SortKey", "KeyType": "RANGE"},
+            ],
+            AttributeDefinitions=[
+                {"AttributeName": "IndexKey", "AttributeType": "S"},
+                {"AttributeName": "SortKey", "AttributeType": "S"},
+            ],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        refs_table = dynamodb.create_table(
+            TableName="object-refs-test",
+            KeySchema=[{"AttributeName": "ObjectKey", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "ObjectKey", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        users_table = dynamodb.create_table(
+            TableName="users-test",
+            KeySchema=[{"AttributeName": "UserId", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "UserId", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        s3 = boto3.client("s3", region_name="us-east-1")
+        s3.create_bucket(Bucket="photos-test-bucket")
+
+        yield {"table": table, "index": index_table, "refs": refs_table, "users": users_table, "s3": s3}
+
+
+def _event(body):
+    return {
+        "requestContext": {"authorizer": {"jwt": {"claims": {"sub": "user-123", "email_verified": "true"}}}},
+        "body": body if isinstance(body, str) else json.dumps(body),
+    }
+
+
+def _put_photo(resources, photo_id, deleted_at=None, object_key=None, user_id="user-123", **extra):
+    object_key = object_key or f"originals/{user_id}/{photo_id}.webp"
+    item = {
+        "UserId": user_id,
+        "PhotoId": photo_id,
+        "ObjectKey": object_key,
+        "ContentType": "image/webp",
+        "Status": "ACTIVE",
+        "Version": 1,
+        **extra,
+    }
+    if deleted_at:
+        item.update({"DeletedAt": deleted_at, "DeletedBy": user_id, "RetentionUntil": "2099-01-01T00:00:00+00:00"})
+    else:
+        item["ActiveUserId"] = user_id
+    resources["table"].put_item(Item=item)
+    resources["refs"].update_item(
+        Key={"ObjectKey": object_key},
+        UpdateExpression="ADD #refs :ref",
+        ExpressionAttributeNames={"#refs": "Refs"},
+        ExpressionAttributeValues={":ref": {ref_member(user_id, photo_id)}},
+    )
+    resources["s3"].put_object(Bucket="photos-test-bucket", Key=object_key, Body=b"image")
+
+
+def _call(module, body):
+    response = module.handler(_event(body), None)
+    assert response["statusCode"] == 200
+    return json.loads(response["body"])
+
+
+def _get(resources, photo_id):
+    return resources["table"].get_item(Key={"UserId": "user-123", "PhotoId": photo_id}).get("Item")
+
+
+def _ticking_clock(monkeypatch, module):
+    """Replace module.updated_at_now with a clock that moves a minute on every call; returns the stamps handed out."""
+    stamps = []
+
+    def tick():
+        stamps.append(f"2026-05-01T00:{len(stamps):02d}:00.000000+00:00")
+        return stamps[-1]
+
+    monkeypatch.setattr(module, "updated_at_now", tick)
+    return stamps
+
+
+def _object_keys(resources):
+    return sorted(entry["Key"] for entry in resources["s3"].list_objects_v2(Bucket="photos-test-bucket").get("Contents") or [])
+
+
+class TestBulkDelete:
+    def test_soft_deletes_listed_photos_and_reports_each(self, aws_resources):
+        _put_photo(aws_resources, "photo-1")
+        _put_photo(aws_resources, "photo-2")
+        _put_photo(aws_resources, "photo-trashed", deleted_at="2026-01-01T00:00:00+00:00")
+
+        body = _call(bulk_delete, {"photoIds": ["photo-1", "photo-trashed", "missing", "photo-2", "photo-1"]})
+
+        assert [result["photoId"] for result in body["results"]] == ["photo-1", "photo-trashed", "missing", "photo-2"]
+        assert body["results"][1] == {"photoId": "photo-trashed", "error": "photo already deleted"}
+        assert body["results"][2] == {"photoId": "missing", "error": "photo not found"}
+        assert body["failedCount"] == 2
+        for photo_id in ("photo-1", "photo-2"):
+            item = _get(aws_resources, photo_id)
+            assert item["DeletedAt"] == body["results"][0]["deletedAt"]
+            assert item["DeletedBy"] == "user-123"
+            assert "ActiveUserId" not in item
+            assert item["Version"] == 2
+        assert aws_resources["users"].get_item(Key={"UserId": "user-123"})["Item"]["CollectionVersion"] == 1
+
+    def test_stamps_updated_at_per_row_as_it_is_written(self, aws_resources, monkeypatch):
+        _put_photo(aws_resources, "photo-1")
+        _put_photo(aws_resources, "photo-2")
+        stamps = _ticking_clock(monkeypatch, bulk_delete)
+
+        _call(bulk_delete, {"photoIds": ["photo-1", "photo-2"]})
+
+        assert sorted(_get(aws_resources, photo_id)["UpdatedAt"] for photo_id in ("photo-1", "photo-2")) == stamps
+        assert len(set(stamps)) == 2
+
+    def test_soft_delete_does_not_accept_deleted_before(self, aws_resources):
+        response = bulk_delete.handler(_event({"deletedBefore": "2026-01-01T00:00:00Z"}), None)
+        assert response["statusCode"] == 400
+
+
+class TestBulkRestore:
+    def test_restores_trashed_photos(self, aws_resources):
+        _put_photo(aws_resources, "photo-1", deleted_at="2026-01-01T00:00:00+00:00")
+        _put_photo(aws_resources, "photo-pending", deleted_at="2026-01-02T00:00:00+00:00", Status="PENDING")
+        _put_photo(aws_resources, "photo-live")
+
+        body = _call(bulk_restore, {"photoIds": ["photo-1", "photo-pending", "photo-live"]})
+
+        assert body["results"] == [
+            {"photoId": "photo-1", "message": "photo restored"},
+            {"photoId": "photo-pending", "message": "photo restored"},
+            {"photoId": "photo-live", "error": "photo is not deleted"},
+        ]
+        restored = _get(aws_resources, "photo-1")
+        assert "DeletedAt" not in restored and "RetentionUntil" not in restored
+        assert restored["ActiveUserId"] == "user-123"
+        assert restored["Version"] == 2
+        assert "ActiveUserId" not in _get(aws_resources, "photo-pending")
+        assert aws_resources["users"].get_item(Key={"UserId": "user-123"})["Item"]["CollectionVersion"] == 1
+
+    def test_stamps_updated_at_per_row_as_it_is_written(self, aws_resources, monkeypatch):
+        _put_photo(aws_resources, "photo-1", deleted_at="2026-01-01T00:00:00+00:00")
+        _put_photo(aws_resources, "photo-2", deleted_at="2026-01-01T00:00:00+00:00")
+        stamps = _ticking_clock(monkeypatch, bulk_restore)
+
+        _call(bulk_restore, {"photoIds": ["photo-1", "photo-2"]})
+
+        assert sorted(_get(aws_resources, photo_id)["UpdatedAt"] for photo_id in ("photo-1", "photo-2")) == stamps
+        assert len(set(stamps)) == 2
+
+    def test_restores_trash_deleted_before_cutoff(self, aws_resources):
+        _put_photo(aws_resources, "photo-old", deleted_at="2026-01-01T00:00:00+00:00")
+        _put_photo(aws_resources, "photo-new", deleted_at="2026-03-01T00:00:00+00:00")
+
+        body = _call(bulk_restore, {"deletedBefore": "2026-02-01T00:00:00Z"})
+
+        assert [result["photoId"] for result in body["results"]] == ["photo-old"]
+        assert body["hasMore"] is False
+        assert "DeletedAt" in _get(aws_resources, "photo-new")
+
+
+class TestBulkHardDelete:
+    def test_hard_deletes_trashed_photos_and_their_unshared_objects(self, aws_resources, monkeypatch):
+        _put_photo(aws_resources, "photo-1", deleted_at="2026-01-01T00:00:00+00:00", Subjects=["beach"])
+        _put_photo(aws_resources, "photo-2", deleted_at="2026-01-01T00:00:00+00:00")
+        _put_photo(aws_resources, "photo-live")
+        aws_resources["index"].put_item(Item={"IndexKey": "user-123#l:beach", "SortKey": "photo-1"})
+        calls = []
+        real_delete_objects = bulk_hard_delete.s3.delete_objects
+        monkeypatch.setattr(
+            bulk_hard_delete.s3,
+            "delete_objects",
+            lambda **kwargs: calls.append(kwargs) or real_delete_objects(**kwargs),
+            raising=False,
+        )
+
+        body = _call(bulk_hard_delete, {"photoIds": ["photo-1", "photo-2", "photo-live", "missing"]})
+
+        assert body["results"] == [
+            {"photoId": "photo-1", "message": "photo permanently deleted"},
+            {"photoId": "photo-2", "message": "photo permanently deleted"},
+            {"photoId": "photo-live", "error": "photo must be soft deleted before hard delete"},
+            {"photoId": "missing", "error": "photo not found"},
+        ]
+        assert _get(aws_resources, "photo-1") is None
+        assert _get(aws_resources, "photo-live") is not None
+        assert _object_keys(aws_resources) == ["originals/user-123/photo-live.webp"]
+        # Both objects went in a single DeleteObjects call
+        assert len(calls) == 1
+        assert len(calls[0]["Delete"]["Objects"]) == 2
+        assert "Item" not in aws_resources["refs"].get_item(Key={"ObjectKey": "originals/user-123/photo-1.webp"})
+        assert "Item" not in aws_resources["index"].get_item(Key={"IndexKey": "user-123#l:beach", "SortKey": "photo-1"})
+
+        tombstones = aws_resources["index"].query(
+            KeyConditionExpression="IndexKey = :key", ExpressionAttributeValues={":key": "user-123#d:"}
+        )["Items"]
+        assert sorted(tombstone["PhotoId"] for tombstone in tombstones) == ["photo-1", "photo-2"]
+        assert aws_resources["users"].get_item(Key={"UserId": "user-123"})["Item"]["CollectionVersion"] == 1
+
+    def test_keeps_objects_other_photos_still_reference(self, aws_resources):
+        shared_key = "originals/user-source/photo-source.webp"
+        _put_photo(aws_resources, "photo-source", user_id="user-source", object_key=shared_key)
+        _put_photo(aws_resources, "photo-copy", deleted_at="2026-01-01T00:00:00+00:00", object_key=shared_key)
+
+        body = _call(bulk_hard_delete, {"photoIds": ["photo-copy"]})
+
+        assert body["failedCount"] == 0
+        assert shared_key in _object_keys(aws_resources)
+        refs = aws_resources["refs"].get_item(Key={"ObjectKey": shared_key})["Item"]["Refs"]
+        assert refs == {ref_member("user-source", "photo-source")}
+
+    def test_skips_photos_restored_after_the_selection_was_read(self, aws_resources, monkeypatch):
+        _put_photo(aws_resources, "photo-1", deleted_at="2026-01-01T00:00:00+00:00")
+        _put_photo(aws_resources, "photo-restored")
+        stale = dict(_get(aws_resources, "photo-restored"), DeletedAt="2026-01-01T00:00:00+00:00")
+        real_load_selection = bulk_hard_delete.load_selection
+
+        def stale_selection(*args):
+            selection, has_more = real_load_selection(*args)
+            return [(photo_id, stale if photo_id == "photo-restored" else item) for photo_id, item in selection], has_more
+
+        monkeypatch.setattr(bulk_hard_delete, "load_selection", stale_selection)
+
+        body = _call(bulk_hard_delete, {"photoIds": ["photo-1", "photo-restored"]})
+
+        assert body["results"] == [
+            {"photoId": "photo-1", "message": "photo permanently deleted"},
+            {"photoId": "photo-restored", "error": "photo is not deleted"},
+        ]
+        assert _get(aws_resources, "photo-restored") is not None
+        assert "originals/user-123/photo-restored.webp" in _object_keys(aws_resources)
+        refs = aws_resources["refs"].get_item(Key={"ObjectKey": "originals/user-123/photo-restored.webp"})["Item"]["Refs"]
+        assert refs == {ref_member("user-123", "photo-restored")}
+        tombstones = aws_resources["index"].query(
+            KeyConditionExpression="IndexKey = :key", ExpressionAttributeValues={":key": "user-123#d:"}
+        )["Items"]
+        assert [tombstone["PhotoId"] for tombstone in tombstones] == ["photo-1"]
+
+    def test_deleted_before_pages_through_old_trash(self, aws_resources, monkeypatch):
+        monkeypatch.setattr(bulk_common, "MAX_BULK_PHOTOS", 2)
+        for position in range(3):
+            _put_photo(aws_resources, f"photo-old-{position}", deleted_at=f"2026-01-0{position + 1}T00:00:00+00:00")
+        _put_photo(aws_resources, "photo-recent", deleted_at="2026-03-01T00:00:00+00:00")
+
+        first = _call(bulk_hard_delete, {"deletedBefore": "2026-02-01T00:00:00+00:00"})
+        second = _call(bulk_hard_delete, {"deletedBefore": "2026-02-01T00:00:00+00:00"})
+
+        assert [result["photoId"] for result in first["results"]] == ["photo-old-0", "photo-old-1"]
+        assert first["hasMore"] is True
+        assert [result["photoId"] for result in second["results"]] == ["photo-old-2"]
+        assert second["hasMore"] is False
+        assert _get(aws_resources, "photo-recent") is not None
+
+    @pytest.mark.parametrize(
+        "body",
+        [
+            {},
+            {"photoIds": []},
+            {"photoIds": [1]},
+            {"deletedBefore": "last tuesday"},
+            {"photoIds": [f"p{i}" for i in range(1001)]},
+        ],
+    )
+    def test_rejects_invalid_selection(self, aws_resources, body):
+        assert bulk_hard_delete.handler(_event(body), None)["statusCode"] == 400
+
+    def test_rejects_invalid_json(self, aws_resources):
+        assert bulk_hard_delete.handler(_event("{not json"), None)["statusCode"] == 400
@@ -0,0 +1,224 @@
+import base64
+import json
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+import boto3
+import pytest
+from moto import mock_aws
+
+# Add the handlers directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from handlers import changes, delete, hard_delete, patch_photo
+
+
+@pytest.fixture
+def aws_resources():
+    with mock_aws():
+        dynamodb = boto3.resource("dynamodb", region_name="us-east-1")
+        table = dynamodb.create_table(
+            TableName="photos-test",
+            KeySchema=[
+                {"AttributeName": "UserId", "KeyType": "HASH"},
+                {"AttributeName": "PhotoId", "KeyType": "RANGE"},
+            ],
+            AttributeDefinitions=[
+                {"AttributeName": "UserId", "AttributeType": "S"},
+                {"AttributeName": "PhotoId", "AttributeType": "S"},
+                {"AttributeName": "UpdatedAt", "AttributeType": "S"},
+            ],
+            GlobalSecondaryIndexes=[
+                {
+                    "IndexName": "UpdatedAtIndex",
+                    "KeySchema": [
+                        {"AttributeName": "UserId", "KeyType": "HASH"},
+                        {"AttributeName": "UpdatedAt", "KeyType": "RANGE"},
+                    ],
+                    "Projection": {"ProjectionType": "ALL"},
+                }
+            ],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        index_table = dynamodb.create_table(
+            TableName="photo-index-test",
+            KeySchema=[
+                {"AttributeName": "IndexKey", "KeyType": "HASH"},
+                {"AttributeName": "SortKey", "KeyType": "RANGE"},
+            ],
+            AttributeDefinitions=[
+                {"AttributeName": "IndexKey", "AttributeType": "S"},
+                {"AttributeName": "SortKey", "AttributeType": "S"},
+            ],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        dynamodb.create_table(
+            TableName="object-refs-test",
+            KeySchema=[{"AttributeName": "ObjectKey", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "ObjectKey", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        dynamodb.create_table(
+            TableName="users-test",
+            KeySchema=[{"AttributeName": "UserId", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "UserId", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        s3 = boto3.client("s3", region_name="us-east-1")
+        s3.create_bucket(Bucket="photos-test-bucket")
+
+        yield {"table": table, "index": index_table, "s3": s3}
+
+
+@pytest.fixture
+def no_settle(monkeypatch):
+    """Let the feed see writes made a moment ago."""
+    monkeypatch.setattr(changes, "SETTLE_SECONDS", 0)
+
+
+def _event(since=None, limit=None, photo_id=None, body=None):
+    params = {}
+    if since:
+        params["since"] = since
+    if limit:
+        params["limit"] = str(limit)
+    event = {
+        "requestContext": {"authorizer": {"jwt": {"claims": {"sub": "user-123", "email_verified": "true"}}}},
+        "queryStringParameters": params or None,
+    }
+    if photo_id:
+        event["pathParameters"] = {"photoId": photo_id}
+    if body is not None:
+        event["body"] = json.dumps(body)
+    return event
+
+
+def _stamp(minutes_ago):
+    return (datetime.now(timezone.utc) - timedelta(minutes=minutes_ago)).isoformat(timespec="microseconds")
+
+
+def _put_photo(table, photo_id, updated_at, **extra):
+    item = {
+        "UserId": "user-123",
+        "PhotoId": photo_id,
+        "ObjectKey": f"originals/user-123/{photo_id}.webp",
+        "ContentType": "image/webp",
+        "OriginalFileName": f"{photo_id}.jpg",
+        "CreatedAt": updated_at,
+        "Status": "ACTIVE",
+        "UpdatedAt": updated_at,
+    }
+    item.update(extra)
+    table.put_item(Item=item)
+
+
+def _sync(since=None, limit=None):
+    response = changes.handler(_event(since=since, limit=limit), None)
+    assert response["statusCode"] == 200
+    return json.loads(response["body"])
+
+
+class TestChanges:
+    def test_initial_sync_reports_every_state_in_update_order(self, aws_resources):
+        table = aws_resources["table"]
+        _put_photo(table, "photo-b", _stamp(3))
+        _put_photo(table, "photo-a", _stamp(5), Subjects=["beach"])
+        _put_photo(table, "photo-trashed", _stamp(2), DeletedAt=_stamp(2), RetentionUntil="2099-01-01T00:00:00+00:00")
+        _put_photo(table, "photo-pending", _stamp(1), Status="PENDING")
+        _put_photo(table, "photo-other-user", _stamp(4), UserId="other-user")
+
+        body = _sync()
+
+        assert [change["photoId"] for change in body["changes"]] == [
+            "photo-a", "photo-b", "photo-trashed", "photo-pending",
+        ]
+        assert [change["change"] for change in body["changes"]] == ["upsert", "upsert", "trashed", "removed"]
+        first = body["changes"][0]["photo"]
+        assert first["fileName"] == "photo-a.jpg"
+        assert first["subjects"] == ["beach"]
+        assert "thumbnailUrl" in first
+        assert body["changes"][2]["retentionUntil"] == "2099-01-01T00:00:00+00:00"
+        assert body["hasMore"] is False
+        assert body["cursor"]
+
+    def test_sync_with_cursor_returns_only_later_changes(self, aws_resources, no_settle):
+        table = aws_resources["table"]
+        _put_photo(table, "photo-1", _stamp(10))
+        _put_photo(table, "photo-2", _stamp(9))
+        cursor = _sync()["cursor"]
+
+        assert _sync(since=cursor)["changes"] == []
+
+        patch_response = patch_photo.handler(_event(photo_id="photo-2", body={"description": "edited"}), None)
+        assert patch_response["statusCode"] == 200
+        body = _sync(since=cursor)
+
+        assert [change["photoId"] for change in body["changes"]] == ["photo-2"]
+        assert body["changes"][0]["photo"]["description"] == "edited"
+        assert _sync(since=body["cursor"])["changes"] == []
+
+    def test_soft_and_hard_delete_show_up_as_trashed_then_removed(self, aws_resources, no_settle):
+        table = aws_resources["table"]
+        _put_photo(table, "photo-1", _stamp(10), ActiveUserId="user-123")
+        cursor = _sync()["cursor"]
+
+        assert delete.handler(_event(photo_id="photo-1"), None)["statusCode"] == 200
+        body = _sync(since=cursor)
+        assert [(change["photoId"], change["change"]) for change in body["changes"]] == [("photo-1", "trashed")]
+
+        assert hard_delete.handler(_event(photo_id="photo-1"), None)["statusCode"] == 200
+        body = _sync(since=body["cursor"])
+        assert [(change["photoId"], change["change"]) for change in body["changes"]] == [("photo-1", "removed")]
+        assert "photo" not in body["changes"][0]
+
+    def test_pages_through_photos_and_tombstones_without_gaps(self, aws_resources, no_settle):
+        table = aws_resources["table"]
+        index_table = aws_resources["index"]
+        for position in range(5):
+            _put_photo(table, f"photo-{position}", _stamp(20 - 2 * position))
+            tombstone_at = _stamp(19 - 2 * position)
+            index_table.put_item(Item={
+                "IndexKey": "user-123#d:",
+                "SortKey": f"{tombstone_at}#gone-{position}",
+                "PhotoId": f"gone-{position}",
+                "UpdatedAt": tombstone_at,
+            })
+
+        seen = []
+        cursor = None
+        for _ in range(20):
+            body = _sync(since=cursor, limit=3)
+            seen.extend(change["photoId"] for change in body["changes"])
+            cursor = body["cursor"]
+            if not body["hasMore"]:
+                break
+
+        expected = []
+        for position in range(5):
+            expected.extend([f"photo-{position}", f"gone-{position}"])
+        assert seen == expected
+        assert _sync(since=cursor)["changes"] == []
+
+    def test_recent_writes_wait_for_the_settle_window(self, aws_resources):
+        _put_photo(aws_resources["table"], "photo-now", datetime.now(timezone.utc).isoformat(timespec="microseconds"))
+
+        assert _sync()["changes"] == []
+
+    def test_invalid_cursor_is_rejected(self, aws_resources):
+        response = changes.handler(_event(since="not-a-cursor"), None)
+        assert response["statusCode"] == 400
+
+    def test_cursor_older_than_tombstone_retention_has_expired(self, aws_resources):
+        stale = (datetime.now(timezone.utc) - timedelta(days=31)).isoformat(timespec="microseconds")
+        cursor = base64.urlsafe_b64encode(
+            json.dumps({"photos": [stale, ""], "tombstones": f"{stale}~"}).encode("utf-8")
+        ).decode("utf-8")
+
+        response = changes.handler(_event(since=cursor), None)
+
+        assert response["statusCode"] == 410
+
+    def test_missing_subject_returns_401(self, aws_resources):
+        response = changes.handler({"requestContext": {}}, None)
+        assert response["statusCode"] == 401
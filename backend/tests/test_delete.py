@@ -33,6 +33,13 @@ def dynamodb_table():
             BillingMode="PAY_PER_REQUEST"
         )
         
+        dynamodb.create_table(
+            TableName="users-test",
+            KeySchema=[{"AttributeName": "UserId", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "UserId", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST",
+        )
+
         yield table
 
 
@@ -74,7 +81,9 @@ class TestDelete:
                 "PhotoId": "photo-456",
                 "OriginalFileName": "photo.jpg",
                 "ObjectKey": "uploads/photo-456.jpg",
-                "ContentType": "image/jpeg"
+                "ContentType": "image/jpeg",
+                "Status": "ACTIVE",
+                "ActiveUserId": "user-123"
             }
         )
         
@@ -97,6 +106,11 @@ class TestDelete:
         assert "DeletedBy" in item
         assert item["DeletedBy"] == "user-123"
         assert "RetentionUntil" in item
+        assert "ActiveUserId" not in item
+        assert item["Version"] == 1
+
+        users_table = boto3.resource("dynamodb", region_name="us-east-1").Table("users-test")
+        assert users_table.get_item(Key={"UserId": "user-123"})["Item"]["CollectionVersion"] == 1
     
     def test_delete_not_found(self, dynamodb_table, mock_env, valid_event):
         """Test deleting non-existent photo returns 404"""
@@ -0,0 +1,243 @@
+import json
+import os
+import sys
+
+import boto3
+import pytest
+from moto import mock_aws
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from handlers import derivation_queue as queue_module
+from handlers import derive_photo
+from handlers.derivation_queue import MAX_RECEIVE_COUNT, enqueue_derivations
+
+
+@pytest.fixture
+def aws_resources():
+    with mock_aws():
+        dynamodb = boto3.resource("dynamodb", region_name="us-east-1")
+        table = dynamodb.create_table(
+            TableName="photos-test",
+            KeySchema=[
+                {"AttributeName": "UserId", "KeyType": "HASH"},
+                {"AttributeName": "PhotoId", "KeyType": "RANGE"},
+            ],
+            AttributeDefinitions=[
+                {"AttributeName": "UserId", "AttributeType": "S"},
+                {"AttributeName": "PhotoId", "AttributeType": "S"},
+            ],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        index_table = dynamodb.create_table(
+            TableName="photo-index-test",
+            KeySchema=[
+                {"AttributeName": "IndexKey", "KeyType": "HASH"},
+                {"AttributeName": "SortKey", "KeyType": "RANGE"},
+            ],
+            AttributeDefinitions=[
+                {"AttributeName": "IndexKey", "AttributeType": "S"},
+                {"AttributeName": "SortKey", "AttributeType": "S"},
+            ],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        users_table = dynamodb.create_table(
+            TableName="users-test",
+            KeySchema=[{"AttributeName": "UserId", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "UserId", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        s3 = boto3.client("s3", region_name="us-east-1")
+        s3.create_bucket(Bucket="photos-test-bucket")
+
+        table.put_item(
+            Item={
+                "UserId": "user-123",
+                "PhotoId": "photo-1",
+                "ObjectKey": "originals/user-123/photo-1.webp",
+                "ContentType": "image/webp",
+                "Status": "ACTIVE",
+                "ActiveUserId": "user-123",
+                "DerivationStatus": "PENDING",
+                "Subjects": ["bob"],
+                "Version": 1,
+            }
+        )
+        s3.put_object(Bucket="photos-test-bucket", Key="originals/user-123/photo-1.webp", Body=b"image")
+
+        yield {"table": table, "index": index_table, "users": users_table, "s3": s3}
+
+
+@pytest.fixture
+def fake_imaging(monkeypatch):
+    """Stand in for Pillow: every image is dated 2024-04-12 and downscales to fixed bytes."""
+    monkeypatch.setattr(
+        derive_photo, "derive_image", lambda _bytes, sizes=(320,): ("date:2024-04-12", {size: b"thumb" for size in sizes})
+    )
+
+
+def _photo(aws_resources):
+    return aws_resources["table"].get_item(Key={"UserId": "user-123", "PhotoId": "photo-1"})["Item"]
+
+
+class TestDerivePhoto:
+    def test_derives_thumbnail_and_date_label(self, aws_resources, derivation_queue, fake_imaging):
+        enqueue_derivations("user-123", ["photo-1"])
+
+        assert derivation_queue.drain(derive_photo.handler) == []
+
+        item = _photo(aws_resources)
+        assert item["DerivationStatus"] == "COMPLETE"
+        assert item["Subjects"] == ["bob", "date:2024-04-12"]
+        assert item["ThumbnailKey"] == "thumbnails/user-123/photo-1.webp"
+        assert item["Renditions"] == {
+            "64": "previews/user-123/photo-1/64.webp",
+            "320": "thumbnails/user-123/photo-1.webp",
+            "2048": "previews/user-123/photo-1/2048.webp",
+        }
+        assert item["Version"] == 2
+        posting = aws_resources["index"].get_item(Key={"IndexKey": "user-123#l:date:2024-04-12", "SortKey": "photo-1"})
+        assert "Item" in posting
+        assert aws_resources["users"].get_item(Key={"UserId": "user-123"})["Item"]["CollectionVersion"] == 1
+
+    def test_redelivered_message_is_a_no_op(self, aws_resources, derivation_queue, fake_imaging):
+        enqueue_derivations("user-123", ["photo-1", "photo-1"])
+
+        assert derivation_queue.drain(derive_photo.handler) == []
+
+        assert _photo(aws_resources)["Version"] == 2
+        assert aws_resources["users"].get_item(Key={"UserId": "user-123"})["Item"]["CollectionVersion"] == 1
+
+    def test_skips_deleted_and_missing_photos(self, aws_resources, derivation_queue, fake_imaging):
+        aws_resources["table"].update_item(
+            Key={"UserId": "user-123", "PhotoId": "photo-1"},
+            UpdateExpression="SET #status = :pending",
+            ExpressionAttributeNames={"#status": "Status"},
+            ExpressionAttributeValues={":pending": "PENDING"},
+        )
+        enqueue_derivations("user-123", ["photo-1", "missing"])
+
+        assert derivation_queue.drain(derive_photo.handler) == []
+        assert "ThumbnailKey" not in _photo(aws_resources)
+
+    def test_keeps_edits_made_during_derivation(self, aws_resources, derivation_queue, monkeypatch):
+        def edit_then_label(_bytes, _sizes):
+            # A PATCH lands between the worker's read and its write
+            aws_resources["table"].update_item(
+                Key={"UserId": "user-123", "PhotoId": "photo-1"},
+                UpdateExpression="SET Subjects = :subjects ADD #version :one",
+                ExpressionAttributeNames={"#version": "Version"},
+                ExpressionAttributeValues={":subjects": ["alice"], ":one": 1},
+            )
+            return "date:2024-04-12", {}
+
+        monkeypatch.setattr(derive_photo, "derive_image", edit_then_label)
+        enqueue_derivations("user-123", ["photo-1"])
+
+        assert derivation_queue.drain(derive_photo.handler) == []
+
+        item = _photo(aws_resources)
+        assert item["Subjects"] == ["alice", "date:2024-04-12"]
+        assert item["Version"] == 3
+
+    def test_imaging_failures_still_complete(self, aws_resources, derivation_queue, monkeypatch):
+        def broken(_bytes, _sizes):
+            raise ValueError("cannot identify image file")
+
+        monkeypatch.setattr(derive_photo, "derive_image", broken)
+        enqueue_derivations("user-123", ["photo-1"])
+
+        assert derivation_queue.drain(derive_photo.handler) == []
+
+        item = _photo(aws_resources)
+        assert item["DerivationStatus"] == "COMPLETE"
+        assert item["Subjects"] == ["bob"]
+        assert "ThumbnailKey" not in item
+        assert "Renditions" not in item
+
+    def test_client_thumbnail_means_only_the_header_is_read(self, aws_resources, derivation_queue, monkeypatch):
+        # With previews off, the original's pixels are never needed when the client sent a thumbnail
+        monkeypatch.setattr(derive_photo, "PREVIEW_MAX_SIZE", 0)
+        monkeypatch.setattr(derive_photo, "RENDITION_SIZES", (64, 320))
+        aws_resources["table"].update_item(
+            Key={"UserId": "user-123", "PhotoId": "photo-1"},
+            UpdateExpression="SET ThumbnailKey = :thumbnailKey",
+            ExpressionAttributeValues={":thumbnailKey": "thumbnails/user-123/photo-1.webp"},
+        )
+        aws_resources["s3"].put_object(Bucket="photos-test-bucket", Key="thumbnails/user-123/photo-1.webp", Body=b"client")
+        monkeypatch.setattr(derive_photo, "read_exif_block", lambda _s3, _bucket, _key: b"exif")
+        monkeypatch.setattr(derive_photo, "extract_date_label_from_exif", lambda _bytes: "date:2024-04-12")
+
+        monkeypatch.setattr(
+            derive_photo, "derive_image", lambda _bytes, sizes: (None, {size: b"small" for size in sizes})
+        )
+        fetched = []
+
+        def load(key):
+            fetched.append(key)
+            return b"client"
+
+        monkeypatch.setattr(derive_photo, "_load_source_bytes", load)
+        enqueue_derivations("user-123", ["photo-1"])
+
+        assert derivation_queue.drain(derive_photo.handler) == []
+
+        item = _photo(aws_resources)
+        assert item["Subjects"] == ["bob", "date:2024-04-12"]
+        assert item["ThumbnailKey"] == "thumbnails/user-123/photo-1.webp"
+        assert item["Renditions"] == {"64": "previews/user-123/photo-1/64.webp", "320": "thumbnails/user-123/photo-1.webp"}
+        # The grid rendition is downscaled from the client thumbnail, not the original
+        assert fetched == ["thumbnails/user-123/photo-1.webp"]
+        thumbnail = aws_resources["s3"].get_object(Bucket="photos-test-bucket", Key="thumbnails/user-123/photo-1.webp")
+        assert thumbnail["Body"].read() == b"client"
+
+    def test_oversized_original_is_not_downloaded(self, aws_resources, derivation_queue, monkeypatch):
+        monkeypatch.setattr(derive_photo, "MAX_SOURCE_BYTES", 4)
+
+        def must_not_decode(_bytes, _sizes):
+            raise AssertionError("oversized originals must not reach Pillow")
+
+        monkeypatch.setattr(derive_photo, "derive_image", must_not_decode)
+        monkeypatch.setattr(derive_photo, "read_exif_block", lambda _s3, _bucket, _key: b"exif")
+        monkeypatch.setattr(derive_photo, "extract_date_label_from_exif", lambda _bytes: "date:2024-04-12")
+        enqueue_derivations("user-123", ["photo-1"])
+
+        assert derivation_queue.drain(derive_photo.handler) == []
+
+        item = _photo(aws_resources)
+        assert item["DerivationStatus"] == "COMPLETE"
+        assert item["Subjects"] == ["bob", "date:2024-04-12"]
+        assert "Renditions" not in item
+
+    def test_missing_source_retries_then_marks_failed(self, aws_resources, derivation_queue, fake_imaging):
+        aws_resources["s3"].delete_object(Bucket="photos-test-bucket", Key="originals/user-123/photo-1.webp")
+        calls = []
+
+        def counting_handler(event, context):
+            calls.append(len(event["Records"]))
+            return derive_photo.handler(event, context)
+
+        enqueue_derivations("user-123", ["photo-1"])
+        dead_letters = derivation_queue.drain(counting_handler)
+
+        assert [json.loads(body)["photoId"] for body in dead_letters] == ["photo-1"]
+        assert len(calls) == MAX_RECEIVE_COUNT
+        assert _photo(aws_resources)["DerivationStatus"] == "FAILED"
+
+    def test_reports_only_failed_messages(self, aws_resources, fake_imaging):
+        response = derive_photo.handler({
+            "Records": [
+                {"messageId": "m-1", "body": json.dumps({"userId": "user-123", "photoId": "photo-1"})},
+                {"messageId": "m-2", "body": "{not json"},
+            ]
+        }, None)
+
+        assert response == {"batchItemFailures": [{"itemIdentifier": "m-2"}]}
+        assert _photo(aws_resources)["DerivationStatus"] == "COMPLETE"
+
+    def test_enqueue_without_a_queue_url_fails_loudly(self, monkeypatch):
+        monkeypatch.setattr(queue_module, "DERIVATION_QUEUE_URL", "")
+        monkeypatch.setattr(queue_module, "_queue", None)
+
+        with pytest.raises(RuntimeError, match="DERIVATION_QUEUE_URL"):
+            enqueue_derivations("user-123", ["photo-1"])
@@ -171,3 +171,43 @@ class TestDownload:
         assert response["statusCode"] == 400
         body = json.loads(response["body"])
         assert "photoId" in body["error"]
+
+    def test_download_size_hint_picks_the_smallest_covering_rendition(self, aws_resources, mock_env, valid_event):
+        """Test size=N serves a rendition instead of the original"""
+        aws_resources["table"].put_item(
+            Item={
+                "UserId": "user-123",
+                "PhotoId": "photo-456",
+                "ObjectKey": "uploads/photo-456.jpg",
+                "ContentType": "image/jpeg",
+                "ThumbnailKey": "thumbnails/user-123/photo-456.webp",
+                "Renditions": {
+                    "64": "previews/user-123/photo-456/64.webp",
+                    "320": "thumbnails/user-123/photo-456.webp",
+                    "2048": "previews/user-123/photo-456/2048.webp",
+                },
+            }
+        )
+
+        def download_for(size):
+            event = valid_event.copy()
+            event["queryStringParameters"] = {"size": size}
+            return json.loads(download.handler(event, None)["body"])
+
+        preview = download_for("1080")
+        assert preview["renditionSize"] == 2048
+        assert "previews/user-123/photo-456/2048.webp" in preview["downloadUrl"]
+        # Nothing covers a hint past the largest rendition, so the original is served
+        original = download_for("4000")
+        assert original["renditionSize"] is None
+        assert "uploads/photo-456.jpg" in original["downloadUrl"]
+
+    def test_download_rejects_invalid_size(self, aws_resources, mock_env, valid_event):
+        """Test a non-numeric size returns 400"""
+        event = valid_event.copy()
+        event["queryStringParameters"] = {"size": "large"}
+
+        response = download.handler(event, None)
+
+        assert response["statusCode"] == 400
+        assert "size" in json.loads(response["body"])["error"]
@@ -0,0 +1,131 @@
+import os
+import sys
+
+import boto3
+import pytest
+from moto import mock_aws
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from handlers.exif_reader import INITIAL_RANGE_BYTES, read_exif_block
+
+BUCKET = "photos-test-bucket"
+# Stand-in EXIF payload: a little-endian TIFF header the reader hands back untouched
+EXIF_BLOCK = b"II*\x00\x08\x00\x00\x00" + b"\x00" * 32
+
+
+class RecordingS3:
+    """Passes calls through to the real (moto) client and records every requested range."""
+
+    def __init__(self, client):
+        self.client = client
+        self.ranges = []
+
+    def get_object(self, **kwargs):
+        self.ranges.append(kwargs.get("Range"))
+        return self.client.get_object(**kwargs)
+
+
+@pytest.fixture
+def s3():
+    with mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket=BUCKET)
+        yield RecordingS3(client)
+
+
+def _put(s3, key, body):
+    s3.client.put_object(Bucket=BUCKET, Key=key, Body=body)
+
+
+def _jpeg_segment(marker, payload):
+    return bytes([0xFF, marker]) + (len(payload) + 2).to_bytes(2, "big") + payload
+
+
+def _jpeg(*segments, scan_bytes=2 * 1024 * 1024):
+    return b"\xff\xd8" + b"".join(segments) + b"\xff\xda\x00\x02" + b"\x00" * scan_bytes + b"\xff\xd9"
+
+
+def _webp_chunk(fourcc, payload):
+    return fourcc + len(payload).to_bytes(4, "little") + payload + (b"\x00" if len(payload) & 1 else b"")
+
+
+def _webp(*chunks):
+    body = b"WEBP" + b"".join(chunks)
+    return b"RIFF" + len(body).to_bytes(4, "little") + body
+
+
+def _png_chunk(chunk_type, payload):
+    return len(payload).to_bytes(4, "big") + chunk_type + payload + b"\x00\x00\x00\x00"
+
+
+class TestReadExifBlock:
+    def test_jpeg_exif_comes_from_the_first_range(self, s3):
+        _put(s3, "a.jpg", _jpeg(_jpeg_segment(0xE0, b"JFIF\x00" + b"\x00" * 9), _jpeg_segment(0xE1, b"Exif\x00\x00" + EXIF_BLOCK)))
+
+        assert read_exif_block(s3, BUCKET, "a.jpg") == EXIF_BLOCK
+        assert s3.ranges == [f"bytes=0-{INITIAL_RANGE_BYTES - 1}"]
+
+    def test_grows_the_read_when_app1_runs_past_the_first_range(self, s3):
+        long_block = EXIF_BLOCK + b"\x01" * 60_000
+        icc_profile = _jpeg_segment(0xE2, b"\x00" * 30_000)
+        _put(s3, "long.jpg", _jpeg(icc_profile, _jpeg_segment(0xE1, b"Exif\x00\x00" + long_block)))
+
+        assert read_exif_block(s3, BUCKET, "long.jpg") == long_block
+        assert len(s3.ranges) == 2
+        assert s3.ranges[1].startswith(f"bytes={INITIAL_RANGE_BYTES}-")
+
+    def test_jpeg_without_exif(self, s3):
+        _put(s3, "plain.jpg", _jpeg(_jpeg_segment(0xE0, b"JFIF\x00" + b"\x00" * 9)))
+
+        assert read_exif_block(s3, BUCKET, "plain.jpg") == b""
+        assert len(s3.ranges) == 1
+
+    def test_webp_skips_image_data_to_reach_a_trailing_exif_chunk(self, s3):
+        vp8x = bytes([0x08]) + b"\x00" * 9
+        _put(s3, "a.webp", _webp(
+            _webp_chunk(b"VP8X", vp8x),
+            _webp_chunk(b"VP8 ", b"\x00" * (3 * 1024 * 1024 + 1)),
+            _webp_chunk(b"EXIF", b"Exif\x00\x00" + EXIF_BLOCK),
+        ))
+
+        assert read_exif_block(s3, BUCKET, "a.webp") == EXIF_BLOCK
+        # The 3 MB VP8 chunk is never downloaded
+        assert len(s3.ranges) == 3
+
+    def test_simple_webp_has_no_exif(self, s3):
+        _put(s3, "simple.webp", _webp(_webp_chunk(b"VP8 ", b"\x00" * 100)))
+
+        assert read_exif_block(s3, BUCKET, "simple.webp") == b""
+
+    def test_png_exif_chunk(self, s3):
+        signature = b"\x89PNG\r\n\x1a\n"
+        _put(s3, "a.png", signature + _png_chunk(b"IHDR", b"\x00" * 13) + _png_chunk(b"eXIf", EXIF_BLOCK)
+             + _png_chunk(b"IDAT", b"\x00" * 1000) + _png_chunk(b"IEND", b""))
+
+        assert read_exif_block(s3, BUCKET, "a.png") == EXIF_BLOCK
+
+    def test_small_tiff_is_returned_whole(self, s3):
+        _put(s3, "a.tif", EXIF_BLOCK)
+
+        assert read_exif_block(s3, BUCKET, "a.tif") == EXIF_BLOCK
+
+    def test_unknown_formats_need_a_full_read(self, s3):
+        _put(s3, "a.heic", b"\x00\x00\x00\x18ftypheic" + b"\x00" * 100)
+
+        assert read_exif_block(s3, BUCKET, "a.heic") is None
+
+    def test_capture_date_from_a_pillow_written_jpeg(self, s3):
+        Image = pytest.importorskip("PIL.Image")
+        from io import BytesIO
+
+        from handlers.upload_common import extract_date_label_from_exif
+
+        exif = Image.Exif()
+        exif.get_ifd(0x8769)[0x9003] = "2024:04:12 10:30:00"
+        source = BytesIO()
+        Image.effect_noise((1600, 1200), 64).convert("RGB").save(source, format="JPEG", exif=exif)
+        _put(s3, "camera.jpg", source.getvalue())
+
+        assert extract_date_label_from_exif(read_exif_block(s3, BUCKET, "camera.jpg")) == "date:2024-04-12"
+        assert s3.ranges == [f"bytes=0-{INITIAL_RANGE_BYTES - 1}"]
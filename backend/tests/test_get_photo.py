@@ -0,0 +1,94 @@
+import json
+import os
+import sys
+
+import boto3
+import pytest
+from moto import mock_aws
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from handlers import get_photo
+
+
+@pytest.fixture
+def dynamodb_table():
+    with mock_aws():
+        dynamodb = boto3.resource("dynamodb", region_name="us-east-1")
+        table = dynamodb.create_table(
+            TableName="photos-test",
+            KeySchema=[
+                {"AttributeName": "UserId", "KeyType": "HASH"},
+                {"AttributeName": "PhotoId", "KeyType": "RANGE"},
+            ],
+            AttributeDefinitions=[
+                {"AttributeName": "UserId", "AttributeType": "S"},
+                {"AttributeName": "PhotoId", "AttributeType": "S"},
+            ],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        table.put_item(
+            Item={
+                "UserId": "user-123",
+                "PhotoId": "photo-1",
+                "OriginalFileName": "beach.jpg",
+                "ObjectKey": "originals/user-123/photo-1.jpg",
+                "ContentType": "image/jpeg",
+                "Status": "ACTIVE",
+            }
+        )
+        yield table
+
+
+@pytest.fixture
+def valid_event():
+    return {
+        "requestContext": {
+            "authorizer": {
+                "jwt": {
+                    "claims": {
+                        "sub": "user-123",
+                        "email_verified": "true",
+                    }
+                }
+            }
+        },
+        "pathParameters": {"photoId": "photo-1"},
+    }
+
+
+class TestGetPhoto:
+    def test_get_photo_returns_metadata_with_etag(self, dynamodb_table, valid_event):
+        response = get_photo.handler(valid_event, None)
+
+        assert response["statusCode"] == 200
+        assert json.loads(response["body"])["fileName"] == "beach.jpg"
+        assert response["headers"]["ETag"].startswith('W/"')
+
+    def test_get_photo_answers_if_none_match_until_photo_changes(self, dynamodb_table, valid_event):
+        etag = get_photo.handler(valid_event, None)["headers"]["ETag"]
+
+        event = dict(valid_event, headers={"if-none-match": etag})
+        not_modified = get_photo.handler(event, None)
+
+        assert not_modified["statusCode"] == 304
+        assert not_modified["body"] == ""
+
+        dynamodb_table.update_item(
+            Key={"UserId": "user-123", "PhotoId": "photo-1"},
+            UpdateExpression="SET Description = :description ADD Version :one",
+            ExpressionAttributeValues={":description": "sunset", ":one": 1},
+        )
+        changed = get_photo.handler(event, None)
+
+        assert changed["statusCode"] == 200
+        assert json.loads(changed["body"])["description"] == "sunset"
+        assert changed["headers"]["ETag"] != etag
+
+    def test_get_photo_conditional_request_for_pending_photo_is_not_found(self, dynamodb_table, valid_event):
+        dynamodb_table.put_item(Item={"UserId": "user-123", "PhotoId": "photo-2", "Status": "PENDING"})
+
+        event = dict(valid_event, pathParameters={"photoId": "photo-2"}, headers={"if-none-match": "*"})
+        response = get_photo.handler(event, None)
+
+        assert response["statusCode"] == 404
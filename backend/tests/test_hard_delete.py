@@ -33,12 +33,42 @@ def aws_resources():
             BillingMode="PAY_PER_REQUEST"
         )
         
+        index_table = dynamodb.create_table(
+            TableName="photo-index-test",
+            KeySchema=[
+                {"AttributeName": "IndexKey", "KeyType": "HASH"},
+                {"AttributeName": "SortKey", "KeyType": "RANGE"},
+            ],
+            AttributeDefinitions=[
+                {"AttributeName": "IndexKey", "AttributeType": "S"},
+                {"AttributeName": "SortKey", "AttributeType": "S"},
+            ],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        
+        refs_table = dynamodb.create_table(
+            TableName="object-refs-test",
+            KeySchema=[{"AttributeName": "ObjectKey", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "ObjectKey", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        
+        users_table = dynamodb.create_table(
+            TableName="users-test",
+            KeySchema=[{"AttributeName": "UserId", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "UserId", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST",
+        )
+
         # Create S3 bucket
         s3 = boto3.client("s3", region_name="us-east-1")
         s3.create_bucket(Bucket="photos-test-bucket")
         
         yield {
             "table": table,
+            "index": index_table,
+            "refs": refs_table,
+            "users": users_table,
             "s3": s3
         }
 
@@ -110,6 +140,16 @@ class TestHardDelete:
             Key={"UserId": "user-123", "PhotoId": "photo-456"}
         )
         assert "Item" not in result
+        assert aws_resources["users"].get_item(Key={"UserId": "user-123"})["Item"]["CollectionVersion"] == 1
+
+        # The change feed learns about the deletion from a tombstone
+        tombstones = aws_resources["index"].query(
+            KeyConditionExpression="IndexKey = :indexKey",
+            ExpressionAttributeValues={":indexKey": "user-123#d:"},
+        )["Items"]
+        assert [entry["PhotoId"] for entry in tombstones] == ["photo-456"]
+        assert tombstones[0]["SortKey"] == f"{tombstones[0]['UpdatedAt']}#photo-456"
+        assert tombstones[0]["ExpiresAt"] > 0
         
         # Verify the object is removed from S3
         from botocore.exceptions import ClientError
@@ -150,6 +190,36 @@ class TestHardDelete:
         body = json.loads(response["body"])
         assert "must be soft deleted" in body["error"]
     
+    def test_hard_delete_does_not_remove_a_photo_restored_after_the_read(self, aws_resources, mock_env, valid_event, monkeypatch):
+        """A restore landing between the trash check and the delete keeps the photo and its object"""
+        table = aws_resources["table"]
+        s3 = aws_resources["s3"]
+        s3.put_object(Bucket="photos-test-bucket", Key="uploads/photo-456.jpg", Body=b"image")
+        table.put_item(
+            Item={
+                "UserId": "user-123",
+                "PhotoId": "photo-456",
+                "ObjectKey": "uploads/photo-456.jpg",
+                "ContentType": "image/jpeg",
+                "DeletedAt": datetime.now(timezone.utc).isoformat()
+            }
+        )
+        client = hard_delete.dynamodb.meta.client
+        real_get_item = client.get_item
+
+        def get_item_then_restore(**kwargs):
+            response = real_get_item(**kwargs)
+            table.update_item(Key={"UserId": "user-123", "PhotoId": "photo-456"}, UpdateExpression="REMOVE DeletedAt")
+            return response
+
+        monkeypatch.setattr(client, "get_item", get_item_then_restore)
+
+        response = hard_delete.handler(valid_event, None)
+
+        assert response["statusCode"] == 409
+        assert "Item" in table.get_item(Key={"UserId": "user-123", "PhotoId": "photo-456"})
+        s3.head_object(Bucket="photos-test-bucket", Key="uploads/photo-456.jpg")
+
     def test_hard_delete_missing_user_id(self, aws_resources, mock_env, valid_event):
         """Test missing JWT subject claim returns 401"""
         event = valid_event.copy()
@@ -263,6 +333,9 @@ class TestHardDelete:
                 "Status": "ACTIVE",
             }
         )
+        aws_resources["refs"].put_item(
+            Item={"ObjectKey": shared_key, "Refs": {"user-123#photo-456", "user-999#photo-shared"}}
+        )
 
         response = hard_delete.handler(valid_event, None)
         assert response["statusCode"] == 200
@@ -274,3 +347,29 @@ class TestHardDelete:
         # Shared object is still present due to another reference.
         existing = s3.head_object(Bucket="photos-test-bucket", Key=shared_key)
         assert existing["ResponseMetadata"]["HTTPStatusCode"] == 200
+
+        refs = aws_resources["refs"].get_item(Key={"ObjectKey": shared_key})["Item"]
+        assert refs["Refs"] == {"user-999#photo-shared"}
+
+    def test_hard_delete_removes_object_with_last_reference(self, aws_resources, mock_env, valid_event):
+        table = aws_resources["table"]
+        s3 = aws_resources["s3"]
+
+        object_key = "originals/user-123/photo-456.webp"
+        s3.put_object(Bucket="photos-test-bucket", Key=object_key, Body=b"image")
+        table.put_item(
+            Item={
+                "UserId": "user-123",
+                "PhotoId": "photo-456",
+                "ObjectKey": object_key,
+                "DeletedAt": datetime.now(timezone.utc).isoformat(),
+            }
+        )
+        aws_resources["refs"].put_item(Item={"ObjectKey": object_key, "Refs": {"user-123#photo-456"}})
+
+        response = hard_delete.handler(valid_event, None)
+
+        assert response["statusCode"] == 200
+        assert "Item" not in aws_resources["refs"].get_item(Key={"ObjectKey": object_key})
+        listed = s3.list_objects_v2(Bucket="photos-test-bucket", Prefix=object_key)
+        assert listed.get("KeyCount") == 0
@@ -0,0 +1,276 @@
+import base64
+import gzip
+import json
+import os
+import sys
+from datetime import datetime, timezone
+
+import boto3
+import pytest
+from moto import mock_aws
+
+# Add the handlers directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from handlers import list as list_handler
+
+
+@pytest.fixture
+def dynamodb_table():
+    with mock_aws():
+        dynamodb = boto3.resource("dynamodb", region_name="us-east-1")
+        table = dynamodb.create_table(
+            TableName="photos-test",
+            KeySchema=[
+                {"AttributeName": "UserId", "KeyType": "HASH"},
+                {"AttributeName": "PhotoId", "KeyType": "RANGE"},
+            ],
+            AttributeDefinitions=[
+                {"AttributeName": "UserId", "AttributeType": "S"},
+                {"AttributeName": "PhotoId", "AttributeType": "S"},
+                {"AttributeName": "ActiveUserId", "AttributeType": "S"},
+                {"AttributeName": "CreatedAt", "AttributeType": "S"},
+            ],
+            GlobalSecondaryIndexes=[
+                {
+                    "IndexName": "ActiveCreatedAtIndex",
+                    "KeySchema": [
+                        {"AttributeName": "ActiveUserId", "KeyType": "HASH"},
+                        {"AttributeName": "CreatedAt", "KeyType": "RANGE"},
+                    ],
+                    "Projection": {"ProjectionType": "ALL"},
+                }
+            ],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        dynamodb.create_table(
+            TableName="users-test",
+            KeySchema=[{"AttributeName": "UserId", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "UserId", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST",
+        )
+
+        yield table
+
+
+@pytest.fixture
+def mock_env(monkeypatch):
+    monkeypatch.setenv("PHOTOS_TABLE", "photos-test")
+
+
+@pytest.fixture
+def valid_event():
+    return {
+        "requestContext": {
+            "authorizer": {
+                "jwt": {
+                    "claims": {
+                        "sub": "user-123",
+                        "email_verified": "true",
+                    }
+                }
+            }
+        },
+        "queryStringParameters": None,
+    }
+
+
+def _put_active_photo(table, photo_id, created_at=None, **extra):
+    table.put_item(
+        Item={
+            "UserId": "user-123",
+            "PhotoId": photo_id,
+            "ObjectKey": f"originals/user-123/{photo_id}.webp",
+            "ContentType": "image/webp",
+            "CreatedAt": created_at or datetime.now(timezone.utc).isoformat(),
+            "Status": "ACTIVE",
+            "ActiveUserId": "user-123",
+            **extra,
+        }
+    )
+
+
+class TestList:
+    def test_list_returns_active_photos(self, dynamodb_table, mock_env, valid_event):
+        _put_active_photo(dynamodb_table, "photo-1", OriginalFileName="beach.jpg", Subjects=["bob"])
+
+        response = list_handler.handler(valid_event, None)
+
+        assert response["statusCode"] == 200
+        body = json.loads(response["body"])
+        assert body["count"] == 1
+        photo = body["photos"][0]
+        assert photo["photoId"] == "photo-1"
+        assert photo["fileName"] == "beach.jpg"
+        assert photo["subjects"] == ["bob"]
+        assert photo["status"] == "ACTIVE"
+
+    def test_list_returns_full_pages_past_pending_and_deleted_rows(self, dynamodb_table, mock_env, valid_event):
+        for i in range(20):
+            dynamodb_table.put_item(Item={"UserId": "user-123", "PhotoId": f"photo-p{i:02d}", "Status": "PENDING"})
+            dynamodb_table.put_item(
+                Item={
+                    "UserId": "user-123",
+                    "PhotoId": f"photo-t{i:02d}",
+                    "Status": "ACTIVE",
+                    "DeletedAt": "2026-01-01T00:00:00+00:00",
+                }
+            )
+        for i in range(4):
+            _put_active_photo(dynamodb_table, f"photo-a{i}", created_at=f"2026-01-0{i + 1}T00:00:00+00:00")
+
+        event = valid_event.copy()
+        event["queryStringParameters"] = {"limit": "3"}
+        first = json.loads(list_handler.handler(event, None)["body"])
+
+        assert [photo["photoId"] for photo in first["photos"]] == ["photo-a3", "photo-a2", "photo-a1"]
+        assert first["nextToken"]
+
+        event["queryStringParameters"] = {"limit": "3", "nextToken": first["nextToken"]}
+        second = json.loads(list_handler.handler(event, None)["body"])
+
+        assert [photo["photoId"] for photo in second["photos"]] == ["photo-a0"]
+
+    def test_list_rejects_next_token_from_another_user(self, dynamodb_table, mock_env, valid_event):
+        _put_active_photo(dynamodb_table, "photo-1")
+        event = valid_event.copy()
+        event["requestContext"]["authorizer"]["jwt"]["claims"]["sub"] = "user-456"
+        event["queryStringParameters"] = {
+            "nextToken": list_handler._encode_next_token(
+                {
+                    "ActiveUserId": "user-123",
+                    "CreatedAt": "2026-01-01T00:00:00+00:00",
+                    "UserId": "user-123",
+                    "PhotoId": "photo-1",
+                }
+            )
+        }
+
+        response = list_handler.handler(event, None)
+
+        assert response["statusCode"] == 400
+
+    def test_list_pages_newest_first_regardless_of_photo_id(self, dynamodb_table, mock_env, valid_event):
+        # Legacy uuid4 hex IDs sort randomly; CreatedAt decides the order
+        _put_active_photo(dynamodb_table, "ffff0000", created_at="2026-01-01T00:00:00+00:00")
+        _put_active_photo(dynamodb_table, "0000ffff", created_at="2026-03-01T00:00:00+00:00")
+        _put_active_photo(dynamodb_table, "01JAAAAAAAAAAAAAAAAAAAAAAA", created_at="2026-02-01T00:00:00+00:00")
+
+        event = valid_event.copy()
+        event["queryStringParameters"] = {"limit": "2"}
+        first = json.loads(list_handler.handler(event, None)["body"])
+        event["queryStringParameters"] = {"limit": "2", "nextToken": first["nextToken"]}
+        second = json.loads(list_handler.handler(event, None)["body"])
+
+        assert [photo["photoId"] for photo in first["photos"] + second["photos"]] == [
+            "0000ffff",
+            "01JAAAAAAAAAAAAAAAAAAAAAAA",
+            "ffff0000",
+        ]
+
+    def test_list_fields_returns_only_requested_fields(self, dynamodb_table, mock_env, valid_event, monkeypatch):
+        hash_a = "a" * 64
+        _put_active_photo(dynamodb_table, "photo-1", created_at="2026-01-01T00:00:00+00:00", ContentHash=hash_a)
+        _put_active_photo(dynamodb_table, "photo-2", created_at="2026-01-02T00:00:00+00:00", ContentHash="b" * 64)
+        monkeypatch.setattr(
+            list_handler, "attach_thumbnail_urls", lambda *args: pytest.fail("thumbnailUrl was not requested")
+        )
+
+        event = valid_event.copy()
+        event["queryStringParameters"] = {"fields": "photoId, contentHash", "limit": "1"}
+        first = json.loads(list_handler.handler(event, None)["body"])
+        event["queryStringParameters"] = {"fields": "photoId,contentHash", "limit": "1", "nextToken": first["nextToken"]}
+        second = json.loads(list_handler.handler(event, None)["body"])
+
+        assert first["photos"] == [{"photoId": "photo-2", "contentHash": "b" * 64}]
+        assert second["photos"] == [{"photoId": "photo-1", "contentHash": hash_a}]
+
+    def test_list_fields_rejects_unknown_field(self, dynamodb_table, mock_env, valid_event):
+        event = valid_event.copy()
+        event["queryStringParameters"] = {"fields": "photoId,secret"}
+
+        response = list_handler.handler(event, None)
+
+        assert response["statusCode"] == 400
+        assert json.loads(response["body"])["error"] == "fields contains unknown field 'secret'"
+
+    def test_list_gzips_large_pages_when_accepted(self, dynamodb_table, mock_env, valid_event):
+        for i in range(30):
+            _put_active_photo(dynamodb_table, f"photo-{i:02d}", created_at=f"2026-01-01T00:00:{i:02d}+00:00")
+
+        event = valid_event.copy()
+        event["headers"] = {"accept-encoding": "gzip, deflate"}
+        response = list_handler.handler(event, None)
+
+        assert response["statusCode"] == 200
+        assert response["isBase64Encoded"] is True
+        assert response["headers"]["Content-Encoding"] == "gzip"
+        body = json.loads(gzip.decompress(base64.b64decode(response["body"])))
+        assert body["count"] == 20
+
+    def test_list_answers_if_none_match_with_304_until_collection_changes(
+        self, dynamodb_table, mock_env, valid_event, monkeypatch
+    ):
+        _put_active_photo(dynamodb_table, "photo-1")
+        first = list_handler.handler(valid_event, None)
+        etag = first["headers"]["ETag"]
+
+        event = valid_event.copy()
+        event["headers"] = {"if-none-match": etag}
+        with monkeypatch.context() as patched:
+            patched.setattr(list_handler, "attach_thumbnail_urls", lambda *args: pytest.fail("304 must not presign"))
+            not_modified = list_handler.handler(event, None)
+
+        assert not_modified["statusCode"] == 304
+        assert not_modified["headers"]["ETag"] == etag
+        assert not_modified["body"] == ""
+
+        boto3.resource("dynamodb", region_name="us-east-1").Table("users-test").update_item(
+            Key={"UserId": "user-123"},
+            UpdateExpression="ADD CollectionVersion :one",
+            ExpressionAttributeValues={":one": 1},
+        )
+        changed = list_handler.handler(event, None)
+
+        assert changed["statusCode"] == 200
+        assert changed["headers"]["ETag"] != etag
+
+    def test_list_etag_depends_on_page_and_fields(self, dynamodb_table, mock_env, valid_event):
+        _put_active_photo(dynamodb_table, "photo-1")
+
+        def etag_for(params):
+            event = valid_event.copy()
+            event["queryStringParameters"] = params
+            return list_handler.handler(event, None)["headers"]["ETag"]
+
+        assert etag_for(None) == etag_for(None)
+        assert etag_for(None) != etag_for({"limit": "5"})
+        assert etag_for({"fields": "photoId"}) != etag_for({"fields": "photoId,contentHash"})
+
+    def test_list_size_hint_points_thumbnail_urls_at_covering_renditions(
+        self, dynamodb_table, mock_env, valid_event, monkeypatch
+    ):
+        _put_active_photo(
+            dynamodb_table,
+            "photo-1",
+            created_at="2026-01-02T00:00:00+00:00",
+            ThumbnailKey="thumbnails/user-123/photo-1.webp",
+            Renditions={"64": "previews/user-123/photo-1/64.webp", "320": "thumbnails/user-123/photo-1.webp"},
+        )
+        # Derived before the ladder: only the list thumbnail exists
+        _put_active_photo(
+            dynamodb_table, "photo-2", created_at="2026-01-01T00:00:00+00:00", ThumbnailKey="thumbnails/user-123/photo-2.webp"
+        )
+        signed = []
+        monkeypatch.setattr(
+            list_handler, "attach_thumbnail_urls", lambda _s3, _bucket, entries: signed.extend(key for _, key in entries)
+        )
+
+        event = valid_event.copy()
+        event["queryStringParameters"] = {"size": "48"}
+        response = list_handler.handler(event, None)
+
+        assert response["statusCode"] == 200
+        assert signed == ["previews/user-123/photo-1/64.webp", "thumbnails/user-123/photo-2.webp"]
+        event["queryStringParameters"] = None
+        assert list_handler.handler(event, None)["headers"]["ETag"] != response["headers"]["ETag"]
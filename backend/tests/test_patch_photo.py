@@ -9,7 +9,7 @@ import boto3
 # Add the handlers directory to the path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
-from handlers import patch_photo
+from handlers import patch_photo, photo_index
 
 
 @pytest.fixture
@@ -32,7 +32,27 @@ def dynamodb_table():
             ],
             BillingMode="PAY_PER_REQUEST"
         )
-        
+
+        dynamodb.create_table(
+            TableName="photo-index-test",
+            KeySchema=[
+                {"AttributeName": "IndexKey", "KeyType": "HASH"},
+                {"AttributeName": "SortKey", "KeyType": "RANGE"},
+            ],
+            AttributeDefinitions=[
+                {"AttributeName": "IndexKey", "AttributeType": "S"},
+                {"AttributeName": "SortKey", "AttributeType": "S"},
+            ],
+            BillingMode="PAY_PER_REQUEST",
+        )
+
+        dynamodb.create_table(
+            TableName="users-test",
+            KeySchema=[{"AttributeName": "UserId", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "UserId", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST",
+        )
+
         yield table
 
 
@@ -90,6 +110,31 @@ class TestPatchPhoto:
         assert body["photoId"] == "photo-456"
         assert body["fileName"] == "updated-photo.jpg"
         assert body["description"] == "Updated description"
+
+        item = dynamodb_table.get_item(Key={"UserId": "user-123", "PhotoId": "photo-456"})["Item"]
+        assert item["Version"] == 1
+        users_table = boto3.resource("dynamodb", region_name="us-east-1").Table("users-test")
+        assert users_table.get_item(Key={"UserId": "user-123"})["Item"]["CollectionVersion"] == 1
+    
+    def test_patch_photo_refreshes_search_postings(self, dynamodb_table, mock_env, valid_event):
+        """Test renaming a photo swaps its trigram postings"""
+        index_table = boto3.resource("dynamodb", region_name="us-east-1").Table("photo-index-test")
+        item = {
+            "UserId": "user-123",
+            "PhotoId": "photo-456",
+            "OriginalFileName": "old-photo.jpg",
+            "ObjectKey": "uploads/photo-456.jpg",
+            "ContentType": "image/jpeg"
+        }
+        dynamodb_table.put_item(Item=item)
+        photo_index.sync_photo_postings(index_table, "user-123", "photo-456", None, item)
+
+        response = patch_photo.handler(valid_event, None)
+
+        assert response["statusCode"] == 200
+        assert photo_index.load_posting_list(index_table, "user-123", "g:upd") == {"photo-456"}
+        assert photo_index.load_posting_list(index_table, "user-123", "g:old") == set()
+        assert photo_index.load_posting_list(index_table, "user-123", "g:pho") == {"photo-456"}
     
     def test_patch_photo_not_found(self, dynamodb_table, mock_env, valid_event):
         """Test updating non-existent photo returns 404"""
@@ -0,0 +1,36 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from handlers import photo_index
+
+
+class TestPhotoIndexTerms:
+    def test_index_terms_cover_every_substring_trigram(self):
+        item = {"PhotoId": "p1", "OriginalFileName": "Ab.jpg", "Subjects": ["folder:Beach"]}
+
+        terms = photo_index.index_terms_for_photo(item)
+
+        assert {"g:ab.", "g:b.j", "g:bea", "g:eac", "g:ach", "g:r:b"} <= terms
+        assert all(term == term.lower() for term in terms)
+
+    def test_query_terms_use_a_non_overlapping_cover(self):
+        assert photo_index.query_terms("beach") == {"g:bea", "g:ach"}
+        assert photo_index.query_terms("beach-2023") == {"g:bea", "g:ch-", "g:202", "g:023"}
+
+    def test_query_terms_are_capped_for_long_queries(self):
+        terms = photo_index.query_terms("a" * 10 + "b" * 40)
+
+        assert 0 < len(terms) <= photo_index.MAX_QUERY_NGRAMS
+
+    def test_short_queries_have_no_terms(self):
+        assert photo_index.query_terms("ab") == set()
+
+    def test_index_terms_include_whole_normalized_labels(self):
+        item = {"PhotoId": "p1", "Subjects": [" Beach ", "date:2024-04-12", ""]}
+
+        terms = photo_index.index_terms_for_photo(item)
+
+        assert {"l:beach", "l:date:2024-04-12"} <= terms
+        assert "l:" not in terms
@@ -0,0 +1,115 @@
+import datetime
+import os
+import sys
+
+import boto3
+import botocore.auth
+import pytest
+from botocore.config import Config
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from handlers import presign
+
+
+FROZEN_NOW = datetime.datetime(2026, 3, 1, 12, 30, 45, tzinfo=datetime.timezone.utc)
+KEYS = [
+    "thumbnails/user-123/photo-1.webp",
+    "originals/user 123/a+b~c.jpg",
+    "originals/user-123/über été/%20.jpg",
+    "originals/user-123/k=v&x?.png",
+]
+
+
+@pytest.fixture
+def frozen_clock(monkeypatch):
+    monkeypatch.setattr(botocore.auth, "get_current_datetime", lambda: FROZEN_NOW.replace(tzinfo=None))
+    monkeypatch.setattr(botocore.auth.time, "time", lambda: FROZEN_NOW.timestamp())
+
+
+@pytest.mark.parametrize(
+    "client_args",
+    [
+        {"region_name": "us-east-1"},
+        {"region_name": "us-east-1", "config": Config(signature_version="s3v4")},
+        {"region_name": "eu-west-2"},
+        {"region_name": "eu-west-2", "config": Config(s3={"addressing_style": "path"})},
+        {"region_name": "us-east-1", "endpoint_url": "http://localhost:4566"},
+    ],
+)
+@pytest.mark.parametrize("bucket", ["photos-test-bucket", "photos.dotted.bucket"])
+def test_presign_matches_botocore(frozen_clock, client_args, bucket):
+    s3 = boto3.client("s3", **client_args)
+
+    urls = presign.presign_get_urls(s3, bucket, KEYS, expires_in=3600)
+
+    for key in KEYS:
+        expected = s3.generate_presigned_url("get_object", Params={"Bucket": bucket, "Key": key}, ExpiresIn=3600)
+        assert urls[key] == expected
+
+
+@pytest.mark.parametrize(
+    "client_args",
+    [
+        {"region_name": "us-east-1"},
+        {"region_name": "us-east-1", "config": Config(signature_version="s3v4")},
+        {"region_name": "eu-west-2"},
+    ],
+)
+def test_presign_put_matches_botocore(frozen_clock, client_args):
+    s3 = boto3.client("s3", **client_args)
+    uploads = [(key, "image/jpeg") for key in KEYS] + [("thumbnails/user-123/t.webp", "image/webp")]
+
+    urls = presign.presign_put_urls(s3, "photos-test-bucket", uploads, expires_in=900)
+
+    for key, content_type in uploads:
+        expected = s3.generate_presigned_url(
+            "put_object",
+            Params={"Bucket": "photos-test-bucket", "Key": key, "ContentType": content_type},
+            ExpiresIn=900,
+        )
+        assert urls[key] == expected
+
+
+def test_presign_skips_empty_and_duplicate_keys(frozen_clock):
+    s3 = boto3.client("s3", region_name="us-east-1")
+
+    urls = presign.presign_get_urls(s3, "photos-test-bucket", [None, "a.jpg", "", "a.jpg", "b.jpg"])
+
+    assert sorted(urls) == ["a.jpg", "b.jpg"]
+
+
+def test_presign_falls_back_to_botocore_for_unknown_url_shapes(frozen_clock, monkeypatch):
+    s3 = boto3.client("s3", region_name="us-east-1")
+    calls = []
+
+    def fake_presign(_client, bucket, key, _expires_in):
+        calls.append(key)
+        return f"https://example.invalid/{bucket}/{key}?token=opaque"
+
+    monkeypatch.setattr(presign, "_botocore_presign", fake_presign)
+
+    urls = presign.presign_get_urls(s3, "photos-test-bucket", ["a.jpg", "b.jpg"])
+
+    assert calls == ["a.jpg", "b.jpg"]
+    assert urls["b.jpg"] == "https://example.invalid/photos-test-bucket/b.jpg?token=opaque"
+
+
+def test_attach_thumbnail_urls_prefers_generated_thumbnail(frozen_clock):
+    s3 = boto3.client("s3", region_name="us-east-1")
+    items = [
+        {"ObjectKey": "originals/a.jpg", "ThumbnailKey": "thumbnails/a.webp", "ContentType": "image/jpeg"},
+        {"ObjectKey": "originals/b.jpg", "ContentType": "image/jpeg"},
+        {"ObjectKey": "originals/c.mp4", "ContentType": "video/mp4"},
+    ]
+    photos = [{} for _ in items]
+
+    presign.attach_thumbnail_urls(
+        s3,
+        "photos-test-bucket",
+        [(photo, presign.thumbnail_source_key(item)) for photo, item in zip(photos, items)],
+    )
+
+    assert "/thumbnails/a.webp?" in photos[0]["thumbnailUrl"]
+    assert "/originals/b.jpg?" in photos[1]["thumbnailUrl"]
+    assert "thumbnailUrl" not in photos[2]
@@ -0,0 +1,48 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from handlers.renditions import build_rendition_key, display_source_key, parse_size_hint, rendition_for_size
+
+LADDER = {
+    "UserId": "user-123",
+    "PhotoId": "photo-1",
+    "ObjectKey": "originals/user-123/photo-1.jpg",
+    "ContentType": "image/jpeg",
+    "ThumbnailKey": "thumbnails/user-123/photo-1.webp",
+    "Renditions": {
+        "64": "previews/user-123/photo-1/64.webp",
+        "320": "thumbnails/user-123/photo-1.webp",
+        "2048": "previews/user-123/photo-1/2048.webp",
+    },
+}
+
+
+class TestRenditions:
+    def test_thumbnail_step_keeps_the_upload_init_key(self):
+        assert build_rendition_key("user-123", "photo-1", 320) == "thumbnails/user-123/photo-1.webp"
+        assert build_rendition_key("user-123", "photo-1", 64) == "previews/user-123/photo-1/64.webp"
+
+    def test_smallest_covering_rendition_wins(self):
+        assert rendition_for_size(LADDER, 1) == ("previews/user-123/photo-1/64.webp", 64)
+        assert rendition_for_size(LADDER, 65) == ("thumbnails/user-123/photo-1.webp", 320)
+        assert rendition_for_size(LADDER, 2048) == ("previews/user-123/photo-1/2048.webp", 2048)
+        assert rendition_for_size(LADDER, 2049) == (None, None)
+
+    def test_display_falls_back_to_the_original_image_only(self):
+        assert display_source_key(LADDER, 4000) == "originals/user-123/photo-1.jpg"
+        video = {"ObjectKey": "originals/user-123/clip.mp4", "ContentType": "video/mp4"}
+        assert display_source_key(video, 64) is None
+
+    def test_rows_without_renditions_use_the_thumbnail(self):
+        legacy = {"ObjectKey": "originals/user-123/photo-2.jpg", "ContentType": "image/jpeg", "ThumbnailKey": "t.webp"}
+
+        assert rendition_for_size(legacy, 100) == ("t.webp", 320)
+        assert display_source_key(legacy, 1000) == "originals/user-123/photo-2.jpg"
+
+    def test_parse_size_hint(self):
+        assert parse_size_hint(None) == (None, None)
+        assert parse_size_hint("640") == (640, None)
+        assert parse_size_hint("0")[1] == "size must be an integer between 1 and 16384"
+        assert parse_size_hint("big")[1] == "size must be an integer between 1 and 16384"
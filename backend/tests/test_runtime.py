@@ -0,0 +1,60 @@
+import base64
+import gzip
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from handlers import runtime
+
+
+LARGE_BODY = {"photos": [{"photoId": f"photo-{i:03d}", "fileName": "IMG_0001.jpg"} for i in range(100)]}
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, expected",
+    [
+        ("gzip", True),
+        ("gzip, deflate, br", True),
+        ("br;q=1.0, GZIP;q=0.5", True),
+        ("*", True),
+        ("gzip;q=0", False),
+        ("deflate, br", False),
+        ("", False),
+    ],
+)
+def test_accepts_gzip(accept_encoding, expected):
+    assert runtime.accepts_gzip({"headers": {"accept-encoding": accept_encoding}}) is expected
+
+
+def test_json_response_compresses_large_bodies_for_gzip_clients():
+    response = runtime.json_response(200, LARGE_BODY, {"headers": {"accept-encoding": "gzip, deflate"}})
+
+    assert response["isBase64Encoded"] is True
+    assert response["headers"]["Content-Encoding"] == "gzip"
+    assert response["headers"]["Vary"] == "Accept-Encoding"
+    assert json.loads(gzip.decompress(base64.b64decode(response["body"]))) == LARGE_BODY
+
+
+def test_json_response_leaves_small_or_unnegotiated_bodies_alone():
+    gzip_event = {"headers": {"accept-encoding": "gzip"}}
+
+    small = runtime.json_response(200, {"count": 0}, gzip_event)
+    plain = runtime.json_response(200, LARGE_BODY, {"headers": {}})
+    no_event = runtime.json_response(200, LARGE_BODY)
+
+    for response in (small, plain, no_event):
+        assert "isBase64Encoded" not in response
+    # The body could have been gzipped for another client, so caches must key on Accept-Encoding
+    assert small["headers"] == {"Vary": "Accept-Encoding"}
+    assert plain["headers"] == {"Vary": "Accept-Encoding"}
+    assert "headers" not in no_event
+    assert json.loads(plain["body"]) == LARGE_BODY
+
+
+def test_run_parallel_keeps_input_order():
+    assert runtime.run_parallel(lambda value: value * 2, range(20), max_workers=4) == [value * 2 for value in range(20)]
+    assert runtime.run_parallel(lambda value: value, [], max_workers=4) == []
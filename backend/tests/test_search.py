@@ -10,7 +10,7 @@ from moto import mock_aws
 # Add the handlers directory to the path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
-from handlers import search
+from handlers import photo_index, search
 
 
 @pytest.fixture
@@ -26,12 +26,45 @@ def dynamodb_table():
             AttributeDefinitions=[
                 {"AttributeName": "UserId", "AttributeType": "S"},
                 {"AttributeName": "PhotoId", "AttributeType": "S"},
+                {"AttributeName": "ActiveUserId", "AttributeType": "S"},
+            ],
+            GlobalSecondaryIndexes=[
+                {
+                    "IndexName": "ActiveIndex",
+                    "KeySchema": [
+                        {"AttributeName": "ActiveUserId", "KeyType": "HASH"},
+                        {"AttributeName": "PhotoId", "KeyType": "RANGE"},
+                    ],
+                    "Projection": {"ProjectionType": "ALL"},
+                }
             ],
             BillingMode="PAY_PER_REQUEST",
         )
         yield table
 
 
+@pytest.fixture
+def index_table(dynamodb_table):
+    dynamodb = boto3.resource("dynamodb", region_name="us-east-1")
+    return dynamodb.create_table(
+        TableName="photo-index-test",
+        KeySchema=[
+            {"AttributeName": "IndexKey", "KeyType": "HASH"},
+            {"AttributeName": "SortKey", "KeyType": "RANGE"},
+        ],
+        AttributeDefinitions=[
+            {"AttributeName": "IndexKey", "AttributeType": "S"},
+            {"AttributeName": "SortKey", "AttributeType": "S"},
+        ],
+        BillingMode="PAY_PER_REQUEST",
+    )
+
+
+def _put_indexed_photo(dynamodb_table, index_table, item):
+    dynamodb_table.put_item(Item=item)
+    photo_index.sync_photo_postings(index_table, item["UserId"], item["PhotoId"], None, item)
+
+
 @pytest.fixture
 def mock_env(monkeypatch):
     monkeypatch.setenv("PHOTOS_TABLE", "photos-test")
@@ -58,10 +91,12 @@ def valid_event():
 
 
 class TestSearch:
-    def test_search_matches_subject_labels_case_insensitive(self, dynamodb_table, mock_env, valid_event):
+    def test_search_matches_subject_labels_case_insensitive(self, dynamodb_table, index_table, mock_env, valid_event):
         now = datetime.now(timezone.utc).isoformat()
-        dynamodb_table.put_item(
-            Item={
+        _put_indexed_photo(
+            dynamodb_table,
+            index_table,
+            {
                 "UserId": "user-123",
                 "PhotoId": "subject-1",
                 "OriginalFileName": "kitchen-receipt.jpg",
@@ -70,7 +105,7 @@ class TestSearch:
                 "CreatedAt": now,
                 "Status": "ACTIVE",
                 "Subjects": ["receipt", "temporary"],
-            }
+            },
         )
 
         event = valid_event.copy()
@@ -84,17 +119,19 @@ class TestSearch:
         assert body["photos"][0]["photoId"] == "subject-1"
         assert body["photos"][0]["subjects"] == ["receipt", "temporary"]
 
-    def test_search_matches_legacy_rows_without_original_file_name(self, dynamodb_table, mock_env, valid_event):
+    def test_search_matches_legacy_rows_without_original_file_name(self, dynamodb_table, index_table, mock_env, valid_event):
         now = datetime.now(timezone.utc).isoformat()
-        dynamodb_table.put_item(
-            Item={
+        _put_indexed_photo(
+            dynamodb_table,
+            index_table,
+            {
                 "UserId": "user-123",
                 "PhotoId": "photo-manual-001",
                 "ObjectKey": "originals/user-123/photo-manual-001.webp",
                 "ContentType": "image/webp",
                 "CreatedAt": now,
                 "Status": "ACTIVE",
-            }
+            },
         )
 
         response = search.handler(valid_event, None)
@@ -105,10 +142,12 @@ class TestSearch:
         assert body["photos"][0]["photoId"] == "photo-manual-001"
         assert body["photos"][0]["fileName"] == "photo-manual-001.webp"
 
-    def test_search_excludes_pending_items(self, dynamodb_table, mock_env, valid_event):
+    def test_search_excludes_pending_items(self, dynamodb_table, index_table, mock_env, valid_event):
         now = datetime.now(timezone.utc).isoformat()
-        dynamodb_table.put_item(
-            Item={
+        _put_indexed_photo(
+            dynamodb_table,
+            index_table,
+            {
                 "UserId": "user-123",
                 "PhotoId": "pending-1",
                 "OriginalFileName": "IMAG0077.jpg",
@@ -116,7 +155,7 @@ class TestSearch:
                 "ContentType": "image/jpeg",
                 "CreatedAt": now,
                 "Status": "PENDING",
-            }
+            },
         )
 
         event = valid_event.copy()
@@ -129,10 +168,12 @@ class TestSearch:
         assert body["count"] == 0
         assert body["photos"] == []
 
-    def test_search_matches_active_original_filename_case_insensitive(self, dynamodb_table, mock_env, valid_event):
+    def test_search_matches_active_original_filename_case_insensitive(self, dynamodb_table, index_table, mock_env, valid_event):
         now = datetime.now(timezone.utc).isoformat()
-        dynamodb_table.put_item(
-            Item={
+        _put_indexed_photo(
+            dynamodb_table,
+            index_table,
+            {
                 "UserId": "user-123",
                 "PhotoId": "active-1",
                 "OriginalFileName": "IMAG0077.jpg",
@@ -140,7 +181,7 @@ class TestSearch:
                 "ContentType": "image/jpeg",
                 "CreatedAt": now,
                 "Status": "ACTIVE",
-            }
+            },
         )
 
         event = valid_event.copy()
@@ -153,3 +194,138 @@ class TestSearch:
         assert body["count"] == 1
         assert body["photos"][0]["photoId"] == "active-1"
         assert body["photos"][0]["fileName"] == "IMAG0077.jpg"
+
+    def test_search_matches_multiple_tokens_and_paginates(self, dynamodb_table, index_table, mock_env, valid_event):
+        now = datetime.now(timezone.utc).isoformat()
+        for photo_id in ["beach-1", "beach-2", "beach-3"]:
+            _put_indexed_photo(
+                dynamodb_table,
+                index_table,
+                {
+                    "UserId": "user-123",
+                    "PhotoId": photo_id,
+                    "OriginalFileName": f"{photo_id}.jpg",
+                    "ContentType": "image/jpeg",
+                    "CreatedAt": now,
+                    "Status": "ACTIVE",
+                    "Subjects": ["folder:Beach Trip"],
+                },
+            )
+        _put_indexed_photo(
+            dynamodb_table,
+            index_table,
+            {
+                "UserId": "user-123",
+                "PhotoId": "city-1",
+                "OriginalFileName": "city-1.jpg",
+                "ContentType": "image/jpeg",
+                "CreatedAt": now,
+                "Status": "ACTIVE",
+                "Subjects": ["folder:Beach Road", "trip"],
+            },
+        )
+
+        event = valid_event.copy()
+        event["queryStringParameters"] = {"q": "beach trip", "limit": "2"}
+        first = search.handler(event, None)
+
+        assert first["statusCode"] == 200
+        first_body = json.loads(first["body"])
+        assert [photo["photoId"] for photo in first_body["photos"]] == ["beach-3", "beach-2"]
+        assert first_body["nextToken"]
+
+        event["queryStringParameters"] = {"q": "beach trip", "limit": "2", "nextToken": first_body["nextToken"]}
+        second = search.handler(event, None)
+
+        second_body = json.loads(second["body"])
+        assert [photo["photoId"] for photo in second_body["photos"]] == ["beach-1"]
+        assert second_body["nextToken"] is None
+
+    def test_search_keeps_substring_semantics(self, dynamodb_table, index_table, mock_env, valid_event):
+        _put_indexed_photo(
+            dynamodb_table,
+            index_table,
+            {
+                "UserId": "user-123",
+                "PhotoId": "beach-folder",
+                "OriginalFileName": "IMG_0001.jpg",
+                "Status": "ACTIVE",
+                "Subjects": ["folder:beach-2023"],
+            },
+        )
+        _put_indexed_photo(
+            dynamodb_table,
+            index_table,
+            {
+                "UserId": "user-123",
+                "PhotoId": "other-folder",
+                "OriginalFileName": "IMG_0002.jpg",
+                "Status": "ACTIVE",
+                "Subjects": ["folder:bea-ch"],
+            },
+        )
+
+        event = valid_event.copy()
+        for query in ["beach", "EACH-20", "r:beach-2023"]:
+            event["queryStringParameters"] = {"q": query, "limit": "20"}
+            response = search.handler(event, None)
+
+            assert response["statusCode"] == 200
+            body = json.loads(response["body"])
+            assert [photo["photoId"] for photo in body["photos"]] == ["beach-folder"]
+
+    def test_search_answers_from_postings_only(self, dynamodb_table, index_table, mock_env, valid_event):
+        dynamodb_table.put_item(
+            Item={
+                "UserId": "user-123",
+                "PhotoId": "unindexed-1",
+                "OriginalFileName": "manual.jpg",
+                "Status": "ACTIVE",
+            }
+        )
+
+        response = search.handler(valid_event, None)
+
+        assert response["statusCode"] == 200
+        assert json.loads(response["body"])["count"] == 0
+
+    def test_search_without_tokens_falls_back_to_partition(self, dynamodb_table, index_table, mock_env, valid_event):
+        dynamodb_table.put_item(
+            Item={
+                "UserId": "user-123",
+                "PhotoId": "dotted-1",
+                "OriginalFileName": "photo.jpg",
+                "Status": "ACTIVE",
+                "ActiveUserId": "user-123",
+            }
+        )
+
+        event = valid_event.copy()
+        event["queryStringParameters"] = {"q": ".", "limit": "20"}
+        response = search.handler(event, None)
+
+        assert response["statusCode"] == 200
+        body = json.loads(response["body"])
+        assert [photo["photoId"] for photo in body["photos"]] == ["dotted-1"]
+
+    def test_search_fields_still_verifies_matches(self, dynamodb_table, index_table, mock_env, valid_event):
+        for photo_id, file_name in (("match-1", "manual-one.jpg"), ("other-1", "beach.jpg")):
+            _put_indexed_photo(
+                dynamodb_table,
+                index_table,
+                {
+                    "UserId": "user-123",
+                    "PhotoId": photo_id,
+                    "OriginalFileName": file_name,
+                    "ContentHash": photo_id * 4,
+                    "Status": "ACTIVE",
+                    "ActiveUserId": "user-123",
+                },
+            )
+
+        event = valid_event.copy()
+        for query in ("manual", "m"):
+            event["queryStringParameters"] = {"q": query, "fields": "contentHash"}
+            body = json.loads(search.handler(event, None)["body"])
+
+            assert body["photos"] == [{"contentHash": "match-1" * 4}]
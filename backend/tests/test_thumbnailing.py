@@ -0,0 +1,62 @@
+import os
+import sys
+from io import BytesIO
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from handlers.thumbnailing import downscale
+
+Image = pytest.importorskip("PIL.Image")
+ImageFile = pytest.importorskip("PIL.ImageFile")
+
+
+def _encoded(image, image_format):
+    output = BytesIO()
+    image.save(output, format=image_format)
+    return BytesIO(output.getvalue())
+
+
+@pytest.fixture
+def decoded_sizes(monkeypatch):
+    """Records the size each file-backed image has when its pixels are decoded."""
+    sizes = []
+    original_load = ImageFile.ImageFile.load
+
+    def recording_load(self):
+        if self.tile:
+            sizes.append(self.size)
+        return original_load(self)
+
+    monkeypatch.setattr(ImageFile.ImageFile, "load", recording_load)
+    return sizes
+
+
+class TestDownscale:
+    def test_jpeg_is_decoded_at_a_reduced_scale(self, decoded_sizes):
+        source = _encoded(Image.new("RGB", (4000, 3000), "navy"), "JPEG")
+
+        with Image.open(source) as image:
+            thumbnail = downscale(image, 320)
+
+        assert thumbnail.size == (320, 240)
+        assert thumbnail.mode == "RGB"
+        # 1/8 is the largest DCT scale that still covers 320x240
+        assert decoded_sizes == [(500, 375)]
+
+    def test_converts_after_shrinking(self):
+        source = _encoded(Image.new("RGBA", (1200, 600), (10, 20, 30, 128)), "PNG")
+
+        with Image.open(source) as image:
+            thumbnail = downscale(image, 320)
+
+        assert thumbnail.size == (320, 160)
+        assert thumbnail.mode == "RGB"
+
+    def test_palette_and_small_images(self):
+        palette = downscale(Image.new("P", (800, 600)), 320)
+        small = downscale(Image.new("L", (100, 50)), 320)
+
+        assert (palette.size, palette.mode) == ((320, 240), "RGB")
+        assert (small.size, small.mode) == ((100, 50), "RGB")
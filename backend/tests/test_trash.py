@@ -28,7 +28,18 @@ def dynamodb_table():
             ],
             AttributeDefinitions=[
                 {"AttributeName": "UserId", "AttributeType": "S"},
-                {"AttributeName": "PhotoId", "AttributeType": "S"}
+                {"AttributeName": "PhotoId", "AttributeType": "S"},
+                {"AttributeName": "DeletedAt", "AttributeType": "S"}
+            ],
+            GlobalSecondaryIndexes=[
+                {
+                    "IndexName": "DeletedAtIndex",
+                    "KeySchema": [
+                        {"AttributeName": "UserId", "KeyType": "HASH"},
+                        {"AttributeName": "DeletedAt", "KeyType": "RANGE"}
+                    ],
+                    "Projection": {"ProjectionType": "ALL"}
+                }
             ],
             BillingMode="PAY_PER_REQUEST"
         )
@@ -203,3 +214,67 @@ class TestTrash:
         assert response["statusCode"] == 400
         body = json.loads(response["body"])
         assert "limit must be an integer" in body["error"]
+
+    def test_trash_orders_by_deletion_time(self, dynamodb_table, mock_env, valid_event):
+        """Test trash pages come back newest deletion first, regardless of PhotoId order"""
+        for photo_id, deleted_at in [
+            ("photo-a", "2026-01-03T00:00:00+00:00"),
+            ("photo-b", "2026-01-01T00:00:00+00:00"),
+            ("photo-c", "2026-01-02T00:00:00+00:00"),
+        ]:
+            dynamodb_table.put_item(
+                Item={
+                    "UserId": "user-123",
+                    "PhotoId": photo_id,
+                    "ObjectKey": f"uploads/{photo_id}.jpg",
+                    "DeletedAt": deleted_at,
+                }
+            )
+
+        event = valid_event.copy()
+        event["queryStringParameters"] = {"limit": "2"}
+        first = json.loads(trash.handler(event, None)["body"])
+        assert [photo["photoId"] for photo in first["photos"]] == ["photo-a", "photo-c"]
+
+        event["queryStringParameters"] = {"limit": "2", "nextToken": first["nextToken"]}
+        second = json.loads(trash.handler(event, None)["body"])
+        assert [photo["photoId"] for photo in second["photos"]] == ["photo-b"]
+
+    def test_trash_returns_full_pages_when_trash_is_sparse(self, dynamodb_table, mock_env, valid_event):
+        """Test active rows do not eat into the page limit"""
+        now = datetime.now(timezone.utc).isoformat()
+        for i in range(30):
+            dynamodb_table.put_item(
+                Item={"UserId": "user-123", "PhotoId": f"active-{i:02d}", "Status": "ACTIVE", "CreatedAt": now}
+            )
+        for i in range(3):
+            dynamodb_table.put_item(
+                Item={"UserId": "user-123", "PhotoId": f"deleted-{i}", "DeletedAt": f"2026-01-0{i + 1}T00:00:00+00:00"}
+            )
+
+        event = valid_event.copy()
+        event["queryStringParameters"] = {"limit": "3"}
+        body = json.loads(trash.handler(event, None)["body"])
+
+        assert body["count"] == 3
+        assert [photo["photoId"] for photo in body["photos"]] == ["deleted-2", "deleted-1", "deleted-0"]
+
+    def test_trash_fields_returns_only_requested_fields(self, dynamodb_table, mock_env, valid_event):
+        dynamodb_table.put_item(
+            Item={
+                "UserId": "user-123",
+                "PhotoId": "deleted-1",
+                "ObjectKey": "originals/user-123/deleted-1.jpg",
+                "ContentHash": "c" * 64,
+                "DeletedAt": "2026-01-01T00:00:00+00:00",
+                "RetentionUntil": "2026-03-02T00:00:00+00:00",
+            }
+        )
+
+        event = valid_event.copy()
+        event["queryStringParameters"] = {"fields": "photoId,contentHash,retentionUntil"}
+        body = json.loads(trash.handler(event, None)["body"])
+
+        assert body["photos"] == [
+            {"photoId": "deleted-1", "contentHash": "c" * 64, "retentionUntil": "2026-03-02T00:00:00+00:00"}
+        ]
@@ -4,12 +4,16 @@ import sys
 
 import boto3
 import pytest
+from botocore.exceptions import ClientError
 from moto import mock_aws
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
+from handlers import derive_photo
 from handlers import upload
 from handlers import upload_complete
+from handlers import upload_common
+from handlers.upload_common import derive_image
 
 
 @pytest.fixture
@@ -25,15 +29,55 @@ def aws_resources():
             AttributeDefinitions=[
                 {"AttributeName": "UserId", "AttributeType": "S"},
                 {"AttributeName": "PhotoId", "AttributeType": "S"},
+                {"AttributeName": "ContentHash", "AttributeType": "S"},
+            ],
+            GlobalSecondaryIndexes=[
+                {
+                    "IndexName": "ContentHashIndex",
+                    "KeySchema": [{"AttributeName": "ContentHash", "KeyType": "HASH"}],
+                    "Projection": {
+                        "ProjectionType": "INCLUDE",
+                        "NonKeyAttributes": ["ObjectKey", "ThumbnailKey", "Renditions", "Status", "DeletedAt"],
+                    },
+                },
+            ],
+            BillingMode="PAY_PER_REQUEST",
+        )
+
+        index_table = dynamodb.create_table(
+            TableName="photo-index-test",
+            KeySchema=[
+                {"AttributeName": "IndexKey", "KeyType": "HASH"},
+                {"AttributeName": "SortKey", "KeyType": "RANGE"},
+            ],
+            AttributeDefinitions=[
+                {"AttributeName": "IndexKey", "AttributeType": "S"},
+                {"AttributeName": "SortKey", "AttributeType": "S"},
             ],
             BillingMode="PAY_PER_REQUEST",
         )
+        refs_table = dynamodb.create_table(
+            TableName="object-refs-test",
+            KeySchema=[{"AttributeName": "ObjectKey", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "ObjectKey", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST",
+        )
+
+        users_table = dynamodb.create_table(
+            TableName="users-test",
+            KeySchema=[{"AttributeName": "UserId", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "UserId", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST",
+        )
 
         s3 = boto3.client("s3", region_name="us-east-1")
         s3.create_bucket(Bucket="photos-test-bucket")
 
         yield {
             "table": table,
+            "index": index_table,
+            "refs": refs_table,
+            "users": users_table,
             "s3": s3,
         }
 
@@ -74,6 +118,9 @@ class TestUpload:
         assert item["Status"] == "PENDING"
         assert item["OriginalFileName"] == "family-photo.webp"
 
+        refs = aws_resources["refs"].get_item(Key={"ObjectKey": "originals/user-123/photo-123.webp"})["Item"]
+        assert refs["Refs"] == {"user-123#photo-123"}
+
     def test_upload_stores_subjects_when_provided(self, aws_resources, valid_event):
         event = dict(valid_event)
         event["body"] = json.dumps(
@@ -91,6 +138,24 @@ class TestUpload:
         item = aws_resources["table"].get_item(Key={"UserId": "user-123", "PhotoId": "photo-subjects"})["Item"]
         assert item["Subjects"] == ["folder:Trips", "date:2024-05-01"]
 
+    def test_upload_writes_search_postings(self, aws_resources, valid_event):
+        event = dict(valid_event)
+        event["body"] = json.dumps(
+            {
+                "photoId": "photo-indexed",
+                "contentType": "image/webp",
+                "originalFileName": "Lake-Day.webp",
+                "subjects": ["folder:Summer"],
+            }
+        )
+
+        response = upload.handler(event, None)
+
+        assert response["statusCode"] == 200
+        postings = aws_resources["index"].scan()["Items"]
+        terms = {entry["IndexKey"] for entry in postings if entry["SortKey"] == "photo-indexed"}
+        assert {"user-123#g:lak", "user-123#g:e-d", "user-123#g:r:s", "user-123#g:mer"} <= terms
+
     def test_upload_rejects_invalid_subjects(self, valid_event):
         event = dict(valid_event)
         event["body"] = json.dumps(
@@ -123,6 +188,33 @@ class TestUpload:
         body = json.loads(response["body"])
         assert "contentHash" in body["error"]
 
+    def test_upload_accepts_time_ordered_photo_id(self, aws_resources, valid_event):
+        event = dict(valid_event)
+        event["body"] = json.dumps({"photoId": "01JB2X4Y6Z8A0B2C4D6E8F0G2H", "contentType": "image/webp"})
+
+        response = upload.handler(event, None)
+
+        assert response["statusCode"] == 200
+        assert json.loads(response["body"])["objectKey"] == "originals/user-123/01JB2X4Y6Z8A0B2C4D6E8F0G2H.webp"
+
+    def test_upload_rejects_photo_id_with_path_characters(self, valid_event):
+        event = dict(valid_event)
+        event["body"] = json.dumps({"photoId": "../photo-123", "contentType": "image/webp"})
+
+        response = upload.handler(event, None)
+
+        assert response["statusCode"] == 400
+        assert "photoId" in json.loads(response["body"])["error"]
+
+    def test_upload_retry_keeps_created_at(self, aws_resources, valid_event):
+        upload.handler(valid_event, None)
+        key = {"UserId": "user-123", "PhotoId": "photo-123"}
+        first_created_at = aws_resources["table"].get_item(Key=key)["Item"]["CreatedAt"]
+
+        upload.handler(valid_event, None)
+
+        assert aws_resources["table"].get_item(Key=key)["Item"]["CreatedAt"] == first_created_at
+
     def test_upload_deduplicates_by_content_hash(self, aws_resources):
         aws_resources["table"].put_item(
             Item={
@@ -133,6 +225,7 @@ class TestUpload:
                 "OriginalFileName": "source.webp",
                 "Status": "ACTIVE",
                 "ContentHash": "a" * 64,
+                "Renditions": {"64": "previews/user-source/photo-source/64.webp"},
             }
         )
 
@@ -166,12 +259,145 @@ class TestUpload:
 
         target_item = aws_resources["table"].get_item(Key={"UserId": "user-target", "PhotoId": "photo-target"})["Item"]
         assert target_item["Status"] == "ACTIVE"
+        assert target_item["ActiveUserId"] == "user-target"
         assert target_item["ObjectKey"] == "originals/user-source/photo-source.webp"
         assert target_item["DeduplicatedFromPhotoId"] == "photo-source"
+        # Size hints on the copy use the source's renditions, since deduplicated rows are never derived
+        assert target_item["Renditions"] == {"64": "previews/user-source/photo-source/64.webp"}
+
+        refs = aws_resources["refs"].get_item(Key={"ObjectKey": "originals/user-source/photo-source.webp"})["Item"]
+        assert "user-target#photo-target" in refs["Refs"]
+        assert aws_resources["users"].get_item(Key={"UserId": "user-target"})["Item"]["CollectionVersion"] == 1
+
+    def test_upload_dedupe_finds_active_source_behind_other_rows(self, aws_resources, valid_event):
+        table = aws_resources["table"]
+        for index in range(5):
+            table.put_item(
+                Item={
+                    "UserId": "user-other",
+                    "PhotoId": f"photo-other-{index}",
+                    "ObjectKey": f"originals/user-other/photo-other-{index}.webp",
+                    "Status": "ACTIVE",
+                    "ContentHash": f"{index}" * 64,
+                }
+            )
+        table.put_item(
+            Item={
+                "UserId": "user-pending",
+                "PhotoId": "photo-pending",
+                "ObjectKey": "originals/user-pending/photo-pending.webp",
+                "Status": "PENDING",
+                "ContentHash": "b" * 64,
+            }
+        )
+        table.put_item(
+            Item={
+                "UserId": "user-source",
+                "PhotoId": "photo-source",
+                "ObjectKey": "originals/user-source/photo-source.webp",
+                "Status": "ACTIVE",
+                "ContentHash": "b" * 64,
+            }
+        )
+
+        event = dict(valid_event)
+        event["body"] = json.dumps(
+            {
+                "photoId": "photo-target",
+                "contentType": "image/webp",
+                "contentHash": "B" * 64,
+            }
+        )
+
+        response = upload.handler(event, None)
+
+        assert response["statusCode"] == 200
+        body = json.loads(response["body"])
+        assert body["deduplicated"] is True
+        assert body["linkedToPhotoId"] == "photo-source"
+        assert body["objectKey"] == "originals/user-source/photo-source.webp"
+
+
+    def test_upload_trashed_dedupe_source_falls_back_to_normal_upload(self, aws_resources, valid_event):
+        aws_resources["table"].put_item(
+            Item={
+                "UserId": "user-source",
+                "PhotoId": "photo-source",
+                "ObjectKey": "originals/user-source/photo-source.webp",
+                "Status": "ACTIVE",
+                "ContentHash": "c" * 64,
+                "DeletedAt": "2026-01-01T00:00:00+00:00",
+            }
+        )
+        event = dict(valid_event)
+        event["body"] = json.dumps({"photoId": "photo-target", "contentType": "image/webp", "contentHash": "c" * 64})
+
+        response = upload.handler(event, None)
+
+        assert response["statusCode"] == 200
+        body = json.loads(response["body"])
+        assert body["uploadRequired"] is True
+        assert body["deduplicated"] is False
+        item = aws_resources["table"].get_item(Key={"UserId": "user-123", "PhotoId": "photo-target"})["Item"]
+        assert item["Status"] == "PENDING"
+        assert item["ObjectKey"] == "originals/user-123/photo-target.webp"
+        assert "DeduplicatedFromPhotoId" not in item
+        assert "Item" not in aws_resources["refs"].get_item(Key={"ObjectKey": "originals/user-source/photo-source.webp"})
+
+
+    def test_upload_dedupe_skips_trashed_source_for_a_live_duplicate(self, aws_resources, valid_event):
+        for photo_id, trashed in (("photo-a-trashed", True), ("photo-b-live", False)):
+            item = {
+                "UserId": "user-source",
+                "PhotoId": photo_id,
+                "ObjectKey": f"originals/user-source/{photo_id}.webp",
+                "Status": "ACTIVE",
+                "ContentHash": "e" * 64,
+            }
+            if trashed:
+                item["DeletedAt"] = "2026-01-01T00:00:00+00:00"
+            aws_resources["table"].put_item(Item=item)
+        event = dict(valid_event)
+        event["body"] = json.dumps({"photoId": "photo-target", "contentType": "image/webp", "contentHash": "e" * 64})
+
+        response = upload.handler(event, None)
+
+        body = json.loads(response["body"])
+        assert body["deduplicated"] is True
+        assert body["linkedToPhotoId"] == "photo-b-live"
+
+    def test_upload_dedupe_link_error_falls_back_to_normal_upload(self, aws_resources, valid_event, monkeypatch):
+        aws_resources["table"].put_item(
+            Item={
+                "UserId": "user-source",
+                "PhotoId": "photo-source",
+                "ObjectKey": "originals/user-source/photo-source.webp",
+                "Status": "ACTIVE",
+                "ContentHash": "d" * 64,
+            }
+        )
+        client = upload.dynamodb.meta.client
+        real_transact = client.transact_write_items
+
+        def denied_dedupe(**kwargs):
+            if any("ConditionCheck" in entry for entry in kwargs["TransactItems"]):
+                raise ClientError({"Error": {"Code": "AccessDeniedException", "Message": "denied"}}, "TransactWriteItems")
+            return real_transact(**kwargs)
+
+        monkeypatch.setattr(client, "transact_write_items", denied_dedupe)
+        event = dict(valid_event)
+        event["body"] = json.dumps({"photoId": "photo-target", "contentType": "image/webp", "contentHash": "d" * 64})
+
+        response = upload.handler(event, None)
+
+        assert response["statusCode"] == 200
+        assert json.loads(response["body"])["uploadRequired"] is True
+        item = aws_resources["table"].get_item(Key={"UserId": "user-123", "PhotoId": "photo-target"})["Item"]
+        assert item["ObjectKey"] == "originals/user-123/photo-target.webp"
 
 
 class TestUploadCompleteDateLabels:
-    def test_upload_complete_adds_date_label_from_metadata(self, aws_resources, monkeypatch):
+    def test_upload_complete_adds_date_label_from_metadata(self, aws_resources, derivation_queue, monkeypatch):
         aws_resources["table"].put_item(
             Item={
                 "UserId": "user-123",
@@ -189,9 +415,8 @@ class TestUploadCompleteDateLabels:
             ContentType="image/webp",
         )
 
-        monkeypatch.setattr(upload_complete, "_load_source_bytes", lambda _key: b"fake-image-bytes")
-        monkeypatch.setattr(upload_complete, "_extract_date_label_from_image", lambda _bytes: "date:2024-04-12")
-        monkeypatch.setattr(upload_complete, "_try_generate_thumbnail", lambda **_kwargs: None)
+        monkeypatch.setattr(derive_photo, "_load_source_bytes", lambda _key: b"fake-image-bytes")
+        monkeypatch.setattr(derive_photo, "derive_image", lambda _bytes, _sizes: ("date:2024-04-12", {}))
 
         event = {
             "requestContext": {
@@ -210,11 +435,23 @@ class TestUploadCompleteDateLabels:
         response = upload_complete.handler(event, None)
 
         assert response["statusCode"] == 200
+        assert json.loads(response["body"])["derivationStatus"] == "PENDING"
         item = aws_resources["table"].get_item(Key={"UserId": "user-123", "PhotoId": "photo-date-1"})["Item"]
         assert item["Status"] == "ACTIVE"
+        assert item["ActiveUserId"] == "user-123"
+        assert item["DerivationStatus"] == "PENDING"
+        assert item["Subjects"] == ["bob"]
+        assert item["Version"] == 1
+
+        assert derivation_queue.drain(derive_photo.handler) == []
+
+        item = aws_resources["table"].get_item(Key={"UserId": "user-123", "PhotoId": "photo-date-1"})["Item"]
+        assert item["DerivationStatus"] == "COMPLETE"
         assert item["Subjects"] == ["bob", "date:2024-04-12"]
+        assert item["Version"] == 2
+        assert aws_resources["users"].get_item(Key={"UserId": "user-123"})["Item"]["CollectionVersion"] == 2
 
-    def test_upload_complete_does_not_duplicate_existing_date_label(self, aws_resources, monkeypatch):
+    def test_upload_complete_does_not_duplicate_existing_date_label(self, aws_resources, derivation_queue, monkeypatch):
         aws_resources["table"].put_item(
             Item={
                 "UserId": "user-123",
@@ -232,9 +469,8 @@ class TestUploadCompleteDateLabels:
             ContentType="image/webp",
         )
 
-        monkeypatch.setattr(upload_complete, "_load_source_bytes", lambda _key: b"fake-image-bytes")
-        monkeypatch.setattr(upload_complete, "_extract_date_label_from_image", lambda _bytes: "date:2024-04-12")
-        monkeypatch.setattr(upload_complete, "_try_generate_thumbnail", lambda **_kwargs: None)
+        monkeypatch.setattr(derive_photo, "_load_source_bytes", lambda _key: b"fake-image-bytes")
+        monkeypatch.setattr(derive_photo, "derive_image", lambda _bytes, _sizes: ("date:2024-04-12", {}))
 
         event = {
             "requestContext": {
@@ -251,8 +487,83 @@ class TestUploadCompleteDateLabels:
         }
 
         response = upload_complete.handler(event, None)
+        derivation_queue.drain(derive_photo.handler)
 
         assert response["statusCode"] == 200
         item = aws_resources["table"].get_item(Key={"UserId": "user-123", "PhotoId": "photo-date-2"})["Item"]
         assert item["Status"] == "ACTIVE"
         assert item["Subjects"] == ["bob", "date:2024-04-12"]
+
+    def test_repeated_upload_complete_is_a_no_op(self, aws_resources, derivation_queue, monkeypatch):
+        aws_resources["table"].put_item(
+            Item={
+                "UserId": "user-123",
+                "PhotoId": "photo-twice",
+                "ObjectKey": "originals/user-123/photo-twice.webp",
+                "ContentType": "image/webp",
+                "Status": "PENDING",
+            }
+        )
+        aws_resources["s3"].put_object(
+            Bucket="photos-test-bucket",
+            Key="originals/user-123/photo-twice.webp",
+            Body=b"fake-image-bytes",
+            ContentType="image/webp",
+        )
+        monkeypatch.setattr(derive_photo, "_load_source_bytes", lambda _key: b"fake-image-bytes")
+        monkeypatch.setattr(derive_photo, "derive_image", lambda _bytes, _sizes: ("date:2024-04-12", {}))
+
+        event = {
+            "requestContext": {"authorizer": {"jwt": {"claims": {"sub": "user-123", "email_verified": "true"}}}},
+            "body": json.dumps({"photoId": "photo-twice"}),
+        }
+
+        assert upload_complete.handler(event, None)["statusCode"] == 200
+        assert derivation_queue.drain(derive_photo.handler) == []
+        derived = aws_resources["table"].get_item(Key={"UserId": "user-123", "PhotoId": "photo-twice"})["Item"]
+        collection_version = aws_resources["users"].get_item(Key={"UserId": "user-123"})["Item"]["CollectionVersion"]
+
+        response = upload_complete.handler(event, None)
+
+        assert response["statusCode"] == 200
+        assert json.loads(response["body"]) == {
+            "photoId": "photo-twice",
+            "status": "ACTIVE",
+            "thumbnailKey": None,
+            "derivationStatus": "COMPLETE",
+        }
+        assert derivation_queue.messages == []
+        assert aws_resources["table"].get_item(Key={"UserId": "user-123", "PhotoId": "photo-twice"})["Item"] == derived
+        assert aws_resources["users"].get_item(Key={"UserId": "user-123"})["Item"]["CollectionVersion"] == collection_version
+
+
+class TestDeriveImage:
+    def test_reads_capture_date_and_every_rendition_from_one_open(self):
+        Image = pytest.importorskip("PIL.Image")
+        from io import BytesIO
+
+        exif = Image.Exif()
+        exif.get_ifd(0x8769)[0x9003] = "2024:04:12 10:30:00"
+        source = BytesIO()
+        Image.new("RGB", (1200, 900), "navy").save(source, format="JPEG", exif=exif)
+
+        date_label, renditions = derive_image(source.getvalue(), (64, 320, 2048))
+
+        assert date_label == "date:2024-04-12"
+        # The source is smaller than the preview step, so that rendition keeps the original dimensions
+        assert {size: max(Image.open(BytesIO(data)).size) for size, data in renditions.items()} == {64: 64, 320: 320, 2048: 1200}
+        with Image.open(BytesIO(renditions[320])) as thumbnail:
+            assert thumbnail.format == "WEBP"
+
+    def test_skips_renditions_over_the_pixel_cap_but_keeps_the_date(self, monkeypatch):
+        Image = pytest.importorskip("PIL.Image")
+        from io import BytesIO
+
+        monkeypatch.setattr(upload_common, "MAX_DERIVE_PIXELS", 1000)
+        exif = Image.Exif()
+        exif.get_ifd(0x8769)[0x9003] = "2024:04:12 10:30:00"
+        source = BytesIO()
+        Image.new("RGB", (40, 30), "navy").save(source, format="JPEG", exif=exif)
+
+        assert derive_image(source.getvalue(), (64, 320)) == ("date:2024-04-12", {})
+
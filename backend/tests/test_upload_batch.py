@@ -0,0 +1,250 @@
+import json
+import os
+import sys
+
+import boto3
+import pytest
+from botocore.exceptions import ClientError
+from moto import mock_aws
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from handlers import upload, upload_batch
+
+
+@pytest.fixture
+def aws_resources():
+    with mock_aws():
+        dynamodb = boto3.resource("dynamodb", region_name="us-east-1")
+        table = dynamodb.create_table(
+            TableName="photos-test",
+            KeySchema=[
+                {"AttributeName": "UserId", "KeyType": "HASH"},
+                {"AttributeName": "PhotoId", "KeyType": "RANGE"},
+            ],
+            AttributeDefinitions=[
+                {"AttributeName": "UserId", "AttributeType": "S"},
+                {"AttributeName": "PhotoId", "AttributeType": "S"},
+                {"AttributeName": "ContentHash", "AttributeType": "S"},
+            ],
+            GlobalSecondaryIndexes=[
+                {
+                    "IndexName": "ContentHashIndex",
+                    "KeySchema": [{"AttributeName": "ContentHash", "KeyType": "HASH"}],
+                    "Projection": {
+                        "ProjectionType": "INCLUDE",
+                        "NonKeyAttributes": ["ObjectKey", "ThumbnailKey", "Renditions", "Status", "DeletedAt"],
+                    },
+                },
+            ],
+            BillingMode="PAY_PER_REQUEST",
+        )
+
+        index_table = dynamodb.create_table(
+            TableName="photo-index-test",
+            KeySchema=[
+                {"AttributeName": "IndexKey", "KeyType": "HASH"},
+                {"AttributeName": "SortKey", "KeyType": "RANGE"},
+            ],
+            AttributeDefinitions=[
+                {"AttributeName": "IndexKey", "AttributeType": "S"},
+                {"AttributeName": "SortKey", "AttributeType": "S"},
+            ],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        refs_table = dynamodb.create_table(
+            TableName="object-refs-test",
+            KeySchema=[{"AttributeName": "ObjectKey", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "ObjectKey", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST",
+        )
+
+        users_table = dynamodb.create_table(
+            TableName="users-test",
+            KeySchema=[{"AttributeName": "UserId", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "UserId", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST",
+        )
+
+        s3 = boto3.client("s3", region_name="us-east-1")
+        s3.create_bucket(Bucket="photos-test-bucket")
+
+        yield {
+            "table": table,
+            "index": index_table,
+            "refs": refs_table,
+            "users": users_table,
+            "s3": s3,
+        }
+
+
+def _event(body, user_id="user-123"):
+    return {
+        "requestContext": {"authorizer": {"jwt": {"claims": {"sub": user_id, "email_verified": "true"}}}},
+        "body": json.dumps(body),
+    }
+
+
+def _file(photo_id, **extra):
+    return {"photoId": photo_id, "contentType": "image/jpeg", "originalFileName": f"{photo_id}.jpg", **extra}
+
+
+def _results(response):
+    assert response["statusCode"] == 200
+    return json.loads(response["body"])["results"]
+
+
+class TestUploadBatch:
+    def test_batch_creates_pending_rows_with_upload_urls(self, aws_resources):
+        files = [_file(f"photo-{position}", subjects=["Beach"]) for position in range(3)]
+
+        results = _results(upload_batch.handler(_event({"files": files}), None))
+
+        assert [result["photoId"] for result in results] == ["photo-0", "photo-1", "photo-2"]
+        for position, result in enumerate(results):
+            assert result["uploadRequired"] is True
+            assert result["objectKey"] == f"originals/user-123/photo-{position}.webp"
+            assert f"/originals/user-123/photo-{position}.webp?" in result["uploadUrl"]
+            assert f"/thumbnails/user-123/photo-{position}.webp?" in result["thumbnailUploadUrl"]
+            assert result["expiresInSeconds"] == 900
+
+            item = aws_resources["table"].get_item(Key={"UserId": "user-123", "PhotoId": f"photo-{position}"})["Item"]
+            assert item["Status"] == "PENDING"
+            assert item["Subjects"] == ["Beach"]
+            refs = aws_resources["refs"].get_item(Key={"ObjectKey": result["objectKey"]})["Item"]["Refs"]
+            assert refs == {f"user-123#photo-{position}"}
+
+        postings = aws_resources["index"].get_item(Key={"IndexKey": "user-123#l:beach", "SortKey": "photo-1"})
+        assert "Item" in postings
+        # Nothing entered or left the listed collection
+        assert "Item" not in aws_resources["users"].get_item(Key={"UserId": "user-123"})
+
+    def test_batch_row_matches_single_upload_init(self, aws_resources):
+        upload.handler(_event(_file("photo-single", subjects=["x"])), None)
+        upload_batch.handler(_event({"files": [_file("photo-batch", subjects=["x"])]}), None)
+
+        table = aws_resources["table"]
+        single = table.get_item(Key={"UserId": "user-123", "PhotoId": "photo-single"})["Item"]
+        batched = table.get_item(Key={"UserId": "user-123", "PhotoId": "photo-batch"})["Item"]
+        ignored = {"PhotoId", "ObjectKey", "ThumbnailKey", "OriginalFileName", "CreatedAt", "UpdatedAt"}
+        assert {k: v for k, v in batched.items() if k not in ignored} == {
+            k: v for k, v in single.items() if k not in ignored
+        }
+
+    def test_batch_links_duplicates_and_bumps_collection_once(self, aws_resources):
+        for source in ("a", "b"):
+            aws_resources["table"].put_item(
+                Item={
+                    "UserId": "user-source",
+                    "PhotoId": f"photo-source-{source}",
+                    "ObjectKey": f"originals/user-source/photo-source-{source}.webp",
+                    "ThumbnailKey": f"thumbnails/user-source/photo-source-{source}.webp",
+                    "Status": "ACTIVE",
+                    "ContentHash": source * 64,
+                }
+            )
+        files = [_file("photo-1", contentHash="a" * 64), _file("photo-2"), _file("photo-3", contentHash="b" * 64)]
+
+        results = _results(upload_batch.handler(_event({"files": files}), None))
+
+        assert [result["deduplicated"] for result in results] == [True, False, True]
+        assert results[0]["linkedToPhotoId"] == "photo-source-a"
+        assert results[2]["thumbnailKey"] == "thumbnails/user-source/photo-source-b.webp"
+        assert "uploadUrl" not in results[0]
+        item = aws_resources["table"].get_item(Key={"UserId": "user-123", "PhotoId": "photo-3"})["Item"]
+        assert item["Status"] == "ACTIVE"
+        assert item["ActiveUserId"] == "user-123"
+        refs = aws_resources["refs"].get_item(Key={"ObjectKey": "originals/user-source/photo-source-a.webp"})["Item"]
+        assert "user-123#photo-1" in refs["Refs"]
+        assert aws_resources["users"].get_item(Key={"UserId": "user-123"})["Item"]["CollectionVersion"] == 1
+
+    def test_batch_uploads_normally_when_the_dedupe_source_is_trashed(self, aws_resources):
+        aws_resources["table"].put_item(
+            Item={
+                "UserId": "user-source",
+                "PhotoId": "photo-source",
+                "ObjectKey": "originals/user-source/photo-source.webp",
+                "Status": "ACTIVE",
+                "ContentHash": "a" * 64,
+                "DeletedAt": "2026-01-01T00:00:00+00:00",
+            }
+        )
+
+        results = _results(upload_batch.handler(_event({"files": [_file("photo-1", contentHash="a" * 64)]}), None))
+
+        assert results[0]["uploadRequired"] is True
+        assert results[0]["objectKey"] == "originals/user-123/photo-1.webp"
+        item = aws_resources["table"].get_item(Key={"UserId": "user-123", "PhotoId": "photo-1"})["Item"]
+        assert item["Status"] == "PENDING"
+        refs = aws_resources["refs"].get_item(Key={"ObjectKey": "originals/user-123/photo-1.webp"})["Item"]["Refs"]
+        assert refs == {"user-123#photo-1"}
+        assert "Item" not in aws_resources["refs"].get_item(Key={"ObjectKey": "originals/user-source/photo-source.webp"})
+
+    def test_batch_dedupe_link_error_only_falls_back_that_file(self, aws_resources, monkeypatch):
+        aws_resources["table"].put_item(
+            Item={
+                "UserId": "user-source",
+                "PhotoId": "photo-source",
+                "ObjectKey": "originals/user-source/photo-source.webp",
+                "Status": "ACTIVE",
+                "ContentHash": "a" * 64,
+            }
+        )
+
+        def denied(**kwargs):
+            raise ClientError({"Error": {"Code": "AccessDeniedException", "Message": "denied"}}, "TransactWriteItems")
+
+        monkeypatch.setattr(upload_batch.dynamodb.meta.client, "transact_write_items", denied)
+
+        files = [_file("photo-1", contentHash="a" * 64), _file("photo-2")]
+        results = _results(upload_batch.handler(_event({"files": files}), None))
+
+        assert [result["uploadRequired"] for result in results] == [True, True]
+        assert results[0]["objectKey"] == "originals/user-123/photo-1.webp"
+
+    def test_batch_reports_invalid_files_and_keeps_the_rest(self, aws_resources):
+        files = [_file("photo-1"), _file("photo-2", contentHash="nope"), _file("photo-1"), {"photoId": "a/b"}]
+
+        results = _results(upload_batch.handler(_event({"files": files}), None))
+
+        assert results[0]["uploadRequired"] is True
+        assert results[1] == {"photoId": "photo-2", "error": "contentHash must be a 64-character hex SHA-256 string"}
+        assert results[2] == {"photoId": "photo-1", "error": "photoId appears more than once in the batch"}
+        assert "error" in results[3]
+        assert "Item" not in aws_resources["table"].get_item(Key={"UserId": "user-123", "PhotoId": "photo-2"})
+
+    def test_batch_retry_keeps_created_at_and_bumps_version(self, aws_resources):
+        event = _event({"files": [_file("photo-1")]})
+        upload_batch.handler(event, None)
+        key = {"UserId": "user-123", "PhotoId": "photo-1"}
+        first = aws_resources["table"].get_item(Key=key)["Item"]
+
+        upload_batch.handler(event, None)
+
+        second = aws_resources["table"].get_item(Key=key)["Item"]
+        assert second["CreatedAt"] == first["CreatedAt"]
+        assert second["Version"] == first["Version"] + 1
+
+    def test_batch_reinit_releases_replaced_object(self, aws_resources):
+        upload_batch.handler(_event({"files": [_file("photo-1")]}), None)
+        aws_resources["s3"].put_object(Bucket="photos-test-bucket", Key="originals/user-123/photo-1.webp", Body=b"x")
+        aws_resources["table"].put_item(
+            Item={
+                "UserId": "user-source",
+                "PhotoId": "photo-source",
+                "ObjectKey": "originals/user-source/photo-source.webp",
+                "Status": "ACTIVE",
+                "ContentHash": "c" * 64,
+            }
+        )
+
+        results = _results(upload_batch.handler(_event({"files": [_file("photo-1", contentHash="c" * 64)]}), None))
+
+        assert results[0]["deduplicated"] is True
+        assert "Item" not in aws_resources["refs"].get_item(Key={"ObjectKey": "originals/user-123/photo-1.webp"})
+        listed = aws_resources["s3"].list_objects_v2(Bucket="photos-test-bucket").get("Contents") or []
+        assert [entry["Key"] for entry in listed] == []
+
+    @pytest.mark.parametrize("body", [{}, {"files": []}, {"files": "photo-1"}, {"files": [_file(f"p{i}") for i in range(101)]}])
+    def test_batch_rejects_invalid_envelope(self, aws_resources, body):
+        assert upload_batch.handler(_event(body), None)["statusCode"] == 400
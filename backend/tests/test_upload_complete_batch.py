@@ -0,0 +1,193 @@
+import json
+import os
+import sys
+
+import boto3
+import pytest
+from moto import mock_aws
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from handlers import derive_photo
+from handlers import upload_complete_batch
+
+
+@pytest.fixture
+def aws_resources():
+    with mock_aws():
+        dynamodb = boto3.resource("dynamodb", region_name="us-east-1")
+        table = dynamodb.create_table(
+            TableName="photos-test",
+            KeySchema=[
+                {"AttributeName": "UserId", "KeyType": "HASH"},
+                {"AttributeName": "PhotoId", "KeyType": "RANGE"},
+            ],
+            AttributeDefinitions=[
+                {"AttributeName": "UserId", "AttributeType": "S"},
+                {"AttributeName": "PhotoId", "AttributeType": "S"},
+            ],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        index_table = dynamodb.create_table(
+            TableName="photo-index-test",
+            KeySchema=[
+                {"AttributeName": "IndexKey", "KeyType": "HASH"},
+                {"AttributeName": "SortKey", "KeyType": "RANGE"},
+            ],
+            AttributeDefinitions=[
+                {"AttributeName": "IndexKey", "AttributeType": "S"},
+                {"AttributeName": "SortKey", "AttributeType": "S"},
+            ],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        users_table = dynamodb.create_table(
+            TableName="users-test",
+            KeySchema=[{"AttributeName": "UserId", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "UserId", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        s3 = boto3.client("s3", region_name="us-east-1")
+        s3.create_bucket(Bucket="photos-test-bucket")
+
+        for position in range(3):
+            photo_id = f"photo-{position}"
+            table.put_item(
+                Item={
+                    "UserId": "user-123",
+                    "PhotoId": photo_id,
+                    "ObjectKey": f"originals/user-123/{photo_id}.webp",
+                    "ContentType": "image/webp",
+                    "Status": "PENDING",
+                    "Subjects": ["bob"],
+                    "Version": 1,
+                }
+            )
+            s3.put_object(Bucket="photos-test-bucket", Key=f"originals/user-123/{photo_id}.webp", Body=b"image")
+        table.put_item(
+            Item={
+                "UserId": "user-123",
+                "PhotoId": "photo-unuploaded",
+                "ObjectKey": "originals/user-123/photo-unuploaded.webp",
+                "ContentType": "image/webp",
+                "Status": "PENDING",
+            }
+        )
+
+        yield {"table": table, "index": index_table, "users": users_table, "s3": s3}
+
+
+@pytest.fixture
+def fake_imaging(monkeypatch):
+    """Stand in for Pillow: every image is dated 2024-04-12 and downscales to fixed bytes."""
+    reads = []
+
+    def fake_derive_image(source_bytes, sizes):
+        reads.append(source_bytes)
+        return "date:2024-04-12", {size: b"thumb" for size in sizes}
+
+    monkeypatch.setattr(derive_photo, "derive_image", fake_derive_image)
+    return reads
+
+
+def _event(body):
+    return {
+        "requestContext": {"authorizer": {"jwt": {"claims": {"sub": "user-123", "email_verified": "true"}}}},
+        "body": body if isinstance(body, str) else json.dumps(body),
+    }
+
+
+class TestUploadCompleteBatch:
+    def test_finalizes_every_uploaded_photo(self, aws_resources, derivation_queue, fake_imaging):
+        response = upload_complete_batch.handler(_event({"photoIds": ["photo-0", "photo-1", "photo-2"]}), None)
+
+        assert response["statusCode"] == 200
+        body = json.loads(response["body"])
+        assert body["count"] == 3
+        assert body["failedCount"] == 0
+        for position, result in enumerate(body["results"]):
+            photo_id = f"photo-{position}"
+            assert result == {
+                "photoId": photo_id,
+                "status": "ACTIVE",
+                "thumbnailKey": None,
+                "derivationStatus": "PENDING",
+            }
+            item = aws_resources["table"].get_item(Key={"UserId": "user-123", "PhotoId": photo_id})["Item"]
+            assert item["Status"] == "ACTIVE"
+            assert item["ActiveUserId"] == "user-123"
+            assert item["Subjects"] == ["bob"]
+            assert item["Version"] == 2
+        # No image work happens inside the request
+        assert fake_imaging == []
+        assert len(derivation_queue.messages) == 3
+        assert aws_resources["users"].get_item(Key={"UserId": "user-123"})["Item"]["CollectionVersion"] == 1
+
+        assert derivation_queue.drain(derive_photo.handler) == []
+
+        for position in range(3):
+            photo_id = f"photo-{position}"
+            item = aws_resources["table"].get_item(Key={"UserId": "user-123", "PhotoId": photo_id})["Item"]
+            assert item["DerivationStatus"] == "COMPLETE"
+            assert item["Subjects"] == ["bob", "date:2024-04-12"]
+            assert item["Version"] == 3
+            thumbnail = aws_resources["s3"].get_object(Bucket="photos-test-bucket", Key=item["ThumbnailKey"])
+            assert thumbnail["Body"].read() == b"thumb"
+        # One source read per photo feeds both the date label and the thumbnail
+        assert fake_imaging == [b"image", b"image", b"image"]
+        posting = aws_resources["index"].get_item(Key={"IndexKey": "user-123#l:date:2024-04-12", "SortKey": "photo-1"})
+        assert "Item" in posting
+
+    def test_reports_per_photo_failures_alongside_successes(self, aws_resources, derivation_queue, fake_imaging):
+        response = upload_complete_batch.handler(
+            _event({"photoIds": ["photo-unuploaded", "photo-0", "missing", "photo-0"]}), None
+        )
+
+        body = json.loads(response["body"])
+        assert body["results"] == [
+            {"photoId": "photo-unuploaded", "error": "photo not found in storage"},
+            {"photoId": "photo-0", "status": "ACTIVE", "thumbnailKey": None, "derivationStatus": "PENDING"},
+            {"photoId": "missing", "error": "photo not found"},
+        ]
+        assert body["failedCount"] == 2
+        pending = aws_resources["table"].get_item(Key={"UserId": "user-123", "PhotoId": "photo-unuploaded"})["Item"]
+        assert pending["Status"] == "PENDING"
+        assert [json.loads(message["body"])["photoId"] for message in derivation_queue.messages] == ["photo-0"]
+
+    def test_non_images_skip_derivation(self, aws_resources, derivation_queue):
+        aws_resources["table"].update_item(
+            Key={"UserId": "user-123", "PhotoId": "photo-0"},
+            UpdateExpression="SET ContentType = :video",
+            ExpressionAttributeValues={":video": "video/mp4"},
+        )
+
+        response = upload_complete_batch.handler(_event({"photoIds": ["photo-0"]}), None)
+
+        assert json.loads(response["body"])["results"][0]["derivationStatus"] == "SKIPPED"
+        assert derivation_queue.messages == []
+
+    def test_repeated_complete_leaves_active_photos_alone(self, aws_resources, derivation_queue, fake_imaging):
+        upload_complete_batch.handler(_event({"photoIds": ["photo-0"]}), None)
+        assert derivation_queue.drain(derive_photo.handler) == []
+        derived = aws_resources["table"].get_item(Key={"UserId": "user-123", "PhotoId": "photo-0"})["Item"]
+
+        response = upload_complete_batch.handler(_event({"photoIds": ["photo-0", "photo-1"]}), None)
+
+        assert [result["derivationStatus"] for result in json.loads(response["body"])["results"]] == ["COMPLETE", "PENDING"]
+        assert aws_resources["table"].get_item(Key={"UserId": "user-123", "PhotoId": "photo-0"})["Item"] == derived
+        assert [json.loads(message["body"])["photoId"] for message in derivation_queue.messages] == ["photo-1"]
+
+    def test_nothing_finalized_leaves_collection_version_alone(self, aws_resources, derivation_queue):
+        response = upload_complete_batch.handler(_event({"photoIds": ["missing", "photo-unuploaded"]}), None)
+
+        assert json.loads(response["body"])["failedCount"] == 2
+        assert "Item" not in aws_resources["users"].get_item(Key={"UserId": "user-123"})
+
+    @pytest.mark.parametrize(
+        "body",
+        [{}, {"photoIds": []}, {"photoIds": "photo-0"}, {"photoIds": [1]}, {"photoIds": [f"p{i}" for i in range(101)]}],
+    )
+    def test_rejects_invalid_photo_ids(self, aws_resources, body):
+        assert upload_complete_batch.handler(_event(body), None)["statusCode"] == 400
+
+    def test_rejects_invalid_json(self, aws_resources):
+        assert upload_complete_batch.handler(_event("{not json"), None)["statusCode"] == 400
@@ -0,0 +1,226 @@
+import json
+import os
+import sys
+
+import boto3
+import pytest
+from moto import mock_aws
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from handlers import upload, upload_batch, upload_complete, upload_complete_batch, upload_parts
+from handlers.upload_common import MULTIPART_PART_SIZE, multipart_part_size
+
+BUCKET = "photos-test-bucket"
+OBJECT_KEY = "originals/user-123/video-1.webp"
+# S3 rejects non-final parts under 5 MiB, so a two-part upload needs a full first part
+FILE_SIZE = MULTIPART_PART_SIZE + 1024
+
+
+@pytest.fixture
+def aws_resources():
+    with mock_aws():
+        dynamodb = boto3.resource("dynamodb", region_name="us-east-1")
+        table = dynamodb.create_table(
+            TableName="photos-test",
+            KeySchema=[
+                {"AttributeName": "UserId", "KeyType": "HASH"},
+                {"AttributeName": "PhotoId", "KeyType": "RANGE"},
+            ],
+            AttributeDefinitions=[
+                {"AttributeName": "UserId", "AttributeType": "S"},
+                {"AttributeName": "PhotoId", "AttributeType": "S"},
+            ],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        dynamodb.create_table(
+            TableName="photo-index-test",
+            KeySchema=[
+                {"AttributeName": "IndexKey", "KeyType": "HASH"},
+                {"AttributeName": "SortKey", "KeyType": "RANGE"},
+            ],
+            AttributeDefinitions=[
+                {"AttributeName": "IndexKey", "AttributeType": "S"},
+                {"AttributeName": "SortKey", "AttributeType": "S"},
+            ],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        dynamodb.create_table(
+            TableName="object-refs-test",
+            KeySchema=[{"AttributeName": "ObjectKey", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "ObjectKey", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        dynamodb.create_table(
+            TableName="users-test",
+            KeySchema=[{"AttributeName": "UserId", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "UserId", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        s3 = boto3.client("s3", region_name="us-east-1")
+        s3.create_bucket(Bucket=BUCKET)
+
+        yield {"table": table, "s3": s3}
+
+
+def _event(body, photo_id=None):
+    event = {
+        "requestContext": {
+            "authorizer": {
+                "jwt": {
+                    "claims": {
+                        "sub": "user-123",
+                        "email_verified": "true",
+                    }
+                }
+            }
+        },
+        "body": json.dumps(body),
+    }
+    if photo_id:
+        event["pathParameters"] = {"photoId": photo_id}
+    return event
+
+
+def _init_multipart(file_size=FILE_SIZE):
+    response = upload.handler(_event({
+        "photoId": "video-1",
+        "contentType": "video/mp4",
+        "originalFileName": "holiday.mp4",
+        "multipart": True,
+        "fileSize": file_size,
+    }), None)
+    assert response["statusCode"] == 200
+    return json.loads(response["body"])
+
+
+def _upload_parts(s3, upload_id, part_count):
+    """Stand in for the client's PUTs to the part URLs; returns the parts list upload-complete takes."""
+    parts = []
+    for part_number in range(1, part_count + 1):
+        size = MULTIPART_PART_SIZE if part_number < part_count else FILE_SIZE - MULTIPART_PART_SIZE
+        uploaded = s3.upload_part(
+            Bucket=BUCKET, Key=OBJECT_KEY, UploadId=upload_id, PartNumber=part_number, Body=b"\x00" * size
+        )
+        parts.append({"partNumber": part_number, "etag": uploaded["ETag"]})
+    return parts
+
+
+def _photo(aws_resources):
+    return aws_resources["table"].get_item(Key={"UserId": "user-123", "PhotoId": "video-1"})["Item"]
+
+
+class TestMultipartUpload:
+    def test_init_opens_a_multipart_upload(self, aws_resources):
+        body = _init_multipart()
+
+        assert body["uploadUrl"] is None
+        assert body["partSize"] == MULTIPART_PART_SIZE
+        assert body["partCount"] == 2
+        item = _photo(aws_resources)
+        assert item["MultipartUploadId"] == body["multipartUploadId"]
+        assert item["FileSize"] == FILE_SIZE
+        uploads = aws_resources["s3"].list_multipart_uploads(Bucket=BUCKET)["Uploads"]
+        assert [upload_entry["UploadId"] for upload_entry in uploads] == [body["multipartUploadId"]]
+
+    def test_part_urls_then_complete_activates_the_photo(self, aws_resources):
+        init = _init_multipart()
+
+        response = upload_parts.handler(_event({"partNumbers": [2, 1, 2]}, "video-1"), None)
+        assert response["statusCode"] == 200
+        body = json.loads(response["body"])
+        assert [part["partNumber"] for part in body["parts"]] == [1, 2]
+        assert all(f"uploadId={init['multipartUploadId']}" in part["uploadUrl"] for part in body["parts"])
+        assert body["multipartUploadId"] == init["multipartUploadId"]
+
+        parts = _upload_parts(aws_resources["s3"], init["multipartUploadId"], 2)
+        completed = upload_complete.handler(_event({"photoId": "video-1", "parts": parts}), None)
+
+        assert completed["statusCode"] == 200
+        assert json.loads(completed["body"])["derivationStatus"] == "SKIPPED"
+        head = aws_resources["s3"].head_object(Bucket=BUCKET, Key=OBJECT_KEY)
+        assert head["ContentLength"] == FILE_SIZE
+        item = _photo(aws_resources)
+        assert item["Status"] == "ACTIVE"
+        assert "MultipartUploadId" not in item
+        assert "MultipartPartSize" not in item
+
+    def test_part_urls_include_a_fresh_thumbnail_url(self, aws_resources):
+        upload.handler(_event({
+            "photoId": "photo-1",
+            "contentType": "image/jpeg",
+            "multipart": True,
+            "fileSize": FILE_SIZE,
+        }), None)
+
+        # An empty list asks for the thumbnail URL alone, as a client resuming with every part uploaded does
+        response = upload_parts.handler(_event({"partNumbers": []}, "photo-1"), None)
+
+        assert response["statusCode"] == 200
+        body = json.loads(response["body"])
+        assert body["parts"] == []
+        assert body["thumbnailKey"] == "thumbnails/user-123/photo-1.webp"
+        assert "/thumbnails/user-123/photo-1.webp?" in body["thumbnailUploadUrl"]
+
+    def test_complete_needs_every_part(self, aws_resources):
+        init = _init_multipart()
+        parts = _upload_parts(aws_resources["s3"], init["multipartUploadId"], 2)
+
+        missing = upload_complete.handler(_event({"photoId": "video-1", "parts": parts[:1]}), None)
+        wrong_etag = upload_complete.handler(
+            _event({"photoId": "video-1", "parts": [parts[0], {"partNumber": 2, "etag": '"0000"'}]}), None
+        )
+
+        assert missing["statusCode"] == 400
+        assert json.loads(missing["body"])["error"] == "parts must list all 2 uploaded parts"
+        assert wrong_etag["statusCode"] == 400
+        assert "InvalidPart" in json.loads(wrong_etag["body"])["error"]
+        assert _photo(aws_resources)["Status"] == "PENDING"
+
+    def test_batch_complete_leaves_multipart_uploads_alone(self, aws_resources, derivation_queue):
+        _init_multipart()
+
+        response = upload_complete_batch.handler(_event({"photoIds": ["video-1"]}), None)
+
+        assert json.loads(response["body"])["failedCount"] == 1
+        assert _photo(aws_resources)["Status"] == "PENDING"
+
+    def test_reinit_aborts_the_previous_upload(self, aws_resources):
+        first = _init_multipart()
+        second = _init_multipart()
+
+        uploads = aws_resources["s3"].list_multipart_uploads(Bucket=BUCKET)["Uploads"]
+        assert [upload_entry["UploadId"] for upload_entry in uploads] == [second["multipartUploadId"]]
+        assert first["multipartUploadId"] != second["multipartUploadId"]
+
+    def test_batch_reinit_aborts_the_previous_upload(self, aws_resources):
+        _init_multipart()
+
+        response = upload_batch.handler(_event({"files": [{"photoId": "video-1", "contentType": "video/mp4"}]}), None)
+
+        assert response["statusCode"] == 200
+        assert aws_resources["s3"].list_multipart_uploads(Bucket=BUCKET).get("Uploads", []) == []
+        assert "MultipartUploadId" not in _photo(aws_resources)
+
+    def test_part_urls_need_an_open_upload_and_valid_numbers(self, aws_resources):
+        not_found = upload_parts.handler(_event({"partNumbers": [1]}, "video-1"), None)
+        upload.handler(_event({"photoId": "video-1", "contentType": "video/mp4"}), None)
+        single_put = upload_parts.handler(_event({"partNumbers": [1]}, "video-1"), None)
+        _init_multipart()
+        out_of_range = upload_parts.handler(_event({"partNumbers": [3]}, "video-1"), None)
+
+        assert not_found["statusCode"] == 404
+        assert single_put["statusCode"] == 409
+        assert out_of_range["statusCode"] == 400
+        assert json.loads(out_of_range["body"])["error"] == "partNumbers must be integers between 1 and 2"
+
+    def test_init_rejects_missing_file_size(self, aws_resources):
+        response = upload.handler(_event({"photoId": "video-1", "multipart": True}), None)
+
+        assert response["statusCode"] == 400
+        assert "fileSize" in json.loads(response["body"])["error"]
+
+    def test_part_size_grows_to_stay_within_ten_thousand_parts(self):
+        assert multipart_part_size(10 * 1024 ** 3) == MULTIPART_PART_SIZE
+        # 200 GiB / 10,000 parts is just over 20 MiB, rounded up to 21 MiB
+        assert multipart_part_size(200 * 1024 ** 3) == 21 * 1024 * 1024
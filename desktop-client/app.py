@@ -5,6 +5,7 @@ import mimetypes
 import os
 import re
 import threading
+import time
 import uuid
 import webbrowser
 import ctypes
@@ -19,6 +20,15 @@ from google.auth.transport.requests import Request as GoogleAuthRequest
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.oauth2.credentials import Credentials as GoogleOAuthCredentials
 import requests
+from multipart_upload import (
+    MULTIPART_THRESHOLD_BYTES,
+    PART_UPLOAD_TIMEOUT_SECONDS,
+    MultipartStateStore,
+    MultipartUploadGone,
+    file_fingerprint,
+    upload_missing_parts,
+)
+from photo_ids import new_photo_id
 from thumbnail_hydration import (
     LIST_THUMBNAIL_CACHE_MAX_ITEMS,
     LIST_THUMBNAIL_MAX_ATTEMPTS,
@@ -27,6 +37,7 @@ from thumbnail_hydration import (
     count_cached_rows,
     count_image_rows,
 )
+from thumbnailing import downscale
 
 try:
     from PIL import ExifTags, Image, ImageTk
@@ -64,6 +75,14 @@ DEFAULT_AUTH_STATE_FILE = os.path.join(
 LIST_THUMBNAIL_WORKERS = 6
 LIST_THUMBNAIL_TIMEOUT_SECONDS = 8
 LIST_THUMBNAIL_URL_TIMEOUT_SECONDS = 6
+ALBUM_PHOTOS_PAGE_SIZE = 100
+ALBUM_PHOTOS_MAX_PAGES = 20
+# The API gzips large list/search/album pages for clients that ask; requests decodes them transparently
+API_ACCEPT_ENCODING = "gzip, deflate"
+LIST_ETAG_CACHE_MAX_ENTRIES = 200
+PHOTO_CHANGES_PAGE_SIZE = 100
+# Mirrored photos keep their presigned thumbnailUrl (valid 1h) only this long
+PHOTO_SYNC_URL_MAX_AGE_SECONDS = 45 * 60
 
 
 def pretty_json(value):
@@ -108,6 +127,10 @@ class MillerPicDesktopApp:
         self.list_current_token = ""
         self.list_previous_tokens = []
         self.list_last_limit = "20"
+        # (endpoint, params) -> (ETag, body) for conditional GET /photos refreshes
+        self.list_etag_cache = {}
+        # Local copy of the library kept current from GET /photos/changes
+        self.photo_sync_state = self._empty_photo_sync_state(None)
         self.thumbnail_preview_image = None
         self.list_thumbnail_images = {}
         self.list_thumbnail_generation = 0
@@ -133,6 +156,9 @@ class MillerPicDesktopApp:
         self.google_credentials = None
 
         self._load_local_state()
+        self.multipart_state = MultipartStateStore(
+            os.path.join(os.path.dirname(os.path.abspath(self._desktop_state_file_path())), "multipart_uploads.json")
+        )
 
         self._build_ui()
         self._restore_google_session_if_available()
@@ -688,19 +714,24 @@ class MillerPicDesktopApp:
         self.local_albums.append(album)
 
     def _fetch_all_photos(self, headers, limit=100, max_pages=20):
+        base_url = self.api_base_url_var.get().rstrip('/')
+        synced_photos, status_code, body = self._sync_photos_from_changes(base_url, headers, max_pages)
+        # Backends without the change feed answer 404; list the whole library instead
+        if not self._is_not_found_status(status_code):
+            return synced_photos, status_code, body
+
         all_photos = []
         next_token = ""
-        endpoint = f"{self.api_base_url_var.get().rstrip('/')}/photos"
+        endpoint = f"{base_url}/photos"
 
         for _ in range(max_pages):
             params = {"limit": str(limit)}
             if next_token:
                 params["nextToken"] = next_token
 
-            response = requests.get(endpoint, headers=headers, params=params, timeout=30)
-            body = self._safe_json(response)
-            if response.status_code != 200:
-                return None, response.status_code, body
+            status_code, body = self._get_json_with_etag(endpoint, headers, params)
+            if status_code != 200:
+                return None, status_code, body
 
             page_items = body.get("photos") or []
             all_photos.extend(page_items)
@@ -710,6 +741,50 @@ class MillerPicDesktopApp:
 
         return all_photos, 200, {"count": len(all_photos)}
     
+    @staticmethod
+    def _empty_photo_sync_state(base_url):
+        return {"baseUrl": base_url, "cursor": None, "photos": {}}
+
+    def _sync_photos_from_changes(self, base_url, headers, max_pages):
+        """Apply GET /photos/changes since the stored cursor to the local copy; returns (photos, status, body)."""
+        state = self.photo_sync_state
+        if state["baseUrl"] != base_url:
+            state = self.photo_sync_state = self._empty_photo_sync_state(base_url)
+
+        for _ in range(max_pages):
+            params = {"limit": str(PHOTO_CHANGES_PAGE_SIZE)}
+            if state["cursor"]:
+                params["since"] = state["cursor"]
+            response = requests.get(f"{base_url}/photos/changes", headers=headers, params=params, timeout=30)
+            body = self._safe_json(response)
+            if response.status_code == 410 and state["cursor"]:
+                self.log("Photo change cursor expired; resyncing the full library.")
+                state = self.photo_sync_state = self._empty_photo_sync_state(base_url)
+                continue
+            if response.status_code != 200:
+                return None, response.status_code, body
+
+            received_at = time.monotonic()
+            for change in body.get("changes") or []:
+                photo_id = change.get("photoId")
+                if change.get("change") == "upsert" and change.get("photo"):
+                    state["photos"][photo_id] = (change["photo"], received_at)
+                else:
+                    state["photos"].pop(photo_id, None)
+            state["cursor"] = body.get("cursor") or state["cursor"]
+            if not body.get("hasMore"):
+                break
+
+        now = time.monotonic()
+        photos = []
+        for photo, received_at in state["photos"].values():
+            if now - received_at > PHOTO_SYNC_URL_MAX_AGE_SECONDS:
+                # Let thumbnail hydration resolve a fresh URL instead of an expired one
+                photo = {key: value for key, value in photo.items() if key != "thumbnailUrl"}
+            photos.append(photo)
+        photos.sort(key=lambda photo: photo.get("createdAt") or "", reverse=True)
+        return photos, 200, {"count": len(photos)}
+
     def _handle_album_api_error(self, operation_name, status_code, response_body):
         error_text = self._extract_error_message(response_body, f"request failed ({status_code})")
         detail = f"{operation_name} failed: {error_text}"
@@ -939,7 +1014,7 @@ class MillerPicDesktopApp:
         try:
             album_id = album.get("albumId")
             self.log(f"Requesting derived photos for albumId={album_id}...")
-            response = requests.get(endpoint, headers=headers, timeout=30)
+            response = requests.get(endpoint, headers=headers, params={"limit": str(ALBUM_PHOTOS_PAGE_SIZE)}, timeout=30)
             body = self._safe_json(response)
             self.log(f"GET /albums/{{albumId}}/photos -> {response.status_code}")
             self.log(pretty_json(body))
@@ -974,7 +1049,24 @@ class MillerPicDesktopApp:
                 self._handle_album_api_error("View album photos", response.status_code, body)
                 return
 
-            photos = body.get("photos") or []
+            photos = list(body.get("photos") or [])
+            next_token = body.get("nextToken") or ""
+            for _ in range(ALBUM_PHOTOS_MAX_PAGES):
+                if not next_token:
+                    break
+                page_response = requests.get(
+                    endpoint,
+                    headers=headers,
+                    params={"limit": str(ALBUM_PHOTOS_PAGE_SIZE), "nextToken": next_token},
+                    timeout=30,
+                )
+                page_body = self._safe_json(page_response)
+                if page_response.status_code != 200:
+                    self._handle_album_api_error("View album photos", page_response.status_code, page_body)
+                    return
+                photos.extend(page_body.get("photos") or [])
+                next_token = page_body.get("nextToken") or ""
+
             self.albums_backend_available = True
             self.current_album_context = {
                 "albumId": album.get("albumId"),
@@ -1475,12 +1567,14 @@ class MillerPicDesktopApp:
 
         self.auth_status_var.set(f"Signed in (expires: {expiry_text})")
         self._save_google_session()
+        self.photo_sync_state = self._empty_photo_sync_state(None)
         self.log("Google sign-in complete. Token field updated.")
 
     def on_google_sign_out(self):
         self.google_credentials = None
         self.id_token_var.set("")
         self._clear_google_session()
+        self.photo_sync_state = self._empty_photo_sync_state(None)
         self.auth_status_var.set("Not signed in")
         self.log("Signed out locally (token cleared).")
 
@@ -1524,7 +1618,7 @@ class MillerPicDesktopApp:
         if guessed_type:
             self.content_type_var.set(guessed_type)
 
-        generated_photo_id = uuid.uuid4().hex
+        generated_photo_id = new_photo_id()
         self.set_photo_id_if_empty(generated_photo_id)
         self.log(f"Selected file: {file_path}")
         self.log(f"Auto-filled photo ID: {self.photo_id_var.get()}")
@@ -1715,8 +1809,7 @@ class MillerPicDesktopApp:
             ttk.Label(panel, text=item.get("fileName") or "").pack()
             try:
                 with Image.open(file_path) as image:
-                    prepared = image.convert("RGB")
-                    prepared.thumbnail((440, 440))
+                    prepared = downscale(image, 440)
                     image_tk = ImageTk.PhotoImage(prepared)
                 image_label = ttk.Label(panel, image=image_tk)
                 image_label.image = image_tk
@@ -1750,7 +1843,7 @@ class MillerPicDesktopApp:
             queue_item = {
                 "filePath": file_path,
                 "fileName": item.get("fileName") or os.path.basename(file_path),
-                "photoId": uuid.uuid4().hex,
+                "photoId": new_photo_id(),
                 "curation": "KEEP",
                 "status": "QUEUED",
                 "message": "curation-keep",
@@ -2147,7 +2240,7 @@ class MillerPicDesktopApp:
                             queue_item = {
                                 "filePath": file_path,
                                 "fileName": file_name,
-                                "photoId": uuid.uuid4().hex,
+                                "photoId": new_photo_id(),
                                 "curation": "REJECT",
                                 "status": "SKIPPED_VIDEO",
                                 "message": reason,
@@ -2185,7 +2278,7 @@ class MillerPicDesktopApp:
                     queue_item = {
                         "filePath": file_path,
                         "fileName": file_name,
-                        "photoId": uuid.uuid4().hex,
+                        "photoId": new_photo_id(),
                         "curation": "KEEP",
                         "status": "QUEUED",
                         "message": "sync-new",
@@ -2245,7 +2338,7 @@ class MillerPicDesktopApp:
                 queue_item = {
                     "filePath": file_path,
                     "fileName": file_name,
-                    "photoId": uuid.uuid4().hex,
+                    "photoId": new_photo_id(),
                     "curation": "KEEP",
                     "status": "QUEUED",
                     "message": "",
@@ -2519,8 +2612,7 @@ class MillerPicDesktopApp:
 
         try:
             with Image.open(file_path) as image:
-                prepared = image.convert("RGB")
-                prepared.thumbnail((320, 320))
+                prepared = downscale(image, 320)
                 output = BytesIO()
                 prepared.save(output, format="WEBP", quality=80)
                 return output.getvalue()
@@ -2537,6 +2629,10 @@ class MillerPicDesktopApp:
             payload["subjects"] = subjects
         if content_hash:
             payload["contentHash"] = content_hash
+        file_size = os.path.getsize(file_path)
+        if file_size >= MULTIPART_THRESHOLD_BYTES:
+            return self._upload_one_file_multipart(headers, file_path, file_size, payload, original_file_name)
+
         upload_init_url = f"{self.api_base_url_var.get().rstrip('/')}/photos/upload-url"
 
         init_response = requests.post(upload_init_url, headers=headers, json=payload, timeout=30)
@@ -2570,19 +2666,7 @@ class MillerPicDesktopApp:
             return False, f"upload-bytes failed ({put_response.status_code})", False
 
         if thumbnail_upload_url:
-            thumbnail_bytes = self._build_thumbnail_webp_bytes(file_path)
-            if thumbnail_bytes:
-                thumb_response = requests.put(
-                    thumbnail_upload_url,
-                    data=thumbnail_bytes,
-                    headers={"Content-Type": "image/webp"},
-                    timeout=120,
-                )
-                self.log(f"PUT thumbnail signed-url -> {thumb_response.status_code} ({original_file_name})")
-                if thumb_response.status_code not in (200, 201):
-                    self.log(f"Thumbnail upload skipped after failure ({thumb_response.status_code}) for key={thumbnail_key}")
-            else:
-                self.log(f"Thumbnail generation not available for file: {original_file_name}")
+            self._upload_client_thumbnail(file_path, thumbnail_upload_url, thumbnail_key, original_file_name)
 
         upload_complete_url = f"{self.api_base_url_var.get().rstrip('/')}/photos/upload-complete"
         complete_response = requests.post(
@@ -2599,6 +2683,138 @@ class MillerPicDesktopApp:
 
         return True, "completed", False
 
+    def _upload_client_thumbnail(self, file_path, thumbnail_upload_url, thumbnail_key, original_file_name):
+        thumbnail_bytes = self._build_thumbnail_webp_bytes(file_path)
+        if not thumbnail_bytes:
+            self.log(f"Thumbnail generation not available for file: {original_file_name}")
+            return
+
+        thumb_response = requests.put(
+            thumbnail_upload_url,
+            data=thumbnail_bytes,
+            headers={"Content-Type": "image/webp"},
+            timeout=120,
+        )
+        self.log(f"PUT thumbnail signed-url -> {thumb_response.status_code} ({original_file_name})")
+        if thumb_response.status_code not in (200, 201):
+            self.log(f"Thumbnail upload skipped after failure ({thumb_response.status_code}) for key={thumbnail_key}")
+
+    def _upload_one_file_multipart(self, headers, file_path, file_size, payload, original_file_name, allow_restart=True):
+        api_base_url = self.api_base_url_var.get().rstrip('/')
+        fingerprint = file_fingerprint(file_path)
+        saved = self.multipart_state.get(fingerprint)
+
+        if saved:
+            self.log(
+                f"Resuming multipart upload of {original_file_name}: "
+                f"{len(saved['parts'])}/{saved['partCount']} parts already uploaded"
+            )
+        else:
+            init_response = requests.post(
+                f"{api_base_url}/photos/upload-url",
+                headers=headers,
+                json={**payload, "multipart": True, "fileSize": file_size},
+                timeout=30,
+            )
+            init_body = self._safe_json(init_response)
+            self.log(f"POST /photos/upload-url (multipart) -> {init_response.status_code} ({original_file_name})")
+            if init_response.status_code != 200:
+                error_message = self._extract_error_message(init_body, f"upload-init failed ({init_response.status_code})")
+                return False, error_message, False
+            if init_body.get("uploadRequired") is False:
+                return True, "deduplicated-link", True
+            if not init_body.get("multipartUploadId"):
+                return False, "multipartUploadId missing in response", False
+
+            self.multipart_state.start(
+                fingerprint,
+                payload["photoId"],
+                init_body["multipartUploadId"],
+                init_body["partSize"],
+                init_body["partCount"],
+            )
+            saved = self.multipart_state.get(fingerprint)
+
+        photo_id = saved["photoId"]
+
+        def sign_parts(part_numbers):
+            response = requests.post(
+                f"{api_base_url}/photos/{photo_id}/upload-parts",
+                headers=headers,
+                json={"partNumbers": part_numbers},
+                timeout=30,
+            )
+            body = self._safe_json(response)
+            if response.status_code in (404, 409):
+                raise MultipartUploadGone(self._extract_error_message(body, f"upload-parts failed ({response.status_code})"))
+            if response.status_code != 200:
+                raise RuntimeError(self._extract_error_message(body, f"upload-parts failed ({response.status_code})"))
+            if body.get("multipartUploadId") != saved["uploadId"]:
+                raise MultipartUploadGone("server has a different multipart upload for this photo")
+            return body
+
+        def presign_parts(part_numbers):
+            return {part["partNumber"]: part["uploadUrl"] for part in sign_parts(part_numbers).get("parts") or []}
+
+        def put_part(url, data):
+            response = requests.put(url, data=data, timeout=PART_UPLOAD_TIMEOUT_SECONDS)
+            if response.status_code not in (200, 201) or not response.headers.get("ETag"):
+                raise RuntimeError(f"part upload failed ({response.status_code})")
+            return response.headers["ETag"]
+
+        try:
+            parts = upload_missing_parts(
+                file_path,
+                saved["partSize"],
+                saved["partCount"],
+                saved["parts"],
+                presign_parts,
+                put_part,
+                lambda part_number, etag: self.multipart_state.record_part(fingerprint, part_number, etag),
+            )
+        except MultipartUploadGone as error:
+            self.multipart_state.discard(fingerprint)
+            self.log(f"Saved multipart upload for {original_file_name} is no longer open ({error}); starting over")
+            if not allow_restart:
+                return False, str(error), False
+            return self._upload_one_file_multipart(
+                headers, file_path, file_size, payload, original_file_name, allow_restart=False
+            )
+        except (requests.RequestException, RuntimeError) as error:
+            # Finished parts stay in the state file; the next attempt uploads only the rest
+            return False, f"multipart upload interrupted: {error}", False
+        self.log(f"PUT {saved['partCount']} parts -> done ({original_file_name})")
+
+        # Upload-init's thumbnail URL may have expired during the parts (or been lost on resume);
+        # the derive worker skips originals over its size cap, so this thumbnail may be the only one
+        try:
+            signed = sign_parts([])
+        except (MultipartUploadGone, requests.RequestException, RuntimeError) as error:
+            signed = {}
+            self.log(f"Thumbnail URL unavailable for {original_file_name}: {error}")
+        if signed.get("thumbnailUploadUrl"):
+            self._upload_client_thumbnail(
+                file_path, signed["thumbnailUploadUrl"], signed.get("thumbnailKey"), original_file_name
+            )
+
+        complete_response = requests.post(
+            f"{api_base_url}/photos/upload-complete",
+            headers=headers,
+            json={"photoId": photo_id, "parts": parts},
+            timeout=60,
+        )
+        complete_body = self._safe_json(complete_response)
+        self.log(f"POST /photos/upload-complete -> {complete_response.status_code} ({original_file_name})")
+        if complete_response.status_code == 400:
+            # S3 rejected the saved parts; they cannot be reused
+            self.multipart_state.discard(fingerprint)
+        if complete_response.status_code != 200:
+            error_message = self._extract_error_message(complete_body, f"upload-complete failed ({complete_response.status_code})")
+            return False, error_message, False
+
+        self.multipart_state.discard(fingerprint)
+        return True, "completed", False
+
     def _run_upload_queue_flow(self, headers, max_parallel):
         queued_items = [
             item for item in self.upload_queue_items
@@ -2745,7 +2961,7 @@ class MillerPicDesktopApp:
         token = self._require_auth()
         if not token:
             return None
-        return {"Authorization": f"Bearer {token}"}
+        return {"Authorization": f"Bearer {token}", "Accept-Encoding": API_ACCEPT_ENCODING}
 
     def on_upload(self):
         headers = self._headers()
@@ -2969,8 +3185,7 @@ class MillerPicDesktopApp:
     def _apply_thumbnail_preview(self, image_bytes, photo_id):
         try:
             with Image.open(BytesIO(image_bytes)) as image:
-                prepared = image.convert("RGB")
-                prepared.thumbnail((220, 220))
+                prepared = downscale(image, 220)
                 image_tk = ImageTk.PhotoImage(prepared)
 
             self.thumbnail_preview_image = image_tk
@@ -3140,19 +3355,38 @@ class MillerPicDesktopApp:
                 if not photos:
                     break
 
+                photo_ids = [photo.get("photoId") for photo in photos if photo.get("photoId")]
                 deleted_this_round = 0
-                for photo in photos:
-                    photo_id = photo.get("photoId")
-                    if not photo_id:
-                        continue
-                    delete_endpoint = f"{base_url}/photos/{photo_id}"
-                    delete_response = requests.delete(delete_endpoint, headers=headers, timeout=30)
-                    if delete_response.status_code == 200:
-                        deleted_count += 1
-                        deleted_this_round += 1
-                    else:
-                        failed_count += 1
-                        self.log(f"DELETE /photos/{{photoId}} failed -> {delete_response.status_code} ({photo_id})")
+                # One bulk call per listed page instead of one DELETE per photo
+                bulk_response = requests.post(
+                    f"{base_url}/photos/bulk-delete",
+                    headers=headers,
+                    json={"photoIds": photo_ids},
+                    timeout=60,
+                )
+                if bulk_response.status_code == 200:
+                    for result in self._safe_json(bulk_response).get("results") or []:
+                        if result.get("error"):
+                            failed_count += 1
+                            self.log(f"Bulk delete failed -> {result.get('error')} ({result.get('photoId')})")
+                        else:
+                            deleted_count += 1
+                            deleted_this_round += 1
+                elif bulk_response.status_code == 404:
+                    # Older API without the bulk endpoint
+                    for photo_id in photo_ids:
+                        delete_endpoint = f"{base_url}/photos/{photo_id}"
+                        delete_response = requests.delete(delete_endpoint, headers=headers, timeout=30)
+                        if delete_response.status_code == 200:
+                            deleted_count += 1
+                            deleted_this_round += 1
+                        else:
+                            failed_count += 1
+                            self.log(f"DELETE /photos/{{photoId}} failed -> {delete_response.status_code} ({photo_id})")
+                else:
+                    failed_count += len(photo_ids)
+                    self.log(f"POST /photos/bulk-delete failed -> {bulk_response.status_code}")
+                    self.log(pretty_json(self._safe_json(bulk_response)))
 
                 if deleted_this_round == 0:
                     self.log("Cleanup stopped: no deletions succeeded in this round.")
@@ -3250,12 +3484,11 @@ class MillerPicDesktopApp:
     def _list_photos_flow(self, endpoint, headers, params, requested_token, push_previous_token, pop_previous_token):
         try:
             self.log("Requesting photo list...")
-            response = requests.get(endpoint, headers=headers, params=params, timeout=30)
-            body = self._safe_json(response)
-            self.log(f"GET /photos -> {response.status_code}")
+            status_code, body = self._get_json_with_etag(endpoint, headers, params)
+            self.log(f"GET /photos -> {status_code}")
             self.log(pretty_json(body))
 
-            if response.status_code != 200:
+            if status_code != 200:
                 return
 
             photos = body.get("photos") or []
@@ -3384,7 +3617,7 @@ class MillerPicDesktopApp:
             token = token[7:].strip()
         if not token:
             return None
-        return {"Authorization": f"Bearer {token}"}
+        return {"Authorization": f"Bearer {token}", "Accept-Encoding": API_ACCEPT_ENCODING}
 
     def _resolve_list_thumbnail_url(self, photo, headers):
         thumbnail_url = photo.get("thumbnailUrl")
@@ -3495,8 +3728,7 @@ class MillerPicDesktopApp:
 
         try:
             with Image.open(BytesIO(image_bytes)) as image:
-                prepared = image.convert("RGB")
-                prepared.thumbnail((64, 64))
+                prepared = downscale(image, 64)
                 image_tk = ImageTk.PhotoImage(prepared)
 
             self.list_thumbnail_images[iid] = image_tk
@@ -3517,6 +3749,26 @@ class MillerPicDesktopApp:
         thread = threading.Thread(target=fn, args=args, daemon=True)
         thread.start()
 
+    def _get_json_with_etag(self, endpoint, headers, params):
+        """GET a JSON list page, revalidating a cached copy with If-None-Match; a 304 reuses the cached body."""
+        cache_key = (endpoint, tuple(sorted(params.items())))
+        cached = self.list_etag_cache.get(cache_key)
+        request_headers = dict(headers)
+        if cached:
+            request_headers["If-None-Match"] = cached[0]
+
+        response = requests.get(endpoint, headers=request_headers, params=params, timeout=30)
+        if response.status_code == 304 and cached:
+            return 200, cached[1]
+
+        body = self._safe_json(response)
+        etag = response.headers.get("ETag")
+        if response.status_code == 200 and etag:
+            if len(self.list_etag_cache) >= LIST_ETAG_CACHE_MAX_ENTRIES:
+                self.list_etag_cache.clear()
+            self.list_etag_cache[cache_key] = (etag, body)
+        return response.status_code, body
+
     @staticmethod
     def _safe_json(response):
         try:
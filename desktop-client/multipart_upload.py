@@ -0,0 +1,131 @@
+"""Resumable multipart uploads: parallel part PUTs with progress saved to disk.
+
+Files of MULTIPART_THRESHOLD_BYTES or more use the API's multipart mode. The
+ETag of every finished part is written to the state file as soon as S3
+returns it, so an upload cut short by a lost connection or a closed app
+picks up with the parts still missing instead of starting from byte 0.
+"""
+
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+# Below the derive worker's 64 MiB source cap: every file the worker will not download goes
+# multipart, and a multipart upload always sends its client thumbnail on a freshly signed URL
+MULTIPART_THRESHOLD_BYTES = 32 * 1024 * 1024
+PART_UPLOAD_WORKERS = 4
+# Part URLs expire after 15 minutes, so they are requested one window at a time
+PART_URL_BATCH_SIZE = 16
+PART_UPLOAD_TIMEOUT_SECONDS = 120
+
+
+class MultipartUploadGone(Exception):
+    """The server no longer has the saved upload (re-initialized, completed or aborted)."""
+
+
+def file_fingerprint(file_path):
+    """Identifies one version of a local file: an edited or replaced file starts a fresh upload."""
+    stat = os.stat(file_path)
+    return f"{os.path.normcase(os.path.abspath(file_path))}|{stat.st_size}|{stat.st_mtime_ns}"
+
+
+def read_part(file_path, part_number, part_size):
+    with open(file_path, "rb") as source:
+        source.seek((part_number - 1) * part_size)
+        return source.read(part_size)
+
+
+class MultipartStateStore:
+    """Saved multipart uploads by file fingerprint: photoId, uploadId, part layout and finished part ETags."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = self._load()
+
+    def _load(self):
+        if not os.path.isfile(self.path):
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as state_file:
+                data = json.load(state_file)
+        except (OSError, ValueError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def _save(self):
+        # Write then rename, so a crash mid-write never leaves a half-written state file
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as state_file:
+            json.dump(self._entries, state_file, indent=2, ensure_ascii=False)
+        os.replace(temp_path, self.path)
+
+    def get(self, fingerprint):
+        with self._lock:
+            entry = self._entries.get(fingerprint)
+            return json.loads(json.dumps(entry)) if entry else None
+
+    def start(self, fingerprint, photo_id, upload_id, part_size, part_count):
+        with self._lock:
+            self._entries[fingerprint] = {
+                "photoId": photo_id,
+                "uploadId": upload_id,
+                "partSize": part_size,
+                "partCount": part_count,
+                "parts": {},
+            }
+            self._save()
+
+    def record_part(self, fingerprint, part_number, etag):
+        with self._lock:
+            entry = self._entries.get(fingerprint)
+            if entry is None:
+                return
+            entry["parts"][str(part_number)] = etag
+            self._save()
+
+    def discard(self, fingerprint):
+        with self._lock:
+            if self._entries.pop(fingerprint, None) is not None:
+                self._save()
+
+
+def upload_missing_parts(
+    file_path,
+    part_size,
+    part_count,
+    completed_etags,
+    presign_parts,
+    put_part,
+    on_part_uploaded,
+    max_workers=PART_UPLOAD_WORKERS,
+):
+    """Upload every part not in completed_etags and return the full [{partNumber, etag}] list.
+
+    presign_parts(part_numbers) returns {part_number: url}; put_part(url, data)
+    returns the part's ETag or raises; on_part_uploaded(part_number, etag)
+    records progress. A failed part raises after the rest of its window has
+    finished, so those parts are saved for the next attempt.
+    """
+    etags = {int(part_number): etag for part_number, etag in (completed_etags or {}).items()}
+    missing = [part_number for part_number in range(1, part_count + 1) if part_number not in etags]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for start in range(0, len(missing), PART_URL_BATCH_SIZE):
+            window = missing[start:start + PART_URL_BATCH_SIZE]
+            urls = presign_parts(window)
+
+            def _upload(part_number):
+                etag = put_part(urls[part_number], read_part(file_path, part_number, part_size))
+                on_part_uploaded(part_number, etag)
+                return part_number, etag
+
+            # map() would cancel the parts not yet started once one fails; wait for the whole window instead
+            futures = [executor.submit(_upload, part_number) for part_number in window]
+            wait(futures)
+            for future in futures:
+                part_number, etag = future.result()
+                etags[part_number] = etag
+
+    return [{"partNumber": part_number, "etag": etags[part_number]} for part_number in range(1, part_count + 1)]
@@ -0,0 +1,40 @@
+import os
+import time
+
+# Crockford base32: no I, L, O or U, so IDs stay unambiguous and sort in ASCII order
+PHOTO_ID_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+PHOTO_ID_LENGTH = 26
+TIMESTAMP_CHARS = 10
+
+
+def _encode_base32(value, length):
+    chars = []
+    for _ in range(length):
+        chars.append(PHOTO_ID_ALPHABET[value & 31])
+        value >>= 5
+    return "".join(reversed(chars))
+
+
+def new_photo_id(now_ms=None):
+    """ULID-style photo ID: 48-bit millisecond timestamp then 80 random bits.
+
+    IDs generated later sort after earlier ones, so the service can page a
+    user's photos newest-first by PhotoId as well as by CreatedAt.
+    """
+    if now_ms is None:
+        now_ms = int(time.time() * 1000)
+    randomness = int.from_bytes(os.urandom(10), "big")
+    return _encode_base32(now_ms, TIMESTAMP_CHARS) + _encode_base32(randomness, PHOTO_ID_LENGTH - TIMESTAMP_CHARS)
+
+
+def photo_id_timestamp_ms(photo_id):
+    """Milliseconds encoded in a ULID-style photo ID, or None for legacy uuid4 hex IDs."""
+    if not isinstance(photo_id, str) or len(photo_id) != PHOTO_ID_LENGTH:
+        return None
+    value = 0
+    for char in photo_id[:TIMESTAMP_CHARS].upper():
+        index = PHOTO_ID_ALPHABET.find(char)
+        if index < 0:
+            return None
+        value = (value << 5) | index
+    return value
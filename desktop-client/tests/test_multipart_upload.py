@@ -0,0 +1,98 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from multipart_upload import MultipartStateStore, file_fingerprint, upload_missing_parts
+
+PART_SIZE = 4
+
+
+@pytest.fixture
+def source_file(tmp_path):
+    path = tmp_path / "clip.mp4"
+    path.write_bytes(b"aaaabbbbccccdd")
+    return str(path)
+
+
+def _presign(part_numbers):
+    return {part_number: f"url-{part_number}" for part_number in part_numbers}
+
+
+def test_uploads_every_part_and_records_each_etag(source_file, tmp_path):
+    store = MultipartStateStore(str(tmp_path / "multipart_uploads.json"))
+    fingerprint = file_fingerprint(source_file)
+    store.start(fingerprint, "photo-1", "upload-1", PART_SIZE, 4)
+    bodies = {}
+
+    def put_part(url, data):
+        bodies[url] = data
+        return f'"etag-{url}"'
+
+    parts = upload_missing_parts(
+        source_file, PART_SIZE, 4, {}, _presign, put_part,
+        lambda part_number, etag: store.record_part(fingerprint, part_number, etag),
+    )
+
+    assert bodies == {"url-1": b"aaaa", "url-2": b"bbbb", "url-3": b"cccc", "url-4": b"dd"}
+    assert [part["partNumber"] for part in parts] == [1, 2, 3, 4]
+    # A fresh store reads the progress back from disk
+    reloaded = MultipartStateStore(str(tmp_path / "multipart_uploads.json")).get(fingerprint)
+    assert reloaded["parts"] == {str(number): f'"etag-url-{number}"' for number in range(1, 5)}
+
+
+def test_resume_uploads_only_the_missing_parts(source_file, tmp_path):
+    store = MultipartStateStore(str(tmp_path / "multipart_uploads.json"))
+    fingerprint = file_fingerprint(source_file)
+    store.start(fingerprint, "photo-1", "upload-1", PART_SIZE, 4)
+
+    def flaky_put(url, data):
+        if url == "url-3":
+            raise RuntimeError("connection reset")
+        return f'"etag-{url}"'
+
+    with pytest.raises(RuntimeError):
+        upload_missing_parts(
+            source_file, PART_SIZE, 4, {}, _presign, flaky_put,
+            lambda part_number, etag: store.record_part(fingerprint, part_number, etag),
+        )
+
+    saved = store.get(fingerprint)
+    assert sorted(saved["parts"]) == ["1", "2", "4"]
+
+    signed = []
+
+    def presign(part_numbers):
+        signed.extend(part_numbers)
+        return _presign(part_numbers)
+
+    parts = upload_missing_parts(
+        source_file, PART_SIZE, 4, saved["parts"], presign, lambda url, data: '"etag-retry"',
+        lambda part_number, etag: store.record_part(fingerprint, part_number, etag),
+    )
+
+    assert signed == [3]
+    assert [part["etag"] for part in parts] == ['"etag-url-1"', '"etag-url-2"', '"etag-retry"', '"etag-url-4"']
+
+
+def test_changed_file_gets_a_new_fingerprint(source_file):
+    before = file_fingerprint(source_file)
+    with open(source_file, "ab") as source:
+        source.write(b"more")
+
+    assert file_fingerprint(source_file) != before
+
+
+def test_discard_forgets_the_upload(source_file, tmp_path):
+    store = MultipartStateStore(str(tmp_path / "multipart_uploads.json"))
+    fingerprint = file_fingerprint(source_file)
+    store.start(fingerprint, "photo-1", "upload-1", PART_SIZE, 4)
+
+    store.discard(fingerprint)
+
+    assert store.get(fingerprint) is None
+    assert MultipartStateStore(str(tmp_path / "multipart_uploads.json")).get(fingerprint) is None
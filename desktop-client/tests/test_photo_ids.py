@@ -0,0 +1,27 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from photo_ids import PHOTO_ID_ALPHABET, PHOTO_ID_LENGTH, new_photo_id, photo_id_timestamp_ms
+
+
+def test_new_photo_id_is_fixed_length_crockford_base32():
+    photo_id = new_photo_id(now_ms=1_700_000_000_000)
+
+    assert len(photo_id) == PHOTO_ID_LENGTH
+    assert all(char in PHOTO_ID_ALPHABET for char in photo_id)
+    assert photo_id_timestamp_ms(photo_id) == 1_700_000_000_000
+
+
+def test_new_photo_ids_sort_by_creation_time():
+    earlier = new_photo_id(now_ms=1_700_000_000_000)
+    later = new_photo_id(now_ms=1_700_000_000_001)
+
+    assert earlier < later
+
+
+def test_legacy_uuid_hex_ids_have_no_timestamp():
+    assert photo_id_timestamp_ms("0123456789abcdef0123456789abcdef") is None
@@ -0,0 +1,31 @@
+import os
+import sys
+from io import BytesIO
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from thumbnailing import downscale
+
+Image = pytest.importorskip("PIL.Image")
+
+
+def test_jpeg_thumbnail_comes_from_a_draft_decode():
+    source = BytesIO()
+    Image.new("RGB", (4000, 3000), "navy").save(source, format="JPEG")
+    source.seek(0)
+
+    with Image.open(source) as image:
+        thumbnail = downscale(image, 320)
+        assert image.decoderconfig[0] == 8
+
+    assert thumbnail.size == (320, 240)
+    assert thumbnail.mode == "RGB"
+
+
+def test_non_rgb_images_come_back_rgb():
+    assert downscale(Image.new("P", (800, 600)), 320).mode == "RGB"
+    assert downscale(Image.new("LA", (64, 64)), 64).size == (64, 64)
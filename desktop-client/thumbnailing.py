@@ -0,0 +1,33 @@
+"""Shrink photos for thumbnails and previews without a full-resolution RGB copy.
+
+Same routine as backend/src/handlers/thumbnailing.py; change both together.
+JPEGs are decoded straight to 1/2, 1/4 or 1/8 scale with draft(), other
+formats are reduce()d by thumbnail(), and the mode is converted last.
+"""
+
+# Modes Pillow resamples with the requested filter; palette and bilevel images fall back to NEAREST
+RESAMPLE_MODES = ("RGB", "RGBA", "L", "LA", "CMYK")
+
+
+def _draft_size(image, max_size):
+    """Aspect-preserving size whose long edge is max_size, or None when the image already fits."""
+    width, height = image.size
+    scale = max_size / max(width, height)
+    if scale >= 1:
+        return None
+    return max(1, int(width * scale)), max(1, int(height * scale))
+
+
+def downscale(image, max_size):
+    """RGB image whose long edge is at most max_size; image may be modified in place.
+
+    Call it on a freshly opened image for the DCT scaling to apply: once
+    pixels are loaded, draft() is a no-op.
+    """
+    if image.mode not in RESAMPLE_MODES:
+        image = image.convert("RGB")
+    draft_size = _draft_size(image, max_size)
+    if draft_size:
+        image.draft(None, draft_size)
+    image.thumbnail((max_size, max_size))
+    return image if image.mode == "RGB" else image.convert("RGB")
@@ -27,6 +27,14 @@ resource "aws_apigatewayv2_integration" "upload" {
   payload_format_version = "2.0"
 }
 
+resource "aws_apigatewayv2_integration" "upload_batch" {
+  api_id                 = aws_apigatewayv2_api.http_api.id
+  integration_type       = "AWS_PROXY"
+  integration_method     = "POST"
+  integration_uri        = aws_lambda_function.upload_batch.invoke_arn
+  payload_format_version = "2.0"
+}
+
 resource "aws_apigatewayv2_integration" "download" {
   api_id                 = aws_apigatewayv2_api.http_api.id
   integration_type       = "AWS_PROXY"
@@ -35,6 +43,14 @@ resource "aws_apigatewayv2_integration" "download" {
   payload_format_version = "2.0"
 }
 
+resource "aws_apigatewayv2_integration" "upload_parts" {
+  api_id                 = aws_apigatewayv2_api.http_api.id
+  integration_type       = "AWS_PROXY"
+  integration_method     = "POST"
+  integration_uri        = aws_lambda_function.upload_parts.invoke_arn
+  payload_format_version = "2.0"
+}
+
 resource "aws_apigatewayv2_integration" "list" {
   api_id                 = aws_apigatewayv2_api.http_api.id
   integration_type       = "AWS_PROXY"
@@ -51,6 +67,14 @@ resource "aws_apigatewayv2_integration" "upload_complete" {
   payload_format_version = "2.0"
 }
 
+resource "aws_apigatewayv2_integration" "upload_complete_batch" {
+  api_id                 = aws_apigatewayv2_api.http_api.id
+  integration_type       = "AWS_PROXY"
+  integration_method     = "POST"
+  integration_uri        = aws_lambda_function.upload_complete_batch.invoke_arn
+  payload_format_version = "2.0"
+}
+
 resource "aws_apigatewayv2_integration" "patch_photo" {
   api_id                 = aws_apigatewayv2_api.http_api.id
   integration_type       = "AWS_PROXY"
@@ -67,6 +91,22 @@ resource "aws_apigatewayv2_integration" "delete" {
   payload_format_version = "2.0"
 }
 
+resource "aws_apigatewayv2_integration" "bulk_delete" {
+  api_id                 = aws_apigatewayv2_api.http_api.id
+  integration_type       = "AWS_PROXY"
+  integration_method     = "POST"
+  integration_uri        = aws_lambda_function.bulk_delete.invoke_arn
+  payload_format_version = "2.0"
+}
+
+resource "aws_apigatewayv2_integration" "bulk_restore" {
+  api_id                 = aws_apigatewayv2_api.http_api.id
+  integration_type       = "AWS_PROXY"
+  integration_method     = "POST"
+  integration_uri        = aws_lambda_function.bulk_restore.invoke_arn
+  payload_format_version = "2.0"
+}
+
 resource "aws_apigatewayv2_integration" "trash" {
   api_id                 = aws_apigatewayv2_api.http_api.id
   integration_type       = "AWS_PROXY"
@@ -75,6 +115,14 @@ resource "aws_apigatewayv2_integration" "trash" {
   payload_format_version = "2.0"
 }
 
+resource "aws_apigatewayv2_integration" "changes" {
+  api_id                 = aws_apigatewayv2_api.http_api.id
+  integration_type       = "AWS_PROXY"
+  integration_method     = "POST"
+  integration_uri        = aws_lambda_function.changes.invoke_arn
+  payload_format_version = "2.0"
+}
+
 resource "aws_apigatewayv2_integration" "hard_delete" {
   api_id                 = aws_apigatewayv2_api.http_api.id
   integration_type       = "AWS_PROXY"
@@ -83,6 +131,14 @@ resource "aws_apigatewayv2_integration" "hard_delete" {
   payload_format_version = "2.0"
 }
 
+resource "aws_apigatewayv2_integration" "bulk_hard_delete" {
+  api_id                 = aws_apigatewayv2_api.http_api.id
+  integration_type       = "AWS_PROXY"
+  integration_method     = "POST"
+  integration_uri        = aws_lambda_function.bulk_hard_delete.invoke_arn
+  payload_format_version = "2.0"
+}
+
 resource "aws_apigatewayv2_integration" "search" {
   api_id                 = aws_apigatewayv2_api.http_api.id
   integration_type       = "AWS_PROXY"
@@ -99,6 +155,14 @@ resource "aws_apigatewayv2_integration" "get_photo" {
   payload_format_version = "2.0"
 }
 
+resource "aws_apigatewayv2_integration" "batch_get" {
+  api_id                 = aws_apigatewayv2_api.http_api.id
+  integration_type       = "AWS_PROXY"
+  integration_method     = "POST"
+  integration_uri        = aws_lambda_function.batch_get.invoke_arn
+  payload_format_version = "2.0"
+}
+
 resource "aws_apigatewayv2_integration" "albums_create" {
   api_id                 = aws_apigatewayv2_api.http_api.id
   integration_type       = "AWS_PROXY"
@@ -131,6 +195,14 @@ resource "aws_apigatewayv2_integration" "albums_apply_labels" {
   payload_format_version = "2.0"
 }
 
+resource "aws_apigatewayv2_integration" "albums_bulk_apply_labels" {
+  api_id                 = aws_apigatewayv2_api.http_api.id
+  integration_type       = "AWS_PROXY"
+  integration_method     = "POST"
+  integration_uri        = aws_lambda_function.albums_bulk_apply_labels.invoke_arn
+  payload_format_version = "2.0"
+}
+
 resource "aws_apigatewayv2_integration" "albums_remove_labels" {
   api_id                 = aws_apigatewayv2_api.http_api.id
   integration_type       = "AWS_PROXY"
@@ -139,6 +211,14 @@ resource "aws_apigatewayv2_integration" "albums_remove_labels" {
   payload_format_version = "2.0"
 }
 
+resource "aws_apigatewayv2_integration" "albums_bulk_remove_labels" {
+  api_id                 = aws_apigatewayv2_api.http_api.id
+  integration_type       = "AWS_PROXY"
+  integration_method     = "POST"
+  integration_uri        = aws_lambda_function.albums_bulk_remove_labels.invoke_arn
+  payload_format_version = "2.0"
+}
+
 resource "aws_apigatewayv2_route" "upload" {
   api_id             = aws_apigatewayv2_api.http_api.id
   route_key          = "POST /photos/upload-url"
@@ -147,6 +227,14 @@ resource "aws_apigatewayv2_route" "upload" {
   authorizer_id      = var.enable_jwt_auth ? aws_apigatewayv2_authorizer.jwt[0].id : null
 }
 
+resource "aws_apigatewayv2_route" "upload_batch" {
+  api_id             = aws_apigatewayv2_api.http_api.id
+  route_key          = "POST /photos/upload-url/batch"
+  target             = "integrations/${aws_apigatewayv2_integration.upload_batch.id}"
+  authorization_type = var.enable_jwt_auth ? "JWT" : "NONE"
+  authorizer_id      = var.enable_jwt_auth ? aws_apigatewayv2_authorizer.jwt[0].id : null
+}
+
 resource "aws_apigatewayv2_route" "download" {
   api_id             = aws_apigatewayv2_api.http_api.id
   route_key          = "GET /photos/{photoId}/download-url"
@@ -155,6 +243,14 @@ resource "aws_apigatewayv2_route" "download" {
   authorizer_id      = var.enable_jwt_auth ? aws_apigatewayv2_authorizer.jwt[0].id : null
 }
 
+resource "aws_apigatewayv2_route" "upload_parts" {
+  api_id             = aws_apigatewayv2_api.http_api.id
+  route_key          = "POST /photos/{photoId}/upload-parts"
+  target             = "integrations/${aws_apigatewayv2_integration.upload_parts.id}"
+  authorization_type = var.enable_jwt_auth ? "JWT" : "NONE"
+  authorizer_id      = var.enable_jwt_auth ? aws_apigatewayv2_authorizer.jwt[0].id : null
+}
+
 resource "aws_apigatewayv2_route" "list" {
   api_id             = aws_apigatewayv2_api.http_api.id
   route_key          = "GET /photos"
@@ -171,6 +267,14 @@ resource "aws_apigatewayv2_route" "upload_complete" {
   authorizer_id      = var.enable_jwt_auth ? aws_apigatewayv2_authorizer.jwt[0].id : null
 }
 
+resource "aws_apigatewayv2_route" "upload_complete_batch" {
+  api_id             = aws_apigatewayv2_api.http_api.id
+  route_key          = "POST /photos/upload-complete/batch"
+  target             = "integrations/${aws_apigatewayv2_integration.upload_complete_batch.id}"
+  authorization_type = var.enable_jwt_auth ? "JWT" : "NONE"
+  authorizer_id      = var.enable_jwt_auth ? aws_apigatewayv2_authorizer.jwt[0].id : null
+}
+
 resource "aws_apigatewayv2_route" "patch_photo" {
   api_id             = aws_apigatewayv2_api.http_api.id
   route_key          = "PATCH /photos/{photoId}"
@@ -187,6 +291,14 @@ resource "aws_apigatewayv2_route" "get_photo" {
   authorizer_id      = var.enable_jwt_auth ? aws_apigatewayv2_authorizer.jwt[0].id : null
 }
 
+resource "aws_apigatewayv2_route" "batch_get" {
+  api_id             = aws_apigatewayv2_api.http_api.id
+  route_key          = "POST /photos/batch-get"
+  target             = "integrations/${aws_apigatewayv2_integration.batch_get.id}"
+  authorization_type = var.enable_jwt_auth ? "JWT" : "NONE"
+  authorizer_id      = var.enable_jwt_auth ? aws_apigatewayv2_authorizer.jwt[0].id : null
+}
+
 resource "aws_apigatewayv2_route" "delete" {
   api_id             = aws_apigatewayv2_api.http_api.id
   route_key          = "DELETE /photos/{photoId}"
@@ -195,6 +307,22 @@ resource "aws_apigatewayv2_route" "delete" {
   authorizer_id      = var.enable_jwt_auth ? aws_apigatewayv2_authorizer.jwt[0].id : null
 }
 
+resource "aws_apigatewayv2_route" "bulk_delete" {
+  api_id             = aws_apigatewayv2_api.http_api.id
+  route_key          = "POST /photos/bulk-delete"
+  target             = "integrations/${aws_apigatewayv2_integration.bulk_delete.id}"
+  authorization_type = var.enable_jwt_auth ? "JWT" : "NONE"
+  authorizer_id      = var.enable_jwt_auth ? aws_apigatewayv2_authorizer.jwt[0].id : null
+}
+
+resource "aws_apigatewayv2_route" "bulk_restore" {
+  api_id             = aws_apigatewayv2_api.http_api.id
+  route_key          = "POST /photos/bulk-restore"
+  target             = "integrations/${aws_apigatewayv2_integration.bulk_restore.id}"
+  authorization_type = var.enable_jwt_auth ? "JWT" : "NONE"
+  authorizer_id      = var.enable_jwt_auth ? aws_apigatewayv2_authorizer.jwt[0].id : null
+}
+
 resource "aws_apigatewayv2_route" "trash" {
   api_id             = aws_apigatewayv2_api.http_api.id
   route_key          = "GET /photos/trash"
@@ -203,6 +331,14 @@ resource "aws_apigatewayv2_route" "trash" {
   authorizer_id      = var.enable_jwt_auth ? aws_apigatewayv2_authorizer.jwt[0].id : null
 }
 
+resource "aws_apigatewayv2_route" "changes" {
+  api_id             = aws_apigatewayv2_api.http_api.id
+  route_key          = "GET /photos/changes"
+  target             = "integrations/${aws_apigatewayv2_integration.changes.id}"
+  authorization_type = var.enable_jwt_auth ? "JWT" : "NONE"
+  authorizer_id      = var.enable_jwt_auth ? aws_apigatewayv2_authorizer.jwt[0].id : null
+}
+
 resource "aws_apigatewayv2_route" "hard_delete" {
   api_id             = aws_apigatewayv2_api.http_api.id
   route_key          = "DELETE /photos/{photoId}/hard"
@@ -211,6 +347,14 @@ resource "aws_apigatewayv2_route" "hard_delete" {
   authorizer_id      = var.enable_jwt_auth ? aws_apigatewayv2_authorizer.jwt[0].id : null
 }
 
+resource "aws_apigatewayv2_route" "bulk_hard_delete" {
+  api_id             = aws_apigatewayv2_api.http_api.id
+  route_key          = "POST /photos/bulk-hard-delete"
+  target             = "integrations/${aws_apigatewayv2_integration.bulk_hard_delete.id}"
+  authorization_type = var.enable_jwt_auth ? "JWT" : "NONE"
+  authorizer_id      = var.enable_jwt_auth ? aws_apigatewayv2_authorizer.jwt[0].id : null
+}
+
 resource "aws_apigatewayv2_route" "search" {
   api_id             = aws_apigatewayv2_api.http_api.id
   route_key          = "GET /photos/search"
@@ -251,6 +395,14 @@ resource "aws_apigatewayv2_route" "albums_apply_labels" {
   authorizer_id      = var.enable_jwt_auth ? aws_apigatewayv2_authorizer.jwt[0].id : null
 }
 
+resource "aws_apigatewayv2_route" "albums_bulk_apply_labels" {
+  api_id             = aws_apigatewayv2_api.http_api.id
+  route_key          = "POST /albums/{albumId}/bulk-apply-labels"
+  target             = "integrations/${aws_apigatewayv2_integration.albums_bulk_apply_labels.id}"
+  authorization_type = var.enable_jwt_auth ? "JWT" : "NONE"
+  authorizer_id      = var.enable_jwt_auth ? aws_apigatewayv2_authorizer.jwt[0].id : null
+}
+
 resource "aws_apigatewayv2_route" "albums_remove_labels" {
   api_id             = aws_apigatewayv2_api.http_api.id
   route_key          = "POST /albums/{albumId}/photos/{photoId}/remove-labels"
@@ -259,6 +411,14 @@ resource "aws_apigatewayv2_route" "albums_remove_labels" {
   authorizer_id      = var.enable_jwt_auth ? aws_apigatewayv2_authorizer.jwt[0].id : null
 }
 
+resource "aws_apigatewayv2_route" "albums_bulk_remove_labels" {
+  api_id             = aws_apigatewayv2_api.http_api.id
+  route_key          = "POST /albums/{albumId}/bulk-remove-labels"
+  target             = "integrations/${aws_apigatewayv2_integration.albums_bulk_remove_labels.id}"
+  authorization_type = var.enable_jwt_auth ? "JWT" : "NONE"
+  authorizer_id      = var.enable_jwt_auth ? aws_apigatewayv2_authorizer.jwt[0].id : null
+}
+
 resource "aws_cloudwatch_log_group" "api_access" {
   name              = "/aws/apigateway/${var.project_name}-http-api-${var.environment}"
   retention_in_days = 365
@@ -299,6 +459,14 @@ resource "aws_lambda_permission" "allow_apigw_upload" {
   source_arn    = "${aws_apigatewayv2_api.http_api.execution_arn}/*/*"
 }
 
+resource "aws_lambda_permission" "allow_apigw_upload_batch" {
+  statement_id  = "AllowAPIGatewayInvokeUploadBatch"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.upload_batch.function_name
+  principal     = "apigateway.amazonaws.com"
+  source_arn    = "${aws_apigatewayv2_api.http_api.execution_arn}/*/*"
+}
+
 resource "aws_lambda_permission" "allow_apigw_download" {
   statement_id  = "AllowAPIGatewayInvokeDownload"
   action        = "lambda:InvokeFunction"
@@ -307,6 +475,14 @@ resource "aws_lambda_permission" "allow_apigw_download" {
   source_arn    = "${aws_apigatewayv2_api.http_api.execution_arn}/*/*"
 }
 
+resource "aws_lambda_permission" "allow_apigw_upload_parts" {
+  statement_id  = "AllowAPIGatewayInvokeUploadParts"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.upload_parts.function_name
+  principal     = "apigateway.amazonaws.com"
+  source_arn    = "${aws_apigatewayv2_api.http_api.execution_arn}/*/*"
+}
+
 resource "aws_lambda_permission" "allow_apigw_list" {
   statement_id  = "AllowAPIGatewayInvokeList"
   action        = "lambda:InvokeFunction"
@@ -323,6 +499,14 @@ resource "aws_lambda_permission" "allow_apigw_upload_complete" {
   source_arn    = "${aws_apigatewayv2_api.http_api.execution_arn}/*/*"
 }
 
+resource "aws_lambda_permission" "allow_apigw_upload_complete_batch" {
+  statement_id  = "AllowAPIGatewayInvokeUploadCompleteBatch"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.upload_complete_batch.function_name
+  principal     = "apigateway.amazonaws.com"
+  source_arn    = "${aws_apigatewayv2_api.http_api.execution_arn}/*/*"
+}
+
 resource "aws_lambda_permission" "allow_apigw_patch_photo" {
   statement_id  = "AllowAPIGatewayInvokePatchPhoto"
   action        = "lambda:InvokeFunction"
@@ -339,6 +523,14 @@ resource "aws_lambda_permission" "allow_apigw_get_photo" {
   source_arn    = "${aws_apigatewayv2_api.http_api.execution_arn}/*/*"
 }
 
+resource "aws_lambda_permission" "allow_apigw_batch_get" {
+  statement_id  = "AllowAPIGatewayInvokeBatchGet"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.batch_get.function_name
+  principal     = "apigateway.amazonaws.com"
+  source_arn    = "${aws_apigatewayv2_api.http_api.execution_arn}/*/*"
+}
+
 resource "aws_lambda_permission" "allow_apigw_delete" {
   statement_id  = "AllowAPIGatewayInvokeDelete"
   action        = "lambda:InvokeFunction"
@@ -347,6 +539,22 @@ resource "aws_lambda_permission" "allow_apigw_delete" {
   source_arn    = "${aws_apigatewayv2_api.http_api.execution_arn}/*/*"
 }
 
+resource "aws_lambda_permission" "allow_apigw_bulk_delete" {
+  statement_id  = "AllowAPIGatewayInvokeBulkDelete"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.bulk_delete.function_name
+  principal     = "apigateway.amazonaws.com"
+  source_arn    = "${aws_apigatewayv2_api.http_api.execution_arn}/*/*"
+}
+
+resource "aws_lambda_permission" "allow_apigw_bulk_restore" {
+  statement_id  = "AllowAPIGatewayInvokeBulkRestore"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.bulk_restore.function_name
+  principal     = "apigateway.amazonaws.com"
+  source_arn    = "${aws_apigatewayv2_api.http_api.execution_arn}/*/*"
+}
+
 resource "aws_lambda_permission" "allow_apigw_trash" {
   statement_id  = "AllowAPIGatewayInvokeTrash"
   action        = "lambda:InvokeFunction"
@@ -355,6 +563,14 @@ resource "aws_lambda_permission" "allow_apigw_trash" {
   source_arn    = "${aws_apigatewayv2_api.http_api.execution_arn}/*/*"
 }
 
+resource "aws_lambda_permission" "allow_apigw_changes" {
+  statement_id  = "AllowAPIGatewayInvokeChanges"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.changes.function_name
+  principal     = "apigateway.amazonaws.com"
+  source_arn    = "${aws_apigatewayv2_api.http_api.execution_arn}/*/*"
+}
+
 resource "aws_lambda_permission" "allow_apigw_hard_delete" {
   statement_id  = "AllowAPIGatewayInvokeHardDelete"
   action        = "lambda:InvokeFunction"
@@ -363,6 +579,14 @@ resource "aws_lambda_permission" "allow_apigw_hard_delete" {
   source_arn    = "${aws_apigatewayv2_api.http_api.execution_arn}/*/*"
 }
 
+resource "aws_lambda_permission" "allow_apigw_bulk_hard_delete" {
+  statement_id  = "AllowAPIGatewayInvokeBulkHardDelete"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.bulk_hard_delete.function_name
+  principal     = "apigateway.amazonaws.com"
+  source_arn    = "${aws_apigatewayv2_api.http_api.execution_arn}/*/*"
+}
+
 resource "aws_lambda_permission" "allow_apigw_search" {
   statement_id  = "AllowAPIGatewayInvokeSearch"
   action        = "lambda:InvokeFunction"
@@ -403,6 +627,14 @@ resource "aws_lambda_permission" "allow_apigw_albums_apply_labels" {
   source_arn    = "${aws_apigatewayv2_api.http_api.execution_arn}/*/*"
 }
 
+resource "aws_lambda_permission" "allow_apigw_albums_bulk_apply_labels" {
+  statement_id  = "AllowAPIGatewayInvokeAlbumsBulkApplyLabels"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.albums_bulk_apply_labels.function_name
+  principal     = "apigateway.amazonaws.com"
+  source_arn    = "${aws_apigatewayv2_api.http_api.execution_arn}/*/*"
+}
+
 resource "aws_lambda_permission" "allow_apigw_albums_remove_labels" {
   statement_id  = "AllowAPIGatewayInvokeAlbumsRemoveLabels"
   action        = "lambda:InvokeFunction"
@@ -410,3 +642,11 @@ resource "aws_lambda_permission" "allow_apigw_albums_remove_labels" {
   principal     = "apigateway.amazonaws.com"
   source_arn    = "${aws_apigatewayv2_api.http_api.execution_arn}/*/*"
 }
+
+resource "aws_lambda_permission" "allow_apigw_albums_bulk_remove_labels" {
+  statement_id  = "AllowAPIGatewayInvokeAlbumsBulkRemoveLabels"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.albums_bulk_remove_labels.function_name
+  principal     = "apigateway.amazonaws.com"
+  source_arn    = "${aws_apigatewayv2_api.http_api.execution_arn}/*/*"
+}
@@ -40,6 +40,70 @@ resource "aws_dynamodb_table" "photos" {
     type = "S"
   }
 
+  attribute {
+    name = "ContentHash"
+    type = "S"
+  }
+
+  attribute {
+    name = "DeletedAt"
+    type = "S"
+  }
+
+  attribute {
+    name = "ActiveUserId"
+    type = "S"
+  }
+
+  attribute {
+    name = "CreatedAt"
+    type = "S"
+  }
+
+  attribute {
+    name = "UpdatedAt"
+    type = "S"
+  }
+
+  global_secondary_index {
+    name               = "ContentHashIndex"
+    hash_key           = "ContentHash"
+    projection_type    = "INCLUDE"
+    non_key_attributes = ["ObjectKey", "ThumbnailKey", "Renditions", "Status", "DeletedAt"]
+  }
+
+  # Sparse: only soft-deleted rows carry DeletedAt
+  global_secondary_index {
+    name            = "DeletedAtIndex"
+    hash_key        = "UserId"
+    range_key       = "DeletedAt"
+    projection_type = "ALL"
+  }
+
+  # Sparse: ActiveUserId is set by upload-complete and removed by soft delete
+  global_secondary_index {
+    name            = "ActiveIndex"
+    hash_key        = "ActiveUserId"
+    range_key       = "PhotoId"
+    projection_type = "ALL"
+  }
+
+  # Same sparse partition, ordered by upload time for newest-first listing
+  global_secondary_index {
+    name            = "ActiveCreatedAtIndex"
+    hash_key        = "ActiveUserId"
+    range_key       = "CreatedAt"
+    projection_type = "ALL"
+  }
+
+  # Every photo write stamps UpdatedAt; GET /photos/changes reads the user's rows in that order
+  global_secondary_index {
+    name            = "UpdatedAtIndex"
+    hash_key        = "UserId"
+    range_key       = "UpdatedAt"
+    projection_type = "ALL"
+  }
+
   point_in_time_recovery {
     enabled = true
   }
@@ -95,3 +159,55 @@ resource "aws_dynamodb_table" "albums" {
     kms_key_arn = aws_kms_key.dynamodb.arn
   }
 }
+
+resource "aws_dynamodb_table" "photo_index" {
+  name         = "${var.project_name}-photo-index-${var.environment}"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "IndexKey"
+  range_key    = "SortKey"
+
+  attribute {
+    name = "IndexKey"
+    type = "S"
+  }
+
+  attribute {
+    name = "SortKey"
+    type = "S"
+  }
+
+  # Hard-delete tombstones for the change feed expire on their own
+  ttl {
+    attribute_name = "ExpiresAt"
+    enabled        = true
+  }
+
+  point_in_time_recovery {
+    enabled = true
+  }
+
+  server_side_encryption {
+    enabled     = true
+    kms_key_arn = aws_kms_key.dynamodb.arn
+  }
+}
+
+resource "aws_dynamodb_table" "object_refs" {
+  name         = "${var.project_name}-object-refs-${var.environment}"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "ObjectKey"
+
+  attribute {
+    name = "ObjectKey"
+    type = "S"
+  }
+
+  point_in_time_recovery {
+    enabled = true
+  }
+
+  server_side_encryption {
+    enabled     = true
+    kms_key_arn = aws_kms_key.dynamodb.arn
+  }
+}
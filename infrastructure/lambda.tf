@@ -156,6 +156,26 @@ resource "aws_sqs_queue" "lambda_dlq" {
   kms_master_key_id         = aws_kms_key.lambda_dlq.arn
 }
 
+# Thumbnail and EXIF date-label work queued by upload-complete for the derive_photo worker
+resource "aws_sqs_queue" "derivations_dlq" {
+  name                      = "${var.project_name}-derivations-dlq-${var.environment}"
+  message_retention_seconds = 1209600
+  kms_master_key_id         = aws_kms_key.lambda_dlq.arn
+}
+
+resource "aws_sqs_queue" "derivations" {
+  name              = "${var.project_name}-derivations-${var.environment}"
+  kms_master_key_id = aws_kms_key.lambda_dlq.arn
+  # Six times the worker timeout, as Lambda recommends for SQS event sources
+  visibility_timeout_seconds = 720
+
+  # Matches MAX_RECEIVE_COUNT in derivation_queue.py
+  redrive_policy = jsonencode({
+    deadLetterTargetArn = aws_sqs_queue.derivations_dlq.arn
+    maxReceiveCount     = 5
+  })
+}
+
 resource "aws_iam_policy" "app_policy" {
   name = "${var.project_name}-lambda-policy-${var.environment}"
 
@@ -164,23 +184,55 @@ resource "aws_iam_policy" "app_policy" {
     Statement = [
       {
         Effect   = "Allow"
-        Action   = ["s3:GetObject", "s3:PutObject", "s3:HeadObject", "s3:DeleteObject"]
+        Action   = ["s3:GetObject", "s3:PutObject", "s3:HeadObject", "s3:DeleteObject", "s3:AbortMultipartUpload"]
         Resource = "${aws_s3_bucket.photos.arn}/*"
       },
       {
+        # Lets HeadObject on a missing key return 404 instead of 403 (the derive worker probes for client thumbnails)
         Effect   = "Allow"
-        Action   = ["dynamodb:PutItem", "dynamodb:GetItem", "dynamodb:Query", "dynamodb:UpdateItem", "dynamodb:DeleteItem"]
-        Resource = aws_dynamodb_table.photos.arn
+        Action   = ["s3:ListBucket"]
+        Resource = aws_s3_bucket.photos.arn
+      },
+      {
+        Effect   = "Allow"
+        Action   = ["dynamodb:PutItem", "dynamodb:GetItem", "dynamodb:Query", "dynamodb:UpdateItem", "dynamodb:DeleteItem", "dynamodb:BatchGetItem", "dynamodb:BatchWriteItem", "dynamodb:ConditionCheckItem"]
+        Resource = [aws_dynamodb_table.photos.arn, "${aws_dynamodb_table.photos.arn}/index/*"]
       },
       {
         Effect   = "Allow"
         Action   = ["dynamodb:PutItem", "dynamodb:GetItem", "dynamodb:Query", "dynamodb:UpdateItem", "dynamodb:DeleteItem"]
         Resource = aws_dynamodb_table.albums.arn
       },
+      {
+        Effect   = "Allow"
+        Action   = ["dynamodb:Query", "dynamodb:BatchWriteItem", "dynamodb:PutItem", "dynamodb:DeleteItem"]
+        Resource = aws_dynamodb_table.photo_index.arn
+      },
+      {
+        Effect   = "Allow"
+        Action   = ["dynamodb:GetItem", "dynamodb:UpdateItem", "dynamodb:DeleteItem"]
+        Resource = aws_dynamodb_table.object_refs.arn
+      },
+      {
+        Effect   = "Allow"
+        Action   = ["dynamodb:GetItem", "dynamodb:UpdateItem"]
+        Resource = aws_dynamodb_table.users.arn
+      },
       {
         Effect   = "Allow"
         Action   = ["sqs:SendMessage"]
         Resource = aws_sqs_queue.lambda_dlq.arn
+      },
+      {
+        Effect   = "Allow"
+        Action   = ["sqs:SendMessage", "sqs:ReceiveMessage", "sqs:DeleteMessage", "sqs:GetQueueAttributes"]
+        Resource = aws_sqs_queue.derivations.arn
+      },
+      {
+        # The derivations queue is encrypted with the DLQ key
+        Effect   = "Allow"
+        Action   = ["kms:GenerateDataKey", "kms:Decrypt"]
+        Resource = aws_kms_key.lambda_dlq.arn
       }
     ]
   })
@@ -216,8 +268,45 @@ resource "aws_lambda_function" "upload" {
 
   environment {
     variables = {
-      PHOTO_BUCKET = aws_s3_bucket.photos.bucket
-      PHOTOS_TABLE = aws_dynamodb_table.photos.name
+      PHOTO_BUCKET      = aws_s3_bucket.photos.bucket
+      PHOTOS_TABLE      = aws_dynamodb_table.photos.name
+      PHOTO_INDEX_TABLE = aws_dynamodb_table.photo_index.name
+      OBJECT_REFS_TABLE = aws_dynamodb_table.object_refs.name
+      USERS_TABLE       = aws_dynamodb_table.users.name
+    }
+  }
+}
+
+resource "aws_lambda_function" "upload_batch" {
+  #checkov:skip=CKV_AWS_50: Budget-approved exception; X-Ray tracing deferred to avoid always-on trace ingestion/storage cost for family workload. Compensating controls: CloudWatch alarms/logs and DLQ coverage. Owner=MillerPic Platform Team; ReviewBy=2026-03-16.
+  function_name                  = "${var.project_name}-upload-batch-${var.environment}"
+  role                           = aws_iam_role.lambda_exec.arn
+  runtime                        = local.lambda_runtime
+  handler                        = "upload_batch.handler"
+  s3_bucket                      = var.lambda_artifacts_bucket_name
+  s3_key                         = lookup(var.lambda_artifact_object_keys, "upload_batch", "signed/upload_batch.zip")
+  s3_object_version              = lookup(var.lambda_artifact_object_versions, "upload_batch", null)
+  reserved_concurrent_executions = var.lambda_reserved_concurrency_per_function
+
+  kms_key_arn             = aws_kms_key.lambda_env.arn
+  code_signing_config_arn = aws_lambda_code_signing_config.millerpic.arn
+
+  dead_letter_config {
+    target_arn = aws_sqs_queue.lambda_dlq.arn
+  }
+
+  vpc_config {
+    subnet_ids         = local.lambda_private_subnet_ids
+    security_group_ids = [aws_security_group.lambda_vpc.id]
+  }
+
+  environment {
+    variables = {
+      PHOTO_BUCKET      = aws_s3_bucket.photos.bucket
+      PHOTOS_TABLE      = aws_dynamodb_table.photos.name
+      PHOTO_INDEX_TABLE = aws_dynamodb_table.photo_index.name
+      OBJECT_REFS_TABLE = aws_dynamodb_table.object_refs.name
+      USERS_TABLE       = aws_dynamodb_table.users.name
     }
   }
 }
@@ -254,6 +343,37 @@ resource "aws_lambda_function" "download" {
   }
 }
 
+resource "aws_lambda_function" "upload_parts" {
+  #checkov:skip=CKV_AWS_50: Budget-approved exception; X-Ray tracing deferred to avoid always-on trace ingestion/storage cost for family workload. Compensating controls: CloudWatch alarms/logs and DLQ coverage. Owner=MillerPic Platform Team; ReviewBy=2026-03-16.
+  function_name                  = "${var.project_name}-upload-parts-${var.environment}"
+  role                           = aws_iam_role.lambda_exec.arn
+  runtime                        = local.lambda_runtime
+  handler                        = "upload_parts.handler"
+  s3_bucket                      = var.lambda_artifacts_bucket_name
+  s3_key                         = lookup(var.lambda_artifact_object_keys, "upload_parts", "signed/upload_parts.zip")
+  s3_object_version              = lookup(var.lambda_artifact_object_versions, "upload_parts", null)
+  reserved_concurrent_executions = var.lambda_reserved_concurrency_per_function
+
+  kms_key_arn             = aws_kms_key.lambda_env.arn
+  code_signing_config_arn = aws_lambda_code_signing_config.millerpic.arn
+
+  dead_letter_config {
+    target_arn = aws_sqs_queue.lambda_dlq.arn
+  }
+
+  vpc_config {
+    subnet_ids         = local.lambda_private_subnet_ids
+    security_group_ids = [aws_security_group.lambda_vpc.id]
+  }
+
+  environment {
+    variables = {
+      PHOTO_BUCKET = aws_s3_bucket.photos.bucket
+      PHOTOS_TABLE = aws_dynamodb_table.photos.name
+    }
+  }
+}
+
 resource "aws_lambda_function" "list" {
   #checkov:skip=CKV_AWS_50: Budget-approved exception; X-Ray tracing deferred to avoid always-on trace ingestion/storage cost for family workload. Compensating controls: CloudWatch alarms/logs and DLQ coverage. Owner=MillerPic Platform Team; ReviewBy=2026-03-16.
   function_name                  = "${var.project_name}-list-${var.environment}"
@@ -281,6 +401,7 @@ resource "aws_lambda_function" "list" {
     variables = {
       PHOTO_BUCKET = aws_s3_bucket.photos.bucket
       PHOTOS_TABLE = aws_dynamodb_table.photos.name
+      USERS_TABLE  = aws_dynamodb_table.users.name
     }
   }
 }
@@ -310,12 +431,96 @@ resource "aws_lambda_function" "upload_complete" {
 
   environment {
     variables = {
-      PHOTO_BUCKET = aws_s3_bucket.photos.bucket
-      PHOTOS_TABLE = aws_dynamodb_table.photos.name
+      PHOTO_BUCKET         = aws_s3_bucket.photos.bucket
+      PHOTOS_TABLE         = aws_dynamodb_table.photos.name
+      PHOTO_INDEX_TABLE    = aws_dynamodb_table.photo_index.name
+      USERS_TABLE          = aws_dynamodb_table.users.name
+      DERIVATION_QUEUE_URL = aws_sqs_queue.derivations.url
+    }
+  }
+}
+
+resource "aws_lambda_function" "upload_complete_batch" {
+  #checkov:skip=CKV_AWS_50: Budget-approved exception; X-Ray tracing deferred to avoid always-on trace ingestion/storage cost for family workload. Compensating controls: CloudWatch alarms/logs and DLQ coverage. Owner=MillerPic Platform Team; ReviewBy=2026-03-16.
+  function_name                  = "${var.project_name}-upload-complete-batch-${var.environment}"
+  role                           = aws_iam_role.lambda_exec.arn
+  runtime                        = local.lambda_runtime
+  handler                        = "upload_complete_batch.handler"
+  s3_bucket                      = var.lambda_artifacts_bucket_name
+  s3_key                         = lookup(var.lambda_artifact_object_keys, "upload_complete_batch", "signed/upload_complete_batch.zip")
+  s3_object_version              = lookup(var.lambda_artifact_object_versions, "upload_complete_batch", null)
+  reserved_concurrent_executions = var.lambda_reserved_concurrency_per_function
+  # Up to 100 HeadObject checks and row updates; stay inside the API Gateway 30s limit
+  timeout = 29
+
+  kms_key_arn             = aws_kms_key.lambda_env.arn
+  code_signing_config_arn = aws_lambda_code_signing_config.millerpic.arn
+
+  dead_letter_config {
+    target_arn = aws_sqs_queue.lambda_dlq.arn
+  }
+
+  vpc_config {
+    subnet_ids         = local.lambda_private_subnet_ids
+    security_group_ids = [aws_security_group.lambda_vpc.id]
+  }
+
+  environment {
+    variables = {
+      PHOTO_BUCKET         = aws_s3_bucket.photos.bucket
+      PHOTOS_TABLE         = aws_dynamodb_table.photos.name
+      PHOTO_INDEX_TABLE    = aws_dynamodb_table.photo_index.name
+      USERS_TABLE          = aws_dynamodb_table.users.name
+      DERIVATION_QUEUE_URL = aws_sqs_queue.derivations.url
+    }
+  }
+}
+
+resource "aws_lambda_function" "derive_photo" {
+  #checkov:skip=CKV_AWS_50: Budget-approved exception; X-Ray tracing deferred to avoid always-on trace ingestion/storage cost for family workload. Compensating controls: CloudWatch alarms/logs and DLQ coverage. Owner=MillerPic Platform Team; ReviewBy=2026-03-16.
+  function_name                  = "${var.project_name}-derive-photo-${var.environment}"
+  role                           = aws_iam_role.lambda_exec.arn
+  runtime                        = local.lambda_runtime
+  handler                        = "derive_photo.handler"
+  s3_bucket                      = var.lambda_artifacts_bucket_name
+  s3_key                         = lookup(var.lambda_artifact_object_keys, "derive_photo", "signed/derive_photo.zip")
+  s3_object_version              = lookup(var.lambda_artifact_object_versions, "derive_photo", null)
+  reserved_concurrent_executions = var.lambda_reserved_concurrency_per_function
+  # Decodes one original at a time; not behind API Gateway, so it can run past 30s
+  memory_size = 1024
+  timeout     = 120
+
+  kms_key_arn             = aws_kms_key.lambda_env.arn
+  code_signing_config_arn = aws_lambda_code_signing_config.millerpic.arn
+
+  dead_letter_config {
+    target_arn = aws_sqs_queue.lambda_dlq.arn
+  }
+
+  vpc_config {
+    subnet_ids         = local.lambda_private_subnet_ids
+    security_group_ids = [aws_security_group.lambda_vpc.id]
+  }
+
+  environment {
+    variables = {
+      PHOTO_BUCKET      = aws_s3_bucket.photos.bucket
+      PHOTOS_TABLE      = aws_dynamodb_table.photos.name
+      PHOTO_INDEX_TABLE = aws_dynamodb_table.photo_index.name
+      USERS_TABLE       = aws_dynamodb_table.users.name
     }
   }
 }
 
+resource "aws_lambda_event_source_mapping" "derive_photo" {
+  event_source_arn        = aws_sqs_queue.derivations.arn
+  function_name           = aws_lambda_function.derive_photo.arn
+  # One photo per invocation gets the whole timeout and memory, and a worker killed by either
+  # costs no other photo a receive on its way to the FAILED marking
+  batch_size              = 1
+  function_response_types = ["ReportBatchItemFailures"]
+}
+
 resource "aws_lambda_function" "delete" {
   #checkov:skip=CKV_AWS_50: Budget-approved exception; X-Ray tracing deferred to avoid always-on trace ingestion/storage cost for family workload. Compensating controls: CloudWatch alarms/logs and DLQ coverage. Owner=MillerPic Platform Team; ReviewBy=2026-03-16.
   function_name                  = "${var.project_name}-delete-${var.environment}"
@@ -343,6 +548,73 @@ resource "aws_lambda_function" "delete" {
     variables = {
       PHOTO_BUCKET = aws_s3_bucket.photos.bucket
       PHOTOS_TABLE = aws_dynamodb_table.photos.name
+      USERS_TABLE  = aws_dynamodb_table.users.name
+    }
+  }
+}
+
+resource "aws_lambda_function" "bulk_delete" {
+  #checkov:skip=CKV_AWS_50: Budget-approved exception; X-Ray tracing deferred to avoid always-on trace ingestion/storage cost for family workload. Compensating controls: CloudWatch alarms/logs and DLQ coverage. Owner=MillerPic Platform Team; ReviewBy=2026-03-16.
+  function_name                  = "${var.project_name}-bulk-delete-${var.environment}"
+  role                           = aws_iam_role.lambda_exec.arn
+  runtime                        = local.lambda_runtime
+  handler                        = "bulk_delete.handler"
+  s3_bucket                      = var.lambda_artifacts_bucket_name
+  s3_key                         = lookup(var.lambda_artifact_object_keys, "bulk_delete", "signed/bulk_delete.zip")
+  s3_object_version              = lookup(var.lambda_artifact_object_versions, "bulk_delete", null)
+  reserved_concurrent_executions = var.lambda_reserved_concurrency_per_function
+  # Up to 1,000 photos per call; stay inside the API Gateway 30s limit
+  timeout = 29
+
+  kms_key_arn             = aws_kms_key.lambda_env.arn
+  code_signing_config_arn = aws_lambda_code_signing_config.millerpic.arn
+
+  dead_letter_config {
+    target_arn = aws_sqs_queue.lambda_dlq.arn
+  }
+
+  vpc_config {
+    subnet_ids         = local.lambda_private_subnet_ids
+    security_group_ids = [aws_security_group.lambda_vpc.id]
+  }
+
+  environment {
+    variables = {
+      PHOTOS_TABLE = aws_dynamodb_table.photos.name
+      USERS_TABLE  = aws_dynamodb_table.users.name
+    }
+  }
+}
+
+resource "aws_lambda_function" "bulk_restore" {
+  #checkov:skip=CKV_AWS_50: Budget-approved exception; X-Ray tracing deferred to avoid always-on trace ingestion/storage cost for family workload. Compensating controls: CloudWatch alarms/logs and DLQ coverage. Owner=MillerPic Platform Team; ReviewBy=2026-03-16.
+  function_name                  = "${var.project_name}-bulk-restore-${var.environment}"
+  role                           = aws_iam_role.lambda_exec.arn
+  runtime                        = local.lambda_runtime
+  handler                        = "bulk_restore.handler"
+  s3_bucket                      = var.lambda_artifacts_bucket_name
+  s3_key                         = lookup(var.lambda_artifact_object_keys, "bulk_restore", "signed/bulk_restore.zip")
+  s3_object_version              = lookup(var.lambda_artifact_object_versions, "bulk_restore", null)
+  reserved_concurrent_executions = var.lambda_reserved_concurrency_per_function
+  # Up to 1,000 photos per call; stay inside the API Gateway 30s limit
+  timeout = 29
+
+  kms_key_arn             = aws_kms_key.lambda_env.arn
+  code_signing_config_arn = aws_lambda_code_signing_config.millerpic.arn
+
+  dead_letter_config {
+    target_arn = aws_sqs_queue.lambda_dlq.arn
+  }
+
+  vpc_config {
+    subnet_ids         = local.lambda_private_subnet_ids
+    security_group_ids = [aws_security_group.lambda_vpc.id]
+  }
+
+  environment {
+    variables = {
+      PHOTOS_TABLE = aws_dynamodb_table.photos.name
+      USERS_TABLE  = aws_dynamodb_table.users.name
     }
   }
 }
@@ -378,6 +650,38 @@ resource "aws_lambda_function" "trash" {
   }
 }
 
+resource "aws_lambda_function" "changes" {
+  #checkov:skip=CKV_AWS_50: Budget-approved exception; X-Ray tracing deferred to avoid always-on trace ingestion/storage cost for family workload. Compensating controls: CloudWatch alarms/logs and DLQ coverage. Owner=MillerPic Platform Team; ReviewBy=2026-03-16.
+  function_name                  = "${var.project_name}-changes-${var.environment}"
+  role                           = aws_iam_role.lambda_exec.arn
+  runtime                        = local.lambda_runtime
+  handler                        = "changes.handler"
+  s3_bucket                      = var.lambda_artifacts_bucket_name
+  s3_key                         = lookup(var.lambda_artifact_object_keys, "changes", "signed/changes.zip")
+  s3_object_version              = lookup(var.lambda_artifact_object_versions, "changes", null)
+  reserved_concurrent_executions = var.lambda_reserved_concurrency_per_function
+
+  kms_key_arn             = aws_kms_key.lambda_env.arn
+  code_signing_config_arn = aws_lambda_code_signing_config.millerpic.arn
+
+  dead_letter_config {
+    target_arn = aws_sqs_queue.lambda_dlq.arn
+  }
+
+  vpc_config {
+    subnet_ids         = local.lambda_private_subnet_ids
+    security_group_ids = [aws_security_group.lambda_vpc.id]
+  }
+
+  environment {
+    variables = {
+      PHOTOS_TABLE      = aws_dynamodb_table.photos.name
+      PHOTO_INDEX_TABLE = aws_dynamodb_table.photo_index.name
+      PHOTO_BUCKET      = aws_s3_bucket.photos.bucket
+    }
+  }
+}
+
 resource "aws_lambda_function" "hard_delete" {
   #checkov:skip=CKV_AWS_50: Budget-approved exception; X-Ray tracing deferred to avoid always-on trace ingestion/storage cost for family workload. Compensating controls: CloudWatch alarms/logs and DLQ coverage. Owner=MillerPic Platform Team; ReviewBy=2026-03-16.
   function_name                  = "${var.project_name}-hard-delete-${var.environment}"
@@ -403,8 +707,47 @@ resource "aws_lambda_function" "hard_delete" {
 
   environment {
     variables = {
-      PHOTO_BUCKET = aws_s3_bucket.photos.bucket
-      PHOTOS_TABLE = aws_dynamodb_table.photos.name
+      PHOTO_BUCKET      = aws_s3_bucket.photos.bucket
+      PHOTOS_TABLE      = aws_dynamodb_table.photos.name
+      PHOTO_INDEX_TABLE = aws_dynamodb_table.photo_index.name
+      OBJECT_REFS_TABLE = aws_dynamodb_table.object_refs.name
+      USERS_TABLE       = aws_dynamodb_table.users.name
+    }
+  }
+}
+
+resource "aws_lambda_function" "bulk_hard_delete" {
+  #checkov:skip=CKV_AWS_50: Budget-approved exception; X-Ray tracing deferred to avoid always-on trace ingestion/storage cost for family workload. Compensating controls: CloudWatch alarms/logs and DLQ coverage. Owner=MillerPic Platform Team; ReviewBy=2026-03-16.
+  function_name                  = "${var.project_name}-bulk-hard-delete-${var.environment}"
+  role                           = aws_iam_role.lambda_exec.arn
+  runtime                        = local.lambda_runtime
+  handler                        = "bulk_hard_delete.handler"
+  s3_bucket                      = var.lambda_artifacts_bucket_name
+  s3_key                         = lookup(var.lambda_artifact_object_keys, "bulk_hard_delete", "signed/bulk_hard_delete.zip")
+  s3_object_version              = lookup(var.lambda_artifact_object_versions, "bulk_hard_delete", null)
+  reserved_concurrent_executions = var.lambda_reserved_concurrency_per_function
+  # Up to 1,000 photos per call; stay inside the API Gateway 30s limit
+  timeout = 29
+
+  kms_key_arn             = aws_kms_key.lambda_env.arn
+  code_signing_config_arn = aws_lambda_code_signing_config.millerpic.arn
+
+  dead_letter_config {
+    target_arn = aws_sqs_queue.lambda_dlq.arn
+  }
+
+  vpc_config {
+    subnet_ids         = local.lambda_private_subnet_ids
+    security_group_ids = [aws_security_group.lambda_vpc.id]
+  }
+
+  environment {
+    variables = {
+      PHOTO_BUCKET      = aws_s3_bucket.photos.bucket
+      PHOTOS_TABLE      = aws_dynamodb_table.photos.name
+      PHOTO_INDEX_TABLE = aws_dynamodb_table.photo_index.name
+      OBJECT_REFS_TABLE = aws_dynamodb_table.object_refs.name
+      USERS_TABLE       = aws_dynamodb_table.users.name
     }
   }
 }
@@ -434,7 +777,9 @@ resource "aws_lambda_function" "patch_photo" {
 
   environment {
     variables = {
-      PHOTOS_TABLE = aws_dynamodb_table.photos.name
+      PHOTOS_TABLE      = aws_dynamodb_table.photos.name
+      PHOTO_INDEX_TABLE = aws_dynamodb_table.photo_index.name
+      USERS_TABLE       = aws_dynamodb_table.users.name
     }
   }
 }
@@ -464,7 +809,9 @@ resource "aws_lambda_function" "search" {
 
   environment {
     variables = {
-      PHOTOS_TABLE = aws_dynamodb_table.photos.name
+      PHOTOS_TABLE      = aws_dynamodb_table.photos.name
+      PHOTO_INDEX_TABLE = aws_dynamodb_table.photo_index.name
+      PHOTO_BUCKET      = aws_s3_bucket.photos.bucket
     }
   }
 }
@@ -499,6 +846,37 @@ resource "aws_lambda_function" "get_photo" {
   }
 }
 
+resource "aws_lambda_function" "batch_get" {
+  #checkov:skip=CKV_AWS_50: Budget-approved exception; X-Ray tracing deferred to avoid always-on trace ingestion/storage cost for family workload. Compensating controls: CloudWatch alarms/logs and DLQ coverage. Owner=MillerPic Platform Team; ReviewBy=2026-03-16.
+  function_name                  = "${var.project_name}-batch-get-${var.environment}"
+  role                           = aws_iam_role.lambda_exec.arn
+  runtime                        = local.lambda_runtime
+  handler                        = "batch_get.handler"
+  s3_bucket                      = var.lambda_artifacts_bucket_name
+  s3_key                         = lookup(var.lambda_artifact_object_keys, "batch_get", "signed/batch_get.zip")
+  s3_object_version              = lookup(var.lambda_artifact_object_versions, "batch_get", null)
+  reserved_concurrent_executions = var.lambda_reserved_concurrency_per_function
+
+  kms_key_arn             = aws_kms_key.lambda_env.arn
+  code_signing_config_arn = aws_lambda_code_signing_config.millerpic.arn
+
+  dead_letter_config {
+    target_arn = aws_sqs_queue.lambda_dlq.arn
+  }
+
+  vpc_config {
+    subnet_ids         = local.lambda_private_subnet_ids
+    security_group_ids = [aws_security_group.lambda_vpc.id]
+  }
+
+  environment {
+    variables = {
+      PHOTOS_TABLE = aws_dynamodb_table.photos.name
+      PHOTO_BUCKET = aws_s3_bucket.photos.bucket
+    }
+  }
+}
+
 resource "aws_lambda_function" "albums_create" {
   #checkov:skip=CKV_AWS_50: Budget-approved exception; X-Ray tracing deferred to avoid always-on trace ingestion/storage cost for family workload. Compensating controls: CloudWatch alarms/logs and DLQ coverage. Owner=MillerPic Platform Team; ReviewBy=2026-03-16.
   function_name                  = "${var.project_name}-albums-create-${var.environment}"
@@ -584,9 +962,10 @@ resource "aws_lambda_function" "albums_photos" {
 
   environment {
     variables = {
-      ALBUMS_TABLE = aws_dynamodb_table.albums.name
-      PHOTOS_TABLE = aws_dynamodb_table.photos.name
-      PHOTO_BUCKET = aws_s3_bucket.photos.bucket
+      ALBUMS_TABLE      = aws_dynamodb_table.albums.name
+      PHOTOS_TABLE      = aws_dynamodb_table.photos.name
+      PHOTO_BUCKET      = aws_s3_bucket.photos.bucket
+      PHOTO_INDEX_TABLE = aws_dynamodb_table.photo_index.name
     }
   }
 }
@@ -616,8 +995,45 @@ resource "aws_lambda_function" "albums_apply_labels" {
 
   environment {
     variables = {
-      ALBUMS_TABLE = aws_dynamodb_table.albums.name
-      PHOTOS_TABLE = aws_dynamodb_table.photos.name
+      ALBUMS_TABLE      = aws_dynamodb_table.albums.name
+      PHOTOS_TABLE      = aws_dynamodb_table.photos.name
+      PHOTO_INDEX_TABLE = aws_dynamodb_table.photo_index.name
+      USERS_TABLE       = aws_dynamodb_table.users.name
+    }
+  }
+}
+
+resource "aws_lambda_function" "albums_bulk_apply_labels" {
+  #checkov:skip=CKV_AWS_50: Budget-approved exception; X-Ray tracing deferred to avoid always-on trace ingestion/storage cost for family workload. Compensating controls: CloudWatch alarms/logs and DLQ coverage. Owner=MillerPic Platform Team; ReviewBy=2026-03-16.
+  function_name                  = "${var.project_name}-albums-bulk-apply-labels-${var.environment}"
+  role                           = aws_iam_role.lambda_exec.arn
+  runtime                        = local.lambda_runtime
+  handler                        = "albums_bulk_apply_labels.handler"
+  s3_bucket                      = var.lambda_artifacts_bucket_name
+  s3_key                         = lookup(var.lambda_artifact_object_keys, "albums_bulk_apply_labels", "signed/albums_bulk_apply_labels.zip")
+  s3_object_version              = lookup(var.lambda_artifact_object_versions, "albums_bulk_apply_labels", null)
+  reserved_concurrent_executions = var.lambda_reserved_concurrency_per_function
+  # Up to 1,000 photos per call; stay inside the API Gateway 30s limit
+  timeout = 29
+
+  kms_key_arn             = aws_kms_key.lambda_env.arn
+  code_signing_config_arn = aws_lambda_code_signing_config.millerpic.arn
+
+  dead_letter_config {
+    target_arn = aws_sqs_queue.lambda_dlq.arn
+  }
+
+  vpc_config {
+    subnet_ids         = local.lambda_private_subnet_ids
+    security_group_ids = [aws_security_group.lambda_vpc.id]
+  }
+
+  environment {
+    variables = {
+      ALBUMS_TABLE      = aws_dynamodb_table.albums.name
+      PHOTOS_TABLE      = aws_dynamodb_table.photos.name
+      PHOTO_INDEX_TABLE = aws_dynamodb_table.photo_index.name
+      USERS_TABLE       = aws_dynamodb_table.users.name
     }
   }
 }
@@ -647,8 +1063,45 @@ resource "aws_lambda_function" "albums_remove_labels" {
 
   environment {
     variables = {
-      ALBUMS_TABLE = aws_dynamodb_table.albums.name
-      PHOTOS_TABLE = aws_dynamodb_table.photos.name
+      ALBUMS_TABLE      = aws_dynamodb_table.albums.name
+      PHOTOS_TABLE      = aws_dynamodb_table.photos.name
+      PHOTO_INDEX_TABLE = aws_dynamodb_table.photo_index.name
+      USERS_TABLE       = aws_dynamodb_table.users.name
+    }
+  }
+}
+
+resource "aws_lambda_function" "albums_bulk_remove_labels" {
+  #checkov:skip=CKV_AWS_50: Budget-approved exception; X-Ray tracing deferred to avoid always-on trace ingestion/storage cost for family workload. Compensating controls: CloudWatch alarms/logs and DLQ coverage. Owner=MillerPic Platform Team; ReviewBy=2026-03-16.
+  function_name                  = "${var.project_name}-albums-bulk-remove-labels-${var.environment}"
+  role                           = aws_iam_role.lambda_exec.arn
+  runtime                        = local.lambda_runtime
+  handler                        = "albums_bulk_remove_labels.handler"
+  s3_bucket                      = var.lambda_artifacts_bucket_name
+  s3_key                         = lookup(var.lambda_artifact_object_keys, "albums_bulk_remove_labels", "signed/albums_bulk_remove_labels.zip")
+  s3_object_version              = lookup(var.lambda_artifact_object_versions, "albums_bulk_remove_labels", null)
+  reserved_concurrent_executions = var.lambda_reserved_concurrency_per_function
+  # Up to 1,000 photos per call; stay inside the API Gateway 30s limit
+  timeout = 29
+
+  kms_key_arn             = aws_kms_key.lambda_env.arn
+  code_signing_config_arn = aws_lambda_code_signing_config.millerpic.arn
+
+  dead_letter_config {
+    target_arn = aws_sqs_queue.lambda_dlq.arn
+  }
+
+  vpc_config {
+    subnet_ids         = local.lambda_private_subnet_ids
+    security_group_ids = [aws_security_group.lambda_vpc.id]
+  }
+
+  environment {
+    variables = {
+      ALBUMS_TABLE      = aws_dynamodb_table.albums.name
+      PHOTOS_TABLE      = aws_dynamodb_table.photos.name
+      PHOTO_INDEX_TABLE = aws_dynamodb_table.photo_index.name
+      USERS_TABLE       = aws_dynamodb_table.users.name
     }
   }
 }
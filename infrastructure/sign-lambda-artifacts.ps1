@@ -27,20 +27,46 @@ if (-not (Test-Path $handlersFullPath)) {
 
 $functions = @(
     "upload",
+    "upload_batch",
     "download",
+    "upload_parts",
     "list",
     "upload_complete",
+    "upload_complete_batch",
+    "derive_photo",
     "delete",
+    "bulk_delete",
+    "bulk_restore",
     "trash",
+    "changes",
     "hard_delete",
+    "bulk_hard_delete",
     "patch_photo",
     "search",
     "get_photo",
+    "batch_get",
     "albums_create",
     "albums_list",
     "albums_photos",
     "albums_apply_labels",
-    "albums_remove_labels"
+    "albums_bulk_apply_labels",
+    "albums_remove_labels",
+    "albums_bulk_remove_labels"
+)
+
+$sharedModules = @(
+    "bulk_common.py",
+    "derivation_queue.py",
+    "exif_reader.py",
+    "object_refs.py",
+    "photo_fields.py",
+    "photo_index.py",
+    "presign.py",
+    "renditions.py",
+    "runtime.py",
+    "thumbnailing.py",
+    "upload_common.py",
+    "versions.py"
 )
 
 $timestamp = Get-Date -Format "yyyyMMddHHmmss"
@@ -62,6 +88,14 @@ try {
 
         Copy-Item -Path $sourceFile -Destination (Join-Path $stagingDir "$fn.py") -Force
 
+        foreach ($sharedModuleName in $sharedModules) {
+            $sharedModule = Join-Path $handlersFullPath $sharedModuleName
+            if (-not (Test-Path $sharedModule)) {
+                throw "Missing shared handler module: $sharedModule"
+            }
+            Copy-Item -Path $sharedModule -Destination (Join-Path $stagingDir $sharedModuleName) -Force
+        }
+
         if ($fn -like "albums_*") {
             $sharedModule = Join-Path $handlersFullPath "albums_common.py"
             if (-not (Test-Path $sharedModule)) {
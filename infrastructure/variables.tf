@@ -49,21 +49,32 @@ variable "lambda_artifact_object_keys" {
   description = "Map of Lambda handler names to signed S3 object keys"
   type        = map(string)
   default = {
-    upload               = "signed/upload.zip"
-    download             = "signed/download.zip"
-    list                 = "signed/list.zip"
-    upload_complete      = "signed/upload_complete.zip"
-    delete               = "signed/delete.zip"
-    trash                = "signed/trash.zip"
-    hard_delete          = "signed/hard_delete.zip"
-    patch_photo          = "signed/patch_photo.zip"
-    search               = "signed/search.zip"
-    get_photo            = "signed/get_photo.zip"
-    albums_create        = "signed/albums_create.zip"
-    albums_list          = "signed/albums_list.zip"
-    albums_photos        = "signed/albums_photos.zip"
-    albums_apply_labels  = "signed/albums_apply_labels.zip"
-    albums_remove_labels = "signed/albums_remove_labels.zip"
+    upload                    = "signed/upload.zip"
+    upload_batch              = "signed/upload_batch.zip"
+    download                  = "signed/download.zip"
+    upload_parts              = "signed/upload_parts.zip"
+    list                      = "signed/list.zip"
+    upload_complete           = "signed/upload_complete.zip"
+    upload_complete_batch     = "signed/upload_complete_batch.zip"
+    derive_photo              = "signed/derive_photo.zip"
+    delete                    = "signed/delete.zip"
+    bulk_delete               = "signed/bulk_delete.zip"
+    bulk_restore              = "signed/bulk_restore.zip"
+    trash                     = "signed/trash.zip"
+    changes                   = "signed/changes.zip"
+    hard_delete               = "signed/hard_delete.zip"
+    bulk_hard_delete          = "signed/bulk_hard_delete.zip"
+    patch_photo               = "signed/patch_photo.zip"
+    search                    = "signed/search.zip"
+    get_photo                 = "signed/get_photo.zip"
+    batch_get                 = "signed/batch_get.zip"
+    albums_create             = "signed/albums_create.zip"
+    albums_list               = "signed/albums_list.zip"
+    albums_photos             = "signed/albums_photos.zip"
+    albums_apply_labels       = "signed/albums_apply_labels.zip"
+    albums_bulk_apply_labels  = "signed/albums_bulk_apply_labels.zip"
+    albums_remove_labels      = "signed/albums_remove_labels.zip"
+    albums_bulk_remove_labels = "signed/albums_bulk_remove_labels.zip"
   }
 }
 